@@ -0,0 +1,499 @@
+# Copyright 2023 The MediaPipe Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Measurement, reporting and baseline comparison of MediaPipe benchmarks."""
+
+import abc
+import collections
+import dataclasses
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+
+try:
+  import resource  # pylint: disable=g-import-not-at-top
+except ImportError:
+  # Not available on Windows, where the peak RSS isn't reported.
+  resource = None
+
+# The names of the running modes shared by the Tasks and Solutions benchmarks.
+IMAGE = 'IMAGE'
+VIDEO = 'VIDEO'
+LIVE_STREAM = 'LIVE_STREAM'
+RUNNING_MODES = (IMAGE, VIDEO, LIVE_STREAM)
+
+# The names of the benchmark inputs.
+TESTDATA = 'testdata'
+SYNTHETIC = 'synthetic'
+INPUTS = (TESTDATA, SYNTHETIC)
+
+# The names of the per-frame samples recorded by a benchmark case.
+LATENCY = 'latency'
+PACKET_CREATION = 'packet_creation'
+RESULT_CONVERSION = 'result_conversion'
+PYTHON_OVERHEAD = 'python_overhead'
+
+_PERCENTILES = (50, 90, 95, 99)
+_REPORT_VERSION = 1
+
+
+@dataclasses.dataclass
+class BenchmarkConfig:
+  """Options shared by all the benchmark cases.
+
+  Attributes:
+    testdata_dir: The directory that the `mediapipe/...` test data paths are
+      relative to.
+    synthetic_width: The width of the synthetic input images.
+    synthetic_height: The height of the synthetic input images.
+    num_iterations: The number of measured frames.
+    num_warmup_iterations: The number of frames processed after the cold start
+      and before the measured frames.
+  """
+
+  testdata_dir: str
+  synthetic_width: int = 640
+  synthetic_height: int = 480
+  num_iterations: int = 100
+  num_warmup_iterations: int = 10
+
+  def get_testdata_path(self, path: str) -> str:
+    """Returns the full path of a `mediapipe/...` test data file.
+
+    Args:
+      path: The path of the test data file relative to the workspace root.
+
+    Raises:
+      FileNotFoundError: The test data file doesn't exist. The benchmarks never
+        download missing files.
+    """
+    full_path = os.path.join(self.testdata_dir, path)
+    if not os.path.exists(full_path):
+      raise FileNotFoundError(
+          f'Missing test data file {path} in {self.testdata_dir}.')
+    return full_path
+
+  def create_synthetic_rgb_array(self, seed: int = 0) -> np.ndarray:
+    """Returns a random uint8 RGB image of the synthetic input size."""
+    return np.random.RandomState(seed).randint(
+        0, 256, (self.synthetic_height, self.synthetic_width, 3),
+        dtype=np.uint8)
+
+
+@dataclasses.dataclass
+class BenchmarkResult:
+  """The measurements of a benchmark case.
+
+  All the times are in milliseconds. The per-frame measurements are summarized
+  by `summarize`, and are None when they don't apply to the case.
+
+  Attributes:
+    benchmark: The name of the benchmarked task or solution.
+    running_mode: The running mode of the task or solution.
+    input_name: The name of the input, `testdata` or `synthetic`.
+    num_iterations: The number of measured frames.
+    num_results: The number of results received for the measured frames. Less
+      than `num_iterations` if frames were dropped in the live stream mode.
+    cold_start_ms: The time to create the task or solution and get the result
+      of its first frame.
+    throughput_fps: The number of results per second over the measured frames.
+    peak_rss_mb: The peak resident set size of the benchmark process.
+    latency_ms: The per-frame latency, from the call to the result.
+    packet_creation_ms: The per-frame time spent creating input packets.
+    result_conversion_ms: The per-frame time spent converting output packets
+      into Python results.
+    python_overhead_ms: The per-frame time spent in Python rather than in the
+      MediaPipe graph.
+  """
+
+  benchmark: str
+  running_mode: str
+  input_name: str
+  num_iterations: int
+  num_results: int
+  cold_start_ms: float
+  throughput_fps: float
+  peak_rss_mb: Optional[float]
+  latency_ms: Optional[Dict[str, float]]
+  packet_creation_ms: Optional[Dict[str, float]] = None
+  result_conversion_ms: Optional[Dict[str, float]] = None
+  python_overhead_ms: Optional[Dict[str, float]] = None
+
+  @property
+  def key(self) -> str:
+    """The key of the result in reports and baselines."""
+    return get_result_key(self.benchmark, self.running_mode, self.input_name)
+
+  def to_dict(self) -> Dict[str, Any]:
+    return dataclasses.asdict(self)
+
+
+def get_result_key(benchmark: str, running_mode: str, input_name: str) -> str:
+  return f'{benchmark}/{running_mode}/{input_name}'
+
+
+def summarize(samples_ms: Iterable[float]) -> Optional[Dict[str, float]]:
+  """Summarizes per-frame times in milliseconds.
+
+  Args:
+    samples_ms: The per-frame times in milliseconds.
+
+  Returns:
+    The mean, min, max and the p50, p90, p95 and p99 percentiles of the times,
+    or None if there are no samples.
+  """
+  samples = np.asarray(list(samples_ms), dtype=np.float64)
+  if not samples.size:
+    return None
+  summary = {
+      'mean': float(samples.mean()),
+      'min': float(samples.min()),
+      'max': float(samples.max()),
+  }
+  for percentile, value in zip(_PERCENTILES,
+                               np.percentile(samples, _PERCENTILES)):
+    summary[f'p{percentile}'] = float(value)
+  return summary
+
+
+def get_peak_rss_mb() -> Optional[float]:
+  """Returns the peak resident set size of this process in MiB, if known."""
+  if resource is None:
+    return None
+  max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  # ru_maxrss is in bytes on macOS and in KiB elsewhere.
+  if sys.platform == 'darwin':
+    return max_rss / (1 << 20)
+  return max_rss / (1 << 10)
+
+
+class MethodTimer(object):
+  """Accumulates the time spent in functions looked up on an object.
+
+  The functions are replaced by timed wrappers on the object itself, which can
+  be an instance or a module, and restored by `restore`. The accumulated times
+  are thread-safe, since the live stream results are produced on the graph
+  threads.
+  """
+
+  def __init__(self, obj: Any, method_names: Iterable[str]) -> None:
+    self._obj = obj
+    self._lock = threading.Lock()
+    self._elapsed = collections.defaultdict(float)
+    self._originals = {}
+    for name in method_names:
+      self._originals[name] = (name in vars(obj), getattr(obj, name))
+      setattr(obj, name, self._wrap(name, getattr(obj, name)))
+
+  def _wrap(self, name: str, method: Callable[..., Any]) -> Callable[..., Any]:
+
+    def timed_method(*args, **kwargs):
+      start = time.perf_counter()
+      try:
+        return method(*args, **kwargs)
+      finally:
+        elapsed = time.perf_counter() - start
+        with self._lock:
+          self._elapsed[name] += elapsed
+
+    return timed_method
+
+  def take_ms(self, name: str) -> float:
+    """Returns and resets the time accumulated by a function in milliseconds."""
+    with self._lock:
+      return self._elapsed.pop(name, 0.) * 1000
+
+  def restore(self) -> None:
+    """Restores the original functions of the object."""
+    for name, (own_attribute, method) in self._originals.items():
+      if own_attribute:
+        setattr(self._obj, name, method)
+      else:
+        delattr(self._obj, name)
+    self._originals = {}
+
+
+class BenchmarkCase(abc.ABC):
+  """A task or solution benchmarked in a running mode on an input.
+
+  Subclasses create the task or solution in `setup`, process a frame in
+  `process` and release it in `close`. The synchronous cases are timed by
+  `run_benchmark`, and record their other per-frame times in `samples`. The
+  asynchronous cases record the latencies of their results in `samples` too,
+  and notify them with `add_result`.
+  """
+
+  asynchronous = False
+
+  def __init__(self, config: BenchmarkConfig) -> None:
+    self.config = config
+    self.samples = collections.defaultdict(list)
+    self._num_results = 0
+    self._results_condition = threading.Condition()
+
+  @abc.abstractmethod
+  def setup(self) -> None:
+    """Creates the task or solution."""
+
+  @abc.abstractmethod
+  def process(self, index: int) -> None:
+    """Processes, or sends in the live stream mode, the frame `index`."""
+
+  @abc.abstractmethod
+  def close(self) -> None:
+    """Closes the task or solution, waiting for all the pending results."""
+
+  @property
+  def num_results(self) -> int:
+    with self._results_condition:
+      return self._num_results
+
+  def add_result(self) -> None:
+    """Notifies an asynchronous result."""
+    with self._results_condition:
+      self._num_results += 1
+      self._results_condition.notify_all()
+
+  def wait_for_results(self, num_results: int, timeout: float) -> bool:
+    """Waits until `num_results` asynchronous results were received."""
+    with self._results_condition:
+      return self._results_condition.wait_for(
+          lambda: self._num_results >= num_results, timeout)
+
+
+def run_benchmark(case: BenchmarkCase,
+                  benchmark: str,
+                  running_mode: str,
+                  input_name: str,
+                  first_result_timeout: float = 60.) -> BenchmarkResult:
+  """Runs a benchmark case.
+
+  Args:
+    case: The benchmark case to run.
+    benchmark: The name of the benchmarked task or solution.
+    running_mode: The running mode of the case.
+    input_name: The name of the input of the case.
+    first_result_timeout: The time in seconds to wait for the result of each
+      warmup frame of an asynchronous case.
+
+  Returns:
+    The measurements of the case.
+
+  Raises:
+    RuntimeError: The result of a warmup frame of an asynchronous case wasn't
+      received in time.
+  """
+  config = case.config
+  start = time.perf_counter()
+  case.setup()
+  closed = False
+  try:
+    for index in range(config.num_warmup_iterations + 1):
+      case.process(index)
+      # The asynchronous warmup frames are sent one at a time, so that none of
+      # them is dropped.
+      if case.asynchronous and not case.wait_for_results(
+          index + 1, first_result_timeout):
+        raise RuntimeError(
+            f'No result from {benchmark} in {running_mode} mode.')
+      if index == 0:
+        cold_start_ms = (time.perf_counter() - start) * 1000
+    num_warmup_results = case.num_results
+    case.samples.clear()
+
+    latencies_ms = []
+    start = time.perf_counter()
+    for index in range(config.num_warmup_iterations + 1,
+                       config.num_warmup_iterations + 1 +
+                       config.num_iterations):
+      frame_start = time.perf_counter()
+      case.process(index)
+      latencies_ms.append((time.perf_counter() - frame_start) * 1000)
+    if case.asynchronous:
+      # Waits for the results of the measured frames.
+      closed = True
+      case.close()
+    elapsed = time.perf_counter() - start
+  finally:
+    if not closed:
+      case.close()
+
+  if case.asynchronous:
+    # The send calls only measure the enqueuing, the cases record the time
+    # from the call to the result.
+    latencies_ms = case.samples[LATENCY]
+    num_results = case.num_results - num_warmup_results
+  else:
+    num_results = config.num_iterations
+  return BenchmarkResult(
+      benchmark=benchmark,
+      running_mode=running_mode,
+      input_name=input_name,
+      num_iterations=config.num_iterations,
+      num_results=num_results,
+      cold_start_ms=cold_start_ms,
+      throughput_fps=num_results / elapsed if elapsed > 0 else 0.,
+      peak_rss_mb=get_peak_rss_mb(),
+      latency_ms=summarize(latencies_ms),
+      packet_creation_ms=summarize(case.samples[PACKET_CREATION]),
+      result_conversion_ms=summarize(case.samples[RESULT_CONVERSION]),
+      python_overhead_ms=summarize(case.samples[PYTHON_OVERHEAD]))
+
+
+@dataclasses.dataclass
+class Regression:
+  """A metric of a benchmark case that regressed against the baseline.
+
+  Attributes:
+    key: The key of the benchmark case.
+    metric: The name of the metric.
+    baseline: The baseline value of the metric.
+    value: The current value of the metric.
+    change: The relative change of the metric, positive when it got worse.
+  """
+
+  key: str
+  metric: str
+  baseline: float
+  value: float
+  change: float
+
+
+# (result field, summary statistic or None, whether higher values are better)
+# of the metrics compared against the baseline.
+_COMPARED_METRICS = (
+    ('cold_start_ms', None, False),
+    ('latency_ms', 'p50', False),
+    ('latency_ms', 'p90', False),
+    ('throughput_fps', None, True),
+    ('peak_rss_mb', None, False),
+    ('python_overhead_ms', 'p50', False),
+)
+
+
+def _get_metric(result: Mapping[str, Any], field: str,
+                statistic: Optional[str]) -> Optional[float]:
+  value = result.get(field)
+  if statistic is not None and value is not None:
+    value = value.get(statistic)
+  return value
+
+
+def compare_to_baseline(results: Iterable[BenchmarkResult],
+                        baseline: Mapping[str, Mapping[str, Any]],
+                        threshold: float) -> List[Regression]:
+  """Finds the metrics that regressed against a baseline.
+
+  Args:
+    results: The results of the current run.
+    baseline: The results of the baseline run, as returned by `load_report`.
+      The cases missing from the baseline are not compared.
+    threshold: The relative change, e.g. 0.1 for 10%, above which a metric is
+      reported as a regression.
+
+  Returns:
+    The regressed metrics.
+  """
+  regressions = []
+  for result in results:
+    if result.key not in baseline:
+      continue
+    current = result.to_dict()
+    for field, statistic, higher_is_better in _COMPARED_METRICS:
+      metric = field if statistic is None else f'{field}.{statistic}'
+      baseline_value = _get_metric(baseline[result.key], field, statistic)
+      value = _get_metric(current, field, statistic)
+      if not baseline_value or value is None:
+        continue
+      change = (value - baseline_value) / baseline_value
+      if higher_is_better:
+        change = -change
+      if change > threshold:
+        regressions.append(
+            Regression(result.key, metric, baseline_value, value, change))
+  return regressions
+
+
+def _get_environment() -> Dict[str, Any]:
+  environment = {
+      'platform': platform.platform(),
+      'processor': platform.processor(),
+      'python_version': platform.python_version(),
+      'cpu_count': os.cpu_count(),
+  }
+  try:
+    import mediapipe  # pylint: disable=g-import-not-at-top
+    environment['mediapipe_version'] = getattr(mediapipe, '__version__', None)
+  except ImportError:
+    pass
+  return environment
+
+
+def write_report(
+    path: Optional[str],
+    results: Iterable[BenchmarkResult],
+    regressions: Iterable[Regression] = (),
+    errors: Optional[Mapping[str, str]] = None) -> Dict[str, Any]:
+  """Writes the results of a run as JSON.
+
+  Args:
+    path: The path of the JSON report, or None to write it to stdout.
+    results: The results of the run.
+    regressions: The regressions found against the baseline, if any.
+    errors: The errors of the failed benchmark cases by key, if any.
+
+  Returns:
+    The written report.
+  """
+  report = {
+      'version': _REPORT_VERSION,
+      'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+      'environment': _get_environment(),
+      'results': {result.key: result.to_dict() for result in results},
+      'regressions': [dataclasses.asdict(r) for r in regressions],
+      'errors': dict(errors or {}),
+  }
+  if path is None:
+    json.dump(report, sys.stdout, indent=2, sort_keys=True)
+    sys.stdout.write('\n')
+  else:
+    with open(path, 'w') as f:
+      json.dump(report, f, indent=2, sort_keys=True)
+  return report
+
+
+def load_report(path: str) -> Dict[str, Dict[str, Any]]:
+  """Loads the results of a report written by `write_report`.
+
+  Args:
+    path: The path of the JSON report.
+
+  Returns:
+    The results of the report by benchmark case key.
+
+  Raises:
+    ValueError: The report has an unsupported version.
+  """
+  with open(path) as f:
+    report = json.load(f)
+  if report.get('version') != _REPORT_VERSION:
+    raise ValueError(
+        f'Unsupported benchmark report version {report.get("version")} in '
+        f'{path}.')
+  return report['results']
@@ -0,0 +1,196 @@
+# Copyright 2023 The MediaPipe Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests for benchmark_utils."""
+
+import os
+import tempfile
+import threading
+
+from absl.testing import absltest
+
+from mediapipe.benchmarks import benchmark_utils
+
+
+class _Counter(object):
+
+  def __init__(self):
+    self.num_calls = 0
+
+  def increment(self):
+    self.num_calls += 1
+    return self.num_calls
+
+
+class _SyncCase(benchmark_utils.BenchmarkCase):
+
+  def __init__(self, config):
+    super().__init__(config)
+    self.processed = []
+    self.closed = False
+
+  def setup(self):
+    pass
+
+  def process(self, index):
+    self.processed.append(index)
+    self.samples[benchmark_utils.PYTHON_OVERHEAD].append(float(index))
+
+  def close(self):
+    self.closed = True
+
+
+class _AsyncCase(_SyncCase):
+  """Produces a result on another thread for every even frame."""
+
+  asynchronous = True
+
+  def __init__(self, config):
+    super().__init__(config)
+    self._threads = []
+
+  def process(self, index):
+    self.processed.append(index)
+    if index % 2 and index > self.config.num_warmup_iterations:
+      return
+
+    def deliver():
+      self.samples[benchmark_utils.LATENCY].append(1.)
+      self.add_result()
+
+    thread = threading.Thread(target=deliver)
+    thread.start()
+    self._threads.append(thread)
+
+  def close(self):
+    for thread in self._threads:
+      thread.join()
+    self.closed = True
+
+
+def _create_result(**kwargs):
+  fields = dict(
+      benchmark='object_detector',
+      running_mode=benchmark_utils.IMAGE,
+      input_name=benchmark_utils.TESTDATA,
+      num_iterations=10,
+      num_results=10,
+      cold_start_ms=100.,
+      throughput_fps=50.,
+      peak_rss_mb=200.,
+      latency_ms=benchmark_utils.summarize([10., 20.]))
+  fields.update(kwargs)
+  return benchmark_utils.BenchmarkResult(**fields)
+
+
+class BenchmarkUtilsTest(absltest.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.config = benchmark_utils.BenchmarkConfig(
+        testdata_dir=tempfile.mkdtemp(),
+        num_iterations=4,
+        num_warmup_iterations=2)
+
+  def test_summarize(self):
+    summary = benchmark_utils.summarize(float(i) for i in range(1, 101))
+    self.assertAlmostEqual(summary['mean'], 50.5)
+    self.assertEqual(summary['min'], 1.)
+    self.assertEqual(summary['max'], 100.)
+    self.assertAlmostEqual(summary['p50'], 50.5)
+    self.assertAlmostEqual(summary['p99'], 99.01)
+    self.assertIsNone(benchmark_utils.summarize([]))
+
+  def test_method_timer_wraps_and_restores(self):
+    counter = _Counter()
+    timer = benchmark_utils.MethodTimer(counter, ('increment',))
+    self.assertEqual(counter.increment(), 1)
+    self.assertEqual(counter.increment(), 2)
+    self.assertGreater(timer.take_ms('increment'), 0.)
+    self.assertEqual(timer.take_ms('increment'), 0.)
+    timer.restore()
+    self.assertNotIn('increment', vars(counter))
+    self.assertEqual(counter.increment(), 3)
+
+  def test_run_synchronous_benchmark(self):
+    case = _SyncCase(self.config)
+    result = benchmark_utils.run_benchmark(case, 'object_detector',
+                                           benchmark_utils.VIDEO,
+                                           benchmark_utils.SYNTHETIC)
+    self.assertEqual(case.processed, list(range(7)))
+    self.assertTrue(case.closed)
+    self.assertEqual(result.key, 'object_detector/VIDEO/synthetic')
+    self.assertEqual(result.num_iterations, 4)
+    self.assertEqual(result.num_results, 4)
+    self.assertGreater(result.throughput_fps, 0.)
+    # The warmup samples are discarded.
+    self.assertEqual(result.python_overhead_ms['min'], 3.)
+    self.assertEqual(result.python_overhead_ms['max'], 6.)
+    self.assertIsNone(result.packet_creation_ms)
+
+  def test_run_asynchronous_benchmark_counts_dropped_frames(self):
+    case = _AsyncCase(self.config)
+    result = benchmark_utils.run_benchmark(case, 'object_detector',
+                                           benchmark_utils.LIVE_STREAM,
+                                           benchmark_utils.TESTDATA)
+    self.assertTrue(case.closed)
+    self.assertEqual(result.num_iterations, 4)
+    # Frames 3 and 5 are dropped.
+    self.assertEqual(result.num_results, 2)
+    self.assertEqual(result.latency_ms['mean'], 1.)
+
+  def test_run_benchmark_closes_failed_case(self):
+    case = _SyncCase(self.config)
+
+    def process(index):
+      raise RuntimeError(f'Failed to process frame {index}.')
+
+    case.process = process
+    with self.assertRaisesRegex(RuntimeError, 'frame 0'):
+      benchmark_utils.run_benchmark(case, 'pose', benchmark_utils.IMAGE,
+                                    benchmark_utils.TESTDATA)
+    self.assertTrue(case.closed)
+
+  def test_compare_to_baseline(self):
+    baseline = {
+        'object_detector/IMAGE/testdata': _create_result().to_dict(),
+    }
+    results = [
+        _create_result(
+            cold_start_ms=105.,
+            throughput_fps=40.,
+            latency_ms=benchmark_utils.summarize([20., 40.])),
+        _create_result(benchmark='pose'),
+    ]
+    regressions = benchmark_utils.compare_to_baseline(results, baseline, 0.1)
+    self.assertEqual([r.metric for r in regressions],
+                     ['latency_ms.p50', 'latency_ms.p90', 'throughput_fps'])
+    self.assertAlmostEqual(regressions[0].change, 1.)
+    self.assertAlmostEqual(regressions[2].change, 0.2)
+
+  def test_report_round_trip(self):
+    path = os.path.join(self.config.testdata_dir, 'report.json')
+    result = _create_result()
+    report = benchmark_utils.write_report(
+        path, [result], errors={'pose/IMAGE/testdata': 'FileNotFoundError'})
+    self.assertIn('cpu_count', report['environment'])
+    self.assertEqual(benchmark_utils.load_report(path),
+                     {result.key: result.to_dict()})
+
+  def test_missing_testdata(self):
+    with self.assertRaisesRegex(FileNotFoundError, 'model.tflite'):
+      self.config.get_testdata_path('mediapipe/model.tflite')
+
+
+if __name__ == '__main__':
+  absltest.main()
@@ -0,0 +1,160 @@
+# Copyright 2023 The MediaPipe Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Runs the benchmarks of the MediaPipe Tasks and Solutions Python APIs.
+
+Every task and solution is run in each of its running modes on its test image
+and on a synthetic image. The results are written as JSON and compared against
+a baseline report, if any. The exit status is 1 if a benchmark failed or
+regressed.
+
+The benchmarks run offline: the models and images are read from the test data
+of the workspace, e.g. `mediapipe/tasks/testdata/vision`, which are resolved
+against --testdata_dir.
+
+Example usage:
+  python -m mediapipe.benchmarks.run_benchmarks \
+    --testdata_dir=/path/to/workspace \
+    --benchmarks=object_detector,pose \
+    --output=/tmp/benchmarks.json \
+    --baseline=/path/to/baseline.json
+"""
+
+import multiprocessing
+import os
+from typing import Sequence
+
+from absl import app
+from absl import flags
+from absl import logging
+
+from mediapipe.benchmarks import benchmark_utils
+from mediapipe.benchmarks import solution_benchmarks
+from mediapipe.benchmarks import vision_task_benchmarks
+
+_BENCHMARK_MODULES = (vision_task_benchmarks, solution_benchmarks)
+_MODULES_BY_BENCHMARK = {
+    benchmark: module for module in _BENCHMARK_MODULES
+    for benchmark in module.BENCHMARKS
+}
+
+_BENCHMARKS = flags.DEFINE_list(
+    'benchmarks', list(_MODULES_BY_BENCHMARK),
+    'The tasks and solutions to benchmark.')
+_RUNNING_MODES = flags.DEFINE_list(
+    'running_modes', list(benchmark_utils.RUNNING_MODES),
+    'The running modes to benchmark. The modes that a task or solution '
+    "doesn't support are skipped.")
+_INPUTS = flags.DEFINE_list('inputs', list(benchmark_utils.INPUTS),
+                            'The inputs to benchmark.')
+_NUM_ITERATIONS = flags.DEFINE_integer('num_iterations', 100,
+                                       'The number of measured frames.')
+_NUM_WARMUP_ITERATIONS = flags.DEFINE_integer(
+    'num_warmup_iterations', 10,
+    'The number of frames processed before the measured frames.')
+_SYNTHETIC_WIDTH = flags.DEFINE_integer(
+    'synthetic_width', 640, 'The width of the synthetic input images.')
+_SYNTHETIC_HEIGHT = flags.DEFINE_integer(
+    'synthetic_height', 480, 'The height of the synthetic input images.')
+_TESTDATA_DIR = flags.DEFINE_string(
+    'testdata_dir', None,
+    'The directory that the mediapipe/... test data paths are relative to. '
+    'Defaults to the directory of the mediapipe package.')
+_OUTPUT = flags.DEFINE_string(
+    'output', None, 'The path of the JSON report. Defaults to stdout.')
+_BASELINE = flags.DEFINE_string(
+    'baseline', None, 'The path of the JSON report to compare against.')
+_REGRESSION_THRESHOLD = flags.DEFINE_float(
+    'regression_threshold', 0.1,
+    'The relative change of a metric above which it is reported as a '
+    'regression.')
+_ISOLATE = flags.DEFINE_boolean(
+    'isolate', True,
+    'Whether to run every benchmark in a fresh process, so that the cold '
+    'start and the peak RSS are not affected by the other benchmarks.')
+
+
+def _get_default_testdata_dir() -> str:
+  # The directory containing the mediapipe package.
+  return os.path.dirname(
+      os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def run_case(
+    benchmark: str, running_mode: str, input_name: str,
+    config: benchmark_utils.BenchmarkConfig) -> benchmark_utils.BenchmarkResult:
+  """Runs a benchmark case in this process."""
+  case = _MODULES_BY_BENCHMARK[benchmark].create_case(benchmark, running_mode,
+                                                      input_name, config)
+  return benchmark_utils.run_benchmark(case, benchmark, running_mode,
+                                       input_name)
+
+
+def main(argv: Sequence[str]) -> int:
+  if len(argv) > 1:
+    raise app.UsageError('Too many command-line arguments.')
+  for values, choices, flag in (
+      (_BENCHMARKS.value, _MODULES_BY_BENCHMARK, _BENCHMARKS),
+      (_RUNNING_MODES.value, benchmark_utils.RUNNING_MODES, _RUNNING_MODES),
+      (_INPUTS.value, benchmark_utils.INPUTS, _INPUTS)):
+    unknown = set(values) - set(choices)
+    if unknown:
+      raise app.UsageError(
+          f'Unknown --{flag.name} {sorted(unknown)}, expected some of '
+          f'{list(choices)}.')
+  config = benchmark_utils.BenchmarkConfig(
+      testdata_dir=_TESTDATA_DIR.value or _get_default_testdata_dir(),
+      synthetic_width=_SYNTHETIC_WIDTH.value,
+      synthetic_height=_SYNTHETIC_HEIGHT.value,
+      num_iterations=_NUM_ITERATIONS.value,
+      num_warmup_iterations=_NUM_WARMUP_ITERATIONS.value)
+
+  results = []
+  errors = {}
+  for benchmark in _BENCHMARKS.value:
+    module = _MODULES_BY_BENCHMARK[benchmark]
+    for running_mode in _RUNNING_MODES.value:
+      if running_mode not in module.RUNNING_MODES:
+        logging.info('Skipping %s, which has no %s mode.', benchmark,
+                     running_mode)
+        continue
+      for input_name in _INPUTS.value:
+        key = benchmark_utils.get_result_key(benchmark, running_mode,
+                                             input_name)
+        logging.info('Running %s.', key)
+        args = (benchmark, running_mode, input_name, config)
+        try:
+          if _ISOLATE.value:
+            with multiprocessing.get_context('spawn').Pool(1) as pool:
+              results.append(pool.apply(run_case, args))
+          else:
+            results.append(run_case(*args))
+        except Exception as e:  # pylint: disable=broad-except
+          logging.exception('Benchmark %s failed.', key)
+          errors[key] = f'{type(e).__name__}: {e}'
+
+  regressions = []
+  if _BASELINE.value:
+    regressions = benchmark_utils.compare_to_baseline(
+        results, benchmark_utils.load_report(_BASELINE.value),
+        _REGRESSION_THRESHOLD.value)
+    for regression in regressions:
+      logging.warning('%s %s regressed by %.1f%%: %g -> %g.', regression.key,
+                      regression.metric, regression.change * 100,
+                      regression.baseline, regression.value)
+  benchmark_utils.write_report(_OUTPUT.value, results, regressions, errors)
+  return 1 if regressions or errors else 0
+
+
+if __name__ == '__main__':
+  app.run(main)
@@ -0,0 +1,134 @@
+# Copyright 2023 The MediaPipe Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Benchmark cases of the MediaPipe Solutions APIs."""
+
+import dataclasses
+import os
+import time
+from typing import Any, Dict, Mapping
+
+import numpy as np
+
+from mediapipe.benchmarks import benchmark_utils
+from mediapipe.python._framework_bindings import image as image_module
+from mediapipe.python.solutions import face_mesh
+from mediapipe.python.solutions import hands
+from mediapipe.python.solutions import holistic
+from mediapipe.python.solutions import pose
+
+_TEST_DATA_DIR = 'mediapipe/python/solutions/testdata'
+# The SolutionBase methods that create the input packets and convert the output
+# packets.
+_MAKE_PACKET_METHOD_NAME = '_make_packet'
+_GET_PACKET_CONTENT_METHOD_NAME = '_get_packet_content'
+
+# The solutions have no live stream mode, the video mode tracks the landmarks
+# across frames.
+RUNNING_MODES = (benchmark_utils.IMAGE, benchmark_utils.VIDEO)
+
+
+@dataclasses.dataclass(frozen=True)
+class _SolutionSpec:
+  """A benchmarked solution.
+
+  Attributes:
+    solution_class: The class of the solution.
+    kwargs: The arguments of the solution, other than `static_image_mode`. The
+      models that aren't bundled with the package are never selected, so the
+      solutions don't download anything.
+    image_file: The name of the solution test image in the test data.
+  """
+
+  solution_class: Any
+  kwargs: Mapping[str, Any]
+  image_file: str
+
+
+BENCHMARKS: Dict[str, _SolutionSpec] = {
+    'pose': _SolutionSpec(pose.Pose, {'model_complexity': 1}, 'pose.jpg'),
+    'hands': _SolutionSpec(hands.Hands, {}, 'hands.jpg'),
+    'face_mesh': _SolutionSpec(face_mesh.FaceMesh, {}, 'portrait.jpg'),
+    'holistic': _SolutionSpec(holistic.Holistic, {'model_complexity': 1},
+                              'holistic.jpg'),
+}
+
+
+class SolutionCase(benchmark_utils.BenchmarkCase):
+  """Benchmarks a solution in the image or video mode.
+
+  The Python overhead is the time spent creating the input packets and getting
+  the content of the output packets.
+  """
+
+  def __init__(self, config: benchmark_utils.BenchmarkConfig,
+               spec: _SolutionSpec, running_mode: str, input_name: str) -> None:
+    super().__init__(config)
+    if running_mode not in RUNNING_MODES:
+      raise ValueError(f'Unsupported solution running mode {running_mode}.')
+    self._spec = spec
+    self._running_mode = running_mode
+    self._input_name = input_name
+    self._solution = None
+    self._timer = None
+
+  def _create_image(self) -> np.ndarray:
+    if self._input_name == benchmark_utils.SYNTHETIC:
+      return self.config.create_synthetic_rgb_array()
+    image = image_module.Image.create_from_file(
+        self.config.get_testdata_path(
+            os.path.join(_TEST_DATA_DIR, self._spec.image_file)))
+    return np.copy(image.numpy_view())
+
+  def setup(self) -> None:
+    self._image = self._create_image()
+    self._solution = self._spec.solution_class(
+        static_image_mode=self._running_mode == benchmark_utils.IMAGE,
+        **self._spec.kwargs)
+    self._timer = benchmark_utils.MethodTimer(
+        self._solution,
+        (_MAKE_PACKET_METHOD_NAME, _GET_PACKET_CONTENT_METHOD_NAME))
+
+  def process(self, index: int) -> None:
+    del index  # The solutions simulate the video timestamps.
+    self._solution.process(self._image)
+    packet_creation_ms = self._timer.take_ms(_MAKE_PACKET_METHOD_NAME)
+    result_conversion_ms = self._timer.take_ms(_GET_PACKET_CONTENT_METHOD_NAME)
+    self.samples[benchmark_utils.PACKET_CREATION].append(packet_creation_ms)
+    self.samples[benchmark_utils.RESULT_CONVERSION].append(result_conversion_ms)
+    self.samples[benchmark_utils.PYTHON_OVERHEAD].append(packet_creation_ms +
+                                                         result_conversion_ms)
+
+  def close(self) -> None:
+    try:
+      if self._solution is not None:
+        self._solution.close()
+    finally:
+      if self._timer is not None:
+        self._timer.restore()
+
+
+def create_case(benchmark: str, running_mode: str, input_name: str,
+                config: benchmark_utils.BenchmarkConfig) -> SolutionCase:
+  """Creates the benchmark case of a solution.
+
+  Args:
+    benchmark: The name of the solution, a key of `BENCHMARKS`.
+    running_mode: The running mode, one of `RUNNING_MODES`.
+    input_name: The input, one of `benchmark_utils.INPUTS`.
+    config: The benchmark options.
+
+  Returns:
+    The benchmark case.
+  """
+  return SolutionCase(config, BENCHMARKS[benchmark], running_mode, input_name)
@@ -0,0 +1,195 @@
+# Copyright 2023 The MediaPipe Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Benchmark cases of the MediaPipe Tasks vision APIs."""
+
+import dataclasses
+import os
+import threading
+import time
+from typing import Any, Dict
+
+from mediapipe.benchmarks import benchmark_utils
+from mediapipe.python import packet_creator
+from mediapipe.python._framework_bindings import image as image_module
+from mediapipe.python._framework_bindings import image_frame
+from mediapipe.tasks.python.core import base_options as base_options_module
+from mediapipe.tasks.python.vision import gesture_recognizer
+from mediapipe.tasks.python.vision import image_classifier
+from mediapipe.tasks.python.vision import image_segmenter
+from mediapipe.tasks.python.vision import object_detector
+from mediapipe.tasks.python.vision.core import vision_task_running_mode
+
+_BaseOptions = base_options_module.BaseOptions
+_Image = image_module.Image
+_ImageFormat = image_frame.ImageFormat
+_RunningMode = vision_task_running_mode.VisionTaskRunningMode
+
+_TEST_DATA_DIR = 'mediapipe/tasks/testdata/vision'
+# The timestamp interval of the video and live stream frames, as in 30 fps.
+_FRAME_INTERVAL_MS = 33
+# The task methods that run the task graph.
+_GRAPH_METHOD_NAMES = ('_process_image_data', '_process_video_data')
+
+RUNNING_MODES = benchmark_utils.RUNNING_MODES
+
+
+@dataclasses.dataclass(frozen=True)
+class _TaskSpec:
+  """A benchmarked vision task.
+
+  Attributes:
+    task_class: The class of the task.
+    options_class: The class of the task options.
+    model_file: The name of the task model in the test data.
+    image_file: The name of the task test image in the test data.
+    method_name: The name of the task method in the image mode. The methods in
+      the video and live stream modes are suffixed with `_for_video` and
+      `_async`.
+  """
+
+  task_class: Any
+  options_class: Any
+  model_file: str
+  image_file: str
+  method_name: str
+
+
+BENCHMARKS: Dict[str, _TaskSpec] = {
+    'object_detector':
+        _TaskSpec(object_detector.ObjectDetector,
+                  object_detector.ObjectDetectorOptions,
+                  'coco_ssd_mobilenet_v1_1.0_quant_2018_06_29.tflite',
+                  'cats_and_dogs.jpg', 'detect'),
+    'image_classifier':
+        _TaskSpec(image_classifier.ImageClassifier,
+                  image_classifier.ImageClassifierOptions,
+                  'mobilenet_v2_1.0_224.tflite', 'burger.jpg', 'classify'),
+    'image_segmenter':
+        _TaskSpec(image_segmenter.ImageSegmenter,
+                  image_segmenter.ImageSegmenterOptions, 'deeplabv3.tflite',
+                  'segmentation_input_rotation0.jpg', 'segment'),
+    'gesture_recognizer':
+        _TaskSpec(gesture_recognizer.GestureRecognizer,
+                  gesture_recognizer.GestureRecognizerOptions,
+                  'gesture_recognizer.task', 'thumb_up.jpg', 'recognize'),
+}
+
+
+class VisionTaskCase(benchmark_utils.BenchmarkCase):
+  """Benchmarks a vision task in a running mode.
+
+  The graph time is the time spent in the task runner. The Python overhead is
+  the rest of the time of a task method call, split into the input packet
+  creation and the result conversion. In the live stream mode, the results are
+  converted on the graph threads before they reach the result callback, so
+  only the packet creation is measured on top of the latency.
+  """
+
+  def __init__(self, config: benchmark_utils.BenchmarkConfig, spec: _TaskSpec,
+               running_mode: str, input_name: str) -> None:
+    super().__init__(config)
+    self._spec = spec
+    self._running_mode = _RunningMode[running_mode]
+    self._input_name = input_name
+    self.asynchronous = self._running_mode == _RunningMode.LIVE_STREAM
+    self._task = None
+    self._packet_timer = None
+    self._graph_timer = None
+    self._send_times_lock = threading.Lock()
+    self._send_times = {}
+
+  def _create_image(self) -> _Image:
+    if self._input_name == benchmark_utils.SYNTHETIC:
+      return _Image(
+          image_format=_ImageFormat.SRGB,
+          data=self.config.create_synthetic_rgb_array())
+    return _Image.create_from_file(
+        self.config.get_testdata_path(
+            os.path.join(_TEST_DATA_DIR, self._spec.image_file)))
+
+  def _on_result(self, unused_result: Any, unused_image: _Image,
+                 timestamp_ms: int) -> None:
+    now = time.perf_counter()
+    with self._send_times_lock:
+      send_time = self._send_times.pop(timestamp_ms)
+    self.samples[benchmark_utils.LATENCY].append((now - send_time) * 1000)
+    self.add_result()
+
+  def setup(self) -> None:
+    self._image = self._create_image()
+    base_options = _BaseOptions(
+        model_asset_path=self.config.get_testdata_path(
+            os.path.join(_TEST_DATA_DIR, self._spec.model_file)))
+    options = self._spec.options_class(
+        base_options=base_options,
+        running_mode=self._running_mode,
+        result_callback=self._on_result if self.asynchronous else None)
+    self._packet_timer = benchmark_utils.MethodTimer(packet_creator,
+                                                     ('create_image',))
+    self._task = self._spec.task_class.create_from_options(options)
+    self._graph_timer = benchmark_utils.MethodTimer(self._task,
+                                                    _GRAPH_METHOD_NAMES)
+    method_name = self._spec.method_name
+    if self._running_mode == _RunningMode.VIDEO:
+      method_name += '_for_video'
+    elif self._running_mode == _RunningMode.LIVE_STREAM:
+      method_name += '_async'
+    self._method = getattr(self._task, method_name)
+
+  def process(self, index: int) -> None:
+    timestamp_ms = index * _FRAME_INTERVAL_MS
+    start = time.perf_counter()
+    if self._running_mode == _RunningMode.IMAGE:
+      self._method(self._image)
+    else:
+      if self.asynchronous:
+        with self._send_times_lock:
+          self._send_times[timestamp_ms] = start
+      self._method(self._image, timestamp_ms)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    packet_creation_ms = self._packet_timer.take_ms('create_image')
+    self.samples[benchmark_utils.PACKET_CREATION].append(packet_creation_ms)
+    if self.asynchronous:
+      return
+    graph_ms = sum(self._graph_timer.take_ms(name)
+                   for name in _GRAPH_METHOD_NAMES)
+    self.samples[benchmark_utils.PYTHON_OVERHEAD].append(elapsed_ms - graph_ms)
+    self.samples[benchmark_utils.RESULT_CONVERSION].append(
+        elapsed_ms - graph_ms - packet_creation_ms)
+
+  def close(self) -> None:
+    try:
+      if self._task is not None:
+        self._task.close()
+    finally:
+      for timer in (self._graph_timer, self._packet_timer):
+        if timer is not None:
+          timer.restore()
+
+
+def create_case(benchmark: str, running_mode: str, input_name: str,
+                config: benchmark_utils.BenchmarkConfig) -> VisionTaskCase:
+  """Creates the benchmark case of a vision task.
+
+  Args:
+    benchmark: The name of the task, a key of `BENCHMARKS`.
+    running_mode: The running mode, one of `RUNNING_MODES`.
+    input_name: The input, one of `benchmark_utils.INPUTS`.
+    config: The benchmark options.
+
+  Returns:
+    The benchmark case.
+  """
+  return VisionTaskCase(config, BENCHMARKS[benchmark], running_mode,
+                        input_name)
@@ -39,6 +39,7 @@ void SetColorChannel(int channel, uint8 value, cv::Mat* mat) {
 constexpr char kRgbaInTag[] = "RGBA_IN";
 constexpr char kRgbInTag[] = "RGB_IN";
 constexpr char kBgraInTag[] = "BGRA_IN";
+constexpr char kBgrInTag[] = "BGR_IN";
 constexpr char kGrayInTag[] = "GRAY_IN";
 constexpr char kRgbaOutTag[] = "RGBA_OUT";
 constexpr char kRgbOutTag[] = "RGB_OUT";
@@ -57,6 +58,7 @@ constexpr char kGrayOutTag[] = "GRAY_OUT";
 //   RGB  -> RGBA
 //   RGBA -> BGRA
 //   BGRA -> RGBA
+//   BGR  -> RGB
 //
 // This calculator only supports a single input stream and output stream at a
 // time. If more than one input stream or output stream is present, the
@@ -68,6 +70,8 @@ constexpr char kGrayOutTag[] = "GRAY_OUT";
 //   RGBA_IN:       The input video stream (ImageFrame, SRGBA).
 //   RGB_IN:        The input video stream (ImageFrame, SRGB).
 //   BGRA_IN:       The input video stream (ImageFrame, SBGRA).
+//   BGR_IN:        The input video stream (ImageFrame, SRGB), whose channels
+//                  are in BGR order, e.g. OpenCV frames taken without a copy.
 //   GRAY_IN:       The input video stream (ImageFrame, GRAY8).
 //
 // Output streams:
@@ -122,6 +126,10 @@ absl::Status ColorConvertCalculator::GetContract(CalculatorContract* cc) {
     cc->Inputs().Tag(kBgraInTag).Set<ImageFrame>();
   }
 
+  if (cc->Inputs().HasTag(kBgrInTag)) {
+    cc->Inputs().Tag(kBgrInTag).Set<ImageFrame>();
+  }
+
   if (cc->Outputs().HasTag(kRgbOutTag)) {
     cc->Outputs().Tag(kRgbOutTag).Set<ImageFrame>();
   }
@@ -189,6 +197,11 @@ absl::Status ColorConvertCalculator::Process(CalculatorContext* cc) {
     return ConvertAndOutput(kBgraInTag, kRgbaOutTag, ImageFormat::SRGBA,
                             cv::COLOR_BGRA2RGBA, cc);
   }
+  // BGR -> RGB
+  if (cc->Inputs().HasTag(kBgrInTag) && cc->Outputs().HasTag(kRgbOutTag)) {
+    return ConvertAndOutput(kBgrInTag, kRgbOutTag, ImageFormat::SRGB,
+                            cv::COLOR_BGR2RGB, cc);
+  }
   // RGBA -> BGRA
   if (cc->Inputs().HasTag(kRgbaInTag) && cc->Outputs().HasTag(kBgraOutTag)) {
     return ConvertAndOutput(kRgbaInTag, kBgraOutTag, ImageFormat::SBGRA,
@@ -15,6 +15,7 @@
 #include "mediapipe/calculators/image/opencv_encoded_image_to_image_frame_calculator.pb.h"
 #include "mediapipe/framework/calculator_framework.h"
 #include "mediapipe/framework/formats/image_frame_opencv.h"
+#include "mediapipe/framework/port/logging.h"
 #include "mediapipe/framework/port/opencv_imgcodecs_inc.h"
 #include "mediapipe/framework/port/opencv_imgproc_inc.h"
 #include "mediapipe/framework/port/status.h"
@@ -24,7 +25,8 @@ namespace mediapipe {
 
 // Takes in an encoded image string, decodes it by OpenCV, and converts to an
 // ImageFrame. Note that this calculator only supports grayscale and RGB images
-// for now.
+// for now. An image that can't be decoded is skipped, and only the timestamp
+// bound of the output is advanced.
 //
 // Example config:
 // node {
@@ -32,6 +34,19 @@ namespace mediapipe {
 //   input_stream: "encoded_image"
 //   output_stream: "image_frame"
 // }
+//
+// The image can be decoded at a reduced resolution, which JPEG images are
+// scaled to while they are decoded:
+// node {
+//   calculator: "OpenCvEncodedImageToImageFrameCalculator"
+//   input_stream: "encoded_image"
+//   output_stream: "image_frame"
+//   options {
+//     [mediapipe.OpenCvEncodedImageToImageFrameCalculatorOptions.ext] {
+//       reduced_resolution_factor: 4
+//     }
+//   }
+// }
 class OpenCvEncodedImageToImageFrameCalculator : public CalculatorBase {
  public:
   static absl::Status GetContract(CalculatorContract* cc);
@@ -53,6 +68,18 @@ absl::Status OpenCvEncodedImageToImageFrameCalculator::Open(
     CalculatorContext* cc) {
   options_ =
       cc->Options<mediapipe::OpenCvEncodedImageToImageFrameCalculatorOptions>();
+  switch (options_.reduced_resolution_factor()) {
+    case 1:
+    case 2:
+    case 4:
+    case 8:
+      break;
+    default:
+      return mediapipe::InvalidArgumentErrorBuilder(MEDIAPIPE_LOC)
+             << "Unsupported reduced_resolution_factor: "
+             << options_.reduced_resolution_factor()
+             << ". It must be one of 1, 2, 4 and 8.";
+  }
   return absl::OkStatus();
 }
 
@@ -61,7 +88,19 @@ absl::Status OpenCvEncodedImageToImageFrameCalculator::Process(
   const std::string& contents = cc->Inputs().Index(0).Get<std::string>();
   const std::vector<char> contents_vector(contents.begin(), contents.end());
   cv::Mat decoded_mat;
-  if (options_.apply_orientation_from_exif_data()) {
+  if (options_.reduced_resolution_factor() > 1) {
+    // The reduced color modes respect the orientation from the EXIF data
+    // unless it's explicitly ignored.
+    int flags = options_.reduced_resolution_factor() == 2
+                    ? cv::IMREAD_REDUCED_COLOR_2
+                    : options_.reduced_resolution_factor() == 4
+                          ? cv::IMREAD_REDUCED_COLOR_4
+                          : cv::IMREAD_REDUCED_COLOR_8;
+    if (!options_.apply_orientation_from_exif_data()) {
+      flags |= cv::IMREAD_IGNORE_ORIENTATION;
+    }
+    decoded_mat = cv::imdecode(contents_vector, flags);
+  } else if (options_.apply_orientation_from_exif_data()) {
     // We want to respect the orientation from the EXIF data, which
     // IMREAD_UNCHANGED ignores, but otherwise we want to be as permissive as
     // possible with our reading flags. Therefore, we use IMREAD_ANYCOLOR and
@@ -72,6 +111,15 @@ absl::Status OpenCvEncodedImageToImageFrameCalculator::Process(
     // Return the loaded image as-is
     decoded_mat = cv::imdecode(contents_vector, cv::IMREAD_UNCHANGED);
   }
+  if (decoded_mat.empty()) {
+    // An undecodable image is skipped instead of failing the graph, so that
+    // the following images are still decoded.
+    LOG(WARNING) << "Failed to decode the encoded image at timestamp "
+                 << cc->InputTimestamp() << ".";
+    cc->Outputs().Index(0).SetNextTimestampBound(
+        cc->InputTimestamp().NextAllowedInStream());
+    return absl::OkStatus();
+  }
   ImageFormat::Format image_format = ImageFormat::UNKNOWN;
   cv::Mat output_mat;
   switch (decoded_mat.channels()) {
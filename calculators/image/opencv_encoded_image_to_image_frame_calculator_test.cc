@@ -102,5 +102,54 @@ TEST(OpenCvEncodedImageToImageFrameCalculatorTest, TestGrayscaleJpeg) {
   EXPECT_LE(max_val, 10);
 }
 
+TEST(OpenCvEncodedImageToImageFrameCalculatorTest,
+     TestRgbJpegWithReducedResolution) {
+  std::string contents;
+  MP_ASSERT_OK(file::GetContents(
+      file::JoinPath("./", "/mediapipe/calculators/image/testdata/dino.jpg"),
+      &contents));
+  Packet input_packet = MakePacket<std::string>(contents);
+
+  CalculatorGraphConfig::Node node_config =
+      ParseTextProtoOrDie<CalculatorGraphConfig::Node>(R"pb(
+        calculator: "OpenCvEncodedImageToImageFrameCalculator"
+        input_stream: "encoded_image"
+        output_stream: "image_frame"
+        options {
+          [mediapipe.OpenCvEncodedImageToImageFrameCalculatorOptions.ext] {
+            reduced_resolution_factor: 4
+          }
+        }
+      )pb");
+  CalculatorRunner runner(node_config);
+  runner.MutableInputs()->Index(0).packets.push_back(
+      input_packet.At(Timestamp(0)));
+  MP_ASSERT_OK(runner.Run());
+  const std::vector<Packet>& packets = runner.Outputs().Index(0).packets;
+  ASSERT_EQ(1, packets.size());
+  const ImageFrame& output_frame = packets[0].Get<ImageFrame>();
+
+  cv::Mat input_mat = cv::imread(
+      file::JoinPath("./", "/mediapipe/calculators/image/testdata/dino.jpg"));
+  EXPECT_EQ(output_frame.Format(), ImageFormat::SRGB);
+  EXPECT_EQ(output_frame.Width(), (input_mat.cols + 3) / 4);
+  EXPECT_EQ(output_frame.Height(), (input_mat.rows + 3) / 4);
+}
+
+TEST(OpenCvEncodedImageToImageFrameCalculatorTest, TestInvalidEncodedImage) {
+  CalculatorGraphConfig::Node node_config =
+      ParseTextProtoOrDie<CalculatorGraphConfig::Node>(R"pb(
+        calculator: "OpenCvEncodedImageToImageFrameCalculator"
+        input_stream: "encoded_image"
+        output_stream: "image_frame"
+      )pb");
+  CalculatorRunner runner(node_config);
+  runner.MutableInputs()->Index(0).packets.push_back(
+      MakePacket<std::string>("not an image").At(Timestamp(0)));
+  // The undecodable image is skipped without failing the graph.
+  MP_ASSERT_OK(runner.Run());
+  EXPECT_TRUE(runner.Outputs().Index(0).packets.empty());
+}
+
 }  // namespace
 }  // namespace mediapipe
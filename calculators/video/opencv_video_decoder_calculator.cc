@@ -14,6 +14,7 @@
 
 #include <stdlib.h>
 
+#include "mediapipe/calculators/video/opencv_video_decoder_calculator.pb.h"
 #include "mediapipe/framework/calculator_framework.h"
 #include "mediapipe/framework/formats/image_format.pb.h"
 #include "mediapipe/framework/formats/image_frame.h"
@@ -90,6 +91,25 @@ ImageFormat::Format GetImageFormat(int num_channels) {
 //   output_stream: "VIDEO_PRESTREAM:video_header"
 // }
 //
+// A time range of the video can be decoded by seeking to its start, and the
+// frames can be subsampled. The skipped frames are grabbed from the video but
+// not converted to ImageFrames. The output frames keep their timestamps in the
+// video.
+//
+// Example config:
+// node {
+//   calculator: "OpenCvVideoDecoderCalculator"
+//   input_side_packet: "INPUT_FILE_PATH:input_file_path"
+//   output_stream: "VIDEO:video_frames"
+//   options {
+//     [mediapipe.OpenCvVideoDecoderCalculatorOptions.ext] {
+//       start_time_us: 2000000
+//       end_time_us: 4000000
+//       frame_stride: 3
+//     }
+//   }
+// }
+//
 class OpenCvVideoDecoderCalculator : public CalculatorBase {
  public:
   static absl::Status GetContract(CalculatorContract* cc) {
@@ -105,6 +125,19 @@ class OpenCvVideoDecoderCalculator : public CalculatorBase {
   }
 
   absl::Status Open(CalculatorContext* cc) override {
+    options_ = cc->Options<OpenCvVideoDecoderCalculatorOptions>();
+    if (options_.frame_stride() < 1) {
+      return mediapipe::InvalidArgumentErrorBuilder(MEDIAPIPE_LOC)
+             << "frame_stride must be positive, but got "
+             << options_.frame_stride();
+    }
+    if (options_.start_time_us() < 0 ||
+        (options_.end_time_us() >= 0 &&
+         options_.end_time_us() < options_.start_time_us())) {
+      return mediapipe::InvalidArgumentErrorBuilder(MEDIAPIPE_LOC)
+             << "Invalid time range [" << options_.start_time_us() << ", "
+             << options_.end_time_us() << "] of the video.";
+    }
     const std::string& input_file_path =
         cc->InputSidePackets().Tag(kInputFilePathTag).Get<std::string>();
     cap_ = absl::make_unique<cv::VideoCapture>(input_file_path);
@@ -152,8 +185,11 @@ class OpenCvVideoDecoderCalculator : public CalculatorBase {
           .Add(header.release(), Timestamp::PreStream());
       cc->Outputs().Tag(kVideoPrestreamTag).Close();
     }
-    // Rewind to the very first frame.
+    // Rewind to the very first frame, or seek to the start of the time range.
     cap_->set(cv::CAP_PROP_POS_AVI_RATIO, 0);
+    if (options_.start_time_us() > 0) {
+      cap_->set(cv::CAP_PROP_POS_MSEC, options_.start_time_us() / 1000.0);
+    }
 
     if (cc->OutputSidePackets().HasTag(kSavedAudioPathTag)) {
 #ifdef HAVE_FFMPEG
@@ -187,10 +223,22 @@ class OpenCvVideoDecoderCalculator : public CalculatorBase {
   }
 
   absl::Status Process(CalculatorContext* cc) override {
-    auto image_frame = absl::make_unique<ImageFrame>(format_, width_, height_,
-                                                     /*alignment_boundary=*/1);
     // Use microsecond as the unit of time.
     Timestamp timestamp(cap_->get(cv::CAP_PROP_POS_MSEC) * 1000);
+    if (options_.end_time_us() >= 0 &&
+        timestamp.Microseconds() > options_.end_time_us()) {
+      return tool::StatusStop();
+    }
+    // Seeking may land on an earlier frame, e.g. a key frame, so the frames
+    // before the start of the time range are grabbed but not converted.
+    if (timestamp.Microseconds() < options_.start_time_us()) {
+      if (!cap_->grab()) {
+        return tool::StatusStop();
+      }
+      return absl::OkStatus();
+    }
+    auto image_frame = absl::make_unique<ImageFrame>(format_, width_, height_,
+                                                     /*alignment_boundary=*/1);
     if (format_ == ImageFormat::GRAY8) {
       cv::Mat frame = formats::MatView(image_frame.get());
       ReadFrame(frame);
@@ -218,6 +266,14 @@ class OpenCvVideoDecoderCalculator : public CalculatorBase {
       prev_timestamp_ = timestamp;
       decoded_frames_++;
     }
+    // The frames between the output frames are only grabbed, which skips the
+    // color conversion and the copy. The end of the video is detected by the
+    // next ReadFrame().
+    for (int i = 1; i < options_.frame_stride(); ++i) {
+      if (!cap_->grab()) {
+        break;
+      }
+    }
 
     return absl::OkStatus();
   }
@@ -226,7 +282,10 @@ class OpenCvVideoDecoderCalculator : public CalculatorBase {
     if (cap_ && cap_->isOpened()) {
       cap_->release();
     }
-    if (decoded_frames_ != frame_count_) {
+    const bool decodes_all_frames = options_.start_time_us() == 0 &&
+                                    options_.end_time_us() < 0 &&
+                                    options_.frame_stride() == 1;
+    if (decodes_all_frames && decoded_frames_ != frame_count_) {
       LOG(WARNING) << "Not all the frames are decoded (total frames: "
                    << frame_count_ << " vs decoded frames: " << decoded_frames_
                    << ").";
@@ -243,6 +302,7 @@ class OpenCvVideoDecoderCalculator : public CalculatorBase {
   }
 
  private:
+  OpenCvVideoDecoderCalculatorOptions options_;
   std::unique_ptr<cv::VideoCapture> cap_;
   int width_;
   int height_;
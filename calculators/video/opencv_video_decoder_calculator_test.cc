@@ -12,6 +12,7 @@
 // See the License for the specific language governing permissions and
 // limitations under the License.
 
+#include "mediapipe/calculators/video/opencv_video_decoder_calculator.pb.h"
 #include "mediapipe/framework/calculator_runner.h"
 #include "mediapipe/framework/deps/file_path.h"
 #include "mediapipe/framework/formats/image_frame.h"
@@ -168,5 +169,60 @@ TEST(OpenCvVideoDecoderCalculatorTest, TestMkvVp8Video) {
   }
 }
 
+TEST(OpenCvVideoDecoderCalculatorTest, TestTimeRangeAndFrameStride) {
+  CalculatorGraphConfig::Node node_config =
+      ParseTextProtoOrDie<CalculatorGraphConfig::Node>(R"pb(
+        calculator: "OpenCvVideoDecoderCalculator"
+        input_side_packet: "INPUT_FILE_PATH:input_file_path"
+        output_stream: "VIDEO:video"
+        options {
+          [mediapipe.OpenCvVideoDecoderCalculatorOptions.ext] {
+            start_time_us: 2000000
+            end_time_us: 4000000
+            frame_stride: 3
+          }
+        })pb");
+  CalculatorRunner runner(node_config);
+  runner.MutableSidePackets()->Tag(kInputFilePathTag) =
+      MakePacket<std::string>(file::JoinPath(GetTestDataDir(kTestPackageRoot),
+                                             "format_MKV_VP8_VORBIS.video"));
+  MP_EXPECT_OK(runner.Run());
+
+  // Two seconds of the 30 fps video, of which every third frame is output.
+  const std::vector<Packet>& packets = runner.Outputs().Tag(kVideoTag).packets;
+  EXPECT_GE(packets.size(), 19);
+  EXPECT_LE(packets.size(), 21);
+  for (int i = 0; i < packets.size(); ++i) {
+    EXPECT_GE(packets[i].Timestamp().Microseconds(), 2000000);
+    EXPECT_LE(packets[i].Timestamp().Microseconds(), 4000000);
+    if (i > 0) {
+      EXPECT_GT(packets[i].Timestamp().Microseconds() -
+                    packets[i - 1].Timestamp().Microseconds(),
+                60000);
+    }
+    cv::Mat output_mat = formats::MatView(&(packets[i].Get<ImageFrame>()));
+    EXPECT_EQ(640, output_mat.size().width);
+    EXPECT_EQ(320, output_mat.size().height);
+  }
+}
+
+TEST(OpenCvVideoDecoderCalculatorTest, TestInvalidFrameStride) {
+  CalculatorGraphConfig::Node node_config =
+      ParseTextProtoOrDie<CalculatorGraphConfig::Node>(R"pb(
+        calculator: "OpenCvVideoDecoderCalculator"
+        input_side_packet: "INPUT_FILE_PATH:input_file_path"
+        output_stream: "VIDEO:video"
+        options {
+          [mediapipe.OpenCvVideoDecoderCalculatorOptions.ext] {
+            frame_stride: 0
+          }
+        })pb");
+  CalculatorRunner runner(node_config);
+  runner.MutableSidePackets()->Tag(kInputFilePathTag) =
+      MakePacket<std::string>(file::JoinPath(GetTestDataDir(kTestPackageRoot),
+                                             "format_MKV_VP8_VORBIS.video"));
+  EXPECT_FALSE(runner.Run().ok());
+}
+
 }  // namespace
 }  // namespace mediapipe
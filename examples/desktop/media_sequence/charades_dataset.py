@@ -25,11 +25,11 @@ this code and not the data set.
 Running this code as a module generates the data set on disk. First, the
 required files are downloaded (_download_data). Then, for each split in the
 data set (generate_examples), the metadata is generated from the annotations for
-each example (_generate_metadata), and MediaPipe is used to fill in the video
-frames (_run_mediapipe). The data set is written to disk as a set of numbered
-TFRecord files. If the download is disrupted, the incomplete files will need to
-be removed before running the script again. This pattern can be reproduced and
-modified to generate most video data sets.
+each example (_generate_metadata), and a pool of MediaPipe workers is used to
+fill in the video frames (parallel_generation). The data set is written to disk
+as a set of numbered TFRecord files. If the download or the generation is
+interrupted, running the script again resumes it. This pattern can be
+reproduced and modified to generate most video data sets.
 
 Generating the data on disk will probably take 4-8 hours and requires 150 GB of
 disk space. (Image compression quality is the primary determiner of disk usage.)
@@ -56,22 +56,21 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
-import contextlib
 import csv
 import os
 import random
-import subprocess
 import sys
-import tempfile
 import zipfile
 
 from absl import app
 from absl import flags
 from absl import logging
+import numpy as np
 from six.moves import range
-from six.moves import urllib
 import tensorflow.compat.v1 as tf
 
+from mediapipe.examples.desktop.media_sequence import download_manager
+from mediapipe.examples.desktop.media_sequence import parallel_generation
 from mediapipe.util.sequence import media_sequence as ms
 
 
@@ -100,18 +99,29 @@ SPLITS = {
 }
 NUM_CLASSES = 157
 CLASS_LABEL_OFFSET = 1
+# Prefix of the feature list storing precomputed classification targets.
+CLASSIFICATION_TARGET_PREFIX = "CLASSIFICATION_TARGET"
 
 
 class Charades(object):
   """Generates and loads the Charades data set."""
 
-  def __init__(self, path_to_data):
+  def __init__(self, path_to_data, download_cache_dir=None):
+    """Creates the data set.
+
+    Args:
+      path_to_data: the directory the data set is written to and read from.
+      download_cache_dir: the directory downloads are cached in, which can be
+        shared with other data sets. Defaults to path_to_data.
+    """
     if not path_to_data:
       raise ValueError("You must supply the path to the data directory.")
     self.path_to_data = path_to_data
+    self.download_cache_dir = download_cache_dir or path_to_data
 
   def as_dataset(self, split, shuffle=False, repeat=False,
-                 serialized_prefetch_size=32, decoded_prefetch_size=32):
+                 serialized_prefetch_size=32, decoded_prefetch_size=32,
+                 include_segment_matrix=False):
     """Returns Charades as a tf.data.Dataset.
 
     After running this function, calling padded_batch() on the Dataset object
@@ -125,11 +135,14 @@ class Charades(object):
       repeat: if true, repeats the data set forever.
       serialized_prefetch_size: the buffer size for reading from disk.
       decoded_prefetch_size: the buffer size after decoding.
+      include_segment_matrix: if true, the output includes the dense
+        "segment_matrix", which takes [time, num_segments] memory per example.
     Returns:
       A tf.data.Dataset object with the following structure: {
         "images": uint8 tensor, shape [time, height, width, channels]
         "segment_matrix": binary tensor of segments, shape [time, num_segments].
-          See one_hot_segments() for details.
+          See one_hot_segments() for details. Only present if
+          include_segment_matrix is true.
         "indicator_matrix": binary tensor indicating valid frames,
           shape [time, 1]. If padded with zeros to align sizes, the indicator
           marks where segments is valid.
@@ -165,8 +178,12 @@ class Charades(object):
               ms.get_image_frame_rate_default_parser()),
       }
 
+      target_key = ms.get_feature_floats_key(CLASSIFICATION_TARGET_PREFIX)
       sequence_features = {
-          ms.get_image_encoded_key(): ms.get_image_encoded_default_parser()
+          ms.get_image_encoded_key(): ms.get_image_encoded_default_parser(),
+          target_key: tf.io.FixedLenSequenceFeature(
+              [NUM_CLASSES + CLASS_LABEL_OFFSET], tf.float32,
+              allow_missing=True),
       }
       parsed_context, parsed_sequence = tf.io.parse_single_sequence_example(
           sequence_example, context_features, sequence_features)
@@ -174,20 +191,29 @@ class Charades(object):
       sequence_length = tf.shape(parsed_sequence[ms.get_image_encoded_key()])[0]
       num_segments = tf.shape(
           parsed_context[ms.get_segment_label_index_key()])[0]
-      # segments matrix and targets for training.
-      segments_matrix, indicator = one_hot_segments(
-          tf.sparse_tensor_to_dense(
-              parsed_context[ms.get_segment_start_index_key()]),
-          tf.sparse_tensor_to_dense(
-              parsed_context[ms.get_segment_end_index_key()]),
-          sequence_length)
-
-      classification_target = timepoint_classification_target(
-          segments_matrix,
-          tf.sparse_tensor_to_dense(
-              parsed_context[ms.get_segment_label_index_key()]
-              ) + CLASS_LABEL_OFFSET,
-          NUM_CLASSES + CLASS_LABEL_OFFSET)
+      # create a tensors of ones everywhere there's an annotation. If padded
+      # with zeros later, element-wise multiplication of the loss will mask out
+      # the padding.
+      indicator = tf.ones(shape=[sequence_length, 1], dtype=tf.float32)
+
+      def compute_target():
+        return segment_classification_target(
+            tf.sparse_tensor_to_dense(
+                parsed_context[ms.get_segment_start_index_key()]),
+            tf.sparse_tensor_to_dense(
+                parsed_context[ms.get_segment_end_index_key()]),
+            tf.sparse_tensor_to_dense(
+                parsed_context[ms.get_segment_label_index_key()]
+                ) + CLASS_LABEL_OFFSET,
+            sequence_length,
+            NUM_CLASSES + CLASS_LABEL_OFFSET)
+
+      # Use the targets stored by generate_examples(precompute_targets=True)
+      # when available.
+      precomputed_target = parsed_sequence[target_key]
+      classification_target = tf.cond(
+          tf.equal(tf.shape(precomputed_target)[0], sequence_length),
+          lambda: precomputed_target, compute_target)
 
       # [segments, 2] start and end time in seconds.
       gt_segment_seconds = tf.to_float(tf.concat(
@@ -207,7 +233,6 @@ class Charades(object):
                          dtype=tf.uint8)
 
       output_dict = {
-          "segment_matrix": segments_matrix,
           "indicator_matrix": indicator,
           "classification_target": classification_target,
           "example_id": example_id,
@@ -218,12 +243,19 @@ class Charades(object):
           "num_timesteps": sequence_length,
           "images": images,
       }
+      if include_segment_matrix:
+        output_dict["segment_matrix"], _ = one_hot_segments(
+            tf.sparse_tensor_to_dense(
+                parsed_context[ms.get_segment_start_index_key()]),
+            tf.sparse_tensor_to_dense(
+                parsed_context[ms.get_segment_end_index_key()]),
+            sequence_length)
       return output_dict
 
     if split not in SPLITS:
       raise ValueError("Split %s not in %s" % split, str(list(SPLITS.keys())))
     all_shards = tf.io.gfile.glob(
-        os.path.join(self.path_to_data, SPLITS[split][0] + "-*-of-*"))
+        os.path.join(self.path_to_data, SPLITS[split][0] + "-*-of-?????"))
     random.shuffle(all_shards)
     all_shards_dataset = tf.data.Dataset.from_tensor_slices(all_shards)
     cycle_length = min(16, len(all_shards))
@@ -243,7 +275,8 @@ class Charades(object):
     return dataset
 
   def generate_examples(self,
-                        path_to_mediapipe_binary, path_to_graph_directory):
+                        path_to_mediapipe_binary, path_to_graph_directory,
+                        num_workers=None, precompute_targets=False):
     """Downloads data and generates sharded TFRecords.
 
     Downloads the data files, generates metadata, and processes the metadata
@@ -256,6 +289,10 @@ class Charades(object):
         mediapipe/examples/desktop/demo:media_sequence_demo.
       path_to_graph_directory: Path to the directory with MediaPipe graphs in
         mediapipe/graphs/media_sequence/.
+      num_workers: The number of examples processed concurrently. Defaults to
+        the number of CPUs.
+      precompute_targets: If true, stores the classification target of each
+        example so that as_dataset() does not need to compute it.
     """
     if not path_to_mediapipe_binary:
       raise ValueError(
@@ -276,16 +313,14 @@ class Charades(object):
       random.shuffle(all_metadata)
       shard_names = [os.path.join(self.path_to_data, name + "-%05d-of-%05d" % (
           i, shards)) for i in range(shards)]
-      writers = [tf.io.TFRecordWriter(shard_name) for shard_name in shard_names]
-      with _close_on_exit(writers) as writers:
-        for i, seq_ex in enumerate(all_metadata):
-          print("Processing example %d of %d   (%d%%) \r" % (
-              i, len(all_metadata), i * 100 / len(all_metadata)), end="")
-          for graph in GRAPHS:
-            graph_path = os.path.join(path_to_graph_directory, graph)
-            seq_ex = self._run_mediapipe(
-                path_to_mediapipe_binary, seq_ex, graph_path)
-          writers[i % len(writers)].write(seq_ex.SerializeToString())
+      graph_paths = [
+          os.path.join(path_to_graph_directory, graph) for graph in GRAPHS
+      ]
+      parallel_generation.write_sequence_examples(
+          all_metadata, shard_names, path_to_mediapipe_binary, graph_paths,
+          num_workers,
+          postprocess_fn=(add_classification_target
+                          if precompute_targets else None))
     logging.info("Data extraction complete.")
 
   def _generate_metadata(self, annotations_file, video_dir):
@@ -329,77 +364,27 @@ class Charades(object):
 
   def _download_data(self):
     """Downloads and extracts data if not already available."""
-    if sys.version_info >= (3, 0):
-      urlretrieve = urllib.request.urlretrieve
-    else:
-      urlretrieve = urllib.request.urlretrieve
     logging.info("Creating data directory.")
     tf.io.gfile.makedirs(self.path_to_data)
-    logging.info("Downloading license.")
-    local_license_path = os.path.join(
-        self.path_to_data, DATA_URL_LICENSE.split("/")[-1])
-    if not tf.io.gfile.exists(local_license_path):
-      urlretrieve(DATA_URL_LICENSE, local_license_path)
-    logging.info("Downloading annotations.")
-    local_annotations_path = os.path.join(
-        self.path_to_data, DATA_URL_ANNOTATIONS.split("/")[-1])
-    if not tf.io.gfile.exists(local_annotations_path):
-      urlretrieve(DATA_URL_ANNOTATIONS, local_annotations_path)
-    logging.info("Downloading videos.")
-    local_videos_path = os.path.join(
-        self.path_to_data, DATA_URL_VIDEOS.split("/")[-1])
-    if not tf.io.gfile.exists(local_videos_path):
-      urlretrieve(DATA_URL_VIDEOS, local_videos_path, progress_hook)
+    logging.info("Downloading license, annotations and videos.")
+    downloads = download_manager.DownloadManager(self.download_cache_dir)
+    _, local_annotations_path, local_videos_path = downloads.download_all(
+        [DATA_URL_LICENSE, DATA_URL_ANNOTATIONS, DATA_URL_VIDEOS])
     logging.info("Extracting annotations.")
-    # return video dir and annotation_dir by removing .zip from the path.
-    annotations_dir = local_annotations_path[:-4]
+    # return video dir and annotation_dir by removing .zip from the name.
+    annotations_dir = os.path.join(
+        self.path_to_data, os.path.basename(local_annotations_path)[:-4])
     if not tf.io.gfile.exists(annotations_dir):
       with zipfile.ZipFile(local_annotations_path) as annotations_zip:
         annotations_zip.extractall(self.path_to_data)
     logging.info("Extracting videos.")
-    video_dir = local_videos_path[:-4]
+    video_dir = os.path.join(
+        self.path_to_data, os.path.basename(local_videos_path)[:-4])
     if not tf.io.gfile.exists(video_dir):
       with zipfile.ZipFile(local_videos_path) as videos_zip:
         videos_zip.extractall(self.path_to_data)
     return annotations_dir, video_dir
 
-  def _run_mediapipe(self, path_to_mediapipe_binary, sequence_example, graph):
-    """Runs MediaPipe over MediaSequence tf.train.SequenceExamples.
-
-    Args:
-      path_to_mediapipe_binary: Path to the compiled binary for the BUILD target
-        mediapipe/examples/desktop/demo:media_sequence_demo.
-      sequence_example: The SequenceExample with metadata or partial data file.
-      graph: The path to the graph that extracts data to add to the
-        SequenceExample.
-    Returns:
-      A copy of the input SequenceExample with additional data fields added
-      by the MediaPipe graph.
-    Raises:
-      RuntimeError: if MediaPipe returns an error or fails to run the graph.
-    """
-    if not path_to_mediapipe_binary:
-      raise ValueError("--path_to_mediapipe_binary must be specified.")
-    input_fd, input_filename = tempfile.mkstemp()
-    output_fd, output_filename = tempfile.mkstemp()
-    cmd = [path_to_mediapipe_binary,
-           "--calculator_graph_config_file=%s" % graph,
-           "--input_side_packets=input_sequence_example=%s" % input_filename,
-           "--output_side_packets=output_sequence_example=%s" % output_filename]
-    with open(input_filename, "wb") as input_file:
-      input_file.write(sequence_example.SerializeToString())
-    mediapipe_output = subprocess.check_output(cmd)
-    if b"Failed to run the graph" in mediapipe_output:
-      raise RuntimeError(mediapipe_output)
-    with open(output_filename, "rb") as output_file:
-      output_example = tf.train.SequenceExample()
-      output_example.ParseFromString(output_file.read())
-    os.close(input_fd)
-    os.remove(input_filename)
-    os.close(output_fd)
-    os.remove(output_filename)
-    return output_example
-
 
 def one_hot_segments(start_indices, end_indices, num_samples):
   """Returns a one-hot, float matrix of segments at each timestep.
@@ -429,16 +414,13 @@ def one_hot_segments(start_indices, end_indices, num_samples):
   start_indices.shape.assert_is_compatible_with(end_indices.shape)
   start_indices.shape.assert_has_rank(1)
   end_indices.shape.assert_has_rank(1)
-  # create a matrix of the index at each row with a column per segment.
-  indices = tf.to_int64(
-      tf.tile(
-          tf.transpose(tf.expand_dims(tf.range(num_samples), 0)),
-          [1, tf.shape(start_indices)[0]]))
+  # a column of the index at each row, broadcast against the segments.
+  indices = tf.expand_dims(tf.range(tf.to_int64(num_samples)), 1)
   # switch to one hot encoding of segments (includes start and end indices)
   segments = tf.to_float(
       tf.logical_and(
-          tf.greater_equal(indices, start_indices),
-          tf.less_equal(indices, end_indices)))
+          tf.greater_equal(indices, tf.to_int64(start_indices)),
+          tf.less_equal(indices, tf.to_int64(end_indices))))
   # create a tensors of ones everywhere there's an annotation. If padded with
   # zeros later, element-wise multiplication of the loss will mask out the
   # padding.
@@ -462,23 +444,95 @@ def timepoint_classification_target(segments, segment_classes, num_classes):
     a [time, num_classes] tensor. In the final output, more than one
     value in a row can be 1.0 if segments overlap.
   """
-  num_segments = tf.shape(segments)[1]
-  matrix_of_class_indices = tf.to_int32(
-      segments * tf.to_float(tf.expand_dims(segment_classes, 0)))
-  # First column will have one count per zero segment. Correct this to be 0
-  # unless no segments are present.
-  one_hot = tf.reduce_sum(tf.one_hot(matrix_of_class_indices, num_classes), 1)
-  normalizer = tf.concat([
-      tf.ones(shape=[1, 1], dtype=tf.float32) / tf.to_float(num_segments),
-      tf.ones(shape=[1, num_classes - 1], dtype=tf.float32)
-  ], 1)
-  corrected_one_hot = tf.floor(one_hot * normalizer)
-  return corrected_one_hot
+  counts = tf.matmul(segments, tf.one_hot(segment_classes, num_classes))
+  return _add_background_class(counts)
+
+
+def _add_background_class(counts):
+  """Sets the first column of counts to 1.0 where no segment is present."""
+  background = tf.to_float(
+      tf.equal(tf.reduce_sum(counts[:, 1:], 1, keepdims=True), 0.0))
+  return tf.concat([background, counts[:, 1:]], 1)
+
 
+def segment_classification_target(start_indices, end_indices, segment_classes,
+                                  num_samples, num_classes):
+  """Produces the timepoint_classification_target of segment boundaries.
 
-def progress_hook(blocks, block_size, total_size):
-  print("Downloaded %d%% of %d bytes   (%d blocks)\r" % (
-      blocks * block_size / total_size * 100, total_size, blocks), end="")
+  Equivalent to timepoint_classification_target(one_hot_segments(...)[0], ...)
+  without materializing the [time, num_segments] segment matrix: +1 and -1 are
+  scattered at the start and one past the end of each segment in its class
+  column and accumulated over time, which takes O(time * num_classes +
+  num_segments) memory.
+
+  Args:
+    start_indices: a [num_segments] tensor of integer indices for the start of
+      each segment.
+    end_indices: a [num_segments] tensor of inclusive integer indices for the
+      end of each segment.
+    segment_classes: a [num_segments] tensor with the class index of each
+      segment.
+    num_samples: the number of rows in the output.
+    num_classes: the number of classes (must be >= max(segment_classes) + 1)
+  Returns:
+    a [num_samples, num_classes] tensor. In the final output, more than one
+    value in a row can be 1.0 if segments overlap.
+  """
+  num_samples = tf.to_int64(num_samples)
+  starts = tf.clip_by_value(tf.to_int64(start_indices), 0, num_samples)
+  ends = tf.clip_by_value(tf.to_int64(end_indices) + 1, 0, num_samples)
+  classes = tf.to_int64(segment_classes)
+  # Segments that end before they start cover no samples.
+  weights = tf.to_float(tf.greater(ends, starts))
+  indices = tf.stack(
+      [tf.concat([starts, ends], 0), tf.concat([classes, classes], 0)], 1)
+  boundaries = tf.scatter_nd(
+      indices, tf.concat([weights, -weights], 0),
+      tf.stack([num_samples + 1, tf.to_int64(num_classes)]))
+  counts = tf.cumsum(boundaries, axis=0)[:-1]
+  return _add_background_class(counts)
+
+
+def compute_classification_target(start_indices, end_indices, segment_classes,
+                                  num_samples, num_classes):
+  """A NumPy version of segment_classification_target."""
+  starts = np.clip(np.asarray(start_indices, dtype=np.int64), 0, num_samples)
+  ends = np.clip(
+      np.asarray(end_indices, dtype=np.int64) + 1, 0, num_samples)
+  classes = np.asarray(segment_classes, dtype=np.int64)
+  weights = (ends > starts).astype(np.float32)
+  boundaries = np.zeros((num_samples + 1, num_classes), dtype=np.float32)
+  np.add.at(boundaries, (starts, classes), weights)
+  np.add.at(boundaries, (ends, classes), -weights)
+  counts = np.cumsum(boundaries, axis=0)[:-1]
+  counts[:, 0] = counts[:, 1:].sum(axis=1) == 0
+  return counts
+
+
+def add_classification_target(serialized_example):
+  """Stores the classification target in a serialized Charades example.
+
+  Args:
+    serialized_example: a serialized SequenceExample produced by MediaPipe,
+      with encoded images and segment indices.
+  Returns:
+    The serialized SequenceExample with the [time, num_classes] target stored
+    in the feature floats with the CLASSIFICATION_TARGET_PREFIX prefix.
+  """
+  sequence_example = tf.train.SequenceExample.FromString(serialized_example)
+  num_classes = NUM_CLASSES + CLASS_LABEL_OFFSET
+  target = compute_classification_target(
+      ms.get_segment_start_index(sequence_example),
+      ms.get_segment_end_index(sequence_example),
+      np.asarray(ms.get_segment_label_index(sequence_example)) +
+      CLASS_LABEL_OFFSET,
+      ms.get_image_encoded_size(sequence_example),
+      num_classes)
+  ms.set_feature_dimensions((num_classes,), sequence_example,
+                            prefix=CLASSIFICATION_TARGET_PREFIX)
+  ms.set_feature_floats_array(target, sequence_example,
+                              prefix=CLASSIFICATION_TARGET_PREFIX)
+  return sequence_example.SerializeToString()
 
 
 def bytes23(string):
@@ -489,22 +543,15 @@ def bytes23(string):
     return bytes(string)
 
 
-@contextlib.contextmanager
-def _close_on_exit(writers):
-  """Call close on all writers on exit."""
-  try:
-    yield writers
-  finally:
-    for writer in writers:
-      writer.close()
-
-
 def main(argv):
   if len(argv) > 1:
     raise app.UsageError("Too many command-line arguments.")
-  Charades(flags.FLAGS.path_to_charades_data).generate_examples(
+  Charades(flags.FLAGS.path_to_charades_data,
+           flags.FLAGS.download_cache_dir).generate_examples(
       flags.FLAGS.path_to_mediapipe_binary,
-      flags.FLAGS.path_to_graph_directory)
+      flags.FLAGS.path_to_graph_directory,
+      flags.FLAGS.num_workers,
+      flags.FLAGS.precompute_targets)
 
 if __name__ == "__main__":
   flags.DEFINE_string("path_to_charades_data",
@@ -516,4 +563,16 @@ if __name__ == "__main__":
   flags.DEFINE_string("path_to_graph_directory",
                       "",
                       "Path to directory containing the graph files.")
+  flags.DEFINE_string("download_cache_dir",
+                      None,
+                      "Directory to cache downloads in. Defaults to the data "
+                      "directory.")
+  flags.DEFINE_integer("num_workers",
+                       None,
+                       "Number of examples processed concurrently. Defaults "
+                       "to the number of CPUs.")
+  flags.DEFINE_boolean("precompute_targets",
+                       False,
+                       "Store the per-frame classification targets in each "
+                       "example.")
   app.run(main)
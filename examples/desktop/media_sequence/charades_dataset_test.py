@@ -0,0 +1,74 @@
+"""Copyright 2023 The MediaPipe Authors.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Tests for the classification targets of charades_dataset.py.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+from absl.testing import parameterized
+import numpy as np
+import tensorflow.compat.v1 as tf
+
+from mediapipe.examples.desktop.media_sequence import charades_dataset
+
+_NUM_SAMPLES = 10
+_NUM_CLASSES = 5
+
+
+class ClassificationTargetTest(tf.test.TestCase, parameterized.TestCase):
+
+  @parameterized.named_parameters(
+      ("no_segments", [], [], []),
+      ("single_segment", [2], [5], [1]),
+      ("overlapping_segments", [1, 3], [6, 8], [1, 2]),
+      ("same_class_overlapping_segments", [1, 3], [6, 8], [3, 3]),
+      ("inverted_segment", [6, 1], [2, 3], [1, 2]),
+      ("single_index_segment", [4], [4], [2]),
+      ("out_of_range_segments", [-3, 7], [2, 15], [1, 4]),
+  )
+  def test_segment_target_matches_dense_target(self, start_indices,
+                                               end_indices, segment_classes):
+    start_indices = np.array(start_indices, dtype=np.int64)
+    end_indices = np.array(end_indices, dtype=np.int64)
+    segment_classes = np.array(segment_classes, dtype=np.int64)
+    segments, _ = charades_dataset.one_hot_segments(start_indices, end_indices,
+                                                    _NUM_SAMPLES)
+    expected = self.evaluate(
+        charades_dataset.timepoint_classification_target(
+            segments, segment_classes, _NUM_CLASSES))
+
+    target = self.evaluate(
+        charades_dataset.segment_classification_target(
+            start_indices, end_indices, segment_classes, _NUM_SAMPLES,
+            _NUM_CLASSES))
+    self.assertAllEqual(expected, target)
+    self.assertAllEqual(
+        expected,
+        charades_dataset.compute_classification_target(
+            start_indices, end_indices, segment_classes, _NUM_SAMPLES,
+            _NUM_CLASSES))
+
+  def test_same_class_overlap_counts_both_segments(self):
+    target = self.evaluate(
+        charades_dataset.segment_classification_target(
+            [1, 3], [6, 8], [3, 3], _NUM_SAMPLES, _NUM_CLASSES))
+    self.assertAllEqual([0, 1, 1, 2, 2, 2, 2, 1, 1, 0], target[:, 3])
+    self.assertAllEqual([1, 0, 0, 0, 0, 0, 0, 0, 0, 1], target[:, 0])
+
+
+if __name__ == "__main__":
+  tf.test.main()
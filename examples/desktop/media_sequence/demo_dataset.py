@@ -20,11 +20,13 @@ prepare a toy dataset. Second, it can be imported and used to provide a
 tf.data.Dataset reading that data from disk via as_dataset().
 
 Running as a module prepares the data in three stages via generate_examples().
-First, the actual data files are downloaded. If the download is disrupted, the
-incomplete files will need to be removed before running the script again.
+First, the actual data files are downloaded. If the download is disrupted,
+running the script again resumes it.
 Second, the annotations are parsed and reformated into metadata as described in
 the MediaSequence documentation. Third, MediaPipe is run to extract subsequences
-of frames for subsequent training via _run_mediapipe().
+of frames for subsequent training by a pool of workers in parallel_generation.
+If this stage is interrupted, running the script again resumes it from the last
+checkpoint.
 
 The toy data set is classifying a clip as a panning shot of galaxy or nebula
 from videos releasued under the [Creative Commons Attribution 4.0 International
@@ -50,21 +52,19 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
-import contextlib
 import csv
 import os
 import random
-import subprocess
 import sys
-import tempfile
 
 from absl import app
 from absl import flags
 from absl import logging
 from six.moves import range
-from six.moves import urllib
 import tensorflow.compat.v1 as tf
 
+from mediapipe.examples.desktop.media_sequence import download_manager
+from mediapipe.examples.desktop.media_sequence import parallel_generation
 from mediapipe.util.sequence import media_sequence as ms
 
 SPLITS = {
@@ -90,10 +90,18 @@ GRAPHS = ["clipped_images_from_file_at_24fps.pbtxt"]
 class DemoDataset(object):
   """Generates and loads a demo data set."""
 
-  def __init__(self, path_to_data):
+  def __init__(self, path_to_data, download_cache_dir=None):
+    """Creates the data set.
+
+    Args:
+      path_to_data: the directory the data set is written to and read from.
+      download_cache_dir: the directory downloads are cached in, which can be
+        shared with other data sets. Defaults to path_to_data.
+    """
     if not path_to_data:
       raise ValueError("You must supply the path to the data directory.")
     self.path_to_data = path_to_data
+    self.download_cache_dir = download_cache_dir or path_to_data
 
   def as_dataset(self,
                  split,
@@ -151,7 +159,8 @@ class DemoDataset(object):
     if split not in SPLITS:
       raise ValueError("split '%s' is unknown." % split)
     all_shards = tf.io.gfile.glob(
-        os.path.join(self.path_to_data, TF_RECORD_PATTERN % split + "-*-of-*"))
+        os.path.join(self.path_to_data,
+                     TF_RECORD_PATTERN % split + "-*-of-?????"))
     if shuffle:
       random.shuffle(all_shards)
     all_shards_dataset = tf.data.Dataset.from_tensor_slices(all_shards)
@@ -173,7 +182,7 @@ class DemoDataset(object):
     return dataset
 
   def generate_examples(self, path_to_mediapipe_binary,
-                        path_to_graph_directory):
+                        path_to_graph_directory, num_workers=None):
     """Downloads data and generates sharded TFRecords.
 
     Downloads the data files, generates metadata, and processes the metadata
@@ -186,6 +195,8 @@ class DemoDataset(object):
         mediapipe/examples/desktop/demo:media_sequence_demo.
       path_to_graph_directory: Path to the directory with MediaPipe graphs in
         mediapipe/graphs/media_sequence/.
+      num_workers: The number of examples processed concurrently. Defaults to
+        the number of CPUs.
     """
     if not path_to_mediapipe_binary:
       raise ValueError("You must supply the path to the MediaPipe binary for "
@@ -196,20 +207,13 @@ class DemoDataset(object):
           "mediapipe/graphs/media_sequence/.")
     logging.info("Downloading data.")
     tf.io.gfile.makedirs(self.path_to_data)
-    if sys.version_info >= (3, 0):
-      urlretrieve = urllib.request.urlretrieve
-    else:
-      urlretrieve = urllib.request.urlretrieve
+    downloads = download_manager.DownloadManager(self.download_cache_dir)
     for split in SPLITS:
-      reader = csv.DictReader(SPLITS[split].split("\n"))
+      rows = list(csv.DictReader(SPLITS[split].split("\n")))
+      local_paths = downloads.download_all([row["url"] for row in rows])
       all_metadata = []
-      for row in reader:
-        url = row["url"]
-        basename = url.split("/")[-1]
-        local_path = os.path.join(self.path_to_data, basename)
-        if not tf.io.gfile.exists(local_path):
-          urlretrieve(url, local_path)
-
+      for row, local_path in zip(rows, local_paths):
+        basename = row["url"].split("/")[-1]
         for start_time in range(0, int(row["duration"]), SECONDS_PER_EXAMPLE):
           metadata = tf.train.SequenceExample()
           ms.set_example_id(bytes23(basename + "_" + str(start_time)),
@@ -227,14 +231,12 @@ class DemoDataset(object):
       random.seed(47)
       random.shuffle(all_metadata)
       shard_names = [self._indexed_shard(split, i) for i in range(NUM_SHARDS)]
-      writers = [tf.io.TFRecordWriter(shard_name) for shard_name in shard_names]
-      with _close_on_exit(writers) as writers:
-        for i, seq_ex in enumerate(all_metadata):
-          for graph in GRAPHS:
-            graph_path = os.path.join(path_to_graph_directory, graph)
-            seq_ex = self._run_mediapipe(path_to_mediapipe_binary, seq_ex,
-                                         graph_path)
-          writers[i % len(writers)].write(seq_ex.SerializeToString())
+      graph_paths = [
+          os.path.join(path_to_graph_directory, graph) for graph in GRAPHS
+      ]
+      parallel_generation.write_sequence_examples(
+          all_metadata, shard_names, path_to_mediapipe_binary, graph_paths,
+          num_workers)
 
   def _indexed_shard(self, split, index):
     """Constructs a sharded filename."""
@@ -242,46 +244,6 @@ class DemoDataset(object):
         self.path_to_data,
         TF_RECORD_PATTERN % split + "-%05d-of-%05d" % (index, NUM_SHARDS))
 
-  def _run_mediapipe(self, path_to_mediapipe_binary, sequence_example, graph):
-    """Runs MediaPipe over MediaSequence tf.train.SequenceExamples.
-
-    Args:
-      path_to_mediapipe_binary: Path to the compiled binary for the BUILD target
-        mediapipe/examples/desktop/demo:media_sequence_demo.
-      sequence_example: The SequenceExample with metadata or partial data file.
-      graph: The path to the graph that extracts data to add to the
-        SequenceExample.
-
-    Returns:
-      A copy of the input SequenceExample with additional data fields added
-      by the MediaPipe graph.
-    Raises:
-      RuntimeError: if MediaPipe returns an error or fails to run the graph.
-    """
-    if not path_to_mediapipe_binary:
-      raise ValueError("--path_to_mediapipe_binary must be specified.")
-    input_fd, input_filename = tempfile.mkstemp()
-    output_fd, output_filename = tempfile.mkstemp()
-    cmd = [
-        path_to_mediapipe_binary,
-        "--calculator_graph_config_file=%s" % graph,
-        "--input_side_packets=input_sequence_example=%s" % input_filename,
-        "--output_side_packets=output_sequence_example=%s" % output_filename
-    ]
-    with open(input_filename, "wb") as input_file:
-      input_file.write(sequence_example.SerializeToString())
-    mediapipe_output = subprocess.check_output(cmd)
-    if b"Failed to run the graph" in mediapipe_output:
-      raise RuntimeError(mediapipe_output)
-    with open(output_filename, "rb") as output_file:
-      output_example = tf.train.SequenceExample()
-      output_example.ParseFromString(output_file.read())
-    os.close(input_fd)
-    os.remove(input_filename)
-    os.close(output_fd)
-    os.remove(output_filename)
-    return output_example
-
 
 def bytes23(string):
   """Creates a bytes string in either Python 2 or  3."""
@@ -291,21 +253,13 @@ def bytes23(string):
     return bytes(string)
 
 
-@contextlib.contextmanager
-def _close_on_exit(writers):
-  """Call close on all writers on exit."""
-  try:
-    yield writers
-  finally:
-    for writer in writers:
-      writer.close()
-
-
 def main(argv):
   if len(argv) > 1:
     raise app.UsageError("Too many command-line arguments.")
-  DemoDataset(flags.FLAGS.path_to_demo_data).generate_examples(
-      flags.FLAGS.path_to_mediapipe_binary, flags.FLAGS.path_to_graph_directory)
+  DemoDataset(flags.FLAGS.path_to_demo_data,
+              flags.FLAGS.download_cache_dir).generate_examples(
+      flags.FLAGS.path_to_mediapipe_binary, flags.FLAGS.path_to_graph_directory,
+      flags.FLAGS.num_workers)
 
 
 if __name__ == "__main__":
@@ -315,4 +269,10 @@ if __name__ == "__main__":
                       "Path to the MediaPipe run_graph_file_io_main binary.")
   flags.DEFINE_string("path_to_graph_directory", "",
                       "Path to directory containing the graph files.")
+  flags.DEFINE_string("download_cache_dir", None,
+                      "Directory to cache downloads in. Defaults to the data "
+                      "directory.")
+  flags.DEFINE_integer("num_workers", None,
+                       "Number of examples processed concurrently. Defaults "
+                       "to the number of CPUs.")
   app.run(main)
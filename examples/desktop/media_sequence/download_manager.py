@@ -0,0 +1,291 @@
+"""Copyright 2023 The MediaPipe Authors.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Resumable, concurrent downloads for the media_sequence data set builders.
+
+DownloadManager stores files in a cache directory that can be shared between
+data set builders. Files from servers that support HTTP range requests are
+downloaded as concurrent chunks, and the completed chunks are recorded next to
+the partial file so that an interrupted download resumes where it stopped.
+Other files are resumed from the end of the partial file when possible.
+
+The size and SHA-256 of every completed file are saved to a checksum manifest
+in the cache directory, which is locked while it is updated so that several
+processes can share the cache. Cached files are only reused if they match their
+manifest entry, and both cached files and downloads are checked against
+expected checksums when these are given. All the downloads of a manager share
+num_connections concurrent connections.
+
+   manager = DownloadManager("/path/to/cache")
+   local_path = manager.download(url)
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import contextlib
+from concurrent import futures
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from absl import logging
+
+MANIFEST_FILENAME = "checksums.json"
+_READ_SIZE = 1 << 20
+
+
+def _sha256(path):
+  digest = hashlib.sha256()
+  with open(path, "rb") as f:
+    for block in iter(lambda: f.read(_READ_SIZE), b""):
+      digest.update(block)
+  return digest.hexdigest()
+
+
+def _write_json(path, contents):
+  """Writes contents to path atomically."""
+  fd, temp_path = tempfile.mkstemp(
+      dir=os.path.dirname(path), prefix=os.path.basename(path) + ".",
+      suffix=".tmp")
+  try:
+    with os.fdopen(fd, "w") as f:
+      json.dump(contents, f, indent=2, sort_keys=True)
+    os.replace(temp_path, path)
+  except BaseException:
+    os.remove(temp_path)
+    raise
+
+
+def _read_json(path):
+  if not os.path.exists(path):
+    return {}
+  with open(path, "r") as f:
+    return json.load(f)
+
+
+class DownloadManager(object):
+  """Downloads files into a shared cache directory."""
+
+  def __init__(self, cache_dir, num_connections=8, chunk_size=32 << 20,
+               timeout=60, max_retries=3):
+    """Creates the manager.
+
+    Args:
+      cache_dir: the directory downloads are stored in.
+      num_connections: the maximum number of concurrent connections.
+      chunk_size: the size in bytes of each range request.
+      timeout: the timeout in seconds of blocking network operations.
+      max_retries: the number of times a failed request is retried.
+    """
+    self._cache_dir = cache_dir
+    self._num_connections = num_connections
+    self._chunk_size = chunk_size
+    self._timeout = timeout
+    self._max_retries = max_retries
+    self._manifest_path = os.path.join(cache_dir, MANIFEST_FILENAME)
+    self._lock = threading.Lock()
+    # Bounds the connections of all the downloads, including those of
+    # download_all and of the chunks of each download.
+    self._connections = threading.BoundedSemaphore(num_connections)
+    os.makedirs(cache_dir, exist_ok=True)
+
+  def download(self, url, filename=None, sha256=None):
+    """Downloads url into the cache directory unless it is already cached.
+
+    Args:
+      url: the URL to download.
+      filename: the name of the file in the cache directory. Defaults to the
+        last component of the URL.
+      sha256: the expected hex SHA-256 of the file, if known.
+
+    Returns:
+      The local path of the downloaded file.
+    Raises:
+      IOError: if the download fails or does not match the expected checksum.
+    """
+    filename = filename or url.split("/")[-1]
+    path = os.path.join(self._cache_dir, filename)
+    if os.path.exists(path) and self._is_cached(path, filename, sha256):
+      return path
+    logging.info("Downloading %s to %s.", url, path)
+    partial_path = path + ".partial"
+    size, accepts_ranges = self._probe(url)
+    if size is not None and accepts_ranges:
+      self._download_chunks(url, partial_path, size)
+    else:
+      self._download_stream(url, partial_path, accepts_ranges)
+    digest = _sha256(partial_path)
+    if sha256 is not None and digest != sha256:
+      os.remove(partial_path)
+      raise IOError("Checksum mismatch for %s: expected %s, got %s." %
+                    (url, sha256, digest))
+    os.replace(partial_path, path)
+    self._update_manifest(filename, {
+        "url": url,
+        "size": os.path.getsize(path),
+        "sha256": digest,
+    })
+    logging.info("Downloaded %s.", path)
+    return path
+
+  def download_all(self, urls):
+    """Downloads several URLs concurrently and returns their local paths.
+
+    The downloads share the num_connections connections of the manager.
+
+    Args:
+      urls: the URLs to download.
+
+    Returns:
+      The local paths of the downloaded files.
+    """
+    with futures.ThreadPoolExecutor(self._num_connections) as executor:
+      return list(executor.map(self.download, urls))
+
+  def _is_cached(self, path, filename, sha256):
+    """Returns whether the cached file matches the manifest and checksum."""
+    with self._manifest_lock(fcntl.LOCK_SH):
+      entry = _read_json(self._manifest_path).get(filename)
+    if entry is None:
+      # The file may be incomplete, e.g. written by an interrupted download.
+      logging.warning("No checksum for cached %s, downloading again.", path)
+      return False
+    if os.path.getsize(path) != entry["size"]:
+      logging.warning("Size mismatch for cached %s, downloading again.", path)
+      return False
+    if sha256 is not None and sha256 != _sha256(path):
+      logging.warning("Checksum mismatch for cached %s, downloading again.",
+                      path)
+      return False
+    return True
+
+  @contextlib.contextmanager
+  def _manifest_lock(self, operation):
+    """Locks the manifest against other threads and processes."""
+    with self._lock, open(self._manifest_path + ".lock", "a") as f:
+      fcntl.flock(f, operation)
+      try:
+        yield
+      finally:
+        fcntl.flock(f, fcntl.LOCK_UN)
+
+  def _update_manifest(self, filename, entry):
+    with self._manifest_lock(fcntl.LOCK_EX):
+      manifest = _read_json(self._manifest_path)
+      manifest[filename] = entry
+      _write_json(self._manifest_path, manifest)
+
+  def _open(self, url, start=None, end=None, method=None):
+    """Opens url, requesting bytes [start, end) if start is given."""
+    request = urllib.request.Request(url, method=method)
+    if start is not None:
+      request.add_header(
+          "Range", "bytes=%d-%s" % (start, "" if end is None else end - 1))
+    return urllib.request.urlopen(request, timeout=self._timeout)
+
+  def _retry(self, fn, *args):
+    """Calls fn, retrying with exponential backoff on network errors."""
+    for attempt in range(self._max_retries + 1):
+      try:
+        with self._connections:
+          return fn(*args)
+      except urllib.error.HTTPError as e:
+        if e.code < 500 or attempt == self._max_retries:
+          raise
+        logging.warning("Retrying after error: %s", e)
+        time.sleep(2**attempt)
+      except IOError as e:
+        if attempt == self._max_retries:
+          raise
+        logging.warning("Retrying after error: %s", e)
+        time.sleep(2**attempt)
+
+  def _probe(self, url):
+    """Returns the size of url, or None, and whether it accepts ranges."""
+    try:
+      with self._connections, self._open(url, method="HEAD") as response:
+        length = response.headers.get("Content-Length")
+        accepts_ranges = response.headers.get("Accept-Ranges") == "bytes"
+        return (int(length) if length is not None else None), accepts_ranges
+    except urllib.error.URLError:
+      return None, False
+
+  def _download_chunks(self, url, partial_path, size):
+    """Downloads the missing chunks of url into partial_path concurrently."""
+    state_path = partial_path + ".json"
+    state = _read_json(state_path)
+    expected_state = {"url": url, "size": size, "chunk_size": self._chunk_size}
+    if (not os.path.exists(partial_path) or
+        any(state.get(k) != v for k, v in expected_state.items())):
+      state = dict(expected_state, done=[])
+      with open(partial_path, "wb") as f:
+        f.truncate(size)
+      _write_json(state_path, state)
+    done = set(state["done"])
+    num_chunks = (size + self._chunk_size - 1) // self._chunk_size
+    missing = [i for i in range(num_chunks) if i not in done]
+    if done:
+      logging.info("Resuming %s with %d of %d chunks left.", url,
+                   len(missing), num_chunks)
+    fd = os.open(partial_path, os.O_WRONLY)
+    try:
+
+      def fetch_chunk(index):
+        start = index * self._chunk_size
+        end = min(start + self._chunk_size, size)
+        self._retry(self._fetch_range, url, fd, start, end)
+        with self._lock:
+          done.add(index)
+          _write_json(state_path, dict(expected_state, done=sorted(done)))
+
+      with futures.ThreadPoolExecutor(self._num_connections) as executor:
+        list(executor.map(fetch_chunk, missing))
+    finally:
+      os.close(fd)
+    os.remove(state_path)
+
+  def _fetch_range(self, url, fd, start, end):
+    """Writes bytes [start, end) of url at the same offsets of fd."""
+    with self._open(url, start, end) as response:
+      if response.status != 206:
+        raise IOError("Server ignored the range request for %s." % url)
+      offset = start
+      while offset < end:
+        block = response.read(min(_READ_SIZE, end - offset))
+        if not block:
+          raise IOError("Connection closed while downloading %s." % url)
+        os.pwrite(fd, block, offset)
+        offset += len(block)
+
+  def _download_stream(self, url, partial_path, accepts_ranges):
+    """Downloads url with one connection, resuming partial_path if possible."""
+
+    def fetch():
+      start = os.path.getsize(partial_path) if (
+          accepts_ranges and os.path.exists(partial_path)) else 0
+      with self._open(url, start or None) as response:
+        mode = "ab" if start and response.status == 206 else "wb"
+        with open(partial_path, mode) as f:
+          for block in iter(lambda: response.read(_READ_SIZE), b""):
+            f.write(block)
+
+    self._retry(fetch)
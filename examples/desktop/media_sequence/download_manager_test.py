@@ -0,0 +1,188 @@
+"""Copyright 2023 The MediaPipe Authors.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Tests for download_manager.py against a local HTTP server.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import hashlib
+import http.server
+import json
+import os
+import re
+import threading
+
+from absl.testing import absltest
+
+from mediapipe.examples.desktop.media_sequence import download_manager
+
+_CONTENTS = bytes(range(256)) * 40
+_CHUNK_SIZE = 1000
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+  """Serves _CONTENTS, honoring range requests if the server allows it."""
+
+  def log_message(self, *args):
+    pass
+
+  def _send_headers(self, status, start, end):
+    self.send_response(status)
+    self.send_header("Content-Length", str(end - start))
+    if self.server.accepts_ranges:
+      self.send_header("Accept-Ranges", "bytes")
+    if status == 206:
+      self.send_header("Content-Range",
+                       "bytes %d-%d/%d" % (start, end - 1, len(_CONTENTS)))
+    self.end_headers()
+
+  def handle_one_request(self):
+    with self.server.lock:
+      self.server.active_requests += 1
+      self.server.max_active_requests = max(self.server.max_active_requests,
+                                            self.server.active_requests)
+    try:
+      super().handle_one_request()
+    finally:
+      with self.server.lock:
+        self.server.active_requests -= 1
+
+  def do_HEAD(self):  # pylint: disable=invalid-name
+    self._send_headers(200, 0, len(_CONTENTS))
+
+  def do_GET(self):  # pylint: disable=invalid-name
+    match = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+    with self.server.lock:
+      self.server.requests.append(self.headers.get("Range"))
+    if match and self.server.accepts_ranges:
+      start = int(match.group(1))
+      end = int(match.group(2)) + 1 if match.group(2) else len(_CONTENTS)
+      self._send_headers(206, start, end)
+    else:
+      start, end = 0, len(_CONTENTS)
+      self._send_headers(200, start, end)
+    self.wfile.write(_CONTENTS[start:end])
+
+
+class DownloadManagerTest(absltest.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self._cache_dir = self.create_tempdir().full_path
+    self._server = http.server.ThreadingHTTPServer(("localhost", 0), _Handler)
+    self._server.accepts_ranges = True
+    self._server.requests = []
+    self._server.lock = threading.Lock()
+    self._server.active_requests = 0
+    self._server.max_active_requests = 0
+    thread = threading.Thread(target=self._server.serve_forever)
+    thread.start()
+    self.addCleanup(thread.join)
+    self.addCleanup(self._server.server_close)
+    self.addCleanup(self._server.shutdown)
+    self._url = "http://localhost:%d/data.bin" % self._server.server_port
+
+  def _create_manager(self):
+    return download_manager.DownloadManager(
+        self._cache_dir, num_connections=4, chunk_size=_CHUNK_SIZE,
+        max_retries=0)
+
+  def _read(self, path):
+    with open(path, "rb") as f:
+      return f.read()
+
+  def test_download_in_chunks(self):
+    path = self._create_manager().download(self._url)
+    self.assertEqual(os.path.join(self._cache_dir, "data.bin"), path)
+    self.assertEqual(_CONTENTS, self._read(path))
+    self.assertLen(self._server.requests, 11)
+    with open(os.path.join(self._cache_dir,
+                           download_manager.MANIFEST_FILENAME)) as f:
+      manifest = json.load(f)
+    self.assertEqual(hashlib.sha256(_CONTENTS).hexdigest(),
+                     manifest["data.bin"]["sha256"])
+
+  def test_cached_download_is_reused(self):
+    self._create_manager().download(self._url)
+    del self._server.requests[:]
+    self._create_manager().download(self._url)
+    self.assertEmpty(self._server.requests)
+
+  def test_cached_file_without_manifest_entry_is_downloaded(self):
+    with open(os.path.join(self._cache_dir, "data.bin"), "wb") as f:
+      f.write(_CONTENTS[:100])
+    path = self._create_manager().download(self._url)
+    self.assertEqual(_CONTENTS, self._read(path))
+    self.assertNotEmpty(self._server.requests)
+
+  def test_cached_file_is_checked_against_checksum(self):
+    path = self._create_manager().download(self._url)
+    # Corrupts the file without changing its size.
+    with open(path, "r+b") as f:
+      f.write(b"\xff" * 10)
+    del self._server.requests[:]
+    self._create_manager().download(
+        self._url, sha256=hashlib.sha256(_CONTENTS).hexdigest())
+    self.assertEqual(_CONTENTS, self._read(path))
+    self.assertNotEmpty(self._server.requests)
+
+  def test_resume_chunked_download(self):
+    manager = self._create_manager()
+    partial_path = os.path.join(self._cache_dir, "data.bin.partial")
+    with open(partial_path, "wb") as f:
+      f.write(_CONTENTS[:2 * _CHUNK_SIZE])
+      f.truncate(len(_CONTENTS))
+    with open(partial_path + ".json", "w") as f:
+      json.dump({"url": self._url, "size": len(_CONTENTS),
+                 "chunk_size": _CHUNK_SIZE, "done": [0, 1]}, f)
+    path = manager.download(self._url)
+    self.assertEqual(_CONTENTS, self._read(path))
+    self.assertNotIn("bytes=0-999", self._server.requests)
+    self.assertLen(self._server.requests, 9)
+    self.assertFalse(os.path.exists(partial_path + ".json"))
+
+  def test_resume_stream_download(self):
+    manager = download_manager.DownloadManager(self._cache_dir,
+                                               max_retries=0)
+    manager._probe = lambda url: (None, True)
+    with open(os.path.join(self._cache_dir, "data.bin.partial"), "wb") as f:
+      f.write(_CONTENTS[:100])
+    path = manager.download(self._url)
+    self.assertEqual(_CONTENTS, self._read(path))
+    self.assertEqual(["bytes=100-"], self._server.requests)
+
+  def test_download_without_range_support(self):
+    self._server.accepts_ranges = False
+    path = self._create_manager().download(self._url, filename="other.bin")
+    self.assertEqual(_CONTENTS, self._read(path))
+    self.assertEqual([None], self._server.requests)
+
+  def test_checksum_mismatch_raises(self):
+    with self.assertRaisesRegex(IOError, "Checksum mismatch"):
+      self._create_manager().download(self._url, sha256="0" * 64)
+    self.assertFalse(
+        os.path.exists(os.path.join(self._cache_dir, "data.bin")))
+
+  def test_download_all(self):
+    paths = self._create_manager().download_all(
+        [self._url, self._url.replace("data.bin", "copy.bin")])
+    self.assertEqual([_CONTENTS, _CONTENTS], [self._read(p) for p in paths])
+    self.assertLessEqual(self._server.max_active_requests, 4)
+
+
+if __name__ == "__main__":
+  absltest.main()
@@ -26,11 +26,11 @@ Running this code as a module generates the data set on disk. First, the
 required files are downloaded (_download_data) which enables constructing the
 label map. Then (in generate_examples), for each split in the data set, the
 metadata is generated from the annotations for each example
-(_generate_metadata), and MediaPipe is used to fill in the video frames
-(_run_mediapipe). This script processes local video files defined in a custom
-CSV in a comparable manner to the Kinetics data set for evaluating and
-predicting values on your own data. The data set is written to disk as a set of
-numbered TFRecord files.
+(_generate_metadata), and a pool of MediaPipe workers is used to fill in the
+video frames (parallel_generation). This script processes local video files
+defined in a custom CSV in a comparable manner to the Kinetics data set for
+evaluating and predicting values on your own data. The data set is written to
+disk as a set of numbered TFRecord files.
 
 The custom CSV format must match the Kinetics data set format, with columns
 corresponding to [[label_name], video, start, end, split] followed by lines with
@@ -65,23 +65,21 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
-import contextlib
 import csv
 import os
 import random
-import subprocess
 import sys
 import tarfile
-import tempfile
 
 from absl import app
 from absl import flags
 from absl import logging
 from six.moves import range
-from six.moves import urllib
 from six.moves import zip
 import tensorflow.compat.v1 as tf
 
+from mediapipe.examples.desktop.media_sequence import download_manager
+from mediapipe.examples.desktop.media_sequence import parallel_generation
 from mediapipe.util.sequence import media_sequence as ms
 
 CITATION = r"""@article{kay2017kinetics,
@@ -120,10 +118,18 @@ NUM_CLASSES = 700
 class Kinetics(object):
   """Generates and loads the Kinetics data set."""
 
-  def __init__(self, path_to_data):
+  def __init__(self, path_to_data, download_cache_dir=None):
+    """Creates the data set.
+
+    Args:
+      path_to_data: the directory the data set is written to and read from.
+      download_cache_dir: the directory downloads are cached in, which can be
+        shared with other data sets. Defaults to path_to_data.
+    """
     if not path_to_data:
       raise ValueError("You must supply the path to the data directory.")
     self.path_to_data = path_to_data
+    self.download_cache_dir = download_cache_dir or path_to_data
 
   def as_dataset(self, split, shuffle=False, repeat=False,
                  serialized_prefetch_size=32, decoded_prefetch_size=32,
@@ -202,7 +208,7 @@ class Kinetics(object):
     if split not in SPLITS:
       raise ValueError("Split %s not in %s" % split, str(list(SPLITS.keys())))
     all_shards = tf.io.gfile.glob(
-        os.path.join(self.path_to_data, FILEPATTERN % split + "-*-of-*"))
+        os.path.join(self.path_to_data, FILEPATTERN % split + "-*-of-?????"))
     random.shuffle(all_shards)
     all_shards_dataset = tf.data.Dataset.from_tensor_slices(all_shards)
     cycle_length = min(16, len(all_shards))
@@ -226,7 +232,8 @@ class Kinetics(object):
                         only_generate_metadata=False,
                         splits_to_process="train,val,test",
                         video_path_format_string=None,
-                        download_labels_for_map=True):
+                        download_labels_for_map=True,
+                        num_workers=None):
     """Downloads data and generates sharded TFRecords.
 
     Downloads the data files, generates metadata, and processes the metadata
@@ -247,6 +254,8 @@ class Kinetics(object):
       video_path_format_string: The format string for the path to local files.
       download_labels_for_map: If true, download the annotations to create the
         label map.
+      num_workers: The number of examples processed concurrently. Defaults to
+        the number of CPUs.
     """
     if not path_to_mediapipe_binary:
       raise ValueError(
@@ -270,17 +279,12 @@ class Kinetics(object):
       shard_names = [os.path.join(
           self.path_to_data, FILEPATTERN % key + "-%05d-of-%05d" % (
               i, shards)) for i in range(shards)]
-      writers = [tf.io.TFRecordWriter(shard_name) for shard_name in shard_names]
-      with _close_on_exit(writers) as writers:
-        for i, seq_ex in enumerate(all_metadata):
-          if not only_generate_metadata:
-            print("Processing example %d of %d   (%d%%) \r" % (
-                i, len(all_metadata), i * 100 / len(all_metadata)), end="")
-            for graph in GRAPHS:
-              graph_path = os.path.join(path_to_graph_directory, graph)
-              seq_ex = self._run_mediapipe(
-                  path_to_mediapipe_binary, seq_ex, graph_path)
-          writers[i % len(writers)].write(seq_ex.SerializeToString())
+      graph_paths = [] if only_generate_metadata else [
+          os.path.join(path_to_graph_directory, graph) for graph in GRAPHS
+      ]
+      parallel_generation.write_sequence_examples(
+          all_metadata, shard_names, path_to_mediapipe_binary, graph_paths,
+          num_workers)
     logging.info("Data extraction complete.")
 
   def _generate_metadata(self, key, download_output,
@@ -328,20 +332,13 @@ class Kinetics(object):
 
   def _download_data(self, download_labels_for_map):
     """Downloads and extracts data if not already available."""
-    if sys.version_info >= (3, 0):
-      urlretrieve = urllib.request.urlretrieve
-    else:
-      urlretrieve = urllib.request.urlretrieve
     logging.info("Creating data directory.")
     tf.io.gfile.makedirs(self.path_to_data)
     logging.info("Downloading annotations.")
     paths = {}
     if download_labels_for_map:
-      tar_path = os.path.join(self.path_to_data, ANNOTATION_URL.split("/")[-1])
-      if not tf.io.gfile.exists(tar_path):
-        urlretrieve(ANNOTATION_URL, tar_path)
-        with tarfile.open(tar_path) as annotations_tar:
-          annotations_tar.extractall(self.path_to_data)
+      tar_path = download_manager.DownloadManager(
+          self.download_cache_dir).download(ANNOTATION_URL)
       for split in ["train", "test", "validate"]:
         csv_path = os.path.join(self.path_to_data, "kinetics700/%s.csv" % split)
         if not tf.io.gfile.exists(csv_path):
@@ -355,43 +352,6 @@ class Kinetics(object):
                  download_labels_for_map else None)
     return paths, label_map
 
-  def _run_mediapipe(self, path_to_mediapipe_binary, sequence_example, graph):
-    """Runs MediaPipe over MediaSequence tf.train.SequenceExamples.
-
-    Args:
-      path_to_mediapipe_binary: Path to the compiled binary for the BUILD target
-        mediapipe/examples/desktop/demo:media_sequence_demo.
-      sequence_example: The SequenceExample with metadata or partial data file.
-      graph: The path to the graph that extracts data to add to the
-        SequenceExample.
-    Returns:
-      A copy of the input SequenceExample with additional data fields added
-      by the MediaPipe graph.
-    Raises:
-      RuntimeError: if MediaPipe returns an error or fails to run the graph.
-    """
-    if not path_to_mediapipe_binary:
-      raise ValueError("--path_to_mediapipe_binary must be specified.")
-    input_fd, input_filename = tempfile.mkstemp()
-    output_fd, output_filename = tempfile.mkstemp()
-    cmd = [path_to_mediapipe_binary,
-           "--calculator_graph_config_file=%s" % graph,
-           "--input_side_packets=input_sequence_example=%s" % input_filename,
-           "--output_side_packets=output_sequence_example=%s" % output_filename]
-    with open(input_filename, "wb") as input_file:
-      input_file.write(sequence_example.SerializeToString())
-    mediapipe_output = subprocess.check_output(cmd)
-    if b"Failed to run the graph" in mediapipe_output:
-      raise RuntimeError(mediapipe_output)
-    with open(output_filename, "rb") as output_file:
-      output_example = tf.train.SequenceExample()
-      output_example.ParseFromString(output_file.read())
-    os.close(input_fd)
-    os.remove(input_filename)
-    os.close(output_fd)
-    os.remove(output_filename)
-    return output_example
-
   def get_label_map_and_verify_example_counts(self, paths):
     """Verify the number of examples and labels have not changed."""
     for name, path in paths.items():
@@ -423,28 +383,20 @@ def bytes23(string):
     return bytes(string)
 
 
-@contextlib.contextmanager
-def _close_on_exit(writers):
-  """Call close on all writers on exit."""
-  try:
-    yield writers
-  finally:
-    for writer in writers:
-      writer.close()
-
-
 def main(argv):
   if len(argv) > 1:
     raise app.UsageError("Too many command-line arguments.")
   if flags.FLAGS.path_to_custom_csv:
     SPLITS["custom"]["csv"] = flags.FLAGS.path_to_custom_csv
-  Kinetics(flags.FLAGS.path_to_kinetics_data).generate_examples(
+  Kinetics(flags.FLAGS.path_to_kinetics_data,
+           flags.FLAGS.download_cache_dir).generate_examples(
       flags.FLAGS.path_to_mediapipe_binary,
       flags.FLAGS.path_to_graph_directory,
       flags.FLAGS.only_generate_metadata,
       flags.FLAGS.splits_to_process,
       flags.FLAGS.video_path_format_string,
-      flags.FLAGS.download_labels_for_map)
+      flags.FLAGS.download_labels_for_map,
+      flags.FLAGS.num_workers)
 
 if __name__ == "__main__":
   flags.DEFINE_string("path_to_kinetics_data",
@@ -456,6 +408,14 @@ if __name__ == "__main__":
   flags.DEFINE_string("path_to_graph_directory",
                       "",
                       "Path to directory containing the graph files.")
+  flags.DEFINE_string("download_cache_dir",
+                      None,
+                      "Directory to cache downloads in. Defaults to the data "
+                      "directory.")
+  flags.DEFINE_integer("num_workers",
+                       None,
+                       "Number of examples processed concurrently. Defaults "
+                       "to the number of CPUs.")
   flags.DEFINE_boolean("only_generate_metadata",
                        False,
                        "If true, only generate the metadata files.")
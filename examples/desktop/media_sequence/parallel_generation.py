@@ -0,0 +1,350 @@
+r"""Copyright 2023 The MediaPipe Authors.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Parallel and resumable generation of MediaSequence data sets.
+
+Running MediaPipe once per example and graph pays for process start up and
+graph initialization every time. MediaPipeWorkerPool instead keeps one
+persistent run_graph_file_io_main process per graph and worker, started with
+--serve_from_stdin, and processes examples concurrently across workers.
+Results are returned in input order so they can be streamed to
+ResumableShardWriter, which checkpoints its progress and continues where it
+stopped if generation is restarted.
+
+   parallel_generation.write_sequence_examples(
+       all_metadata, shard_paths, path_to_mediapipe_binary, graph_paths,
+       num_workers=8)
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import collections
+from concurrent import futures
+import hashlib
+import json
+import os
+import queue
+import shutil
+import struct
+import subprocess
+
+from absl import logging
+import tensorflow.compat.v1 as tf
+
+from mediapipe.util.sequence import media_sequence_index
+
+
+class _GraphProcess(object):
+  """A run_graph_file_io_main process serving one graph over stdin/stdout."""
+
+  def __init__(self, path_to_mediapipe_binary, graph_path):
+    self._cmd = [
+        path_to_mediapipe_binary,
+        "--calculator_graph_config_file=%s" % graph_path,
+        "--serve_from_stdin"
+    ]
+    self._process = None
+
+  def _start(self):
+    if self._process is None or self._process.poll() is not None:
+      self._process = subprocess.Popen(
+          self._cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+  def _read(self, size):
+    data = self._process.stdout.read(size)
+    if len(data) != size:
+      self.close()
+      raise RuntimeError("MediaPipe exited while running %s." % self._cmd[1])
+    return data
+
+  def run(self, serialized_example):
+    """Returns the output side packet of running the graph on the input."""
+    self._start()
+    try:
+      self._process.stdin.write(
+          struct.pack("<Q", len(serialized_example)) + serialized_example)
+      self._process.stdin.flush()
+    except (BrokenPipeError, OSError):
+      self.close()
+      raise RuntimeError("MediaPipe exited while running %s." % self._cmd[1])
+    status, length = struct.unpack("<BQ", self._read(9))
+    output = self._read(length)
+    if status:
+      raise RuntimeError(output.decode("utf-8", "replace"))
+    return output
+
+  def close(self):
+    if self._process is not None:
+      self._process.stdin.close()
+      self._process.wait()
+      self._process.stdout.close()
+      self._process = None
+
+
+class MediaPipeWorkerPool(object):
+  """Runs a chain of MediaPipe graphs over SequenceExamples concurrently."""
+
+  def __init__(self, path_to_mediapipe_binary, graph_paths, num_workers=None):
+    """Creates the pool. Worker processes are started on first use.
+
+    Args:
+      path_to_mediapipe_binary: Path to the compiled binary for the BUILD target
+        mediapipe/examples/desktop/demo:media_sequence_demo.
+      graph_paths: the paths of the graphs to run, in order, on each example.
+      num_workers: the number of examples processed concurrently. Defaults to
+        the number of CPUs.
+    """
+    if not path_to_mediapipe_binary:
+      raise ValueError("--path_to_mediapipe_binary must be specified.")
+    self._num_workers = num_workers or os.cpu_count() or 1
+    self._workers = queue.Queue()
+    self._all_workers = []
+    for _ in range(self._num_workers):
+      worker = [
+          _GraphProcess(path_to_mediapipe_binary, graph_path)
+          for graph_path in graph_paths
+      ]
+      self._all_workers.append(worker)
+      self._workers.put(worker)
+
+  def run(self, serialized_example):
+    """Runs every graph on one serialized SequenceExample.
+
+    Args:
+      serialized_example: the SequenceExample with metadata, as bytes.
+
+    Returns:
+      The serialized SequenceExample with the data added by the graphs.
+    Raises:
+      RuntimeError: if MediaPipe returns an error or fails to run a graph.
+    """
+    worker = self._workers.get()
+    try:
+      for graph_process in worker:
+        serialized_example = graph_process.run(serialized_example)
+      return serialized_example
+    finally:
+      self._workers.put(worker)
+
+  def imap(self, serialized_examples, max_pending=None):
+    """Yields the results of run() for each input, in input order.
+
+    Args:
+      serialized_examples: an iterable of serialized SequenceExamples.
+      max_pending: the maximum number of examples in flight. Bounds the memory
+        held by results waiting on a slower earlier example. Defaults to four
+        times the number of workers.
+
+    Yields:
+      Each processed, serialized SequenceExample.
+    """
+    max_pending = max_pending or 4 * self._num_workers
+    pending = collections.deque()
+    with futures.ThreadPoolExecutor(self._num_workers) as executor:
+      for serialized_example in serialized_examples:
+        pending.append(executor.submit(self.run, serialized_example))
+        if len(pending) >= max_pending:
+          yield pending.popleft().result()
+      while pending:
+        yield pending.popleft().result()
+
+  def close(self):
+    for worker in self._all_workers:
+      for graph_process in worker:
+        graph_process.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *args):
+    self.close()
+
+
+class ResumableShardWriter(object):
+  """Writes records round robin to TFRecord shards with resumable progress.
+
+  Records are first written to a segment file next to each shard. Every
+  checkpoint_every records, the segments are appended to the shards and the
+  number of records and the shard sizes are saved to a progress file. When a
+  writer is created for shards with a progress file, the shards are truncated
+  to the last checkpoint and num_written records are skipped by the caller.
+  The progress file is kept after close() so that a finished split is not
+  regenerated; delete it to start over.
+
+  Each shard also gets a media_sequence_index file with the offset and keys of
+  its records, which is kept in step with the shard at every checkpoint.
+  """
+
+  def __init__(self, shard_paths, progress_path=None, checkpoint_every=1000,
+               fingerprint=None, write_index=True):
+    """Opens the shards, resuming from the progress file if it exists.
+
+    Args:
+      shard_paths: the paths of the local TFRecord shards.
+      progress_path: the path of the progress file. Defaults to the first
+        shard path with a ".progress" suffix.
+      checkpoint_every: the number of records written between checkpoints.
+      fingerprint: an optional string identifying the input, e.g. its size.
+        Resuming with a different fingerprint raises a ValueError.
+      write_index: whether to write a media_sequence_index file per shard.
+    """
+    self._shard_paths = list(shard_paths)
+    self._progress_path = progress_path or self._shard_paths[0] + ".progress"
+    self._checkpoint_every = checkpoint_every
+    self._fingerprint = fingerprint
+    self._write_index = write_index
+    self._segment_writers = None
+    self._num_pending = 0
+    progress = self._read_progress()
+    self.num_written = progress["num_written"]
+    self._shard_sizes = progress["shard_sizes"]
+    num_shards = len(self._shard_paths)
+    for i, (path, size) in enumerate(zip(self._shard_paths, self._shard_sizes)):
+      with open(path, "ab") as shard:
+        shard.truncate(size)
+      if write_index:
+        num_records = self.num_written // num_shards + (
+            1 if i < self.num_written % num_shards else 0)
+        media_sequence_index.truncate_index(path, num_records)
+    self._offsets = list(self._shard_sizes)
+    self._index_entries = [[] for _ in self._shard_paths]
+    if self.num_written:
+      logging.info("Resuming after %d records from %s.", self.num_written,
+                   self._progress_path)
+
+  def _read_progress(self):
+    """Returns the saved progress, or empty progress for a new output."""
+    if not os.path.exists(self._progress_path):
+      return {
+          "num_written": 0,
+          "shard_sizes": [0] * len(self._shard_paths),
+      }
+    with open(self._progress_path, "r") as f:
+      progress = json.load(f)
+    if len(progress["shard_sizes"]) != len(self._shard_paths):
+      raise ValueError("%s was written for %d shards, not %d." %
+                       (self._progress_path, len(progress["shard_sizes"]),
+                        len(self._shard_paths)))
+    if progress.get("fingerprint") != self._fingerprint:
+      raise ValueError("%s was written for different input. Delete it to "
+                       "start over." % self._progress_path)
+    return progress
+
+  def _segment_path(self, index):
+    return self._shard_paths[index] + ".segment"
+
+  def write(self, record):
+    """Writes the next record to its shard."""
+    if self._segment_writers is None:
+      self._segment_writers = [
+          tf.io.TFRecordWriter(self._segment_path(i))
+          for i in range(len(self._shard_paths))
+      ]
+    shard_index = self.num_written % len(self._shard_paths)
+    self._segment_writers[shard_index].write(record)
+    if self._write_index:
+      self._index_entries[shard_index].append(
+          media_sequence_index.make_index_entry(record,
+                                                self._offsets[shard_index]))
+      self._offsets[shard_index] += media_sequence_index.get_record_size(
+          record)
+    self.num_written += 1
+    self._num_pending += 1
+    if self._num_pending >= self._checkpoint_every:
+      self.checkpoint()
+
+  def checkpoint(self):
+    """Appends the written records to the shards and saves the progress."""
+    if self._segment_writers is None:
+      return
+    for writer in self._segment_writers:
+      writer.close()
+    self._segment_writers = None
+    for i, path in enumerate(self._shard_paths):
+      with open(self._segment_path(i), "rb") as segment, open(path,
+                                                              "ab") as shard:
+        shutil.copyfileobj(segment, shard)
+        self._shard_sizes[i] = shard.tell()
+      if self._write_index:
+        media_sequence_index.append_index_entries(
+            media_sequence_index.get_index_path(path), self._index_entries[i])
+        self._index_entries[i] = []
+    temp_path = self._progress_path + ".tmp"
+    with open(temp_path, "w") as f:
+      json.dump({
+          "num_written": self.num_written,
+          "shard_sizes": self._shard_sizes,
+          "fingerprint": self._fingerprint,
+      }, f)
+    os.replace(temp_path, self._progress_path)
+    for i in range(len(self._shard_paths)):
+      os.remove(self._segment_path(i))
+    self._num_pending = 0
+
+  def close(self):
+    self.checkpoint()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *args):
+    self.close()
+
+
+def write_sequence_examples(sequence_examples, shard_paths,
+                            path_to_mediapipe_binary=None, graph_paths=(),
+                            num_workers=None, postprocess_fn=None):
+  """Runs MediaPipe over SequenceExamples and writes them to TFRecord shards.
+
+  Example i is written to shard i % len(shard_paths). If a previous call for
+  the same examples and shards was interrupted, the examples written before
+  its last checkpoint are skipped.
+
+  Args:
+    sequence_examples: a list of tf.train.SequenceExamples with metadata.
+    shard_paths: the paths of the local TFRecord shards.
+    path_to_mediapipe_binary: Path to the compiled binary for the BUILD target
+      mediapipe/examples/desktop/demo:media_sequence_demo.
+    graph_paths: the paths of the graphs to run, in order, on each example. If
+      empty, the metadata is written as is.
+    num_workers: the number of examples processed concurrently. Defaults to
+      the number of CPUs.
+    postprocess_fn: an optional function applied to each serialized output
+      before it is written, e.g. to add precomputed training targets.
+  """
+  if postprocess_fn is None:
+    postprocess_fn = lambda serialized_example: serialized_example
+  serialized_examples = [
+      sequence_example.SerializeToString()
+      for sequence_example in sequence_examples
+  ]
+  fingerprint = hashlib.sha256()
+  for serialized_example in serialized_examples:
+    fingerprint.update(hashlib.sha256(serialized_example).digest())
+  with ResumableShardWriter(
+      shard_paths, fingerprint=fingerprint.hexdigest()) as writer:
+    remaining = serialized_examples[writer.num_written:]
+    if not graph_paths:
+      for serialized_example in remaining:
+        writer.write(postprocess_fn(serialized_example))
+      return
+    with MediaPipeWorkerPool(path_to_mediapipe_binary, graph_paths,
+                             num_workers) as pool:
+      for serialized_example in pool.imap(remaining):
+        writer.write(postprocess_fn(serialized_example))
+        print("Processed example %d of %d   (%d%%) \r" % (
+            writer.num_written, len(serialized_examples),
+            writer.num_written * 100 / len(serialized_examples)), end="")
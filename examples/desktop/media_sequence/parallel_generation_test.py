@@ -0,0 +1,208 @@
+"""Copyright 2023 The MediaPipe Authors.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Tests for parallel_generation.py.
+
+The worker pool is run against a stub of run_graph_file_io_main that speaks the
+--serve_from_stdin protocol: every response is the request followed by the
+contents of the graph file, requests containing b"fail" get an error status and
+requests containing b"crash" make the stub exit.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+import stat
+import sys
+
+from absl.testing import absltest
+import tensorflow.compat.v1 as tf
+
+from mediapipe.examples.desktop.media_sequence import parallel_generation
+from mediapipe.util.sequence import media_sequence as ms
+from mediapipe.util.sequence import media_sequence_index
+
+_STUB_BINARY = r"""#!%s
+import struct
+import sys
+
+flag = "--calculator_graph_config_file="
+graph_path = [arg[len(flag):] for arg in sys.argv if arg.startswith(flag)][0]
+with open(graph_path, "rb") as f:
+  suffix = f.read()
+while True:
+  header = sys.stdin.buffer.read(8)
+  if len(header) != 8:
+    break
+  request = sys.stdin.buffer.read(struct.unpack("<Q", header)[0])
+  if b"crash" in request:
+    sys.exit(1)
+  if b"fail" in request:
+    status, response = 1, b"Graph failed."
+  else:
+    status, response = 0, request + suffix
+  sys.stdout.buffer.write(struct.pack("<BQ", status, len(response)) + response)
+  sys.stdout.buffer.flush()
+"""
+
+
+def _make_record(index):
+  sequence_example = tf.train.SequenceExample()
+  ms.set_example_id(b"example_%d" % index, sequence_example)
+  return sequence_example.SerializeToString()
+
+
+def _read_records(path):
+  return list(tf.io.tf_record_iterator(path))
+
+
+class MediaPipeWorkerPoolTest(absltest.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self._binary_path = self.create_tempfile(
+        "stub_binary", content=_STUB_BINARY % sys.executable).full_path
+    os.chmod(self._binary_path,
+             os.stat(self._binary_path).st_mode | stat.S_IEXEC)
+
+  def _create_graph(self, suffix):
+    return self.create_tempfile(content=suffix, mode="wb").full_path
+
+  def test_imap_runs_graphs_in_order(self):
+    graph_paths = [self._create_graph(b"-a"), self._create_graph(b"-b")]
+    inputs = [b"%d" % i for i in range(20)]
+    with parallel_generation.MediaPipeWorkerPool(
+        self._binary_path, graph_paths, num_workers=3) as pool:
+      outputs = list(pool.imap(inputs, max_pending=4))
+    self.assertEqual([x + b"-a-b" for x in inputs], outputs)
+
+  def test_graph_error_propagates(self):
+    with parallel_generation.MediaPipeWorkerPool(
+        self._binary_path, [self._create_graph(b"")], num_workers=2) as pool:
+      with self.assertRaisesRegex(RuntimeError, "Graph failed."):
+        list(pool.imap([b"0", b"fail", b"2"]))
+      # The worker keeps serving after an error status.
+      self.assertEqual(b"3", pool.run(b"3"))
+
+  def test_crashed_worker_is_restarted(self):
+    with parallel_generation.MediaPipeWorkerPool(
+        self._binary_path, [self._create_graph(b"")], num_workers=1) as pool:
+      with self.assertRaisesRegex(RuntimeError, "MediaPipe exited"):
+        pool.run(b"crash")
+      self.assertEqual(b"1", pool.run(b"1"))
+
+  def test_close_stops_worker_processes(self):
+    pool = parallel_generation.MediaPipeWorkerPool(
+        self._binary_path, [self._create_graph(b"")], num_workers=2)
+    list(pool.imap([b"0", b"1", b"2", b"3"]))
+    processes = [
+        graph_process._process
+        for worker in pool._all_workers
+        for graph_process in worker
+        if graph_process._process is not None
+    ]
+    self.assertNotEmpty(processes)
+    pool.close()
+    for process in processes:
+      self.assertIsNotNone(process.poll())
+
+  def test_missing_binary_raises(self):
+    with self.assertRaises(ValueError):
+      parallel_generation.MediaPipeWorkerPool("", ["graph.pbtxt"])
+
+  def test_write_sequence_examples_after_interruption(self):
+    output_dir = self.create_tempdir().full_path
+    shard_paths = [os.path.join(output_dir, "records-%d" % i) for i in range(2)]
+    sequence_examples = [
+        tf.train.SequenceExample.FromString(_make_record(i)) for i in range(5)
+    ]
+    graph_paths = [self._create_graph(b"")]
+
+    def interrupt(serialized_example):
+      if ms.get_example_id(tf.train.SequenceExample.FromString(
+          serialized_example)) == b"example_3":
+        raise KeyboardInterrupt()
+      return serialized_example
+
+    with self.assertRaises(KeyboardInterrupt):
+      parallel_generation.write_sequence_examples(
+          sequence_examples, shard_paths, self._binary_path, graph_paths,
+          num_workers=2, postprocess_fn=interrupt)
+    parallel_generation.write_sequence_examples(
+        sequence_examples, shard_paths, self._binary_path, graph_paths,
+        num_workers=2)
+    records = [_make_record(i) for i in range(5)]
+    self.assertEqual(records[0::2], _read_records(shard_paths[0]))
+    self.assertEqual(records[1::2], _read_records(shard_paths[1]))
+
+
+class ResumableShardWriterTest(absltest.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    output_dir = self.create_tempdir().full_path
+    self._shard_paths = [
+        os.path.join(output_dir, "records-%05d-of-00002" % i) for i in range(2)
+    ]
+    self._records = [_make_record(i) for i in range(10)]
+
+  def _assert_shards_hold(self, records):
+    for i, path in enumerate(self._shard_paths):
+      self.assertEqual(records[i::2], _read_records(path))
+      index = media_sequence_index.read_index(
+          media_sequence_index.get_index_path(path))
+      self.assertEqual([ms.get_example_id(
+          tf.train.SequenceExample.FromString(record)).decode("utf-8")
+                        for record in records[i::2]],
+                       [entry[ms.EXAMPLE_ID_KEY] for entry in index])
+
+  def test_write_round_robin(self):
+    with parallel_generation.ResumableShardWriter(
+        self._shard_paths, checkpoint_every=3) as writer:
+      for record in self._records:
+        writer.write(record)
+    self._assert_shards_hold(self._records)
+
+  def test_resume_after_partial_shard(self):
+    writer = parallel_generation.ResumableShardWriter(
+        self._shard_paths, checkpoint_every=3, fingerprint="input")
+    for record in self._records[:7]:
+      writer.write(record)
+    # Simulates an interruption after the checkpoint of 6 records, while the
+    # next records were being appended to the first shard.
+    with open(self._shard_paths[0], "ab") as shard:
+      shard.write(self._records[6][:10])
+
+    writer = parallel_generation.ResumableShardWriter(
+        self._shard_paths, checkpoint_every=3, fingerprint="input")
+    self.assertEqual(6, writer.num_written)
+    self._assert_shards_hold(self._records[:6])
+    with writer:
+      for record in self._records[writer.num_written:]:
+        writer.write(record)
+    self._assert_shards_hold(self._records)
+
+  def test_resume_with_other_input_raises(self):
+    with parallel_generation.ResumableShardWriter(
+        self._shard_paths, fingerprint="input") as writer:
+      writer.write(self._records[0])
+    with self.assertRaisesRegex(ValueError, "different input"):
+      parallel_generation.ResumableShardWriter(
+          self._shard_paths, fingerprint="other input")
+
+
+if __name__ == "__main__":
+  absltest.main()
@@ -15,7 +15,17 @@
 // A simple main function to run a MediaPipe graph. Input side packets are read
 // from files provided via the command line and output side packets are written
 // to disk.
+//
+// With --serve_from_stdin, the graph is initialized once and run repeatedly,
+// once per request read from stdin. Each request is a little-endian uint64
+// length followed by the contents of the side packet named by
+// --stdin_input_side_packet. Each response is a status byte (0 for success),
+// a little-endian uint64 length, and either the contents of the side packet
+// named by --stdout_output_side_packet or the error message.
+#include <cstdint>
+#include <cstdio>
 #include <cstdlib>
+#include <memory>
 
 #include "absl/flags/flag.h"
 #include "absl/flags/parse.h"
@@ -37,6 +47,79 @@ ABSL_FLAG(std::string, output_side_packets, "",
           "Comma-separated list of key=value pairs specifying the output "
           "side packets and paths to write to disk for the "
           "CalculatorGraph.");
+ABSL_FLAG(bool, serve_from_stdin, false,
+          "If true, runs the graph once for every request read from stdin "
+          "and writes the responses to stdout instead of using files.");
+ABSL_FLAG(std::string, stdin_input_side_packet, "input_sequence_example",
+          "Name of the input side packet read from stdin with "
+          "--serve_from_stdin.");
+ABSL_FLAG(std::string, stdout_output_side_packet, "output_sequence_example",
+          "Name of the output side packet written to stdout with "
+          "--serve_from_stdin.");
+
+namespace {
+
+// Reads a length-prefixed request from stdin. Returns false at end of input.
+bool ReadRequest(std::string* contents) {
+  uint8_t header[8];
+  if (std::fread(header, 1, sizeof(header), stdin) != sizeof(header)) {
+    return false;
+  }
+  uint64_t length = 0;
+  for (int i = 7; i >= 0; --i) {
+    length = (length << 8) | header[i];
+  }
+  contents->resize(length);
+  return length == 0 ||
+         std::fread(&(*contents)[0], 1, length, stdin) == length;
+}
+
+void WriteResponse(bool ok, const std::string& contents) {
+  uint8_t header[9];
+  header[0] = ok ? 0 : 1;
+  uint64_t length = contents.size();
+  for (int i = 1; i < 9; ++i) {
+    header[i] = length & 0xff;
+    length >>= 8;
+  }
+  std::fwrite(header, 1, sizeof(header), stdout);
+  std::fwrite(contents.data(), 1, contents.size(), stdout);
+  std::fflush(stdout);
+}
+
+absl::StatusOr<std::string> RunOnce(mediapipe::CalculatorGraph* graph,
+                                    const std::string& input) {
+  MP_RETURN_IF_ERROR(graph->Run(
+      {{absl::GetFlag(FLAGS_stdin_input_side_packet),
+        mediapipe::MakePacket<std::string>(input)}}));
+  ASSIGN_OR_RETURN(mediapipe::Packet output_packet,
+                   graph->GetOutputSidePacket(
+                       absl::GetFlag(FLAGS_stdout_output_side_packet)));
+  return output_packet.Get<std::string>();
+}
+
+// Keeps the graph initialized across requests so that process start up and
+// graph initialization are paid once per worker instead of once per example.
+absl::Status ServeMPPGraph(const mediapipe::CalculatorGraphConfig& config) {
+  auto graph = std::make_unique<mediapipe::CalculatorGraph>();
+  MP_RETURN_IF_ERROR(graph->Initialize(config));
+  std::string input;
+  while (ReadRequest(&input)) {
+    absl::StatusOr<std::string> output = RunOnce(graph.get(), input);
+    if (output.ok()) {
+      WriteResponse(true, *output);
+      continue;
+    }
+    LOG(ERROR) << "Failed to run the graph: " << output.status().message();
+    WriteResponse(false, std::string(output.status().message()));
+    // Start the next request from a freshly initialized graph.
+    graph = std::make_unique<mediapipe::CalculatorGraph>();
+    MP_RETURN_IF_ERROR(graph->Initialize(config));
+  }
+  return absl::OkStatus();
+}
+
+}  // namespace
 
 absl::Status RunMPPGraph() {
   std::string calculator_graph_config_contents;
@@ -48,6 +131,9 @@ absl::Status RunMPPGraph() {
   mediapipe::CalculatorGraphConfig config =
       mediapipe::ParseTextProtoOrDie<mediapipe::CalculatorGraphConfig>(
           calculator_graph_config_contents);
+  if (absl::GetFlag(FLAGS_serve_from_stdin)) {
+    return ServeMPPGraph(config);
+  }
   std::map<std::string, mediapipe::Packet> input_side_packets;
   std::vector<std::string> kv_pairs =
       absl::StrSplit(absl::GetFlag(FLAGS_input_side_packets), ',');
@@ -13,10 +13,15 @@
 // limitations under the License.
 //
 // A simple main function to run a MediaPipe graph.
+#include <cstdint>
+#include <cstdio>
 #include <cstdlib>
 #include <fstream>
 #include <iostream>
 #include <map>
+#include <memory>
+#include <optional>
+#include <sstream>
 #include <string>
 #include <vector>
 
@@ -57,10 +62,19 @@ ABSL_FLAG(std::string, output_side_packets, "",
 ABSL_FLAG(std::string, output_side_packets_file, "",
           "The name of the local file to output all side packets specified "
           "with --output_side_packets. ");
+// Serving
+ABSL_FLAG(bool, serve_from_stdin, false,
+          "If true, keeps the graph initialized and runs it once for every "
+          "request read from stdin. Each request holds input side packets in "
+          "the format of --input_side_packets, which provides defaults. The "
+          "contents of --output_stream and --output_side_packets are written "
+          "to stdout instead of to files.");
 
-absl::Status OutputStreamToLocalFile(mediapipe::OutputStreamPoller& poller) {
-  std::ofstream file;
-  file.open(absl::GetFlag(FLAGS_output_stream_file));
+namespace {
+
+// Writes the packets of the output stream in csv format.
+void WriteOutputStream(mediapipe::OutputStreamPoller& poller,
+                       std::ostream& output) {
   mediapipe::Packet packet;
   while (poller.Next(&packet)) {
     std::string output_data;
@@ -68,8 +82,137 @@ absl::Status OutputStreamToLocalFile(mediapipe::OutputStreamPoller& poller) {
       absl::StrAppend(&output_data, packet.Timestamp().Value(), ",");
     }
     absl::StrAppend(&output_data, packet.Get<std::string>(), "\n");
-    file << output_data;
+    output << output_data;
+  }
+}
+
+// Writes the output side packets as name:value lines.
+absl::Status WriteOutputSidePackets(mediapipe::CalculatorGraph& graph,
+                                    std::ostream& output) {
+  std::vector<std::string> side_packet_names =
+      absl::StrSplit(absl::GetFlag(FLAGS_output_side_packets), ',');
+  for (const std::string& side_packet_name : side_packet_names) {
+    ASSIGN_OR_RETURN(auto status_or_packet,
+                     graph.GetOutputSidePacket(side_packet_name));
+    output << absl::StrCat(side_packet_name, ":",
+                           status_or_packet.Get<std::string>(), "\n");
+  }
+  return absl::OkStatus();
+}
+
+// Parses comma-separated key=value pairs into string packets.
+absl::Status ParseSidePackets(
+    const std::string& kv_pairs_string,
+    std::map<std::string, mediapipe::Packet>* side_packets) {
+  if (kv_pairs_string.empty()) {
+    return absl::OkStatus();
   }
+  std::vector<std::string> kv_pairs = absl::StrSplit(kv_pairs_string, ',');
+  for (const std::string& kv_pair : kv_pairs) {
+    std::vector<std::string> name_and_value = absl::StrSplit(kv_pair, '=');
+    RET_CHECK(name_and_value.size() == 2);
+    RET_CHECK(!mediapipe::ContainsKey(*side_packets, name_and_value[0]));
+    (*side_packets)[name_and_value[0]] =
+        mediapipe::MakePacket<std::string>(name_and_value[1]);
+  }
+  return absl::OkStatus();
+}
+
+// Reads a length-prefixed request from stdin. Returns false at end of input.
+bool ReadRequest(std::string* contents) {
+  uint8_t header[8];
+  if (std::fread(header, 1, sizeof(header), stdin) != sizeof(header)) {
+    return false;
+  }
+  uint64_t length = 0;
+  for (int i = 7; i >= 0; --i) {
+    length = (length << 8) | header[i];
+  }
+  contents->resize(length);
+  return length == 0 ||
+         std::fread(&(*contents)[0], 1, length, stdin) == length;
+}
+
+// Writes a status byte followed by length-prefixed contents to stdout.
+void WriteResponse(bool ok, const std::vector<std::string>& contents) {
+  std::fputc(ok ? 0 : 1, stdout);
+  for (const std::string& content : contents) {
+    uint8_t header[8];
+    uint64_t length = content.size();
+    for (int i = 0; i < 8; ++i) {
+      header[i] = length & 0xff;
+      length >>= 8;
+    }
+    std::fwrite(header, 1, sizeof(header), stdout);
+    std::fwrite(content.data(), 1, content.size(), stdout);
+  }
+  std::fflush(stdout);
+}
+
+// Runs the graph once and returns the output stream and output side packets.
+absl::StatusOr<std::vector<std::string>> RunOnce(
+    mediapipe::CalculatorGraph* graph,
+    std::optional<mediapipe::OutputStreamPoller>* poller,
+    const std::string& request) {
+  std::map<std::string, mediapipe::Packet> input_side_packets;
+  MP_RETURN_IF_ERROR(ParseSidePackets(request, &input_side_packets));
+  std::map<std::string, mediapipe::Packet> default_side_packets;
+  MP_RETURN_IF_ERROR(ParseSidePackets(absl::GetFlag(FLAGS_input_side_packets),
+                                      &default_side_packets));
+  input_side_packets.insert(default_side_packets.begin(),
+                            default_side_packets.end());
+  MP_RETURN_IF_ERROR(graph->StartRun(input_side_packets));
+  std::ostringstream stream_output;
+  if (poller->has_value()) {
+    WriteOutputStream(poller->value(), stream_output);
+  }
+  MP_RETURN_IF_ERROR(graph->WaitUntilDone());
+  std::ostringstream side_packets_output;
+  if (!absl::GetFlag(FLAGS_output_side_packets).empty()) {
+    MP_RETURN_IF_ERROR(WriteOutputSidePackets(*graph, side_packets_output));
+  }
+  return std::vector<std::string>{stream_output.str(),
+                                  side_packets_output.str()};
+}
+
+// Keeps the graph initialized across requests so that process start up and
+// graph initialization are paid once instead of once per request. The side
+// packets of the packet generators without input side packets, e.g. a model
+// session, are generated once by Initialize() and reused by every run. A
+// successful response holds the output stream and the output side packets in
+// the formats of --output_stream_file and --output_side_packets_file.
+absl::Status ServeMPPGraph(const mediapipe::CalculatorGraphConfig& config) {
+  mediapipe::CalculatorGraph graph;
+  MP_RETURN_IF_ERROR(graph.Initialize(config));
+  std::optional<mediapipe::OutputStreamPoller> poller;
+  if (!absl::GetFlag(FLAGS_output_stream).empty()) {
+    ASSIGN_OR_RETURN(auto new_poller, graph.AddOutputStreamPoller(
+                                          absl::GetFlag(FLAGS_output_stream)));
+    poller.emplace(std::move(new_poller));
+  }
+  std::string request;
+  while (ReadRequest(&request)) {
+    // A failed run has finished when RunOnce() returns, and its errors are
+    // cleared by the next StartRun(), so the same graph serves the next
+    // request.
+    absl::StatusOr<std::vector<std::string>> output =
+        RunOnce(&graph, &poller, request);
+    if (output.ok()) {
+      WriteResponse(true, *output);
+      continue;
+    }
+    LOG(ERROR) << "Failed to run the graph: " << output.status().message();
+    WriteResponse(false, {std::string(output.status().message())});
+  }
+  return absl::OkStatus();
+}
+
+}  // namespace
+
+absl::Status OutputStreamToLocalFile(mediapipe::OutputStreamPoller& poller) {
+  std::ofstream file;
+  file.open(absl::GetFlag(FLAGS_output_stream_file));
+  WriteOutputStream(poller, file);
   file.close();
   return absl::OkStatus();
 }
@@ -79,14 +222,7 @@ absl::Status OutputSidePacketsToLocalFile(mediapipe::CalculatorGraph& graph) {
       !absl::GetFlag(FLAGS_output_side_packets_file).empty()) {
     std::ofstream file;
     file.open(absl::GetFlag(FLAGS_output_side_packets_file));
-    std::vector<std::string> side_packet_names =
-        absl::StrSplit(absl::GetFlag(FLAGS_output_side_packets), ',');
-    for (const std::string& side_packet_name : side_packet_names) {
-      ASSIGN_OR_RETURN(auto status_or_packet,
-                       graph.GetOutputSidePacket(side_packet_name));
-      file << absl::StrCat(side_packet_name, ":",
-                           status_or_packet.Get<std::string>(), "\n");
-    }
+    MP_RETURN_IF_ERROR(WriteOutputSidePackets(graph, file));
     file.close();
   } else {
     RET_CHECK(absl::GetFlag(FLAGS_output_side_packets).empty() &&
@@ -107,18 +243,12 @@ absl::Status RunMPPGraph() {
   mediapipe::CalculatorGraphConfig config =
       mediapipe::ParseTextProtoOrDie<mediapipe::CalculatorGraphConfig>(
           calculator_graph_config_contents);
-  std::map<std::string, mediapipe::Packet> input_side_packets;
-  if (!absl::GetFlag(FLAGS_input_side_packets).empty()) {
-    std::vector<std::string> kv_pairs =
-        absl::StrSplit(absl::GetFlag(FLAGS_input_side_packets), ',');
-    for (const std::string& kv_pair : kv_pairs) {
-      std::vector<std::string> name_and_value = absl::StrSplit(kv_pair, '=');
-      RET_CHECK(name_and_value.size() == 2);
-      RET_CHECK(!mediapipe::ContainsKey(input_side_packets, name_and_value[0]));
-      input_side_packets[name_and_value[0]] =
-          mediapipe::MakePacket<std::string>(name_and_value[1]);
-    }
+  if (absl::GetFlag(FLAGS_serve_from_stdin)) {
+    return ServeMPPGraph(config);
   }
+  std::map<std::string, mediapipe::Packet> input_side_packets;
+  MP_RETURN_IF_ERROR(ParseSidePackets(absl::GetFlag(FLAGS_input_side_packets),
+                                      &input_side_packets));
   LOG(INFO) << "Initialize the calculator graph.";
   mediapipe::CalculatorGraph graph;
   MP_RETURN_IF_ERROR(graph.Initialize(config, input_side_packets));
@@ -4,19 +4,29 @@ Serves up both the static files for the website and provides a service that
 fetches the video id and timestamp based labels for a video analyzed in a
 tfrecord files.
 
+The model_inference binary is started with --serve_from_stdin, so the graph
+stays initialized between requests and its SavedModel session is loaded once
+per process, and requests are handled concurrently.
+Results are cached per video and segment size. Records and metadata are read
+through a fetcher, which can be replaced to serve from somewhere other than
+data.yt8m.org.
 """
 from __future__ import print_function
+import collections
+import http.client
+import http.server
 import json
 import os
+import queue
 import re
+import shutil
 import socket
+import struct
 import subprocess
-import sys
+import threading
 
 from absl import app
 from absl import flags
-import http.client
-import http.server
 from six.moves.urllib import parse
 
 FLAGS = flags.FLAGS
@@ -37,10 +47,282 @@ flags.DEFINE_string(
     "Default pbtxt graph file.")
 flags.DEFINE_string("label_map", "mediapipe/graphs/youtube8m/label_map.txt",
                     "Default label map text file.")
+flags.DEFINE_integer("num_workers", 1,
+                     "Number of inference processes kept running.")
+flags.DEFINE_integer("cache_size", 256,
+                     "Number of inference results kept in memory.")
 
+# Parses the youtube video id off the end of the link or as a standalone id.
+_VIDEO_ID_PATTERN = re.compile(
+    "(?:.*youtube.*v=)?([a-zA-Z-0-9_]{2})([a-zA-Z-0-9_]+)")
 
-class HTTPServerV6(http.server.HTTPServer):
+
+class HTTPServerV6(http.server.ThreadingHTTPServer):
   address_family = socket.AF_INET6
+  daemon_threads = True
+
+
+class LRUCache(object):
+  """A thread-safe mapping that evicts the least recently used entries."""
+
+  def __init__(self, capacity):
+    self._capacity = capacity
+    self._entries = collections.OrderedDict()
+    self._lock = threading.Lock()
+
+  def get(self, key):
+    """Returns the value for key, or None if it is not cached."""
+    with self._lock:
+      if key not in self._entries:
+        return None
+      self._entries.move_to_end(key)
+      return self._entries[key]
+
+  def put(self, key, value):
+    with self._lock:
+      self._entries[key] = value
+      self._entries.move_to_end(key)
+      while len(self._entries) > self._capacity:
+        self._entries.popitem(last=False)
+
+
+class Yt8mFetcher(object):
+  """Fetches YouTube-8M records and metadata from data.yt8m.org."""
+
+  def __init__(self, data_host="data.yt8m.org",
+               records_host="us.data.yt8m.org", timeout=60):
+    self._data_host = data_host
+    self._records_host = records_host
+    self._timeout = timeout
+
+  def _request(self, host, path, method="GET"):
+    connection = http.client.HTTPConnection(host, timeout=self._timeout)
+    connection.request(method, path)
+    return connection, connection.getresponse()
+
+  def _get(self, host, path):
+    connection, response = self._request(host, path)
+    try:
+      if response.status != 200:
+        raise IOError("Could not retrieve contents from %s%s" % (host, path))
+      return response.read().decode("utf-8")
+    finally:
+      connection.close()
+
+  def find_record(self, video_id):
+    """Returns the tfrecord filename and index holding a YouTube video id."""
+    response_object = json.loads(
+        self._get(self._data_host,
+                  "/2/j/r/%s/%s.js" % (video_id[:2], video_id)))
+    return response_object["filename_raw"], response_object["index"]
+
+  def download_record(self, filename, output_path):
+    """Downloads the tfrecord filename to output_path."""
+    path = "/2/frame/train/%s" % filename
+    connection, response = self._request(self._records_host, path)
+    try:
+      if (response.status != 200 or
+          response.getheader("Content-Type") != "application/octet-stream"):
+        raise IOError("Filename '%s' is invalid." % filename)
+      temp_path = "%s.%d.tmp" % (output_path, threading.get_ident())
+      with open(temp_path, "wb") as f:
+        shutil.copyfileobj(response, f)
+      os.replace(temp_path, output_path)
+    finally:
+      connection.close()
+
+  def lookup_video_id(self, yt8m_id):
+    """Returns the YouTube video id of a YouTube-8M id."""
+    contents = self._get(self._data_host,
+                         "/2/j/i/%s/%s.js" % (yt8m_id[:2], yt8m_id))
+    match = re.match(""".+"([^"]+)"[^"]+""", contents)
+    if not match:
+      raise IOError("Could not find the video for %s." % yt8m_id)
+    return match.group(1)
+
+
+class _InferenceProcess(object):
+  """A model_inference process serving requests over stdin/stdout."""
+
+  def __init__(self, binary, pbtxt):
+    self._cmd = [
+        binary,
+        "--calculator_graph_config_file=%s" % pbtxt,
+        "--output_stream=annotation_summary",
+        "--output_side_packets=yt8m_id",
+        "--serve_from_stdin",
+    ]
+    self._process = None
+
+  def _read(self, size):
+    data = self._process.stdout.read(size)
+    if len(data) != size:
+      self.close()
+      raise RuntimeError("The inference binary exited unexpectedly.")
+    return data
+
+  def _read_message(self):
+    length, = struct.unpack("<Q", self._read(8))
+    return self._read(length).decode("utf-8")
+
+  def run(self, input_side_packets):
+    """Returns the output stream and output side packets of one graph run."""
+    if self._process is None or self._process.poll() is not None:
+      self._process = subprocess.Popen(
+          self._cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    request = input_side_packets.encode("utf-8")
+    try:
+      self._process.stdin.write(struct.pack("<Q", len(request)) + request)
+      self._process.stdin.flush()
+    except (BrokenPipeError, OSError):
+      self.close()
+      raise RuntimeError("The inference binary exited unexpectedly.")
+    if ord(self._read(1)):
+      raise RuntimeError(
+          "Error executing server binary: \n%s" % self._read_message())
+    return self._read_message(), self._read_message()
+
+  def close(self):
+    if self._process is not None:
+      self._process.stdin.close()
+      self._process.wait()
+      self._process.stdout.close()
+      self._process = None
+
+
+class ModelInference(object):
+  """Runs the inference graph in processes that stay initialized."""
+
+  def __init__(self, binary, pbtxt, num_workers=1):
+    self._workers = queue.Queue()
+    self._all_workers = [
+        _InferenceProcess(binary, pbtxt) for _ in range(num_workers)
+    ]
+    for worker in self._all_workers:
+      self._workers.put(worker)
+
+  def run(self, tfrecord_path, record_index, segment_size):
+    """Runs the graph on one record.
+
+    Args:
+      tfrecord_path: the local path of the tfrecord file.
+      record_index: the index of the record in the file.
+      segment_size: the desired segment size in seconds.
+
+    Returns:
+      (summary_lines, yt8m_id), the lines of the annotation_summary stream
+      and the YouTube-8M id of the record.
+    Raises:
+      RuntimeError: if the inference binary fails.
+    """
+    worker = self._workers.get()
+    try:
+      stream, side_packets = worker.run(
+          "tfrecord_path=%s,record_index=%d,desired_segment_size=%d" %
+          (tfrecord_path, record_index, segment_size))
+    finally:
+      self._workers.put(worker)
+    yt8m_id = ""
+    for line in side_packets.splitlines():
+      name, _, value = line.partition(":")
+      if name == "yt8m_id":
+        yt8m_id = value.strip()
+    return stream.splitlines(), yt8m_id
+
+  def close(self):
+    for worker in self._all_workers:
+      worker.close()
+
+
+def parse_annotation_summary(lines, segment_size, show_at_center=False):
+  """Converts annotation_summary lines to entries of times and labels."""
+  entries = []
+  for line in lines:
+    entry = {"labels": []}
+    entries.append(entry)
+    columns = line.split(",")
+    subtract = segment_size / 2.0 if show_at_center else 0.0
+    entry["time"] = float(int(columns[0])) / 1000000.0 - subtract
+    for column in columns[1:]:
+      label_score = re.match("(.+):([0-9.]+).*", column)
+      if label_score:
+        entry["labels"].append({
+            "label": label_score.group(1),
+            "score": float(label_score.group(2))
+        })
+  return entries
+
+
+class Youtube8MViewer(object):
+  """Finds, downloads and annotates YouTube-8M videos, caching the results."""
+
+  def __init__(self, inference, tmp_dir, fetcher=None, cache_size=256,
+               show_at_center=False):
+    """Creates the viewer.
+
+    Args:
+      inference: an object with the run() method of ModelInference.
+      tmp_dir: the directory downloaded tfrecords are stored in.
+      fetcher: an object with the methods of Yt8mFetcher. Defaults to a
+        Yt8mFetcher for data.yt8m.org.
+      cache_size: the number of results kept in memory.
+      show_at_center: whether labels are shown at the center of the segments.
+    """
+    self._inference = inference
+    self._tmp_dir = tmp_dir
+    self._fetcher = fetcher or Yt8mFetcher()
+    self._cache = LRUCache(cache_size)
+    self._show_at_center = show_at_center
+    self._lock = threading.Lock()
+    self._download_locks = collections.defaultdict(threading.Lock)
+
+  def _download(self, filename):
+    """Returns the local path of filename, downloading it once."""
+    output_file = os.path.join(self._tmp_dir, filename)
+    with self._lock:
+      download_lock = self._download_locks[filename]
+    with download_lock:
+      if not os.path.exists(output_file):
+        print(output_file, "doesn't exist locally, download it now.")
+        self._fetcher.download_record(filename, output_file)
+    return output_file
+
+  def annotate(self, path, segment_size):
+    """Returns the video id and labels for a YouTube video id or link.
+
+    Args:
+      path: a YouTube video id or a link to a video.
+      segment_size: the desired segment size in seconds.
+
+    Returns:
+      A dictionary with the video_id, link and entries with the time and
+      labels of each segment.
+    Raises:
+      ValueError: if path does not hold a video id.
+      IOError: if the record or metadata cannot be fetched.
+      RuntimeError: if the inference fails.
+    """
+    filename_match = _VIDEO_ID_PATTERN.match(path)
+    if not filename_match:
+      raise ValueError("Could not find a video id in '%s'." % path)
+    video_id = filename_match.group(1) + filename_match.group(2)
+    key = (video_id, segment_size)
+    results = self._cache.get(key)
+    if results is not None:
+      return results
+    filename, index = self._fetcher.find_record(video_id)
+    print("TFRecord discovered: ", filename, ", index", index)
+    output_file = self._download(filename)
+    lines, yt8m_id = self._inference.run(output_file, index, segment_size)
+    youtube_id = self._fetcher.lookup_video_id(yt8m_id)
+    results = {
+        "video_id": youtube_id,
+        "link": "https://www.youtube.com/watch?v=%s" % youtube_id,
+        "entries": parse_annotation_summary(lines, segment_size,
+                                            self._show_at_center)
+    }
+    self._cache.put(key, results)
+    return results
 
 
 class Youtube8MRequestHandler(http.server.SimpleHTTPRequestHandler):
@@ -52,15 +334,14 @@ class Youtube8MRequestHandler(http.server.SimpleHTTPRequestHandler):
       self.send_header("Content-type", "text/plain")
       self.send_header("Content-length", 2)
       self.end_headers()
-      self.wfile.write("ok")
-    if self.path.startswith("/video"):
+      self.wfile.write(b"ok")
+    elif self.path.startswith("/video"):
       parsed_params = parse.urlparse(self.path)
       url_params = parse.parse_qs(parsed_params.query)
 
       tfrecord_path = ""
       segment_size = 5
 
-      print(url_params)
       if "file" in url_params:
         tfrecord_path = url_params["file"][0]
       if "segments" in url_params:
@@ -80,151 +361,23 @@ class Youtube8MRequestHandler(http.server.SimpleHTTPRequestHandler):
     self.send_response(500)
     self.send_header("Content-type", "text/plain")
     self.end_headers()
-    if sys.version_info[0] < 3:
-      self.wfile.write(str(msg).encode("utf-8"))
-    else:
-      self.wfile.write(bytes(msg, "utf-8"))
-
-  def report_missing_files(self, files):
-    """Sends out 500 response with missing files."""
-    accumulate = ""
-    for file_path in files:
-      if not os.path.exists(file_path):
-        accumulate = "%s '%s'" % (accumulate, file_path)
-
-    if accumulate:
-      self.report_error("Could not find:%s" % accumulate)
-      return True
-
-    return False
+    self.wfile.write(bytes(msg, "utf-8"))
 
   def fetch(self, path, segment_size):
     """Returns the video id and labels for a tfrecord at a provided index."""
 
     print("Received request.  File=", path, "Segment Size =", segment_size)
-
-    if (self.report_missing_files([
-        "%s/%s" % (FLAGS.root, FLAGS.pbtxt),
-        "%s/%s" % (FLAGS.root, FLAGS.binary),
-        "%s/%s" % (FLAGS.root, FLAGS.label_map)
-    ])):
-      return
-
-    # Parse the youtube video id off the end of the link or as a standalone id.
-    filename_match = re.match(
-        "(?:.*youtube.*v=)?([a-zA-Z-0-9_]{2})([a-zA-Z-0-9_]+)", path)
-    tfrecord_url = filename_match.expand(r"data.yt8m.org/2/j/r/\1/\1\2.js")
-
-    print("Trying to get tfrecord via", tfrecord_url)
-
-    connection = http.client.HTTPConnection("data.yt8m.org")
-    connection.request("GET", tfrecord_url)
-    response = connection.getresponse()
-
-    response_object = json.loads(response.read())
-    filename = response_object["filename_raw"]
-    index = response_object["index"]
-
-    print("TFRecord discovered: ", filename, ", index", index)
-
-    output_file = r"%s/%s" % (FLAGS.tmp_dir, filename)
-    tfrecord_url = r"http://us.data.yt8m.org/2/frame/train/%s" % filename
-
-    connection = http.client.HTTPConnection("us.data.yt8m.org")
-    connection.request("HEAD",
-                       filename_match.expand(r"/2/frame/train/%s" % filename))
-    response = connection.getresponse()
-    if response.getheader("Content-Type") != "application/octet-stream":
-      self.report_error("Filename '%s' is invalid." % path)
-
-    print(output_file, "exists on yt8m.org. Did we fetch this before?")
-
-    if not os.path.exists(output_file):
-      print(output_file, "doesn't exist locally, download it now.")
-      return_code = subprocess.call(
-          ["curl", "--output", output_file, tfrecord_url],
-          stdout=subprocess.PIPE,
-          stderr=subprocess.PIPE)
-      if return_code:
-        self.report_error("Could not retrieve contents from %s" % tfrecord_url)
-        return
-    else:
-      print(output_file, "exist locally, reuse it.")
-
-    print("Run the graph...")
-    process = subprocess.Popen([
-        "%s/%s" % (FLAGS.root, FLAGS.binary),
-        "--calculator_graph_config_file=%s/%s" % (FLAGS.root, FLAGS.pbtxt),
-        "--input_side_packets=tfrecord_path=%s" % output_file +
-        ",record_index=%d" % index + ",desired_segment_size=%d" % segment_size,
-        "--output_stream=annotation_summary",
-        "--output_stream_file=%s/labels" % FLAGS.tmp_dir,
-        "--output_side_packets=yt8m_id",
-        "--output_side_packets_file=%s/yt8m_id" % FLAGS.tmp_dir
-    ],
-                               stdout=subprocess.PIPE,
-                               stderr=subprocess.PIPE)
-    stdout_str, stderr_str = process.communicate()
-    process.wait()
-
-    if stderr_str and "success" not in str(stderr_str).lower():
-      self.report_error("Error executing server binary: \n%s" % stderr_str)
+    try:
+      final_results = self.server.viewer.annotate(path, segment_size)
+    except (IOError, RuntimeError, ValueError) as e:
+      self.report_error(str(e))
       return
 
-    f = open("%s/yt8m_id" % FLAGS.tmp_dir, "r")
-    contents = f.read()
-    print("yt8m_id is", contents[-5:-1])
-
-    curl_arg = "data.yt8m.org/2/j/i/%s/%s.js" % (contents[-5:-3],
-                                                 contents[-5:-1])
-    print("Grab labels from", curl_arg)
-    process = subprocess.Popen(["curl", curl_arg],
-                               stdout=subprocess.PIPE,
-                               stderr=subprocess.PIPE)
-    stdout = process.communicate()
-    process.wait()
-
-    stdout_str = stdout[0].decode("utf-8")
-
-    match = re.match(""".+"([^"]+)"[^"]+""", stdout_str)
-    final_results = {
-        "video_id": match.group(1),
-        "link": "https://www.youtube.com/watch?v=%s" % match.group(1),
-        "entries": []
-    }
-    f = open("%s/labels" % FLAGS.tmp_dir, "r")
-    lines = f.readlines()
-    show_at_center = FLAGS.show_label_at_center
-
-    print("%s/labels" % FLAGS.tmp_dir, "holds", len(lines), "entries")
-    for line in lines:
-      entry = {"labels": []}
-      final_results["entries"].append(entry)
-      first = True
-      for column in line.split(","):
-        if first:
-          subtract = segment_size / 2.0 if show_at_center else 0.0
-          entry["time"] = float(int(column)) / 1000000.0 - subtract
-          first = False
-        else:
-          label_score = re.match("(.+):([0-9.]+).*", column)
-          if label_score:
-            score = float(label_score.group(2))
-            entry["labels"].append({
-                "label": label_score.group(1),
-                "score": score
-            })
-          else:
-            print("empty score")
-
     response_json = json.dumps(final_results, indent=2, separators=(",", ": "))
     self.send_response(200)
     self.send_header("Content-type", "application/json")
     self.end_headers()
-    if sys.version_info[0] < 3:
-      self.wfile.write(str(response_json).encode("utf-8"))
-    else:
-      self.wfile.write(bytes(response_json, "utf-8"))
+    self.wfile.write(bytes(response_json, "utf-8"))
 
 
 def update_pbtxt():
@@ -251,11 +404,31 @@ def main(unused_args):
   if not FLAGS.root:
     print("Must specify MediaPipe root directory: --root `pwd`")
     return
+  missing_files = [
+      file_path for file_path in [
+          "%s/%s" % (FLAGS.root, FLAGS.pbtxt),
+          "%s/%s" % (FLAGS.root, FLAGS.binary),
+          "%s/%s" % (FLAGS.root, FLAGS.label_map)
+      ] if not os.path.exists(file_path)
+  ]
+  if missing_files:
+    print("Could not find: %s" % ", ".join(missing_files))
+    return
   update_pbtxt()
+  os.makedirs(FLAGS.tmp_dir, exist_ok=True)
+  inference = ModelInference("%s/%s" % (FLAGS.root, FLAGS.binary),
+                             "%s/%s" % (FLAGS.root, FLAGS.pbtxt),
+                             FLAGS.num_workers)
   port = FLAGS.port
   print("Listening on port %s" % port)  # pylint: disable=superfluous-parens
   server = HTTPServerV6(("::", int(port)), Youtube8MRequestHandler)
-  server.serve_forever()
+  server.viewer = Youtube8MViewer(inference, FLAGS.tmp_dir,
+                                  cache_size=FLAGS.cache_size,
+                                  show_at_center=FLAGS.show_label_at_center)
+  try:
+    server.serve_forever()
+  finally:
+    inference.close()
 
 
 if __name__ == "__main__":
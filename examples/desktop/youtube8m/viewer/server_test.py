@@ -0,0 +1,155 @@
+"""Tests for the YouTube8M viewer server with local stand-ins."""
+
+import json
+import os
+import stat
+import sys
+import threading
+import urllib.error
+import urllib.request
+
+from absl.testing import absltest
+
+from mediapipe.examples.desktop.youtube8m.viewer import server
+
+# Implements the --serve_from_stdin protocol of the inference binary and
+# counts the graph runs in a file next to itself.
+_FAKE_BINARY = r"""#!%s
+import os
+import struct
+import sys
+
+count_path = os.path.join(os.path.dirname(__file__), "runs")
+while True:
+  header = sys.stdin.buffer.read(8)
+  if len(header) != 8:
+    break
+  request = sys.stdin.buffer.read(struct.unpack("<Q", header)[0]).decode()
+  with open(count_path, "a") as f:
+    f.write(request + "\n")
+  packets = dict(kv.split("=") for kv in request.split(","))
+  if not os.path.exists(packets["tfrecord_path"]):
+    message = b"missing record"
+    sys.stdout.buffer.write(struct.pack("<BQ", 1, len(message)) + message)
+  else:
+    size = int(packets["desired_segment_size"])
+    stream = "0,cat:0.9,dog:0.5\n%%d,dog:0.75\n" %% (size * 1000000)
+    side_packets = "yt8m_id:Ab12\n"
+    sys.stdout.buffer.write(b"\0")
+    for message in (stream.encode(), side_packets.encode()):
+      sys.stdout.buffer.write(struct.pack("<Q", len(message)) + message)
+  sys.stdout.buffer.flush()
+""" % sys.executable
+
+
+class _FakeFetcher(object):
+
+  def __init__(self):
+    self.downloads = []
+
+  def find_record(self, video_id):
+    if video_id == "unknown":
+      raise IOError("No record for unknown.")
+    return "train00.tfrecord", 7
+
+  def download_record(self, filename, output_path):
+    self.downloads.append(filename)
+    with open(output_path, "wb") as f:
+      f.write(b"record")
+
+  def lookup_video_id(self, yt8m_id):
+    return "youtube_" + yt8m_id
+
+
+class ServerTest(absltest.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self._tmp_dir = self.create_tempdir().full_path
+    binary = os.path.join(self._tmp_dir, "model_inference")
+    with open(binary, "w") as f:
+      f.write(_FAKE_BINARY)
+    os.chmod(binary, os.stat(binary).st_mode | stat.S_IEXEC)
+    self._inference = server.ModelInference(binary, "graph.pbtxt",
+                                            num_workers=2)
+    self.addCleanup(self._inference.close)
+    self._fetcher = _FakeFetcher()
+    self._viewer = server.Youtube8MViewer(
+        self._inference, self._tmp_dir, fetcher=self._fetcher, cache_size=2)
+
+  def _num_runs(self):
+    with open(os.path.join(self._tmp_dir, "runs")) as f:
+      return len(f.readlines())
+
+  def test_annotate(self):
+    results = self._viewer.annotate(
+        "https://www.youtube.com/watch?v=abcdef", 5)
+    self.assertEqual("youtube_Ab12", results["video_id"])
+    self.assertEqual("https://www.youtube.com/watch?v=youtube_Ab12",
+                     results["link"])
+    self.assertEqual([{
+        "time": 0.0,
+        "labels": [{"label": "cat", "score": 0.9},
+                   {"label": "dog", "score": 0.5}]
+    }, {
+        "time": 5.0,
+        "labels": [{"label": "dog", "score": 0.75}]
+    }], results["entries"])
+
+  def test_results_are_cached_per_video_and_segment_size(self):
+    self._viewer.annotate("abcdef", 5)
+    self._viewer.annotate("https://www.youtube.com/watch?v=abcdef", 5)
+    self.assertEqual(1, self._num_runs())
+    self.assertEqual(["train00.tfrecord"], self._fetcher.downloads)
+    self._viewer.annotate("abcdef", 10)
+    self.assertEqual(2, self._num_runs())
+    self.assertEqual(["train00.tfrecord"], self._fetcher.downloads)
+
+  def test_least_recently_used_results_are_evicted(self):
+    self._viewer.annotate("abcdef", 1)
+    self._viewer.annotate("abcdef", 2)
+    self._viewer.annotate("abcdef", 1)
+    self._viewer.annotate("abcdef", 3)
+    self._viewer.annotate("abcdef", 1)
+    self.assertEqual(3, self._num_runs())
+    self._viewer.annotate("abcdef", 2)
+    self.assertEqual(4, self._num_runs())
+
+  def test_inference_error_raises_and_worker_recovers(self):
+    self._fetcher.download_record = lambda filename, output_path: None
+    with self.assertRaisesRegex(RuntimeError, "missing record"):
+      self._viewer.annotate("abcdef", 5)
+    del self._fetcher.download_record
+    self.assertLen(self._viewer.annotate("abcdef", 5)["entries"], 2)
+
+  def test_concurrent_requests(self):
+    http_server = server.HTTPServerV6(("::1", 0),
+                                      server.Youtube8MRequestHandler)
+    http_server.viewer = self._viewer
+    thread = threading.Thread(target=http_server.serve_forever)
+    thread.start()
+    self.addCleanup(thread.join)
+    self.addCleanup(http_server.server_close)
+    self.addCleanup(http_server.shutdown)
+    url = "http://[::1]:%d/video?file=abcdef&segments=" % (
+        http_server.server_port)
+    responses = {}
+
+    def get(segment_size):
+      with urllib.request.urlopen(url + str(segment_size)) as response:
+        responses[segment_size] = json.loads(response.read())
+
+    threads = [threading.Thread(target=get, args=(i,)) for i in range(1, 9)]
+    for request_thread in threads:
+      request_thread.start()
+    for request_thread in threads:
+      request_thread.join()
+    self.assertCountEqual(range(1, 9), responses)
+    self.assertEqual(3.0, responses[3]["entries"][1]["time"])
+    with self.assertRaises(urllib.error.HTTPError) as error:
+      urllib.request.urlopen(url.replace("abcdef", "unknown") + "5")
+    self.assertEqual(500, error.exception.code)
+
+
+if __name__ == "__main__":
+  absltest.main()
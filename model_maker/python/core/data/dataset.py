@@ -18,9 +18,12 @@ from __future__ import division
 from __future__ import print_function
 
 import functools
-from typing import Callable, Optional, Tuple, TypeVar
+import hashlib
+import os
+from typing import Any, Callable, Optional, Tuple, TypeVar
 
 # Dependency imports
+import numpy as np
 import tensorflow as tf
 
 _DatasetT = TypeVar('_DatasetT', bound='Dataset')
@@ -51,6 +54,16 @@ class Dataset(object):
     """
     self._dataset = tf_dataset
     self._size = size
+    # Callable returning a hash of the content of `tf_dataset`, evaluated
+    # lazily since hashing may need to touch every file of the dataset.
+    self._fingerprint_fn = None
+    self._fingerprint = None
+    self._cache = False
+    self._cache_dir = None
+    # Optional small per-element items, e.g. image paths and labels, that
+    # `tf_dataset` is loaded from, see `_set_items`.
+    self._items = None
+    self._load_fn = None
 
   @property
   def size(self) -> Optional[int]:
@@ -66,14 +79,63 @@ class Dataset(object):
     """
     return self._size
 
+  @property
+  def fingerprint(self) -> Optional[str]:
+    """Returns a hash of the dataset content, or None if it is unknown.
+
+    The fingerprint identifies the cache files written by `gen_tf_dataset`, so
+    that stale caches are not reused after the underlying data changed.
+    """
+    if self._fingerprint is None and self._fingerprint_fn is not None:
+      self._fingerprint = self._fingerprint_fn()
+    return self._fingerprint
+
+  def enable_cache(self, cache_dir: Optional[str] = None) -> None:
+    """Caches the dataset elements when generating tf.data.Dataset.
+
+    The elements are cached after the deterministic part of the preprocessing
+    so that decoding and resizing only run during the first epoch, while random
+    data augmentation still runs every epoch.
+
+    Args:
+      cache_dir: Directory to cache the elements in. If None, the elements are
+        cached in memory.
+    """
+    self._cache = True
+    self._cache_dir = cache_dir
+
+  def _set_items(self, items: Tuple[np.ndarray, ...],
+                 load_fn: Callable[..., Any]) -> None:
+    """Records the items that the elements of the dataset are loaded from.
+
+    The dataset must be equivalent to `tf.data.Dataset.from_tensor_slices(
+    items).map(load_fn)`. Knowing the items lets `gen_tf_dataset` shuffle them
+    before the elements are loaded, so that only the small items sit in the
+    shuffle buffer, and lets `split` slice them instead of reading through the
+    elements.
+
+    Args:
+      items: Tuple of arrays with one entry per element of the dataset.
+      load_fn: Function loading an element from the entries of `items`.
+    """
+    self._items = items
+    self._load_fn = load_fn
+
   def gen_tf_dataset(self,
                      batch_size: int = 1,
                      is_training: bool = False,
                      shuffle: bool = False,
                      preprocess: Optional[Callable[..., bool]] = None,
-                     drop_remainder: bool = False) -> tf.data.Dataset:
+                     drop_remainder: bool = False,
+                     cache: bool = False,
+                     cache_dir: Optional[str] = None) -> tf.data.Dataset:
     """Generates a batched tf.data.Dataset for training/evaluation.
 
+    If `preprocess` provides `deterministic_preprocess` and `random_preprocess`
+    methods (e.g. `image_preprocessing.Preprocessor`), cached elements are the
+    outputs of `deterministic_preprocess`. Otherwise, the elements are cached
+    before `preprocess` is applied.
+
     Args:
       batch_size: An integer, the returned dataset will be batched by this size.
       is_training: A boolean, when True, the returned dataset will be optionally
@@ -83,21 +145,50 @@ class Dataset(object):
       preprocess: A function taking three arguments in order, feature, label and
         boolean is_training.
       drop_remainder: boolean, whether the finaly batch drops remainder.
+      cache: boolean, whether to cache the elements in memory, in addition to
+        the caching enabled with `enable_cache`.
+      cache_dir: Directory to cache the elements in. Implies `cache`.
 
     Returns:
       A TF dataset ready to be consumed by Keras model.
+
+    Raises:
+      ValueError: if caching to a directory is requested for a dataset without
+        fingerprint.
     """
     dataset = self._dataset
 
+    cache_dir = cache_dir or self._cache_dir
+    use_cache = cache or cache_dir or self._cache
+    # Without caching, the items are shuffled before loading the elements. A
+    # cached dataset replays the order of its first epoch, so its elements are
+    # shuffled after the cache instead, across the whole dataset.
+    shuffle_items = (
+        is_training and shuffle and self._items is not None and not use_cache)
+    if shuffle_items:
+      item_dataset = tf.data.Dataset.from_tensor_slices(self._items)
+      item_dataset = item_dataset.shuffle(
+          buffer_size=len(self._items[0]), reshuffle_each_iteration=True)
+      dataset = item_dataset.map(
+          self._load_fn, num_parallel_calls=tf.data.AUTOTUNE)
+
+    if use_cache:
+      dataset, preprocess = self._cache_dataset(dataset, preprocess,
+                                                is_training, cache_dir)
+
     if preprocess:
       preprocess = functools.partial(preprocess, is_training=is_training)
       dataset = dataset.map(preprocess, num_parallel_calls=tf.data.AUTOTUNE)
 
-    if is_training:
+    if is_training and not shuffle_items:
       if shuffle:
         # Shuffle size should be bigger than the batch_size. Otherwise it's only
         # shuffling within the batch, which equals to not having shuffle.
         buffer_size = 3 * batch_size
+        if use_cache and self._size:
+          # The cached elements are read in the same order every epoch, so they
+          # need a full shuffle, like the items of an uncached dataset.
+          buffer_size = self._size
         # But since we are doing shuffle before repeat, it doesn't make sense to
         # shuffle more than total available entries.
         # TODO: Investigate if shuffling before / after repeat
@@ -114,6 +205,47 @@ class Dataset(object):
     # here.
     return dataset
 
+  def _cache_dataset(
+      self, dataset: tf.data.Dataset,
+      preprocess: Optional[Callable[..., bool]], is_training: bool,
+      cache_dir: Optional[str]
+  ) -> Tuple[tf.data.Dataset, Optional[Callable[..., bool]]]:
+    """Caches `dataset` after the deterministic part of `preprocess`.
+
+    Args:
+      dataset: The tf.data.Dataset to cache.
+      preprocess: The preprocess function passed to `gen_tf_dataset`.
+      is_training: Whether the dataset is generated for training.
+      cache_dir: Directory to cache the elements in, or None to cache in memory.
+
+    Returns:
+      The cached dataset and the part of `preprocess` left to apply after it.
+    """
+    cache_key = [self.fingerprint]
+    if hasattr(preprocess, 'deterministic_preprocess') and hasattr(
+        preprocess, 'random_preprocess'):
+      dataset = dataset.map(
+          functools.partial(
+              preprocess.deterministic_preprocess, is_training=is_training),
+          num_parallel_calls=tf.data.AUTOTUNE)
+      cache_key.append(getattr(preprocess, 'fingerprint', None))
+      cache_key.append(is_training)
+      preprocess = preprocess.random_preprocess
+
+    if not cache_dir:
+      return dataset.cache(), preprocess
+    if None in cache_key:
+      raise ValueError(
+          'Caching to a directory requires the dataset and the preprocessor to '
+          'have a fingerprint, use in-memory caching instead.')
+    if not tf.io.gfile.exists(cache_dir):
+      tf.io.gfile.makedirs(cache_dir)
+    cache_file = os.path.join(
+        cache_dir,
+        hashlib.sha256(repr(cache_key).encode('utf-8')).hexdigest())
+    tf.compat.v1.logging.info('Caching dataset in %s', cache_file)
+    return dataset.cache(cache_file), preprocess
+
   def __len__(self):
     """Returns the number of element of the dataset."""
     if self._size is not None:
@@ -156,9 +288,49 @@ class Dataset(object):
     dataset = self._dataset
 
     train_size = int(self._size * fraction)
-    trainset = self.__class__(dataset.take(train_size), train_size, *args)
-
     test_size = self._size - train_size
-    testset = self.__class__(dataset.skip(train_size), test_size, *args)
+    if self._items is None:
+      trainset = self.__class__(dataset.take(train_size), train_size, *args)
+      testset = self.__class__(dataset.skip(train_size), test_size, *args)
+      subsets = ((trainset, None), (testset, None))
+    else:
+      # Slices the items so that the test set doesn't need to read through the
+      # elements of the training set.
+      train_items = tuple(item[:train_size] for item in self._items)
+      test_items = tuple(item[train_size:] for item in self._items)
+      trainset = self.__class__(
+          self._load_items(train_items), train_size, *args)
+      testset = self.__class__(self._load_items(test_items), test_size, *args)
+      subsets = ((trainset, train_items), (testset, test_items))
+
+    for name, (subset, items) in zip(('train', 'test'), subsets):
+      if items is not None:
+        subset._set_items(items, self._load_fn)
+      subset._cache = self._cache
+      subset._cache_dir = self._cache_dir
+      if self._fingerprint_fn is not None:
+        # The items of a subset depend on the order of the parent's items, so
+        # they are part of its fingerprint.
+        suffix = ('%s:%r' % (name, fraction)
+                  if items is None else _fingerprint_items(items))
+        subset._fingerprint_fn = functools.partial(_derive_fingerprint, self,
+                                                   suffix)
 
     return trainset, testset
+
+  def _load_items(self, items: Tuple[np.ndarray, ...]) -> tf.data.Dataset:
+    """Returns the tf.data.Dataset of the elements loaded from `items`."""
+    return tf.data.Dataset.from_tensor_slices(items).map(
+        self._load_fn, num_parallel_calls=tf.data.AUTOTUNE)
+
+
+def _fingerprint_items(items: Tuple[np.ndarray, ...]) -> str:
+  """Returns a hash of the rows of `items`, independent of their order."""
+  rows = sorted(zip(*(item.tolist() for item in items)))
+  return hashlib.sha256(repr(rows).encode('utf-8')).hexdigest()
+
+
+def _derive_fingerprint(parent: Dataset, suffix: str) -> str:
+  """Returns the fingerprint of a subset of `parent` identified by `suffix`."""
+  return hashlib.sha256(
+      ('%s/%s' % (parent.fingerprint, suffix)).encode('utf-8')).hexdigest()
@@ -43,6 +43,70 @@ class DatasetTest(tf.test.TestCase):
     for i, elem in enumerate(test_data.gen_tf_dataset()):
       self.assertTrue((elem.numpy() == np.array([i, 0])).all())
 
+  def test_split_items(self):
+    items = (np.arange(4), np.arange(4) * 10)
+    dataset = tf.data.Dataset.from_tensor_slices(items)
+    data = ds.Dataset(dataset, 4)
+    data._set_items(items, lambda x, y: (x, y))
+    train_data, test_data = data.split(0.75)
+
+    self.assertLen(train_data, 3)
+    self.assertLen(test_data, 1)
+    self.assertAllEqual(train_data._items[0], [0, 1, 2])
+    self.assertAllEqual(test_data._items[0], [3])
+    self.assertEqual([(x.numpy(), y.numpy()) for x, y in test_data._dataset],
+                     [(3, 30)])
+
+  def test_split_items_fingerprint_depends_on_items(self):
+
+    def create_data(order):
+      items = (np.array(order), np.array(order) * 10)
+      data = ds.Dataset(tf.data.Dataset.from_tensor_slices(items), 4)
+      data._set_items(items, lambda x, y: (x, y))
+      data._fingerprint_fn = lambda: 'fingerprint'
+      return data
+
+    train_data, _ = create_data([0, 1, 2, 3]).split(0.5)
+    reordered_train_data, _ = create_data([1, 0, 2, 3]).split(0.5)
+    shuffled_train_data, _ = create_data([2, 0, 1, 3]).split(0.5)
+
+    self.assertEqual(reordered_train_data.fingerprint, train_data.fingerprint)
+    self.assertNotEqual(shuffled_train_data.fingerprint, train_data.fingerprint)
+
+  def test_gen_tf_dataset_shuffles_items(self):
+    size = 100
+    items = (np.arange(size),)
+    data = ds.Dataset(tf.data.Dataset.from_tensor_slices(items), size)
+    data._set_items(items, lambda x: x)
+
+    batch_size = 10
+    dataset = data.gen_tf_dataset(batch_size=batch_size, is_training=True,
+                                  shuffle=True)
+    epoch = np.concatenate([batch.numpy() for batch in dataset])
+    self.assertCountEqual(epoch, np.arange(size))
+    # The whole item list is shuffled rather than a window of 3 batches, which
+    # could only yield items below 4 * batch_size in the first batch.
+    self.assertGreaterEqual(max(epoch[:batch_size]), 4 * batch_size)
+
+  def test_gen_tf_dataset_with_cache_shuffles_all_elements(self):
+    size = 100
+    items = (np.arange(size),)
+    data = ds.Dataset(tf.data.Dataset.from_tensor_slices(items[0]), size)
+    data._set_items(items, lambda x: x)
+
+    batch_size = 10
+    dataset = data.gen_tf_dataset(batch_size=batch_size, is_training=True,
+                                  shuffle=True, cache=True)
+    epochs = [
+        np.concatenate([batch.numpy() for batch in dataset]) for _ in range(2)
+    ]
+    for epoch in epochs:
+      self.assertCountEqual(epoch, np.arange(size))
+      # The cached elements are shuffled across the whole dataset rather than
+      # a window of 3 batches.
+      self.assertGreaterEqual(max(epoch[:batch_size]), 4 * batch_size)
+    self.assertNotAllEqual(epochs[0], epochs[1])
+
   def test_len(self):
     size = 4
     dataset = tf.data.Dataset.from_tensor_slices([[0, 1], [1, 1], [0, 0],
@@ -73,6 +137,36 @@ class DatasetTest(tf.test.TestCase):
       self.assertTrue((tf.shape(feature).numpy() == np.array([2, 8])).all())
       self.assertTrue((tf.shape(label).numpy() == np.array([2])).all())
 
+  def test_gen_tf_dataset_with_cache(self):
+    input_dim = 8
+    data = test_util.create_dataset(
+        data_size=4, input_shape=[input_dim], num_classes=2)
+
+    dataset = data.gen_tf_dataset(batch_size=2, cache=True)
+    first_epoch = [feature.numpy() for feature, _ in dataset]
+    second_epoch = [feature.numpy() for feature, _ in dataset]
+    self.assertLen(first_epoch, 2)
+    self.assertAllEqual(first_epoch, second_epoch)
+
+  def test_gen_tf_dataset_with_cache_dir_raise_value_error(self):
+    data = test_util.create_dataset(
+        data_size=4, input_shape=[8], num_classes=2)
+    with self.assertRaises(ValueError):
+      data.gen_tf_dataset(cache_dir=self.get_temp_dir())
+
+  def test_split_keeps_cache_settings(self):
+    dataset = tf.data.Dataset.from_tensor_slices([[0, 1], [1, 1], [0, 0],
+                                                  [1, 0]])
+    data = ds.Dataset(dataset, 4)
+    data._fingerprint_fn = lambda: 'fingerprint'
+    data.enable_cache(self.get_temp_dir())
+    train_data, test_data = data.split(0.5)
+
+    self.assertEqual(train_data._cache_dir, self.get_temp_dir())
+    self.assertIsNotNone(train_data.fingerprint)
+    self.assertNotEqual(train_data.fingerprint, test_data.fingerprint)
+    self.assertNotEqual(train_data.fingerprint, data.fingerprint)
+
 
 if __name__ == '__main__':
   tf.test.main()
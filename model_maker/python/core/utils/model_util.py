@@ -17,7 +17,10 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import collections
+from concurrent import futures
 import os
+import queue
 import tempfile
 from typing import Any, Callable, Dict, List, Optional, Text, Tuple, Union
 
@@ -183,25 +186,174 @@ class WarmUp(tf.keras.optimizers.schedules.LearningRateSchedule):
     }
 
 
+class _InterpreterRunner(object):
+  """Runs one TFLite interpreter with cached input shapes and buffers.
+
+  Tensors are only resized and reallocated when the input shapes change, and
+  the scratch buffers used to quantize inputs are reused across invocations.
+  An instance is not thread-safe; `LiteRunner` hands each one to a single
+  thread at a time.
+  """
+
+  def __init__(self, tflite_model: bytearray):
+    self.interpreter = tf.lite.Interpreter(model_content=tflite_model)
+    self.interpreter.allocate_tensors()
+    self.input_details = self.interpreter.get_input_details()
+    self.output_details = self.interpreter.get_output_details()
+    self._allocated_shapes = [
+        tuple(input_detail['shape']) for input_detail in self.input_details
+    ]
+    # Maps input index to the (float scratch, quantized) buffer pair.
+    self._input_buffers = {}
+
+  def _maybe_resize(self, input_arrays: List[np.ndarray]) -> None:
+    """Resizes and reallocates the tensors if the input shapes changed."""
+    shapes = [input_array.shape for input_array in input_arrays]
+    if shapes == self._allocated_shapes:
+      return
+    for input_detail, shape in zip(self.input_details, shapes):
+      self.interpreter.resize_tensor_input(
+          input_index=input_detail['index'], tensor_size=shape)
+    self.interpreter.allocate_tensors()
+    self._allocated_shapes = shapes
+    self._input_buffers.clear()
+
+  def _quantize(self, index: int, input_array: np.ndarray,
+                input_detail: Dict[str, Any]) -> np.ndarray:
+    """Quantizes `input_array` into the reusable buffer of input `index`."""
+    buffers = self._input_buffers.get(index)
+    if buffers is None:
+      buffers = (np.empty(input_array.shape, dtype=np.float32),
+                 np.empty(input_array.shape, dtype=input_detail['dtype']))
+      self._input_buffers[index] = buffers
+    scratch, quantized = buffers
+    scale, zero_point = input_detail['quantization']
+    np.divide(input_array, scale, out=scratch, casting='unsafe')
+    scratch += zero_point
+    np.copyto(quantized, scratch, casting='unsafe')
+    return quantized
+
+  def invoke(self, input_arrays: List[np.ndarray]) -> None:
+    """Feeds `input_arrays` to the interpreter and invokes it."""
+    self._maybe_resize(input_arrays)
+    for i, input_detail in enumerate(self.input_details):
+      input_array = input_arrays[i]
+      if input_detail['quantization'] != (DEFAULT_SCALE, DEFAULT_ZERO_POINT):
+        input_array = self._quantize(i, input_array, input_detail)
+      self.interpreter.set_tensor(input_detail['index'], input_array)
+    self.interpreter.invoke()
+
+  def get_outputs(self) -> List[np.ndarray]:
+    """Returns newly allocated, dequantized copies of the output tensors."""
+    output_tensors = []
+    for output_detail in self.output_details:
+      if output_detail['quantization'] != (DEFAULT_SCALE, DEFAULT_ZERO_POINT):
+        # Dequantize the output straight from the interpreter's memory.
+        scale, zero_point = output_detail['quantization']
+        output_tensor = np.subtract(
+            self.interpreter.tensor(output_detail['index'])(),
+            zero_point,
+            dtype=np.float32)
+        output_tensor *= scale
+      else:
+        output_tensor = self.interpreter.get_tensor(output_detail['index'])
+      output_tensors.append(output_tensor)
+    return output_tensors
+
+  def copy_outputs_to(self, output_buffers: List[np.ndarray]) -> None:
+    """Writes the dequantized output tensors into `output_buffers`."""
+    for output_detail, output_buffer in zip(self.output_details,
+                                            output_buffers):
+      # The view must not outlive this call, otherwise the interpreter refuses
+      # to reallocate its tensors.
+      output_view = self.interpreter.tensor(output_detail['index'])()
+      if output_detail['quantization'] != (DEFAULT_SCALE, DEFAULT_ZERO_POINT):
+        scale, zero_point = output_detail['quantization']
+        # Subtracts in float32, as the quantized dtype would wrap around.
+        np.subtract(
+            output_view,
+            zero_point,
+            out=output_buffer,
+            dtype=np.float32,
+            casting='unsafe')
+        output_buffer *= scale
+      else:
+        np.copyto(output_buffer, output_view, casting='unsafe')
+      del output_view
+
+
 class LiteRunner(object):
   """A runner to do inference with the TFLite model."""
 
-  def __init__(self, tflite_model: bytearray):
+  def __init__(self, tflite_model: bytearray, num_threads: int = 1):
     """Initializes Lite runner from TFLite model buffer.
 
     Args:
       tflite_model: A valid flatbuffer representing the TFLite model.
+      num_threads: Number of interpreters kept in the pool. Batches passed to
+        `evaluate_tflite` are fanned out across them from as many threads.
+
+    Raises:
+      ValueError: if num_threads is smaller than 1.
     """
-    self.interpreter = tf.lite.Interpreter(model_content=tflite_model)
-    self.interpreter.allocate_tensors()
-    self.input_details = self.interpreter.get_input_details()
-    self.output_details = self.interpreter.get_output_details()
+    if num_threads < 1:
+      raise ValueError('num_threads must be at least 1, got %d.' % num_threads)
+    self._num_threads = num_threads
+    self._runners = [
+        _InterpreterRunner(tflite_model) for _ in range(num_threads)
+    ]
+    self._idle_runners = queue.Queue()
+    for runner in self._runners:
+      self._idle_runners.put(runner)
+    self.interpreter = self._runners[0].interpreter
+    self.input_details = self._runners[0].input_details
+    self.output_details = self._runners[0].output_details
+
+  def _to_input_arrays(
+      self, input_tensors: Union[List[tf.Tensor], Dict[str, tf.Tensor]]
+  ) -> List[np.ndarray]:
+    """Returns the inputs as NumPy arrays ordered like `input_details`."""
+    if not isinstance(input_tensors, list) and not isinstance(
+        input_tensors, dict):
+      input_tensors = [input_tensors]
+    return [
+        np.asarray(
+            _get_input_tensor(
+                input_tensors=input_tensors,
+                input_details=self.input_details,
+                index=i)) for i in range(len(self.input_details))
+    ]
+
+  def _run_on_idle_runner(self, input_arrays: List[np.ndarray],
+                          output_buffers: Optional[List[np.ndarray]] = None
+                         ) -> Optional[List[np.ndarray]]:
+    """Runs the inputs on the next idle interpreter in the pool.
+
+    Args:
+      input_arrays: The inputs ordered like `input_details`.
+      output_buffers: Optional buffers to write the outputs into.
+
+    Returns:
+      Newly allocated output arrays if `output_buffers` is None.
+    """
+    runner = self._idle_runners.get()
+    try:
+      runner.invoke(input_arrays)
+      if output_buffers is None:
+        return runner.get_outputs()
+      runner.copy_outputs_to(output_buffers)
+      return None
+    finally:
+      self._idle_runners.put(runner)
 
   def run(
       self, input_tensors: Union[List[tf.Tensor], Dict[str, tf.Tensor]]
   ) -> Union[List[tf.Tensor], tf.Tensor]:
     """Runs inference with the TFLite model.
 
+    The interpreter is only resized when the shapes of the inputs differ from
+    the previous call, so feeding batches of a fixed size is cheap.
+
     Args:
       input_tensors: List / Dict of the input tensors of the TFLite model. The
         order should be the same as the keras model if it's a list. It also
@@ -211,56 +363,104 @@ class LiteRunner(object):
       List of the output tensors for multi-output models, otherwise just
         the output tensor. The order should be the same as the keras model.
     """
-
-    if not isinstance(input_tensors, list) and not isinstance(
-        input_tensors, dict):
-      input_tensors = [input_tensors]
-
-    interpreter = self.interpreter
-
-    # Reshape inputs
-    for i, input_detail in enumerate(self.input_details):
-      input_tensor = _get_input_tensor(
-          input_tensors=input_tensors,
-          input_details=self.input_details,
-          index=i)
-      interpreter.resize_tensor_input(
-          input_index=input_detail['index'], tensor_size=input_tensor.shape)
-    interpreter.allocate_tensors()
-
-    # Feed input to the interpreter
-    for i, input_detail in enumerate(self.input_details):
-      input_tensor = _get_input_tensor(
-          input_tensors=input_tensors,
-          input_details=self.input_details,
-          index=i)
-      if input_detail['quantization'] != (DEFAULT_SCALE, DEFAULT_ZERO_POINT):
-        # Quantize the input
-        scale, zero_point = input_detail['quantization']
-        input_tensor = input_tensor / scale + zero_point
-        input_tensor = np.array(input_tensor, dtype=input_detail['dtype'])
-      interpreter.set_tensor(input_detail['index'], input_tensor)
-
-    interpreter.invoke()
-
-    output_tensors = []
-    for output_detail in self.output_details:
-      output_tensor = interpreter.get_tensor(output_detail['index'])
-      if output_detail['quantization'] != (DEFAULT_SCALE, DEFAULT_ZERO_POINT):
-        # Dequantize the output
-        scale, zero_point = output_detail['quantization']
-        output_tensor = output_tensor.astype(np.float32)
-        output_tensor = (output_tensor - zero_point) * scale
-      output_tensors.append(output_tensor)
+    output_tensors = self._run_on_idle_runner(
+        self._to_input_arrays(input_tensors))
 
     if len(output_tensors) == 1:
       return output_tensors[0]
     return output_tensors
 
+  def evaluate_tflite(
+      self,
+      data: dataset.Dataset,
+      batch_size: int = 32,
+      preprocess: Optional[Callable[..., bool]] = None
+  ) -> Tuple[Union[List[np.ndarray], np.ndarray], np.ndarray]:
+    """Streams `data` through the TFLite model in batches.
 
-def get_lite_runner(tflite_buffer: bytearray) -> 'LiteRunner':
+    Batches are dispatched to the pool of interpreters and the outputs are
+    written into arrays preallocated for the whole dataset. Only the trailing
+    partial batch, if any, triggers a tensor reallocation.
+
+    Args:
+      data: Dataset of (feature, label) pairs to run inference on.
+      batch_size: Number of samples per interpreter invocation.
+      preprocess: A callable to preprocess the data. The callable takes three
+        arguments in order: feature, label, and is_training.
+
+    Returns:
+      A tuple of the model outputs and the labels, both ordered like `data`.
+      The outputs are a list of arrays for multi-output models, otherwise just
+      one array.
+    """
+    tf_dataset = data.gen_tf_dataset(
+        batch_size, is_training=False, preprocess=preprocess)
+    batches = iter(tf_dataset)
+    labels = []
+    outputs = None
+    num_samples = data.size
+    offset = 0
+    pending = collections.deque()
+    max_pending = 2 * self._num_threads
+    with futures.ThreadPoolExecutor(max_workers=self._num_threads) as executor:
+      for features, label in batches:
+        input_arrays = self._to_input_arrays(features)
+        labels.append(label.numpy())
+        current_batch_size = input_arrays[0].shape[0]
+        if outputs is None:
+          # Runs the first batch inline to learn the output shapes.
+          first_outputs = self._run_on_idle_runner(input_arrays)
+          if num_samples is None:
+            outputs = [[output] for output in first_outputs]
+          else:
+            outputs = [
+                np.empty((num_samples,) + output.shape[1:], dtype=output.dtype)
+                for output in first_outputs
+            ]
+            for output, first_output in zip(outputs, first_outputs):
+              output[:current_batch_size] = first_output
+        elif num_samples is None:
+          # Without a known size the outputs are concatenated at the end.
+          pending.append(
+              executor.submit(self._run_on_idle_runner, input_arrays))
+        else:
+          output_buffers = [
+              output[offset:offset + current_batch_size] for output in outputs
+          ]
+          pending.append(
+              executor.submit(self._run_on_idle_runner, input_arrays,
+                              output_buffers))
+        offset += current_batch_size
+        while len(pending) >= max_pending:
+          _collect_batch_outputs(pending.popleft(), outputs)
+      while pending:
+        _collect_batch_outputs(pending.popleft(), outputs)
+
+    if outputs is None:
+      raise ValueError('Input data is empty.')
+    if num_samples is None:
+      outputs = [np.concatenate(output) for output in outputs]
+    elif offset != num_samples:
+      outputs = [output[:offset] for output in outputs]
+    labels = np.concatenate(labels)
+    if len(outputs) == 1:
+      return outputs[0], labels
+    return outputs, labels
+
+
+def _collect_batch_outputs(future: futures.Future,
+                           outputs: List[Any]) -> None:
+  """Waits for a batch and appends its outputs if they were not in place."""
+  batch_outputs = future.result()
+  if batch_outputs is not None:
+    for output, batch_output in zip(outputs, batch_outputs):
+      output.append(batch_output)
+
+
+def get_lite_runner(tflite_buffer: bytearray,
+                    num_threads: int = 1) -> 'LiteRunner':
   """Returns a `LiteRunner` from flatbuffer of the TFLite model."""
-  lite_runner = LiteRunner(tflite_buffer)
+  lite_runner = LiteRunner(tflite_buffer, num_threads=num_threads)
   return lite_runner
 
 
@@ -270,7 +470,7 @@ def _get_input_tensor(input_tensors: Union[List[tf.Tensor], Dict[str,
   """Returns input tensor in `input_tensors` that maps `input_detail[i]`."""
   if isinstance(input_tensors, dict):
     # Gets the mapped input tensor.
-    input_detail = input_details
+    input_detail = input_details[index]
     for input_tensor_name, input_tensor in input_tensors.items():
       if input_tensor_name in input_detail['name']:
         return input_tensor
@@ -15,8 +15,10 @@
 import os
 
 from absl.testing import parameterized
+import numpy as np
 import tensorflow as tf
 
+from mediapipe.model_maker.python.core.data import dataset
 from mediapipe.model_maker.python.core.utils import model_util
 from mediapipe.model_maker.python.core.utils import quantization
 from mediapipe.model_maker.python.core.utils import test_util
@@ -135,6 +137,74 @@ class ModelUtilTest(tf.test.TestCase, parameterized.TestCase):
             atol=1e-00))
     self.assertNear(len(tflite_model), model_size, 300)
 
+  def test_lite_runner_reuses_allocated_shape(self):
+    input_dim = 4
+    model = test_util.build_model(input_shape=[input_dim], num_classes=2)
+    tflite_model = model_util.convert_to_tflite(model)
+    lite_runner = model_util.get_lite_runner(tflite_model)
+    input_tensors = test_util.create_random_sample(size=[3, input_dim])
+    for _ in range(2):
+      lite_output = lite_runner.run(input_tensors)
+      self.assertAllClose(
+          lite_output, model.predict_on_batch(input_tensors), atol=1e-04)
+    self.assertEqual(
+        list(lite_runner.interpreter.get_input_details()[0]['shape']),
+        [3, input_dim])
+
+  @parameterized.named_parameters(
+      dict(testcase_name='single_thread', num_threads=1, size=10),
+      dict(testcase_name='multiple_threads', num_threads=3, size=10),
+      dict(testcase_name='unknown_size', num_threads=2, size=None))
+  def test_evaluate_tflite(self, num_threads, size):
+    input_dim = 4
+    data_size = 10
+    model = test_util.build_model(input_shape=[input_dim], num_classes=2)
+    tflite_model = model_util.convert_to_tflite(model)
+    data = test_util.create_dataset(
+        data_size=data_size, input_shape=[input_dim], num_classes=2)
+    data = dataset.Dataset(data.gen_tf_dataset().unbatch(), size)
+    lite_runner = model_util.get_lite_runner(
+        tflite_model, num_threads=num_threads)
+
+    outputs, labels = lite_runner.evaluate_tflite(data, batch_size=4)
+
+    features = []
+    expected_labels = []
+    for feature, label in data.gen_tf_dataset():
+      features.append(feature.numpy())
+      expected_labels.append(label.numpy())
+    expected_outputs = model.predict_on_batch(np.concatenate(features))
+    self.assertEqual(outputs.shape, (data_size, 2))
+    self.assertAllClose(outputs, expected_outputs, atol=1e-04)
+    self.assertAllEqual(labels, np.concatenate(expected_labels))
+
+  def test_evaluate_tflite_quantized(self):
+    input_dim = 16
+    data_size = 10
+    model = test_util.build_model(input_shape=[input_dim], num_classes=3)
+    config = quantization.QuantizationConfig.for_int8(
+        representative_data=test_util.create_dataset(
+            data_size=10, input_shape=[input_dim], num_classes=3))
+    tflite_model = model_util.convert_to_tflite(
+        model=model, quantization_config=config)
+    data = test_util.create_dataset(
+        data_size=data_size, input_shape=[input_dim], num_classes=3)
+    lite_runner = model_util.get_lite_runner(tflite_model, num_threads=2)
+
+    # All but the first batch are dequantized into the preallocated outputs.
+    outputs, _ = lite_runner.evaluate_tflite(data, batch_size=3)
+
+    features = np.concatenate(
+        [feature.numpy() for feature, _ in data.gen_tf_dataset()])
+    self.assertEqual(outputs.dtype, np.float32)
+    self.assertAllClose(outputs, lite_runner.run(features))
+
+  def test_lite_runner_raise_value_error(self):
+    model = test_util.build_model(input_shape=[4], num_classes=2)
+    tflite_model = model_util.convert_to_tflite(model)
+    with self.assertRaises(ValueError):
+      model_util.get_lite_runner(tflite_model, num_threads=0)
+
   def test_save_tflite(self):
     input_dim = 4
     model = test_util.build_model(input_shape=[input_dim], num_classes=2)
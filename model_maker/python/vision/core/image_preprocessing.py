@@ -36,10 +36,51 @@ class Preprocessor(object):
     self.use_augmentation = use_augmentation
 
   def __call__(self, image, label, is_training=True):
+    image, label = self.deterministic_preprocess(image, label, is_training)
+    return self.random_preprocess(image, label, is_training)
+
+  @property
+  def fingerprint(self):
+    """Returns a string identifying the outputs of this preprocessor."""
+    return repr((list(self.input_shape), self.num_classes, list(self.mean_rgb),
+                 list(self.stddev_rgb), self.use_augmentation))
+
+  def deterministic_preprocess(self, image, label, is_training=True):
+    """Runs the part of the preprocessing that doesn't depend on randomness.
+
+    The outputs of this method can be cached across epochs. They are the
+    decoded images when training with data augmentation, since the random crop
+    is taken from the original image, and fully preprocessed images otherwise.
+
+    Args:
+      image: The decoded image tensor.
+      label: The label index.
+      is_training: Whether the data is used for training.
+
+    Returns:
+      The partially preprocessed image and label.
+    """
     if self.use_augmentation:
+      if is_training:
+        return image, label
       return self._preprocess_with_augmentation(image, label, is_training)
     return self._preprocess_without_augmentation(image, label)
 
+  def random_preprocess(self, image, label, is_training=True):
+    """Runs the rest of the preprocessing on `deterministic_preprocess` outputs.
+
+    Args:
+      image: The image tensor returned by `deterministic_preprocess`.
+      label: The label returned by `deterministic_preprocess`.
+      is_training: Whether the data is used for training.
+
+    Returns:
+      The preprocessed image and one-hot label.
+    """
+    if self.use_augmentation and is_training:
+      return self._preprocess_with_augmentation(image, label, is_training)
+    return image, label
+
   def _preprocess_with_augmentation(self, image, label, is_training):
     """Image preprocessing method with data augmentation."""
     image_size = self.input_shape[0]
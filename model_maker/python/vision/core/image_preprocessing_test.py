@@ -74,6 +74,37 @@ class PreprocessorTest(tf.test.TestCase):
     self.assertEqual(image1.shape, (2, 2, 3))
     self.assertEqual(image2.shape, (2, 2, 3))
 
+  def test_deterministic_preprocess_with_augmentation(self):
+    preprocessor = image_preprocessing.Preprocessor(input_shape=[2, 2],
+                                                    num_classes=2,
+                                                    mean_rgb=[0.0],
+                                                    stddev_rgb=[255.0],
+                                                    use_augmentation=True)
+    image_placeholder = tf.compat.v1.placeholder(tf.uint8, [24, 24, 3])
+    label_placeholder = tf.compat.v1.placeholder(tf.int32, [1])
+    image_tensor, label_tensor = preprocessor.deterministic_preprocess(
+        image_placeholder, label_placeholder, is_training=True)
+
+    # Training images are left untouched so augmentation runs every epoch.
+    self.assertIs(image_tensor, image_placeholder)
+    self.assertIs(label_tensor, label_placeholder)
+
+  def test_preprocess_split_matches_call(self):
+    preprocessor = image_preprocessing.Preprocessor(input_shape=[2, 2],
+                                                    num_classes=2,
+                                                    mean_rgb=[0.0],
+                                                    stddev_rgb=[255.0],
+                                                    use_augmentation=False)
+
+    def split_preprocessor(image, label, is_training):
+      image, label = preprocessor.deterministic_preprocess(
+          image, label, is_training)
+      return preprocessor.random_preprocess(image, label, is_training)
+
+    image = _get_preprocessed_image(preprocessor)
+    split_image = _get_preprocessed_image(split_preprocessor)
+    self.assertTrue(np.allclose(image, split_image, atol=1e-05))
+
 
 if __name__ == '__main__':
   tf.compat.v1.disable_eager_execution()
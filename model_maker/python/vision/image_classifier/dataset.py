@@ -13,19 +13,38 @@
 # limitations under the License.
 """Image classifier dataset library."""
 
+from concurrent import futures
+import csv
+import functools
+import hashlib
+import json
 import os
 import random
 
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
 import tensorflow as tf
 import tensorflow_datasets as tfds
 
 from mediapipe.model_maker.python.core.data import classification_dataset
 
 
-def _load_image(path: str) -> tf.Tensor:
-  """Loads a jpeg/png image and returns an image tensor."""
-  image_raw = tf.io.read_file(path)
+_MANIFEST_FIELDS = ('path', 'label', 'size')
+# The first row of the manifest lists all the label names after this key, since
+# the labels without any image don't appear in the manifest entries.
+_MANIFEST_LABEL_NAMES_KEY = 'label_names'
+_TFRECORD_METADATA_FILENAME = 'metadata.json'
+_TFRECORD_FILENAME = 'images-%05d-of-%05d.tfrecord'
+_IMAGE_ENCODED_KEY = 'image/encoded'
+_IMAGE_LABEL_KEY = 'image/class/label'
+
+# A manifest entry: image path relative to the data root, label name and file
+# size in bytes.
+_ManifestEntry = Tuple[str, str, int]
+
+
+def _decode_image(image_raw: tf.Tensor) -> tf.Tensor:
+  """Decodes a jpeg/png image and returns an image tensor."""
   image_tensor = tf.cond(
       tf.io.is_jpeg(image_raw),
       lambda: tf.io.decode_jpeg(image_raw, channels=3),
@@ -33,6 +52,153 @@ def _load_image(path: str) -> tf.Tensor:
   return image_tensor
 
 
+def _load_image(path: str) -> tf.Tensor:
+  """Loads a jpeg/png image and returns an image tensor."""
+  return _decode_image(tf.io.read_file(path))
+
+
+def _load_image_and_label(path: tf.Tensor,
+                          label: tf.Tensor) -> Tuple[tf.Tensor, tf.Tensor]:
+  """Loads the image of an (image path, label) pair."""
+  return _load_image(path), label
+
+
+def _list_label_names(data_root: str) -> List[str]:
+  """Returns the sorted names of the subdirectories of `data_root`."""
+  return sorted(
+      name.rstrip('/')
+      for name in tf.io.gfile.listdir(data_root)
+      if tf.io.gfile.isdir(os.path.join(data_root, name)))
+
+
+def _list_label_dir(data_root: str, label_name: str) -> List[_ManifestEntry]:
+  """Lists the images of one label subdirectory."""
+  label_dir = os.path.join(data_root, label_name)
+  entries = []
+  for filename in sorted(tf.io.gfile.listdir(label_dir)):
+    stat = tf.io.gfile.stat(os.path.join(label_dir, filename))
+    if not stat.is_directory:
+      entries.append((os.path.join(label_name, filename), label_name,
+                      stat.length))
+  return entries
+
+
+def _list_images(
+    data_root: str, label_names: Sequence[str],
+    num_parallel_listings: int) -> List[_ManifestEntry]:
+  """Lists the images of all label subdirectories in parallel."""
+  with futures.ThreadPoolExecutor(
+      max_workers=num_parallel_listings) as executor:
+    entries_by_label = executor.map(
+        functools.partial(_list_label_dir, data_root), label_names)
+    return [entry for entries in entries_by_label for entry in entries]
+
+
+def _write_manifest(path: str, label_names: Sequence[str],
+                    entries: Sequence[_ManifestEntry]) -> None:
+  """Writes the label names and the manifest entries to a CSV file."""
+  temp_path = path + '.tmp'
+  with tf.io.gfile.GFile(temp_path, 'w') as f:
+    writer = csv.writer(f)
+    writer.writerow((_MANIFEST_LABEL_NAMES_KEY,) + tuple(label_names))
+    writer.writerow(_MANIFEST_FIELDS)
+    writer.writerows(entries)
+  tf.io.gfile.rename(temp_path, path, overwrite=True)
+
+
+def _read_manifest(path: str) -> Tuple[List[str], List[_ManifestEntry]]:
+  """Reads the label names and the manifest entries from a CSV file."""
+  with tf.io.gfile.GFile(path, 'r') as f:
+    reader = csv.reader(f)
+    label_names_row = next(reader, [])
+    if (not label_names_row or
+        label_names_row[0] != _MANIFEST_LABEL_NAMES_KEY or
+        tuple(next(reader, ())) != _MANIFEST_FIELDS):
+      raise ValueError('Invalid manifest file: %s' % path)
+    entries = [(image_path, label, int(size))
+               for image_path, label, size in reader]
+    return label_names_row[1:], entries
+
+
+def _get_manifest_entries(
+    data_root: str, manifest_path: Optional[str],
+    num_parallel_listings: int) -> Tuple[List[str], List[_ManifestEntry]]:
+  """Returns the label names and the images of `data_root`.
+
+  Args:
+    data_root: Directory containing one subdirectory of images per label.
+    manifest_path: Optional path of the manifest file. The manifest is read if
+      it exists, otherwise it is written after listing `data_root`.
+    num_parallel_listings: Number of label directories listed concurrently.
+
+  Returns:
+    The sorted label names and the manifest entries, sorted by path.
+  """
+  if manifest_path and tf.io.gfile.exists(manifest_path):
+    tf.compat.v1.logging.info('Reading manifest %s', manifest_path)
+    return _read_manifest(manifest_path)
+
+  label_names = _list_label_names(data_root)
+  entries = _list_images(data_root, label_names, num_parallel_listings)
+  if manifest_path:
+    tf.compat.v1.logging.info('Writing manifest %s', manifest_path)
+    _write_manifest(manifest_path, label_names, entries)
+  return label_names, entries
+
+
+def _check_shard(shard_index: int, num_shards: int) -> None:
+  """Raises ValueError if the shard index is out of range."""
+  if num_shards < 1 or not 0 <= shard_index < num_shards:
+    raise ValueError('Invalid shard_index %d for num_shards %d.' %
+                     (shard_index, num_shards))
+
+
+def _write_tfrecord(path: str, data_root: str, entries: Sequence[Tuple[str,
+                                                                      int]]):
+  """Writes the encoded bytes and label index of each image to `path`."""
+  with tf.io.TFRecordWriter(path) as writer:
+    for image_path, label in entries:
+      with tf.io.gfile.GFile(os.path.join(data_root, image_path), 'rb') as f:
+        image_raw = f.read()
+      example = tf.train.Example(
+          features=tf.train.Features(
+              feature={
+                  _IMAGE_ENCODED_KEY:
+                      tf.train.Feature(
+                          bytes_list=tf.train.BytesList(value=[image_raw])),
+                  _IMAGE_LABEL_KEY:
+                      tf.train.Feature(
+                          int64_list=tf.train.Int64List(value=[label])),
+              }))
+      writer.write(example.SerializeToString())
+
+
+def _parse_tfrecord(serialized: tf.Tensor) -> Tuple[tf.Tensor, tf.Tensor]:
+  """Parses and decodes an example written by `_write_tfrecord`."""
+  features = tf.io.parse_single_example(
+      serialized, {
+          _IMAGE_ENCODED_KEY: tf.io.FixedLenFeature([], tf.string),
+          _IMAGE_LABEL_KEY: tf.io.FixedLenFeature([], tf.int64),
+      })
+  return (_decode_image(features[_IMAGE_ENCODED_KEY]),
+          features[_IMAGE_LABEL_KEY])
+
+
+def _fingerprint_files(paths: Sequence[str], labels: Sequence[int]) -> str:
+  """Returns a hash of the paths, sizes, modification times and labels.
+
+  The files are hashed in sorted order, so that the hash doesn't depend on how
+  the images are shuffled.
+  """
+  hasher = hashlib.sha256()
+  for path, label in sorted(zip(paths, labels)):
+    stat = tf.io.gfile.stat(path)
+    hasher.update(
+        ('%s\0%d\0%d\0%d\n' %
+         (path, stat.length, stat.mtime_nsec, label)).encode('utf-8'))
+  return hasher.hexdigest()
+
+
 def _create_data(
     name: str, data: tf.data.Dataset, info: tfds.core.DatasetInfo,
     label_names: List[str]
@@ -53,7 +219,12 @@ class Dataset(classification_dataset.ClassificationDataset):
   def from_folder(
       cls,
       dirname: str,
-      shuffle: bool = True) -> classification_dataset.ClassificationDataset:
+      shuffle: bool = True,
+      manifest_path: Optional[str] = None,
+      shard_index: int = 0,
+      num_shards: int = 1,
+      num_parallel_listings: int = 16
+  ) -> classification_dataset.ClassificationDataset:
     """Loads images and labels from the given directory.
 
     Assume the image data of the same label are in the same subdirectory.
@@ -61,35 +232,44 @@ class Dataset(classification_dataset.ClassificationDataset):
     Args:
       dirname: Name of the directory containing the data files.
       shuffle: boolean, if true, random shuffle data.
+      manifest_path: Optional path of a CSV manifest listing the path, label and
+        size of every image. If the file exists, it is used instead of listing
+        `dirname`. Otherwise, it is written so that later runs can reuse it.
+      shard_index: Index of the shard of images to load.
+      num_shards: Number of shards the images are split into, e.g. one per
+        host.
+      num_parallel_listings: Number of label subdirectories listed
+        concurrently.
 
     Returns:
       Dataset containing images and labels and other related info.
     Raises:
-      ValueError: if the input data directory is empty.
+      ValueError: if the input data directory is empty or the shard is
+        invalid.
     """
+    _check_shard(shard_index, num_shards)
     data_root = os.path.abspath(dirname)
 
     # Assumes the image data of the same label are in the same subdirectory,
     # gets image path and label names.
-    all_image_paths = list(tf.io.gfile.glob(data_root + r'/*/*'))
-    all_image_size = len(all_image_paths)
+    label_names, entries = _get_manifest_entries(data_root, manifest_path,
+                                                 num_parallel_listings)
+    entries = entries[shard_index::num_shards]
+    all_image_size = len(entries)
     if all_image_size == 0:
       raise ValueError('Image size is zero')
 
     if shuffle:
       # Random shuffle data.
-      random.shuffle(all_image_paths)
+      random.shuffle(entries)
 
-    label_names = sorted(
-        name for name in os.listdir(data_root)
-        if os.path.isdir(os.path.join(data_root, name)))
     all_label_size = len(label_names)
     index_by_label = dict(
         (name, index) for index, name in enumerate(label_names))
-    all_image_labels = [
-        index_by_label[os.path.basename(os.path.dirname(path))]
-        for path in all_image_paths
+    all_image_paths = [
+        os.path.join(data_root, image_path) for image_path, _, _ in entries
     ]
+    all_image_labels = [index_by_label[label] for _, label, _ in entries]
 
     path_ds = tf.data.Dataset.from_tensor_slices(all_image_paths)
 
@@ -105,5 +285,131 @@ class Dataset(classification_dataset.ClassificationDataset):
     tf.compat.v1.logging.info(
         'Load image with size: %d, num_label: %d, labels: %s.', all_image_size,
         all_label_size, ', '.join(label_names))
-    return Dataset(
+    data = Dataset(
         dataset=image_label_ds, size=all_image_size, label_names=label_names)
+    data._fingerprint_fn = functools.partial(
+        _fingerprint_files, all_image_paths, all_image_labels)
+    data._set_items((np.asarray(all_image_paths),
+                     np.asarray(all_image_labels, dtype=np.int64)),
+                    _load_image_and_label)
+    return data
+
+  @staticmethod
+  def convert_folder_to_tfrecords(dirname: str,
+                                  output_dir: str,
+                                  num_shards: int = 16,
+                                  manifest_path: Optional[str] = None,
+                                  num_parallel_listings: int = 16,
+                                  num_parallel_writes: int = 16) -> None:
+    """Converts an image folder to sharded TFRecords of encoded images.
+
+    The images are written in a fixed random order so that reading the shards
+    sequentially doesn't iterate through the labels one after another. The
+    result can be loaded with `from_tfrecords`.
+
+    Args:
+      dirname: Name of the directory containing the data files, with the same
+        layout as for `from_folder`.
+      output_dir: Directory to write the TFRecord shards and metadata to.
+      num_shards: Number of TFRecord files to write.
+      manifest_path: Optional path of the manifest, see `from_folder`.
+      num_parallel_listings: Number of label subdirectories listed
+        concurrently.
+      num_parallel_writes: Number of shards written concurrently.
+
+    Raises:
+      ValueError: if the input data directory is empty.
+    """
+    if num_shards < 1:
+      raise ValueError('num_shards must be at least 1, got %d.' % num_shards)
+    data_root = os.path.abspath(dirname)
+    label_names, entries = _get_manifest_entries(data_root, manifest_path,
+                                                 num_parallel_listings)
+    if not entries:
+      raise ValueError('Image size is zero')
+    index_by_label = dict(
+        (name, index) for index, name in enumerate(label_names))
+    entries = [(image_path, index_by_label[label])
+               for image_path, label, _ in entries]
+    random.Random(0).shuffle(entries)
+
+    if not tf.io.gfile.exists(output_dir):
+      tf.io.gfile.makedirs(output_dir)
+    filenames = [
+        _TFRECORD_FILENAME % (i, num_shards) for i in range(num_shards)
+    ]
+    shard_entries = [entries[i::num_shards] for i in range(num_shards)]
+    with futures.ThreadPoolExecutor(
+        max_workers=num_parallel_writes) as executor:
+      list(
+          executor.map(
+              lambda filename, shard: _write_tfrecord(
+                  os.path.join(output_dir, filename), data_root, shard),
+              filenames, shard_entries))
+
+    metadata = {
+        'label_names': label_names,
+        'filenames': filenames,
+        'sizes': [len(shard) for shard in shard_entries],
+    }
+    with tf.io.gfile.GFile(
+        os.path.join(output_dir, _TFRECORD_METADATA_FILENAME), 'w') as f:
+      json.dump(metadata, f)
+    tf.compat.v1.logging.info('Wrote %d images to %d TFRecord files in %s.',
+                              len(entries), num_shards, output_dir)
+
+  @classmethod
+  def from_tfrecords(
+      cls,
+      dirname: str,
+      shuffle: bool = True,
+      shard_index: int = 0,
+      num_shards: int = 1) -> classification_dataset.ClassificationDataset:
+    """Loads images and labels written by `convert_folder_to_tfrecords`.
+
+    Args:
+      dirname: Name of the directory containing the TFRecord files.
+      shuffle: boolean, if true, the TFRecord files are read in random order.
+      shard_index: Index of the shard of TFRecord files to load.
+      num_shards: Number of shards the TFRecord files are split into, e.g. one
+        per host. It can't be larger than the number of TFRecord files.
+
+    Returns:
+      Dataset containing images and labels and other related info.
+    Raises:
+      ValueError: if the shard is invalid or empty.
+    """
+    _check_shard(shard_index, num_shards)
+    metadata_path = os.path.join(dirname, _TFRECORD_METADATA_FILENAME)
+    with tf.io.gfile.GFile(metadata_path, 'r') as f:
+      metadata = json.load(f)
+    if num_shards > len(metadata['filenames']):
+      raise ValueError('num_shards (%d) is larger than the number of TFRecord '
+                       'files (%d).' % (num_shards, len(metadata['filenames'])))
+    filenames = metadata['filenames'][shard_index::num_shards]
+    size = sum(metadata['sizes'][shard_index::num_shards])
+    if size == 0:
+      raise ValueError('Image size is zero')
+    label_names = metadata['label_names']
+
+    file_ds = tf.data.Dataset.from_tensor_slices(
+        [os.path.join(dirname, filename) for filename in filenames])
+    if shuffle:
+      file_ds = file_ds.shuffle(len(filenames))
+    record_ds = file_ds.interleave(
+        tf.data.TFRecordDataset,
+        num_parallel_calls=tf.data.AUTOTUNE,
+        deterministic=not shuffle)
+    image_label_ds = record_ds.map(
+        _parse_tfrecord, num_parallel_calls=tf.data.AUTOTUNE)
+
+    tf.compat.v1.logging.info(
+        'Load image with size: %d, num_label: %d, labels: %s.', size,
+        len(label_names), ', '.join(label_names))
+    data = Dataset(dataset=image_label_ds, size=size, label_names=label_names)
+    fingerprint = hashlib.sha256(
+        json.dumps([os.path.abspath(dirname), metadata, filenames],
+                   sort_keys=True).encode('utf-8')).hexdigest()
+    if not shuffle:
+      data._fingerprint_fn = lambda: fingerprint
+    return data
@@ -14,6 +14,8 @@
 
 import os
 import random
+from unittest import mock
+
 import numpy as np
 import tensorflow as tf
 
@@ -80,6 +82,133 @@ class DatasetTest(tf.test.TestCase):
             os.path.join(self.image_path, 'tulips', '0.jpeg'))
       self.assertTrue((image.numpy() == raw_image_tensor.numpy()).all())
 
+  def test_from_folder_with_cache_dir(self):
+    data = dataset.Dataset.from_folder(dirname=self.image_path, shuffle=False)
+    cache_dir = os.path.join(self.get_temp_dir(), 'cache')
+    data.enable_cache(cache_dir)
+    self.assertIsNotNone(data.fingerprint)
+
+    expected = [(image.numpy(), label.numpy())
+                for image, label in data.gen_tf_dataset()]
+    self.assertNotEmpty(tf.io.gfile.listdir(cache_dir))
+    cached = [(image.numpy(), label.numpy())
+              for image, label in data.gen_tf_dataset()]
+    self.assertLen(cached, len(expected))
+    for (image, label), (cached_image, cached_label) in zip(expected, cached):
+      self.assertAllEqual(image, cached_image)
+      self.assertEqual(label, cached_label)
+
+    # Rewriting an image invalidates the fingerprint and thus the cache.
+    _write_filled_jpeg_file(
+        os.path.join(self.image_path, 'daisy', '0.jpeg'), [0, 0, 0], 112)
+    reloaded_data = dataset.Dataset.from_folder(
+        dirname=self.image_path, shuffle=False)
+    self.assertNotEqual(reloaded_data.fingerprint, data.fingerprint)
+
+  def test_from_folder_fingerprint_is_independent_of_shuffle(self):
+    data = dataset.Dataset.from_folder(dirname=self.image_path, shuffle=False)
+    with mock.patch.object(random, 'shuffle', lambda x: x.reverse()):
+      shuffled_data = dataset.Dataset.from_folder(dirname=self.image_path)
+    self.assertEqual(shuffled_data.fingerprint, data.fingerprint)
+
+    # The subsets hold different images after shuffling, so they don't share
+    # their cache.
+    train_data, test_data = data.split(fraction=0.5)
+    shuffled_train_data, shuffled_test_data = shuffled_data.split(fraction=0.5)
+    self.assertEqual(shuffled_train_data.fingerprint, test_data.fingerprint)
+    self.assertEqual(shuffled_test_data.fingerprint, train_data.fingerprint)
+    self.assertNotEqual(train_data.fingerprint, test_data.fingerprint)
+
+  def test_from_folder_split_and_shuffle_items(self):
+    data = dataset.Dataset.from_folder(dirname=self.image_path, shuffle=False)
+    train_data, test_data = data.split(fraction=0.5)
+
+    self.assertLen(train_data, 1)
+    self.assertLen(test_data, 1)
+    self.assertAllEqual(train_data._items[1], [0])
+    self.assertAllEqual(test_data._items[1], [1])
+    for _, label in test_data.gen_tf_dataset():
+      self.assertEqual(label.numpy(), [1])
+
+    labels = [
+        label.numpy()[0] for _, label in data.gen_tf_dataset(
+            is_training=True, shuffle=True)
+    ]
+    self.assertCountEqual(labels, [0, 1])
+
+  def test_from_folder_with_manifest(self):
+    manifest_path = os.path.join(self.get_temp_dir(), 'manifest.csv')
+    data = dataset.Dataset.from_folder(
+        dirname=self.image_path, manifest_path=manifest_path)
+    self.assertLen(data, 2)
+    self.assertTrue(os.path.exists(manifest_path))
+
+    # Images added after the manifest was written are not listed again.
+    extra_image_path = os.path.join(self.image_path, 'daisy', '1.jpeg')
+    _write_filled_jpeg_file(extra_image_path, [0, 0, 0], 224)
+    try:
+      reloaded_data = dataset.Dataset.from_folder(
+          dirname=self.image_path, manifest_path=manifest_path)
+    finally:
+      os.remove(extra_image_path)
+    self.assertLen(reloaded_data, 2)
+    self.assertEqual(reloaded_data.label_names, ['daisy', 'tulips'])
+
+  def test_from_folder_with_manifest_keeps_empty_labels(self):
+    # An empty label directory sorted before the others keeps its index when
+    # the manifest is read back.
+    empty_label_dir = os.path.join(self.image_path, 'aster')
+    os.mkdir(empty_label_dir)
+    manifest_path = os.path.join(self.get_temp_dir(), 'empty_label.csv')
+    try:
+      data = dataset.Dataset.from_folder(
+          dirname=self.image_path, shuffle=False, manifest_path=manifest_path)
+    finally:
+      os.rmdir(empty_label_dir)
+    reloaded_data = dataset.Dataset.from_folder(
+        dirname=self.image_path, shuffle=False, manifest_path=manifest_path)
+
+    self.assertEqual(data.label_names, ['aster', 'daisy', 'tulips'])
+    self.assertEqual(reloaded_data.label_names, ['aster', 'daisy', 'tulips'])
+    labels = [
+        int(label.numpy()[0]) for _, label in reloaded_data.gen_tf_dataset()
+    ]
+    self.assertEqual(labels, [1, 2])
+
+  def test_from_folder_with_shards(self):
+    labels = []
+    for shard_index in range(2):
+      data = dataset.Dataset.from_folder(
+          dirname=self.image_path, shard_index=shard_index, num_shards=2)
+      self.assertLen(data, 1)
+      self.assertEqual(data.label_names, ['daisy', 'tulips'])
+      labels.extend(int(label.numpy()[0]) for _, label in data.gen_tf_dataset())
+    self.assertCountEqual(labels, [0, 1])
+
+    with self.assertRaises(ValueError):
+      dataset.Dataset.from_folder(
+          dirname=self.image_path, shard_index=2, num_shards=2)
+
+  def test_from_tfrecords(self):
+    output_dir = os.path.join(self.get_temp_dir(), 'tfrecords')
+    dataset.Dataset.convert_folder_to_tfrecords(
+        dirname=self.image_path, output_dir=output_dir, num_shards=2)
+    data = dataset.Dataset.from_tfrecords(dirname=output_dir)
+
+    self.assertLen(data, 2)
+    self.assertEqual(data.label_names, ['daisy', 'tulips'])
+    for image, label in data.gen_tf_dataset():
+      raw_image_tensor = dataset._load_image(
+          os.path.join(self.image_path, data.label_names[label.numpy()[0]],
+                       '0.jpeg'))
+      self.assertTrue((image.numpy()[0] == raw_image_tensor.numpy()).all())
+
+    shard = dataset.Dataset.from_tfrecords(
+        dirname=output_dir, shard_index=1, num_shards=2)
+    self.assertLen(shard, 1)
+    with self.assertRaises(ValueError):
+      dataset.Dataset.from_tfrecords(dirname=output_dir, num_shards=3)
+
   def test_from_tfds(self):
     # TODO: Remove this once tfds download error is fixed.
     self.skipTest('Temporarily skip the unittest due to tfds download error.')
@@ -0,0 +1,158 @@
+# Copyright 2022 The MediaPipe Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Cache of frozen backbone features for training classification heads."""
+
+import hashlib
+import os
+from typing import Any, Callable, Optional, Tuple
+
+import numpy as np
+import tensorflow as tf
+
+from mediapipe.model_maker.python.core.data import dataset
+
+_FEATURES_SUFFIX = '.features.npy'
+_LABELS_SUFFIX = '.labels.npy'
+
+
+def get_cache_key(*parts: Any) -> Optional[str]:
+  """Returns a key identifying the features, or None if a part is unknown.
+
+  Args:
+    *parts: Values identifying the cached features, e.g. the dataset
+      fingerprint, the backbone URI and the preprocessor fingerprint.
+
+  Returns:
+    A hex digest of the parts, or None if any of them is None.
+  """
+  if any(part is None for part in parts):
+    return None
+  return hashlib.sha256(repr(parts).encode('utf-8')).hexdigest()
+
+
+def _extract_features(
+    backbone: Callable[..., tf.Tensor], data: dataset.Dataset,
+    preprocess: Optional[Callable[..., bool]],
+    batch_size: int) -> Tuple[np.ndarray, np.ndarray]:
+  """Runs `backbone` once over `data` and returns features and labels."""
+  features = []
+  labels = []
+  tf_dataset = data.gen_tf_dataset(
+      batch_size, is_training=False, preprocess=preprocess)
+  for image, label in tf_dataset:
+    features.append(backbone(image, training=False).numpy())
+    labels.append(label.numpy())
+  return np.concatenate(features), np.concatenate(labels)
+
+
+def _save_array(path: str, array: np.ndarray) -> None:
+  """Saves `array` to `path` atomically."""
+  temp_path = path + '.tmp'
+  with tf.io.gfile.GFile(temp_path, 'wb') as f:
+    np.save(f, array)
+  tf.io.gfile.rename(temp_path, path, overwrite=True)
+
+
+def _load_array(path: str) -> np.ndarray:
+  """Loads the array saved to `path`, memory-mapping local files."""
+  if '://' not in path:
+    return np.load(path, mmap_mode='r')
+  with tf.io.gfile.GFile(path, 'rb') as f:
+    return np.load(f)
+
+
+def get_features(
+    backbone: Callable[..., tf.Tensor],
+    data: dataset.Dataset,
+    preprocess: Optional[Callable[..., bool]] = None,
+    batch_size: int = 32,
+    cache_dir: Optional[str] = None,
+    cache_key: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+  """Gets the backbone features of `data`, computing them only once.
+
+  The features are extracted from the non-augmented data. If both `cache_dir`
+  and `cache_key` are set, they are stored as NumPy files in `cache_dir` and
+  loaded on later calls, e.g. across hyperparameter sweeps. Local files are
+  memory-mapped.
+
+  Args:
+    backbone: The frozen backbone mapping a batch of images to features.
+    data: Dataset of (image, label) pairs.
+    preprocess: A callable to preprocess the data. The callable takes three
+      arguments in order: feature, label, and is_training.
+    batch_size: Batch size used to run the backbone.
+    cache_dir: Directory to cache the features in.
+    cache_key: Key identifying the features, see `get_cache_key`.
+
+  Returns:
+    A tuple of the features and the preprocessed labels.
+  """
+  if cache_dir is None or cache_key is None:
+    if cache_dir is not None:
+      tf.compat.v1.logging.warning(
+          'The dataset has no fingerprint, features are kept in memory.')
+    return _extract_features(backbone, data, preprocess, batch_size)
+
+  features_path = os.path.join(cache_dir, cache_key + _FEATURES_SUFFIX)
+  labels_path = os.path.join(cache_dir, cache_key + _LABELS_SUFFIX)
+  if not (tf.io.gfile.exists(features_path) and
+          tf.io.gfile.exists(labels_path)):
+    tf.compat.v1.logging.info('Caching backbone features in %s', features_path)
+    features, labels = _extract_features(backbone, data, preprocess,
+                                         batch_size)
+    tf.io.gfile.makedirs(cache_dir)
+    _save_array(labels_path, labels)
+    _save_array(features_path, features)
+  else:
+    tf.compat.v1.logging.info('Loading cached backbone features from %s',
+                              features_path)
+  return _load_array(features_path), _load_array(labels_path)
+
+
+def gen_feature_dataset(features: np.ndarray,
+                        labels: np.ndarray,
+                        batch_size: int,
+                        shuffle: bool = False) -> tf.data.Dataset:
+  """Generates a batched tf.data.Dataset from cached features.
+
+  When shuffling, the sample indices are permuted every epoch and each batch is
+  gathered in increasing index order, which keeps reads from memory-mapped
+  features mostly sequential.
+
+  Args:
+    features: Array of features, one row per sample.
+    labels: Array of labels, one row per sample.
+    batch_size: Number of samples per batch.
+    shuffle: Whether to shuffle the samples every epoch.
+
+  Returns:
+    A TF dataset of (features, labels) batches.
+  """
+
+  def _gen():
+    indices = np.arange(len(features))
+    if shuffle:
+      np.random.shuffle(indices)
+    for start in range(0, len(indices), batch_size):
+      batch_indices = np.sort(indices[start:start + batch_size])
+      yield features[batch_indices], labels[batch_indices]
+
+  tf_dataset = tf.data.Dataset.from_generator(
+      _gen,
+      output_signature=(
+          tf.TensorSpec(shape=(None,) + features.shape[1:],
+                        dtype=tf.as_dtype(features.dtype)),
+          tf.TensorSpec(shape=(None,) + labels.shape[1:],
+                        dtype=tf.as_dtype(labels.dtype))))
+  return tf_dataset.prefetch(tf.data.AUTOTUNE)
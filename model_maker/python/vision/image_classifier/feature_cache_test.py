@@ -0,0 +1,90 @@
+# Copyright 2022 The MediaPipe Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+import numpy as np
+import tensorflow as tf
+
+from mediapipe.model_maker.python.core.utils import test_util
+from mediapipe.model_maker.python.vision.image_classifier import feature_cache
+
+
+class _CountingBackbone(object):
+  """Backbone averaging its inputs and counting the number of calls."""
+
+  def __init__(self):
+    self.num_calls = 0
+
+  def __call__(self, inputs, training=False):
+    del training
+    self.num_calls += 1
+    return tf.reduce_mean(inputs, axis=-1, keepdims=True)
+
+
+class FeatureCacheTest(tf.test.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.data = test_util.create_dataset(
+        data_size=5, input_shape=[4], num_classes=2)
+
+  def test_get_cache_key(self):
+    self.assertIsNone(feature_cache.get_cache_key('data', None))
+    self.assertEqual(
+        feature_cache.get_cache_key('data', 'uri'),
+        feature_cache.get_cache_key('data', 'uri'))
+    self.assertNotEqual(
+        feature_cache.get_cache_key('data', 'uri'),
+        feature_cache.get_cache_key('data', 'other_uri'))
+
+  def test_get_features_in_memory(self):
+    backbone = _CountingBackbone()
+    features, labels = feature_cache.get_features(
+        backbone, self.data, batch_size=2)
+    self.assertEqual(features.shape, (5, 1))
+    self.assertEqual(labels.shape, (5,))
+    self.assertEqual(backbone.num_calls, 3)
+
+  def test_get_features_reuses_cache(self):
+    cache_dir = os.path.join(self.get_temp_dir(), 'features')
+    backbone = _CountingBackbone()
+    features, labels = feature_cache.get_features(
+        backbone, self.data, batch_size=2, cache_dir=cache_dir, cache_key='key')
+    self.assertIsInstance(features, np.memmap)
+    self.assertEqual(backbone.num_calls, 3)
+
+    cached_features, cached_labels = feature_cache.get_features(
+        backbone, self.data, batch_size=2, cache_dir=cache_dir, cache_key='key')
+    self.assertEqual(backbone.num_calls, 3)
+    self.assertAllEqual(features, cached_features)
+    self.assertAllEqual(labels, cached_labels)
+
+  def test_gen_feature_dataset(self):
+    features = np.arange(10, dtype=np.float32).reshape([5, 2])
+    labels = np.arange(5, dtype=np.int32)
+    tf_dataset = feature_cache.gen_feature_dataset(
+        features, labels, batch_size=2, shuffle=True)
+
+    for _ in range(2):
+      batches = list(tf_dataset)
+      self.assertLen(batches, 3)
+      all_labels = np.concatenate([label.numpy() for _, label in batches])
+      self.assertCountEqual(all_labels, labels)
+      for feature, label in batches:
+        self.assertAllEqual(feature.numpy(), features[label.numpy()])
+
+
+if __name__ == '__main__':
+  tf.test.main()
@@ -50,6 +50,13 @@ class HParams:
       and create the training optimizer.
     warmup_steps: Number of warmup steps for a linear increasing warmup schedule
        on learning rate. Used to set up warmup schedule by model_util.WarmUp.
+    use_feature_cache: A boolean controlling whether, when do_fine_tuning is
+      false, the frozen base module runs only once over the non-augmented
+      dataset and the classification layer is trained on the cached features.
+      do_data_augmentation is ignored in this mode.
+    feature_cache_dir: The directory to store the cached features in, so that
+      they are reused across runs on the same data and model. If not set, the
+      features are kept in memory.
 
     # Parameters about the saved checkpoint
     model_dir: The location of model checkpoint files and exported model files.
@@ -69,6 +76,8 @@ class HParams:
   steps_per_epoch: Optional[int] = None
   decay_samples: int = 10000 * 256
   warmup_epochs: int = 2
+  use_feature_cache: bool = False
+  feature_cache_dir: Optional[str] = None
 
   # Parameters about the saved checkpoint
   model_dir: str = tempfile.mkdtemp()
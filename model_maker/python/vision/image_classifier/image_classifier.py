@@ -24,6 +24,7 @@ from mediapipe.model_maker.python.core.tasks import classifier
 from mediapipe.model_maker.python.core.utils import model_util
 from mediapipe.model_maker.python.core.utils import quantization
 from mediapipe.model_maker.python.vision.core import image_preprocessing
+from mediapipe.model_maker.python.vision.image_classifier import feature_cache
 from mediapipe.model_maker.python.vision.image_classifier import hyperparameters as hp
 from mediapipe.model_maker.python.vision.image_classifier import model_spec as ms
 from mediapipe.model_maker.python.vision.image_classifier import train_image_classifier_lib
@@ -113,15 +114,20 @@ class ImageClassifier(classifier.Classifier):
                        'the batch_size smaller or increase the size of the '
                        'train_data.' % (len(train_data), hparams.batch_size))
 
+    hparams.steps_per_epoch = model_util.get_steps_per_epoch(
+        steps_per_epoch=hparams.steps_per_epoch,
+        batch_size=hparams.batch_size,
+        train_data=train_data)
+
+    if hparams.use_feature_cache and not hparams.do_fine_tuning:
+      self._train_on_cached_features(train_data, validation_data)
+      return
+
     train_dataset = train_data.gen_tf_dataset(
         batch_size=hparams.batch_size,
         is_training=True,
         shuffle=self._shuffle,
         preprocess=self._preprocess)
-    hparams.steps_per_epoch = model_util.get_steps_per_epoch(
-        steps_per_epoch=hparams.steps_per_epoch,
-        batch_size=hparams.batch_size,
-        train_data=train_data)
     train_dataset = train_dataset.take(count=hparams.steps_per_epoch)
 
     validation_dataset = validation_data.gen_tf_dataset(
@@ -136,6 +142,63 @@ class ImageClassifier(classifier.Classifier):
         train_ds=train_dataset,
         validation_ds=validation_dataset)
 
+  def _train_on_cached_features(
+      self, train_data: classification_ds.ClassificationDataset,
+      validation_data: classification_ds.ClassificationDataset):
+    """Trains only the classification layers on cached backbone features.
+
+    The frozen backbone runs once over the non-augmented data. The head shares
+    its layers with `self._model`, so the full model is trained as well, and
+    the checkpoints hold the weights of the full model.
+
+    Args:
+      train_data: Training data.
+      validation_data: Validation data.
+    """
+    hparams = self._hparams
+    if hparams.do_data_augmentation:
+      tf.compat.v1.logging.warning(
+          'Data augmentation is ignored when training on cached features.')
+    backbone = self._model.layers[0]
+    head_layers = self._model.layers[1:]
+
+    def _get_features(data):
+      cache_key = feature_cache.get_cache_key(data.fingerprint,
+                                              self._model_spec.uri,
+                                              self._preprocess.fingerprint)
+      return feature_cache.get_features(
+          backbone=backbone,
+          data=data,
+          preprocess=self._preprocess,
+          batch_size=hparams.batch_size,
+          cache_dir=hparams.feature_cache_dir,
+          cache_key=cache_key)
+
+    train_features, train_labels = _get_features(train_data)
+    validation_features, validation_labels = _get_features(validation_data)
+    train_dataset = feature_cache.gen_feature_dataset(
+        train_features,
+        train_labels,
+        batch_size=hparams.batch_size,
+        shuffle=self._shuffle)
+    train_dataset = train_dataset.take(count=hparams.steps_per_epoch)
+    validation_dataset = feature_cache.gen_feature_dataset(
+        validation_features,
+        validation_labels,
+        batch_size=hparams.batch_size)
+
+    head = tf.keras.Sequential(
+        [tf.keras.Input(shape=train_features.shape[1:])] + head_layers)
+    self._history = train_image_classifier_lib.train_model(
+        model=head,
+        hparams=hparams,
+        train_ds=train_dataset,
+        validation_ds=validation_dataset,
+        checkpoint_model=self._model)
+    # The full model is used for evaluation and export.
+    self._model.compile(
+        optimizer=head.optimizer, loss=head.loss, metrics=['accuracy'])
+
   def _create_model(self):
     """Creates the classifier model from TFHub pretrained models."""
     module_layer = hub.KerasLayer(
@@ -88,6 +88,20 @@ class ImageClassifierTest(tf.test.TestCase, parameterized.TestCase):
         validation_data=self.test_data)
     self._test_accuracy(model)
 
+  def test_train_model_on_cached_features(self):
+    hparams = image_classifier.HParams(
+        train_epochs=1,
+        batch_size=1,
+        shuffle=True,
+        use_feature_cache=True,
+        feature_cache_dir=os.path.join(self.get_temp_dir(), 'features'))
+    model = image_classifier.ImageClassifier.create(
+        model_spec=image_classifier.SupportedModels.MOBILENET_V2,
+        train_data=self.train_data,
+        hparams=hparams,
+        validation_data=self.test_data)
+    self._test_accuracy(model)
+
   def test_efficientnetlite0_model_train_and_export(self):
     hparams = image_classifier.HParams(
         train_epochs=1, batch_size=1, shuffle=True)
@@ -14,7 +14,7 @@
 """Library to train model."""
 
 import os
-from typing import List
+from typing import List, Optional
 
 import tensorflow as tf
 
@@ -49,21 +49,46 @@ def _create_optimizer(init_lr: float, decay_steps: int,
   return optimizer
 
 
-def _get_default_callbacks(model_dir: str) -> List[tf.keras.callbacks.Callback]:
+class _WeightsCheckpoint(tf.keras.callbacks.Callback):
+  """Saves the weights of a given model every `period` epochs."""
+
+  def __init__(self, model: tf.keras.Model, filepath: str, period: int):
+    super().__init__()
+    self._checkpoint_model = model
+    self._filepath = filepath
+    self._period = period
+
+  def on_epoch_end(self, epoch, logs=None):
+    if (epoch + 1) % self._period == 0:
+      self._checkpoint_model.save_weights(self._filepath)
+
+
+def _get_default_callbacks(
+    model_dir: str,
+    checkpoint_model: Optional[tf.keras.Model] = None
+) -> List[tf.keras.callbacks.Callback]:
   """Gets default callbacks."""
   summary_dir = os.path.join(model_dir, 'summaries')
   summary_callback = tf.keras.callbacks.TensorBoard(summary_dir)
   # Save checkpoint every 20 epochs.
 
   checkpoint_path = os.path.join(model_dir, 'checkpoint')
-  checkpoint_callback = tf.keras.callbacks.ModelCheckpoint(
-      checkpoint_path, save_weights_only=True, period=20)
+  if checkpoint_model is not None:
+    checkpoint_callback = _WeightsCheckpoint(
+        checkpoint_model, checkpoint_path, period=20)
+  else:
+    checkpoint_callback = tf.keras.callbacks.ModelCheckpoint(
+        checkpoint_path, save_weights_only=True, period=20)
   return [summary_callback, checkpoint_callback]
 
 
-def train_model(model: tf.keras.Model, hparams: hp.HParams,
-                train_ds: tf.data.Dataset,
-                validation_ds: tf.data.Dataset) -> tf.keras.callbacks.History:
+def train_model(
+    model: tf.keras.Model,
+    hparams: hp.HParams,
+    train_ds: tf.data.Dataset,
+    validation_ds: tf.data.Dataset,
+    checkpoint_model: Optional[tf.keras.Model] = None
+) -> tf.keras.callbacks.History:
   """Trains model with the input data and hyperparameters.
 
   Args:
@@ -72,6 +97,8 @@ def train_model(model: tf.keras.Model, hparams: hp.HParams,
     train_ds: tf.data.Dataset, training data to be fed in tf.keras.Model.fit().
     validation_ds: tf.data.Dataset, validation data to be fed in
       tf.keras.Model.fit().
+    checkpoint_model: The model whose weights are checkpointed, e.g. a full
+      model sharing its trained layers with `model`. Defaults to `model`.
 
   Returns:
     The tf.keras.callbacks.History object returned by tf.keras.Model.fit().
@@ -92,7 +119,7 @@ def train_model(model: tf.keras.Model, hparams: hp.HParams,
   loss = tf.keras.losses.CategoricalCrossentropy(
       label_smoothing=hparams.label_smoothing)
   model.compile(optimizer=optimizer, loss=loss, metrics=['accuracy'])
-  callbacks = _get_default_callbacks(hparams.model_dir)
+  callbacks = _get_default_callbacks(hparams.model_dir, checkpoint_model)
 
   # Train the model.
   return model.fit(
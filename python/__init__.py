@@ -20,6 +20,8 @@ from mediapipe.python._framework_bindings.calculator_graph import GraphInputStre
 from mediapipe.python._framework_bindings.image import Image
 from mediapipe.python._framework_bindings.image_frame import ImageFormat
 from mediapipe.python._framework_bindings.image_frame import ImageFrame
+from mediapipe.python._framework_bindings.image_frame_pool import ImageFramePool
+from mediapipe.python._framework_bindings.image_frame_pool import PooledImageFrame
 from mediapipe.python._framework_bindings.matrix import Matrix
 from mediapipe.python._framework_bindings.packet import Packet
 from mediapipe.python._framework_bindings.timestamp import Timestamp
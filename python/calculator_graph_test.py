@@ -246,6 +246,45 @@ class GraphTest(absltest.TestCase):
       self.assertEqual(out[i].timestamp, i)
       self.assertEqual(packet_getter.get_str(out[i]), 'hello world')
 
+  def test_batched_output_stream_callback(self):
+    text_config = """
+      input_stream: 'in'
+      output_stream: 'out'
+      node {
+        calculator: 'PassThroughCalculator'
+        input_stream: 'in'
+        output_stream: 'out'
+      }
+    """
+    hello_world_packet = packet_creator.create_string('hello world')
+    batches = []
+    graph = CalculatorGraph(graph_config=text_config)
+    graph.observe_output_stream(
+        'out', lambda _, packets: batches.append(packets), batch_size=4)
+    graph.start_run()
+    for i in range(10):
+      graph.add_packet_to_input_stream(
+          stream='in', packet=hello_world_packet, timestamp=i)
+    graph.wait_until_idle()
+    # The partial batch is delivered when the graph becomes idle.
+    self.assertEqual([4, 4, 2], [len(batch) for batch in batches])
+    out = [packet for batch in batches for packet in batch]
+    self.assertEqual(list(range(10)), [packet.timestamp for packet in out])
+    graph.close()
+
+  def test_invalid_batch_size(self):
+    graph = CalculatorGraph(graph_config="""
+      input_stream: 'in'
+      output_stream: 'out'
+      node {
+        calculator: 'PassThroughCalculator'
+        input_stream: 'in'
+        output_stream: 'out'
+      }
+    """)
+    with self.assertRaisesRegex(ValueError, 'batch_size'):
+      graph.observe_output_stream('out', lambda _, packets: None, batch_size=0)
+
 
 if __name__ == '__main__':
   absltest.main()
@@ -15,6 +15,7 @@
 #include "mediapipe/python/pybind/calculator_graph.h"
 #include "mediapipe/python/pybind/image.h"
 #include "mediapipe/python/pybind/image_frame.h"
+#include "mediapipe/python/pybind/image_frame_pool.h"
 #include "mediapipe/python/pybind/matrix.h"
 #include "mediapipe/python/pybind/packet.h"
 #include "mediapipe/python/pybind/packet_creator.h"
@@ -31,6 +32,7 @@ PYBIND11_MODULE(_framework_bindings, m) {
   ResourceUtilSubmodule(&m);
   ImageSubmodule(&m);
   ImageFrameSubmodule(&m);
+  ImageFramePoolSubmodule(&m);
   MatrixSubmodule(&m);
   TimestampSubmodule(&m);
   PacketSubmodule(&m);
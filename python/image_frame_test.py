@@ -124,6 +124,13 @@ class ImageFrameTest(absltest.TestCase):
     copied_ndarray = np.copy(output_ndarray)
     copied_ndarray[0, 0, 0] = 0
 
+  def test_create_image_frame_with_mismatched_channels(self):
+    w, h = random.randrange(3, 100), random.randrange(3, 100)
+    for data in (np.zeros((h, w, 4), dtype=np.uint8),
+                 np.zeros((h, w), dtype=np.uint8)):
+      with self.assertRaisesRegex(ValueError, 'channel'):
+        ImageFrame(image_format=ImageFormat.SRGB, data=data)
+
   def test_cropped_gray8_image(self):
     w, h = random.randrange(20, 100), random.randrange(20, 100)
     channels, offset = 3, 10
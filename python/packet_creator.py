@@ -14,7 +14,7 @@
 
 """The public facing packet creator APIs."""
 
-from typing import List, Union
+from typing import List, Optional, Union
 import warnings
 
 import numpy as np
@@ -23,6 +23,7 @@ from google.protobuf import message
 from mediapipe.python._framework_bindings import _packet_creator
 from mediapipe.python._framework_bindings import image
 from mediapipe.python._framework_bindings import image_frame
+from mediapipe.python._framework_bindings import image_frame_pool
 from mediapipe.python._framework_bindings import packet
 
 
@@ -51,10 +52,29 @@ create_string_to_packet_map = _packet_creator.create_string_to_packet_map
 create_matrix = _packet_creator.create_matrix
 
 
-def create_image_frame(data: Union[image_frame.ImageFrame, np.ndarray],
-                       *,
-                       image_format: image_frame.ImageFormat = None,
-                       copy: bool = None) -> packet.Packet:
+def _check_pooled_image_frame(data: image_frame_pool.PooledImageFrame,
+                              image_format: image_frame.ImageFormat,
+                              copy: bool, borrow: bool) -> None:
+  if borrow:
+    raise ValueError('Borrow mode is only available for numpy ndarray data.')
+  if data.submitted:
+    raise ValueError('The PooledImageFrame was already submitted to a packet.')
+  if image_format is not None and data.image_format != image_format:
+    raise ValueError(
+        'The provided image_format doesn\'t match the one from the data arg.')
+  if copy:
+    raise ValueError(
+        'A PooledImageFrame is always submitted to a packet without a copy.')
+
+
+def create_image_frame(
+    data: Union[image_frame.ImageFrame, image_frame_pool.PooledImageFrame,
+                np.ndarray],
+    *,
+    image_format: image_frame.ImageFormat = None,
+    copy: bool = None,
+    borrow: bool = False,
+    pool: Optional[image_frame_pool.ImageFramePool] = None) -> packet.Packet:
   """Create a MediaPipe ImageFrame packet.
 
   A MediaPipe ImageFrame packet can be created from an existing MediaPipe
@@ -63,8 +83,8 @@ def create_image_frame(data: Union[image_frame.ImageFrame, np.ndarray],
 
   A MediaPipe ImageFrame packet can also be created from the raw pixel data
   represented as a numpy array with one of the uint8, uint16, and float data
-  types. There are three data ownership modes depending on how the 'copy' arg
-  is set.
+  types. There are four data ownership modes depending on how the 'copy' and
+  'borrow' args are set.
 
   i) Default mode
   If copy is not set, mutable data is always copied while the immutable data
@@ -79,22 +99,50 @@ def create_image_frame(data: Union[image_frame.ImageFrame, np.ndarray],
   If copy is set to False, the data will be forced to be shared. If the data is
   mutable (data.flags.writeable is True), a warning will be raised.
 
+  iv) Borrow mode (safe)
+  If borrow is set to True, the data will be shared and the array is kept alive
+  and marked read-only until all the packets borrowing it are released, after
+  which it's writable again if it was writable before.
+
+  The data is shared without a copy as long as the pixels of each row are
+  stored contiguously, so strided views such as OpenCV ROI slices and padded
+  decoder buffers are wrapped with their row stride. Views that reorder the
+  channels, such as `frame[:, :, ::-1]`, can only be copied; pass the BGR
+  frame itself to a graph that converts it instead, e.g. a SolutionBase
+  created with `input_color_order=ColorOrder.BGR`.
+
+  Whenever the data is copied, it's copied into an ImageFrame drawn from
+  'pool' if it's provided, which saves an allocation per packet.
+
+  A MediaPipe ImageFrame packet can also be created from a PooledImageFrame
+  that was acquired from an ImageFramePool and written in place. Its pixel data
+  is taken over by the packet without a copy.
+
   Args:
-    data: A MediaPipe ImageFrame object or the raw pixel data that is
-      represnted as a numpy ndarray.
+    data: A MediaPipe ImageFrame object, a MediaPipe PooledImageFrame object or
+      the raw pixel data that is represnted as a numpy ndarray.
     image_format: One of the image_frame.ImageFormat enum types.
     copy: Indicate if the packet should copy the data from the numpy nparray.
+    borrow: Indicate if the packet should borrow the data from the numpy
+      nparray, marking it read-only while the packet is alive.
+    pool: An optional ImageFramePool, typically shared by the packets of a
+      graph, to draw the copied ImageFrame from.
 
   Returns:
     A MediaPipe ImageFrame Packet.
 
   Raises:
     ValueError:
-      i) When "data" is a numpy ndarray, "image_format" is not provided or
-        the "data" array is not c_contiguous in the reference mode.
+      i) When "data" is a numpy ndarray, "image_format" is not provided,
+        "copy" is set to True in the borrow mode or the pixels of each row of
+        the "data" array are not stored contiguously in the reference or
+        borrow mode.
       ii) When "data" is an ImageFrame object, the "image_format" arg doesn't
-        match the image format of the "data" ImageFrame object or "copy" is
-        explicitly set to False.
+        match the image format of the "data" ImageFrame object, "copy" is
+        explicitly set to False or "borrow" is set to True.
+      iii) When "data" is a PooledImageFrame object, the "image_format" arg
+        doesn't match its image format, "copy" is explicitly set to True,
+        "borrow" is set to True or it was already submitted to a packet.
     TypeError: If "image format" doesn't match "data" array's data type.
 
   Examples:
@@ -108,15 +156,31 @@ def create_image_frame(data: Union[image_frame.ImageFrame, np.ndarray],
     image_frame_packet = mp.packet_creator.create_image_frame(
         image_format=mp.ImageFormat.SRGB, data=np_array)
 
+    # Borrow the writable array, which is read-only while the packet is alive.
+    np_array.flags.writeable = True
+    image_frame_packet = mp.packet_creator.create_image_frame(
+        image_format=mp.ImageFormat.SRGB, data=np_array, borrow=True)
+
     image_frame = mp.ImageFrame(image_format=mp.ImageFormat.SRGB, data=np_array)
     image_frame_packet = mp.packet_creator.create_image_frame(image_frame)
 
+    # Decode into a pooled ImageFrame and submit it without a copy.
+    pool = mp.ImageFramePool()
+    pooled_frame = pool.acquire(mp.ImageFormat.SRGB, width, height)
+    cv2.cvtColor(bgr_mat, cv2.COLOR_BGR2RGB, dst=pooled_frame.numpy_view())
+    image_frame_packet = mp.packet_creator.create_image_frame(pooled_frame)
+
   """
+  if isinstance(data, image_frame_pool.PooledImageFrame):
+    _check_pooled_image_frame(data, image_format, copy, borrow)
+    # pylint:disable=protected-access
+    return _packet_creator._create_image_frame_from_pooled_image_frame(data)
+    # pylint:enable=protected-access
   if isinstance(data, image_frame.ImageFrame):
     if image_format is not None and data.image_format != image_format:
       raise ValueError(
           'The provided image_format doesn\'t match the one from the data arg.')
-    if copy is not None and not copy:
+    if borrow or (copy is not None and not copy):
       # Taking a reference will make the created packet be mutable since the
       # ImageFrame object can still be manipulated in Python, which voids packet
       # immutability.
@@ -124,35 +188,39 @@ def create_image_frame(data: Union[image_frame.ImageFrame, np.ndarray],
           'Creating ImageFrame packet by taking a reference of another ImageFrame object is not supported yet.'
       )
     # pylint:disable=protected-access
-    return _packet_creator._create_image_frame_from_image_frame(data)
+    return _packet_creator._create_image_frame_from_image_frame(data, pool)
     # pylint:enable=protected-access
   else:
     if image_format is None:
       raise ValueError('Please provide \'image_format\' with \'data\'.')
+    if borrow:
+      if copy:
+        raise ValueError('\'copy\' can\'t be set to True in borrow mode.')
+      # pylint:disable=protected-access
+      return _packet_creator._create_image_frame_from_borrowed_pixel_data(
+          image_format, data)
+      # pylint:enable=protected-access
     # If copy arg is not set, copying the data if it's immutable. Otherwise,
     # take a reference of the immutable data to avoid data copy.
     if copy is None:
       copy = True if data.flags.writeable else False
-    if not copy:
-      # TODO: Investigate why the first 2 bytes of the data has data
-      # corruption when "data" is not c_contiguous.
-      if not data.flags.c_contiguous:
-        raise ValueError(
-            'Reference mode is unavailable if \'data\' is not c_contiguous.')
-      if data.flags.writeable:
-        warnings.warn(
-            '\'data\' is still writeable. Taking a reference of the data to create ImageFrame packet is dangerous.',
-            RuntimeWarning, 2)
+    if not copy and data.flags.writeable:
+      warnings.warn(
+          '\'data\' is still writeable. Taking a reference of the data to create ImageFrame packet is dangerous.',
+          RuntimeWarning, 2)
     # pylint:disable=protected-access
     return _packet_creator._create_image_frame_from_pixel_data(
-        image_format, data, copy)
+        image_format, data, copy, pool)
     # pylint:enable=protected-access
 
 
-def create_image(data: Union[image.Image, np.ndarray],
-                 *,
-                 image_format: image_frame.ImageFormat = None,
-                 copy: bool = None) -> packet.Packet:
+def create_image(
+    data: Union[image.Image, image_frame_pool.PooledImageFrame, np.ndarray],
+    *,
+    image_format: image_frame.ImageFormat = None,
+    copy: bool = None,
+    borrow: bool = False,
+    pool: Optional[image_frame_pool.ImageFramePool] = None) -> packet.Packet:
   """Create a MediaPipe Image packet.
 
   A MediaPipe Image packet can be created from an existing MediaPipe
@@ -161,8 +229,8 @@ def create_image(data: Union[image.Image, np.ndarray],
 
   A MediaPipe Image packet can also be created from the raw pixel data
   represented as a numpy array with one of the uint8, uint16, and float data
-  types. There are three data ownership modes depending on how the 'copy' arg
-  is set.
+  types. There are four data ownership modes depending on how the 'copy' and
+  'borrow' args are set.
 
   i) Default mode
   If copy is not set, mutable data is always copied while the immutable data
@@ -177,22 +245,50 @@ def create_image(data: Union[image.Image, np.ndarray],
   If copy is set to False, the data will be forced to be shared. If the data is
   mutable (data.flags.writeable is True), a warning will be raised.
 
+  iv) Borrow mode (safe)
+  If borrow is set to True, the data will be shared and the array is kept alive
+  and marked read-only until all the packets borrowing it are released, after
+  which it's writable again if it was writable before.
+
+  The data is shared without a copy as long as the pixels of each row are
+  stored contiguously, so strided views such as OpenCV ROI slices and padded
+  decoder buffers are wrapped with their row stride. Views that reorder the
+  channels, such as `frame[:, :, ::-1]`, can only be copied; pass the BGR
+  frame itself to a graph that converts it instead, e.g. a SolutionBase
+  created with `input_color_order=ColorOrder.BGR`.
+
+  Whenever the data is copied, it's copied into an ImageFrame drawn from
+  'pool' if it's provided, which saves an allocation per packet.
+
+  A MediaPipe Image packet can also be created from a PooledImageFrame that was
+  acquired from an ImageFramePool and written in place. Its pixel data is taken
+  over by the packet without a copy.
+
   Args:
-    data: A MediaPipe Image object or the raw pixel data that is represnted as a
-      numpy ndarray.
+    data: A MediaPipe Image object, a MediaPipe PooledImageFrame object or the
+      raw pixel data that is represnted as a numpy ndarray.
     image_format: One of the mp.ImageFormat enum types.
     copy: Indicate if the packet should copy the data from the numpy nparray.
+    borrow: Indicate if the packet should borrow the data from the numpy
+      nparray, marking it read-only while the packet is alive.
+    pool: An optional ImageFramePool, typically shared by the packets of a
+      graph or a task, to draw the copied ImageFrame from.
 
   Returns:
     A MediaPipe Image Packet.
 
   Raises:
     ValueError:
-      i) When "data" is a numpy ndarray, "image_format" is not provided or
-        the "data" array is not c_contiguous in the reference mode.
+      i) When "data" is a numpy ndarray, "image_format" is not provided,
+        "copy" is set to True in the borrow mode or the pixels of each row of
+        the "data" array are not stored contiguously in the reference or
+        borrow mode.
       ii) When "data" is an Image object, the "image_format" arg doesn't
-        match the image format of the "data" Image object or "copy" is
-        explicitly set to False.
+        match the image format of the "data" Image object, "copy" is
+        explicitly set to False or "borrow" is set to True.
+      iii) When "data" is a PooledImageFrame object, the "image_format" arg
+        doesn't match its image format, "copy" is explicitly set to True,
+        "borrow" is set to True or it was already submitted to a packet.
     TypeError: If "image format" doesn't match "data" array's data type.
 
   Examples:
@@ -206,15 +302,31 @@ def create_image(data: Union[image.Image, np.ndarray],
     image_packet = mp.packet_creator.create_image(
         image_format=mp.ImageFormat.SRGB, data=np_array)
 
+    # Borrow the writable array, which is read-only while the packet is alive.
+    np_array.flags.writeable = True
+    image_packet = mp.packet_creator.create_image(
+        image_format=mp.ImageFormat.SRGB, data=np_array, borrow=True)
+
     image = mp.Image(image_format=mp.ImageFormat.SRGB, data=np_array)
     image_packet = mp.packet_creator.create_image(image)
 
+    # Decode into a pooled ImageFrame and submit it without a copy.
+    pool = mp.ImageFramePool()
+    pooled_frame = pool.acquire(mp.ImageFormat.SRGB, width, height)
+    cv2.cvtColor(bgr_mat, cv2.COLOR_BGR2RGB, dst=pooled_frame.numpy_view())
+    image_packet = mp.packet_creator.create_image(pooled_frame)
+
   """
+  if isinstance(data, image_frame_pool.PooledImageFrame):
+    _check_pooled_image_frame(data, image_format, copy, borrow)
+    # pylint:disable=protected-access
+    return _packet_creator._create_image_from_pooled_image_frame(data)
+    # pylint:enable=protected-access
   if isinstance(data, image.Image):
     if image_format is not None and data.image_format != image_format:
       raise ValueError(
           'The provided image_format doesn\'t match the one from the data arg.')
-    if copy is not None and not copy:
+    if borrow or (copy is not None and not copy):
       # Taking a reference will make the created packet be mutable since the
       # Image object can still be manipulated in Python, which voids packet
       # immutability.
@@ -222,28 +334,29 @@ def create_image(data: Union[image.Image, np.ndarray],
           'Creating Image packet by taking a reference of another Image object is not supported yet.'
       )
     # pylint:disable=protected-access
-    return _packet_creator._create_image_from_image(data)
+    return _packet_creator._create_image_from_image(data, pool)
     # pylint:enable=protected-access
   else:
     if image_format is None:
       raise ValueError('Please provide \'image_format\' with \'data\'.')
+    if borrow:
+      if copy:
+        raise ValueError('\'copy\' can\'t be set to True in borrow mode.')
+      # pylint:disable=protected-access
+      return _packet_creator._create_image_from_borrowed_pixel_data(
+          image_format, data)
+      # pylint:enable=protected-access
     # If copy arg is not set, copying the data if it's immutable. Otherwise,
     # take a reference of the immutable data to avoid data copy.
     if copy is None:
       copy = True if data.flags.writeable else False
-    if not copy:
-      # TODO: Investigate why the first 2 bytes of the data has data
-      # corruption when "data" is not c_contiguous.
-      if not data.flags.c_contiguous:
-        raise ValueError(
-            'Reference mode is unavailable if \'data\' is not c_contiguous.')
-      if data.flags.writeable:
-        warnings.warn(
-            '\'data\' is still writeable. Taking a reference of the data to create Image packet is dangerous.',
-            RuntimeWarning, 2)
+    if not copy and data.flags.writeable:
+      warnings.warn(
+          '\'data\' is still writeable. Taking a reference of the data to create Image packet is dangerous.',
+          RuntimeWarning, 2)
     # pylint:disable=protected-access
     return _packet_creator._create_image_from_pixel_data(
-        image_format, data, copy)
+        image_format, data, copy, pool)
     # pylint:enable=protected-access
 
 
@@ -27,12 +27,14 @@ from mediapipe.python import packet_getter
 from mediapipe.python._framework_bindings import calculator_graph
 from mediapipe.python._framework_bindings import image
 from mediapipe.python._framework_bindings import image_frame
+from mediapipe.python._framework_bindings import image_frame_pool
 from mediapipe.python._framework_bindings import packet
 
 CalculatorGraph = calculator_graph.CalculatorGraph
 Image = image.Image
 ImageFormat = image_frame.ImageFormat
 ImageFrame = image_frame.ImageFrame
+ImageFramePool = image_frame_pool.ImageFramePool
 
 
 class PacketTest(absltest.TestCase):
@@ -502,6 +504,140 @@ class PacketTest(absltest.TestCase):
     # copy mode.
     self.assertEqual(sys.getrefcount(rgb_data), initial_ref_count)
 
+  def test_image_frame_packet_copy_creation_with_pool(self):
+    w, h, channels = random.randrange(3, 100), random.randrange(3, 100), 3
+    rgb_data = np.random.randint(255, size=(h, w, channels), dtype=np.uint8)
+    pool = ImageFramePool()
+    for _ in range(3):
+      p = packet_creator.create_image_frame(
+          image_format=ImageFormat.SRGB, data=rgb_data, pool=pool)
+      output_frame = packet_getter.get_image_frame(p)
+      self.assertEqual(output_frame.height, h)
+      self.assertEqual(output_frame.width, w)
+      self.assertTrue(np.array_equal(rgb_data, output_frame.numpy_view()))
+      del p
+      del output_frame
+      gc.collect()
+
+  def test_image_packet_copy_creation_with_pool(self):
+    w, h = random.randrange(3, 100), random.randrange(3, 100)
+    gray_data = np.random.randint(255, size=(h, w), dtype=np.uint8)
+    pool = ImageFramePool(keep_count=1)
+    p = packet_creator.create_image(
+        Image(image_format=ImageFormat.GRAY8, data=gray_data), pool=pool)
+    output_image = packet_getter.get_image(p)
+    self.assertEqual(output_image.image_format, ImageFormat.GRAY8)
+    self.assertTrue(np.array_equal(gray_data, output_image.numpy_view()))
+
+  def test_image_frame_packet_creation_from_pooled_image_frame(self):
+    w, h, channels = random.randrange(3, 100), random.randrange(3, 100), 3
+    rgb_data = np.random.randint(255, size=(h, w, channels), dtype=np.uint8)
+    pooled_frame = ImageFramePool().acquire(ImageFormat.SRGB, w, h)
+    self.assertEqual(pooled_frame.image_format, ImageFormat.SRGB)
+    self.assertEqual((pooled_frame.width, pooled_frame.height), (w, h))
+    pooled_frame.numpy_view()[:] = rgb_data
+    p = packet_creator.create_image_frame(pooled_frame)
+    self.assertTrue(pooled_frame.submitted)
+    output_frame = packet_getter.get_image_frame(p)
+    self.assertTrue(np.array_equal(rgb_data, output_frame.numpy_view()))
+    with self.assertRaisesRegex(ValueError, 'already submitted'):
+      packet_creator.create_image(pooled_frame)
+    with self.assertRaisesRegex(ValueError, 'already submitted'):
+      pooled_frame.numpy_view()
+
+  def test_pooled_image_frame_packet_creation_with_copy(self):
+    pooled_frame = ImageFramePool().acquire(ImageFormat.SRGB, 4, 4)
+    with self.assertRaisesRegex(ValueError, 'without a copy'):
+      packet_creator.create_image(pooled_frame, copy=True)
+    with self.assertRaisesRegex(ValueError, 'image_format'):
+      packet_creator.create_image_frame(
+          pooled_frame, image_format=ImageFormat.GRAY8)
+    self.assertFalse(pooled_frame.submitted)
+
+  def test_image_frame_packet_creation_reference_mode_with_strided_data(self):
+    w, h, channels = random.randrange(3, 100), random.randrange(3, 100), 3
+    padded_data = np.random.randint(
+        255, size=(h + 2, w + 5, channels), dtype=np.uint8)
+    # A ROI slice of the padded data isn't c_contiguous, but its rows are.
+    rgb_data = padded_data[1:h + 1, 2:w + 2]
+    self.assertFalse(rgb_data.flags.c_contiguous)
+    rgb_data.flags.writeable = False
+    image_frame_packet = packet_creator.create_image_frame(
+        image_format=ImageFormat.SRGB, data=rgb_data)
+    output_frame = packet_getter.get_image_frame(image_frame_packet)
+    self.assertEqual((output_frame.height, output_frame.width), (h, w))
+    self.assertTrue(np.array_equal(output_frame.numpy_view(), rgb_data))
+
+    with self.assertRaisesRegex(ValueError, 'stored contiguously'):
+      packet_creator.create_image_frame(
+          image_format=ImageFormat.SRGB, data=rgb_data[:, :, ::-1], copy=False)
+
+  def test_image_packet_creation_with_mismatched_channels(self):
+    w, h = random.randrange(3, 100), random.randrange(3, 100)
+    for data in (np.zeros((h, w, 4), dtype=np.uint8),
+                 np.zeros((h, w), dtype=np.uint8)):
+      with self.assertRaisesRegex(ValueError, 'channel'):
+        packet_creator.create_image_frame(
+            image_format=ImageFormat.SRGB, data=data, copy=True)
+      with self.assertRaisesRegex(ValueError, 'channel'):
+        packet_creator.create_image(
+            image_format=ImageFormat.SRGB, data=data, copy=True)
+      with self.assertRaisesRegex(ValueError, 'channel'):
+        packet_creator.create_image(
+            image_format=ImageFormat.SRGB, data=data, borrow=True)
+
+  def test_image_packet_creation_borrow_mode(self):
+    w, h, channels = random.randrange(3, 100), random.randrange(3, 100), 3
+    rgb_data = np.random.randint(255, size=(h, w, channels), dtype=np.uint8)
+    initial_ref_count = sys.getrefcount(rgb_data)
+    image_packet = packet_creator.create_image(
+        image_format=ImageFormat.SRGB, data=rgb_data, borrow=True)
+    # Borrow mode increases the ref count of the rgb_data by 1 and makes it
+    # read-only while the packet is alive.
+    self.assertEqual(sys.getrefcount(rgb_data), initial_ref_count + 1)
+    self.assertFalse(rgb_data.flags.writeable)
+    output_image = packet_getter.get_image(image_packet)
+    self.assertTrue(np.array_equal(output_image.numpy_view(), rgb_data))
+    del image_packet
+    del output_image
+    gc.collect()
+    self.assertEqual(sys.getrefcount(rgb_data), initial_ref_count)
+    self.assertTrue(rgb_data.flags.writeable)
+
+    # The array stays read-only until the last packet borrowing it is released.
+    first_packet = packet_creator.create_image(
+        image_format=ImageFormat.SRGB, data=rgb_data, borrow=True)
+    second_packet = packet_creator.create_image_frame(
+        image_format=ImageFormat.SRGB, data=rgb_data, borrow=True)
+    self.assertEqual(sys.getrefcount(rgb_data), initial_ref_count + 2)
+    del first_packet
+    gc.collect()
+    self.assertFalse(rgb_data.flags.writeable)
+    self.assertTrue(
+        np.array_equal(
+            packet_getter.get_image_frame(second_packet).numpy_view(),
+            rgb_data))
+    del second_packet
+    gc.collect()
+    self.assertEqual(sys.getrefcount(rgb_data), initial_ref_count)
+    self.assertTrue(rgb_data.flags.writeable)
+
+    # An array that is read-only before it's borrowed stays read-only.
+    rgb_data.flags.writeable = False
+    image_packet = packet_creator.create_image(
+        image_format=ImageFormat.SRGB, data=rgb_data, borrow=True)
+    del image_packet
+    gc.collect()
+    self.assertFalse(rgb_data.flags.writeable)
+    rgb_data.flags.writeable = True
+
+    with self.assertRaisesRegex(ValueError, 'borrow mode'):
+      packet_creator.create_image(
+          image_format=ImageFormat.SRGB, data=rgb_data, copy=True, borrow=True)
+    with self.assertRaises(TypeError):
+      packet_creator.create_image(
+          image_format=ImageFormat.GRAY16, data=rgb_data[:, :, 0], borrow=True)
+
   def test_matrix_packet(self):
     np_matrix = np.array([[.1, .2, .3], [.4, .5, .6]])
     initial_ref_count = sys.getrefcount(np_matrix)
@@ -14,8 +14,15 @@
 
 #include "mediapipe/python/pybind/calculator_graph.h"
 
+#include <memory>
+#include <string>
+#include <utility>
+#include <vector>
+
+#include "absl/base/thread_annotations.h"
 #include "absl/memory/memory.h"
 #include "absl/strings/str_cat.h"
+#include "absl/synchronization/mutex.h"
 #include "mediapipe/framework/calculator.pb.h"
 #include "mediapipe/framework/calculator_graph.h"
 #include "mediapipe/framework/packet.h"
@@ -31,9 +38,109 @@
 namespace mediapipe {
 namespace python {
 
-// A mutex to guard the output stream observer python callback function.
-// Only one python callback can run at once.
-absl::Mutex callback_mutex;
+namespace py = pybind11;
+
+namespace {
+
+// Delivers the packets of an observed output stream to a python callback
+// function. With a batch size of 1, callback_fn(stream_name, packet) is invoked
+// on every packet. Otherwise, packets are buffered and
+// callback_fn(stream_name, packets) is invoked with a list of up to batch_size
+// packets per GIL acquisition.
+class OutputStreamCallback {
+ public:
+  OutputStreamCallback(std::string stream_name, py::function callback_fn,
+                       int batch_size, std::shared_ptr<absl::Mutex> graph_mutex)
+      : stream_name_(std::move(stream_name)),
+        callback_fn_(std::move(callback_fn)),
+        batch_size_(batch_size),
+        graph_mutex_(std::move(graph_mutex)) {}
+
+  // Invoked by the graph on every packet of the output stream.
+  absl::Status OnPacket(const Packet& packet) {
+    absl::MutexLock lock(graph_mutex_.get());
+    if (batch_size_ == 1) {
+      // Acquires GIL before calling Python callback.
+      py::gil_scoped_acquire gil_acquire;
+      callback_fn_(stream_name_, packet);
+      return absl::OkStatus();
+    }
+    buffered_packets_.push_back(packet);
+    if (static_cast<int>(buffered_packets_.size()) >= batch_size_) {
+      DeliverBufferedPackets();
+    }
+    return absl::OkStatus();
+  }
+
+  // Delivers the buffered packets of a partial batch. The GIL must not be held
+  // by the calling thread.
+  void Flush() {
+    absl::MutexLock lock(graph_mutex_.get());
+    if (!buffered_packets_.empty()) {
+      DeliverBufferedPackets();
+    }
+  }
+
+ private:
+  void DeliverBufferedPackets() ABSL_EXCLUSIVE_LOCKS_REQUIRED(*graph_mutex_) {
+    std::vector<Packet> packets;
+    packets.swap(buffered_packets_);
+    // Acquires GIL before calling Python callback.
+    py::gil_scoped_acquire gil_acquire;
+    callback_fn_(stream_name_, packets);
+  }
+
+  const std::string stream_name_;
+  py::function callback_fn_;
+  const int batch_size_;
+  // Shared by the callbacks of a graph, which may outlive the graph object.
+  const std::shared_ptr<absl::Mutex> graph_mutex_;
+  std::vector<Packet> buffered_packets_ ABSL_GUARDED_BY(*graph_mutex_);
+};
+
+// The calculator graph created by the python binding, which owns the state of
+// its output stream observer python callbacks.
+class PyCalculatorGraph : public CalculatorGraph {
+ public:
+  // Observes the named output stream with a python callback function.
+  absl::Status ObserveOutputStreamWithCallback(const std::string& stream_name,
+                                               py::function callback_fn,
+                                               int batch_size,
+                                               bool observe_timestamp_bounds) {
+    auto callback = std::make_shared<OutputStreamCallback>(
+        stream_name, std::move(callback_fn), batch_size, callback_mutex_);
+    MP_RETURN_IF_ERROR(ObserveOutputStream(
+        stream_name,
+        [callback](const Packet& packet) { return callback->OnPacket(packet); },
+        observe_timestamp_bounds));
+    if (batch_size > 1) {
+      batched_callbacks_.push_back(std::move(callback));
+    }
+    return absl::OkStatus();
+  }
+
+  // Delivers the packets buffered by the batched output stream callbacks. The
+  // GIL must not be held by the calling thread.
+  void FlushOutputStreamCallbacks() {
+    for (const auto& callback : batched_callbacks_) {
+      callback->Flush();
+    }
+  }
+
+ private:
+  // Guards the output stream observer python callback functions of the graph.
+  // Only one python callback of a graph can run at once, while the callbacks
+  // of different graphs only contend for the GIL.
+  std::shared_ptr<absl::Mutex> callback_mutex_ =
+      std::make_shared<absl::Mutex>();
+  std::vector<std::shared_ptr<OutputStreamCallback>> batched_callbacks_;
+};
+
+PyCalculatorGraph* AsPyCalculatorGraph(CalculatorGraph* graph) {
+  return static_cast<PyCalculatorGraph*>(graph);
+}
+
+}  // namespace
 
 template <typename T>
 T ParseProto(const py::object& proto_object) {
@@ -47,8 +154,6 @@ T ParseProto(const py::object& proto_object) {
   return proto;
 }
 
-namespace py = pybind11;
-
 void CalculatorGraphSubmodule(pybind11::module* module) {
   py::module m = module->def_submodule("calculator_graph",
                                        "MediaPipe calculator graph module.");
@@ -111,9 +216,9 @@ void CalculatorGraphSubmodule(pybind11::module* module) {
                              "\'validated_graph_config\' to initialize the "
                              "graph with a ValidatedGraphConfig object.");
         }
-        auto calculator_graph = absl::make_unique<CalculatorGraph>();
+        auto calculator_graph = absl::make_unique<PyCalculatorGraph>();
         RaisePyErrorIfNotOk(calculator_graph->Initialize(graph_config_proto));
-        return calculator_graph.release();
+        return static_cast<CalculatorGraph*>(calculator_graph.release());
       }),
       R"doc(Initialize CalculatorGraph object.
 
@@ -292,7 +397,9 @@ void CalculatorGraphSubmodule(pybind11::module* module) {
       "wait_until_done",
       [](CalculatorGraph* self) {
         py::gil_scoped_release gil_release;
-        RaisePyErrorIfNotOk(self->WaitUntilDone(), /**acquire_gil=*/true);
+        absl::Status status = self->WaitUntilDone();
+        AsPyCalculatorGraph(self)->FlushOutputStreamCallbacks();
+        RaisePyErrorIfNotOk(status, /**acquire_gil=*/true);
       },
       R"doc(Wait for the current run to finish.
 
@@ -320,7 +427,9 @@ void CalculatorGraphSubmodule(pybind11::module* module) {
       "wait_until_idle",
       [](CalculatorGraph* self) {
         py::gil_scoped_release gil_release;
-        RaisePyErrorIfNotOk(self->WaitUntilIdle(), /**acquire_gil=*/true);
+        absl::Status status = self->WaitUntilIdle();
+        AsPyCalculatorGraph(self)->FlushOutputStreamCallbacks();
+        RaisePyErrorIfNotOk(status, /**acquire_gil=*/true);
       },
       R"doc(Wait until the running graph is in the idle mode.
 
@@ -350,8 +459,9 @@ void CalculatorGraphSubmodule(pybind11::module* module) {
       "wait_for_observed_output",
       [](CalculatorGraph* self) {
         py::gil_scoped_release gil_release;
-        RaisePyErrorIfNotOk(self->WaitForObservedOutput(),
-                            /**acquire_gil=*/true);
+        absl::Status status = self->WaitForObservedOutput();
+        AsPyCalculatorGraph(self)->FlushOutputStreamCallbacks();
+        RaisePyErrorIfNotOk(status, /**acquire_gil=*/true);
       },
       R"doc(Wait until a packet is emitted on one of the observed output streams.
 
@@ -404,33 +514,44 @@ void CalculatorGraphSubmodule(pybind11::module* module) {
   calculator_graph.def(
       "observe_output_stream",
       [](CalculatorGraph* self, const std::string& stream_name,
-         pybind11::function callback_fn, bool observe_timestamp_bounds) {
-        RaisePyErrorIfNotOk(self->ObserveOutputStream(
-            stream_name,
-            [callback_fn, stream_name](const Packet& packet) {
-              absl::MutexLock lock(&callback_mutex);
-              // Acquires GIL before calling Python callback.
-              py::gil_scoped_acquire gil_acquire;
-              callback_fn(stream_name, packet);
-              return absl::OkStatus();
-            },
-            observe_timestamp_bounds));
+         pybind11::function callback_fn, bool observe_timestamp_bounds,
+         int batch_size) {
+        if (batch_size < 1) {
+          throw RaisePyError(PyExc_ValueError,
+                             "batch_size must be a positive integer.");
+        }
+        RaisePyErrorIfNotOk(
+            AsPyCalculatorGraph(self)->ObserveOutputStreamWithCallback(
+                stream_name, std::move(callback_fn), batch_size,
+                observe_timestamp_bounds));
       },
       R"doc(Observe the named output stream.
 
   callback_fn will be invoked on every packet emitted by the output stream.
   This method can only be called before start_run().
 
+  When batch_size is greater than 1, packets are buffered and callback_fn is
+  invoked with a list of up to batch_size packets per GIL acquisition instead.
+  The buffered packets of a partial batch are delivered by wait_until_idle(),
+  wait_for_observed_output(), wait_until_done() and close().
+
+  The callbacks of different graphs can run concurrently, while the callbacks
+  of the same graph run one at a time.
+
   Args:
     stream_name: The name of the output stream.
     callback_fn: The callback function to invoke on every packet emitted by the
-      output stream.
+      output stream, or on every batch of packets if batch_size is greater than
+      1.
     observe_timestamp_bounds: If true, emits an empty packet at
       timestamp_bound -1 when timestamp bound changes.
+    batch_size: The maximum number of packets to deliver per callback
+      invocation.
 
   Raises:
     RuntimeError: If the calculator graph isn't initialized or the stream
       doesn't exist.
+    ValueError: If batch_size is not positive.
 
   Examples:
     out = []
@@ -438,16 +559,21 @@ void CalculatorGraphSubmodule(pybind11::module* module) {
     graph.observe_output_stream('out',
                                 lambda stream_name, packet: out.append(packet))
 
+    graph.observe_output_stream(
+        'out', lambda stream_name, packets: out.extend(packets), batch_size=16)
+
 )doc",
       py::arg("stream_name"), py::arg("callback_fn"),
-      py::arg("observe_timestamp_bounds") = false);
+      py::arg("observe_timestamp_bounds") = false, py::arg("batch_size") = 1);
 
   calculator_graph.def(
       "close",
       [](CalculatorGraph* self) {
         RaisePyErrorIfNotOk(self->CloseAllPacketSources());
         py::gil_scoped_release gil_release;
-        RaisePyErrorIfNotOk(self->WaitUntilDone(), /**acquire_gil=*/true);
+        absl::Status status = self->WaitUntilDone();
+        AsPyCalculatorGraph(self)->FlushOutputStreamCallbacks();
+        RaisePyErrorIfNotOk(status, /**acquire_gil=*/true);
       },
       R"doc(Close all the input sources and shutdown the graph.)doc");
 
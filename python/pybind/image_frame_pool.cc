@@ -0,0 +1,261 @@
+// Copyright 2023 The MediaPipe Authors.
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//      http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+#include "mediapipe/python/pybind/image_frame_pool.h"
+
+#include <cstring>
+#include <memory>
+#include <vector>
+
+#include "absl/strings/str_cat.h"
+#include "mediapipe/framework/port/integral_types.h"
+#include "mediapipe/python/pybind/util.h"
+#include "pybind11/numpy.h"
+
+namespace mediapipe {
+namespace python {
+
+namespace py = pybind11;
+
+namespace {
+
+// Returns a writable numpy ndarray that references the pixel data of the image
+// frame. The ndarray keeps the image frame out of its pool while it's alive.
+template <typename T>
+py::array GenerateWritableDataArrayHelper(
+    const std::shared_ptr<ImageFrame>& image_frame) {
+  std::vector<py::ssize_t> shape{image_frame->Height(), image_frame->Width()};
+  // The rows of the pooled image frames may be padded to their alignment
+  // boundary.
+  std::vector<py::ssize_t> strides{
+      image_frame->WidthStep(),
+      static_cast<py::ssize_t>(image_frame->NumberOfChannels() * sizeof(T))};
+  if (image_frame->NumberOfChannels() > 1) {
+    shape.push_back(image_frame->NumberOfChannels());
+    strides.push_back(sizeof(T));
+  }
+  auto* owner = new std::shared_ptr<ImageFrame>(image_frame);
+  py::capsule capsule(owner, [](void* owner) {
+    delete static_cast<std::shared_ptr<ImageFrame>*>(owner);
+  });
+  return py::array_t<T>(shape, strides,
+                        reinterpret_cast<T*>(image_frame->MutablePixelData()),
+                        capsule);
+}
+
+py::array GenerateWritableDataArray(
+    const std::shared_ptr<ImageFrame>& image_frame) {
+  switch (image_frame->ChannelSize()) {
+    case sizeof(uint8):
+      return GenerateWritableDataArrayHelper<uint8>(image_frame);
+    case sizeof(uint16):
+      return GenerateWritableDataArrayHelper<uint16>(image_frame);
+    case sizeof(float):
+      return GenerateWritableDataArrayHelper<float>(image_frame);
+    default:
+      throw RaisePyError(PyExc_RuntimeError,
+                         "Unsupported image frame channel size. Data is not "
+                         "uint8, uint16, or float?");
+  }
+}
+
+}  // namespace
+
+std::shared_ptr<ImageFrame> PyImageFramePool::GetBuffer(
+    ImageFormat::Format format, int width, int height) {
+  std::shared_ptr<ImageFramePool> pool;
+  {
+    absl::MutexLock lock(&mutex_);
+    auto& pool_for_key =
+        pools_[std::make_tuple(static_cast<int>(format), width, height)];
+    if (pool_for_key == nullptr) {
+      pool_for_key =
+          ImageFramePool::Create(width, height, format, keep_count_);
+    }
+    pool = pool_for_key;
+  }
+  return pool->GetBuffer();
+}
+
+std::shared_ptr<ImageFrame> CopyToPooledImageFrame(
+    const ImageFrame& image_frame, PyImageFramePool* pool) {
+  std::shared_ptr<ImageFrame> buffer = pool->GetBuffer(
+      image_frame.Format(), image_frame.Width(), image_frame.Height());
+  if (buffer == nullptr) {
+    throw RaisePyError(PyExc_RuntimeError,
+                       "Failed to allocate an image frame of the pool.");
+  }
+  const int row_size = image_frame.Width() * image_frame.NumberOfChannels() *
+                       image_frame.ByteDepth();
+  for (int row = 0; row < image_frame.Height(); ++row) {
+    std::memcpy(buffer->MutablePixelData() + row * buffer->WidthStep(),
+                image_frame.PixelData() + row * image_frame.WidthStep(),
+                row_size);
+  }
+  return buffer;
+}
+
+const std::shared_ptr<ImageFrame>& PooledImageFrame::image_frame() const {
+  if (image_frame_ == nullptr) {
+    throw RaisePyError(PyExc_ValueError,
+                       "The pooled image frame was already submitted.");
+  }
+  return image_frame_;
+}
+
+std::shared_ptr<ImageFrame> PooledImageFrame::Submit() {
+  image_frame();
+  return std::move(image_frame_);
+}
+
+void ImageFramePoolSubmodule(pybind11::module* module) {
+  py::module m = module->def_submodule("image_frame_pool",
+                                       "MediaPipe image frame pool module");
+
+  py::options options;
+  options.disable_function_signatures();
+
+  py::class_<PooledImageFrame> pooled_image_frame(
+      m, "PooledImageFrame",
+      R"doc(A writable image frame drawn from an ImageFramePool.
+
+  The pixel data of a PooledImageFrame can be written in place through the
+  writable numpy ndarray returned by `PooledImageFrame.numpy_view()`, e.g. by
+  decoding or converting an image into it. The frame is then submitted to a
+  packet with `mp.packet_creator.create_image_frame()` or
+  `mp.packet_creator.create_image()`, which take over its pixel data without a
+  copy. A PooledImageFrame can only be submitted once, and its pixel data must
+  not be written after it's submitted. The pixel data returns to its pool once
+  the packet and all the numpy views are released.
+
+  Example:
+    frame = pool.acquire(mp.ImageFormat.SRGB, width, height)
+    cv2.cvtColor(bgr_mat, cv2.COLOR_BGR2RGB, dst=frame.numpy_view())
+    packet = mp.packet_creator.create_image_frame(frame)
+  )doc");
+
+  pooled_image_frame
+      .def(
+          "numpy_view",
+          [](const PooledImageFrame& self) {
+            return GenerateWritableDataArray(self.image_frame());
+          },
+          R"doc(Returns a writable numpy ndarray referencing the pixel data.
+
+  The rows of the ndarray may be padded, in which case it's not c_contiguous.
+
+  Returns:
+    A writable numpy ndarray of the shape (height, width) or (height, width,
+    channels).
+
+  Raises:
+    ValueError: If the frame was already submitted.
+)doc")
+      .def_property_readonly(
+          "image_format",
+          [](const PooledImageFrame& self) {
+            return self.image_frame()->Format();
+          },
+          "The image format of the frame.")
+      .def_property_readonly(
+          "width",
+          [](const PooledImageFrame& self) {
+            return self.image_frame()->Width();
+          },
+          "The width of the frame.")
+      .def_property_readonly(
+          "height",
+          [](const PooledImageFrame& self) {
+            return self.image_frame()->Height();
+          },
+          "The height of the frame.")
+      .def_property_readonly("submitted", &PooledImageFrame::submitted,
+                             "Whether the frame was submitted to a packet.");
+
+  py::class_<PyImageFramePool, std::shared_ptr<PyImageFramePool>>
+      image_frame_pool(
+          m, "ImageFramePool",
+          R"doc(A pool of reusable image frames, keyed by format and dimensions.
+
+  The packet creators copy the pixel data into image frames of the pool instead
+  of newly allocated ones when the pool is passed as their `pool` argument. The
+  image frames return to the pool when the packets are released, so a pool
+  shared by the packets of a graph or a task saves an allocation per frame.
+  The pool also hands out writable image frames that can be filled in place and
+  submitted to a packet without a copy.
+
+  Example:
+    pool = mp.ImageFramePool()
+    packet = mp.packet_creator.create_image_frame(
+        rgb_array, image_format=mp.ImageFormat.SRGB, pool=pool)
+  )doc");
+
+  image_frame_pool
+      .def(py::init([](int keep_count) {
+             if (keep_count < 0) {
+               throw RaisePyError(PyExc_ValueError,
+                                  "keep_count must be non-negative.");
+             }
+             return std::make_shared<PyImageFramePool>(keep_count);
+           }),
+           R"doc(Creates an ImageFramePool.
+
+  Args:
+    keep_count: The number of unused image frames to keep for reuse per format
+      and dimensions.
+)doc",
+           py::arg("keep_count") = 2)
+      .def(
+          "acquire",
+          [](PyImageFramePool& self, mediapipe::ImageFormat::Format format,
+             int width, int height) {
+            if (width <= 0 || height <= 0) {
+              throw RaisePyError(
+                  PyExc_ValueError,
+                  absl::StrCat("Invalid image frame dimensions ", width, "x",
+                               height, ".")
+                      .c_str());
+            }
+            std::shared_ptr<ImageFrame> buffer =
+                self.GetBuffer(format, width, height);
+            if (buffer == nullptr) {
+              throw RaisePyError(
+                  PyExc_RuntimeError,
+                  "Failed to allocate an image frame of the pool.");
+            }
+            return PooledImageFrame(std::move(buffer));
+          },
+          R"doc(Acquires a writable image frame of the pool.
+
+  The content of the pixel data is undefined, as the frame may be reused.
+
+  Args:
+    image_format: One of the mp.ImageFormat enum types.
+    width: The width of the frame.
+    height: The height of the frame.
+
+  Returns:
+    A PooledImageFrame.
+
+  Raises:
+    ValueError: If the dimensions are not positive.
+)doc",
+          py::arg("image_format"), py::arg("width"), py::arg("height"))
+      .def_property_readonly("keep_count", &PyImageFramePool::keep_count,
+                             "The number of unused image frames kept for "
+                             "reuse per format and dimensions.");
+}
+
+}  // namespace python
+}  // namespace mediapipe
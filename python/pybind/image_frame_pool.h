@@ -0,0 +1,84 @@
+// Copyright 2023 The MediaPipe Authors.
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//      http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+#ifndef MEDIAPIPE_PYTHON_PYBIND_IMAGE_FRAME_POOL_H_
+#define MEDIAPIPE_PYTHON_PYBIND_IMAGE_FRAME_POOL_H_
+
+#include <memory>
+#include <tuple>
+
+#include "absl/base/thread_annotations.h"
+#include "absl/container/flat_hash_map.h"
+#include "absl/synchronization/mutex.h"
+#include "mediapipe/framework/formats/image_format.pb.h"
+#include "mediapipe/framework/formats/image_frame.h"
+#include "mediapipe/framework/formats/image_frame_pool.h"
+#include "pybind11/pybind11.h"
+
+namespace mediapipe {
+namespace python {
+
+// The ImageFramePools of a graph or a task, keyed by image format and
+// dimensions, that the packet creators allocate their image frames from.
+class PyImageFramePool {
+ public:
+  explicit PyImageFramePool(int keep_count) : keep_count_(keep_count) {}
+
+  // Returns a buffer, reused or newly allocated, of the given format and
+  // dimensions. The buffer returns to the pool when it's released.
+  std::shared_ptr<ImageFrame> GetBuffer(ImageFormat::Format format, int width,
+                                        int height);
+
+  int keep_count() const { return keep_count_; }
+
+ private:
+  const int keep_count_;
+  absl::Mutex mutex_;
+  absl::flat_hash_map<std::tuple<int, int, int>,
+                      std::shared_ptr<ImageFramePool>>
+      pools_ ABSL_GUARDED_BY(mutex_);
+};
+
+// A writable image frame drawn from a PyImageFramePool. Its pixel data is
+// handed over without a copy to the packet it's submitted to.
+class PooledImageFrame {
+ public:
+  explicit PooledImageFrame(std::shared_ptr<ImageFrame> image_frame)
+      : image_frame_(std::move(image_frame)) {}
+
+  // Returns the image frame, or throws a Python ValueError if it was already
+  // submitted.
+  const std::shared_ptr<ImageFrame>& image_frame() const;
+
+  // Releases the image frame to a packet. Throws a Python ValueError if it was
+  // already submitted.
+  std::shared_ptr<ImageFrame> Submit();
+
+  bool submitted() const { return image_frame_ == nullptr; }
+
+ private:
+  std::shared_ptr<ImageFrame> image_frame_;
+};
+
+// Copies the pixel data of an image frame into a buffer of the pool. Throws a
+// Python RuntimeError if the buffer can't be allocated.
+std::shared_ptr<ImageFrame> CopyToPooledImageFrame(
+    const ImageFrame& image_frame, PyImageFramePool* pool);
+
+void ImageFramePoolSubmodule(pybind11::module* module);
+
+}  // namespace python
+}  // namespace mediapipe
+
+#endif  // MEDIAPIPE_PYTHON_PYBIND_IMAGE_FRAME_POOL_H_
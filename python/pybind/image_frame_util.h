@@ -15,6 +15,7 @@
 #ifndef MEDIAPIPE_PYTHON_PYBIND_IMAGE_FRAME_UTIL_H_
 #define MEDIAPIPE_PYTHON_PYBIND_IMAGE_FRAME_UTIL_H_
 
+#include "absl/container/flat_hash_map.h"
 #include "absl/memory/memory.h"
 #include "absl/strings/str_cat.h"
 #include "mediapipe/framework/formats/image_format.pb.h"
@@ -29,14 +30,73 @@ namespace python {
 
 namespace py = pybind11;
 
+// Returns the row stride in bytes of the pixel data if the pixels of each row
+// are stored contiguously, e.g. for OpenCV ROI slices and padded decoder
+// buffers, or 0 otherwise, e.g. for `frame[:, :, ::-1]` views.
+inline int GetPackedRowWidthStep(mediapipe::ImageFormat::Format format,
+                                 const py::array& data) {
+  if (data.ndim() < 2) {
+    return 0;
+  }
+  const int byte_depth = ImageFrame::ByteDepthForFormat(format);
+  const int pixel_size =
+      ImageFrame::NumberOfChannelsForFormat(format) * byte_depth;
+  const int rows = data.shape()[0];
+  const int cols = data.shape()[1];
+  if (data.ndim() == 3 && data.shape()[2] > 1 &&
+      data.strides()[2] != byte_depth) {
+    return 0;
+  }
+  if (cols > 1 && data.strides()[1] != pixel_size) {
+    return 0;
+  }
+  const int row_size = pixel_size * cols;
+  if (rows > 1) {
+    return data.strides()[0] >= row_size ? data.strides()[0] : 0;
+  }
+  return row_size;
+}
+
+// Raises a ValueError if the shape of the array doesn't match the number of
+// channels of the image format, e.g. a 2-D array for SRGB.
+inline void CheckImageShape(mediapipe::ImageFormat::Format format,
+                            const py::array& data) {
+  const int num_channels = ImageFrame::NumberOfChannelsForFormat(format);
+  const bool matches =
+      data.ndim() == 3 ? data.shape()[2] == num_channels
+                       : data.ndim() == 2 && num_channels == 1;
+  if (!matches) {
+    throw RaisePyError(
+        PyExc_ValueError,
+        absl::StrCat("The shape of 'data' doesn't match the ", num_channels,
+                     " channel(s) of the image format.")
+            .c_str());
+  }
+}
+
 template <typename T>
 std::unique_ptr<ImageFrame> CreateImageFrame(
-    mediapipe::ImageFormat::Format format,
-    const py::array_t<T, py::array::c_style>& data, bool copy = true) {
+    mediapipe::ImageFormat::Format format, const py::array_t<T, 0>& data,
+    bool copy = true) {
+  CheckImageShape(format, data);
   int rows = data.shape()[0];
   int cols = data.shape()[1];
-  int width_step = ImageFrame::NumberOfChannelsForFormat(format) *
-                   ImageFrame::ByteDepthForFormat(format) * cols;
+  int width_step = GetPackedRowWidthStep(format, data);
+  if (width_step == 0) {
+    if (!copy) {
+      throw RaisePyError(PyExc_ValueError,
+                         "Reference mode is unavailable if the pixels of each "
+                         "row of 'data' are not stored contiguously.");
+    }
+    // Gathers the strided pixels into a contiguous array to copy from.
+    auto packed_data = py::array_t<T, py::array::c_style>::ensure(data);
+    if (!packed_data || packed_data.ptr() == data.ptr() ||
+        GetPackedRowWidthStep(format, packed_data) == 0) {
+      throw RaisePyError(PyExc_ValueError,
+                         "The pixels of 'data' can't be stored contiguously.");
+    }
+    return CreateImageFrame<T>(format, packed_data, copy);
+  }
   if (copy) {
     auto image_frame = absl::make_unique<ImageFrame>(
         format, /*width=*/cols, /*height=*/rows, width_step,
@@ -53,7 +113,80 @@ std::unique_ptr<ImageFrame> CreateImageFrame(
   auto image_frame = absl::make_unique<ImageFrame>(
       format, /*width=*/cols, /*height=*/rows, width_step,
       static_cast<uint8*>(data.request().ptr),
-      /*deleter=*/[data_pyobject](uint8*) { Py_XDECREF(data_pyobject); });
+      /*deleter=*/[data_pyobject](uint8*) {
+        // The packet may be released on a graph thread.
+        py::gil_scoped_acquire acquire;
+        Py_XDECREF(data_pyobject);
+      });
+  Py_XINCREF(data_pyobject);
+  return image_frame;
+}
+
+// The state of an array borrowed by one or more ImageFrames.
+struct BorrowedArray {
+  // The number of ImageFrames that borrow the array.
+  int num_borrows = 0;
+  // Whether the array was writable before the first borrow.
+  bool writeable = false;
+};
+
+// Returns the arrays that are currently borrowed, which must only be accessed
+// with the GIL held. A borrowed array is kept alive by its ImageFrames, so its
+// address can't be reused by another object.
+inline absl::flat_hash_map<PyObject*, BorrowedArray>& GetBorrowedArrays() {
+  static auto* borrowed_arrays =
+      new absl::flat_hash_map<PyObject*, BorrowedArray>();
+  return *borrowed_arrays;
+}
+
+// Creates an ImageFrame that references the pixel data of the array without a
+// copy. The array is kept alive and marked read-only until all the ImageFrames
+// borrowing it are released, after which it's writable again if it was
+// writable before the first borrow.
+template <typename T>
+std::unique_ptr<ImageFrame> BorrowImageFrame(
+    mediapipe::ImageFormat::Format format, const py::array& data) {
+  // A converted array would be borrowed instead of the caller's array.
+  if (!py::isinstance<py::array_t<T>>(data)) {
+    throw RaisePyError(PyExc_TypeError,
+                       "The data type of 'data' doesn't match the image "
+                       "format in borrow mode.");
+  }
+  CheckImageShape(format, data);
+  int rows = data.shape()[0];
+  int cols = data.shape()[1];
+  int width_step = GetPackedRowWidthStep(format, data);
+  if (width_step == 0) {
+    throw RaisePyError(PyExc_ValueError,
+                       "Borrow mode is unavailable if the pixels of each row "
+                       "of 'data' are not stored contiguously.");
+  }
+  PyObject* data_pyobject = data.ptr();
+  BorrowedArray& borrowed_array = GetBorrowedArrays()[data_pyobject];
+  if (borrowed_array.num_borrows++ == 0) {
+    auto& flags = py::detail::array_proxy(data_pyobject)->flags;
+    borrowed_array.writeable =
+        flags & py::detail::npy_api::NPY_ARRAY_WRITEABLE_;
+    flags &= ~py::detail::npy_api::NPY_ARRAY_WRITEABLE_;
+  }
+  auto image_frame = absl::make_unique<ImageFrame>(
+      format, /*width=*/cols, /*height=*/rows, width_step,
+      static_cast<uint8*>(data.request().ptr),
+      /*deleter=*/[data_pyobject](uint8*) {
+        // The packet may be released on a graph thread.
+        py::gil_scoped_acquire acquire;
+        auto& borrowed_arrays = GetBorrowedArrays();
+        auto it = borrowed_arrays.find(data_pyobject);
+        // The flag is restored by the last ImageFrame borrowing the array.
+        if (--it->second.num_borrows == 0) {
+          if (it->second.writeable) {
+            py::detail::array_proxy(data_pyobject)->flags |=
+                py::detail::npy_api::NPY_ARRAY_WRITEABLE_;
+          }
+          borrowed_arrays.erase(it);
+        }
+        Py_XDECREF(data_pyobject);
+      });
   Py_XINCREF(data_pyobject);
   return image_frame;
 }
@@ -21,6 +21,7 @@
 #include "mediapipe/framework/packet.h"
 #include "mediapipe/framework/port/integral_types.h"
 #include "mediapipe/framework/timestamp.h"
+#include "mediapipe/python/pybind/image_frame_pool.h"
 #include "mediapipe/python/pybind/image_frame_util.h"
 #include "mediapipe/python/pybind/util.h"
 #include "pybind11/eigen.h"
@@ -31,8 +32,73 @@ namespace mediapipe {
 namespace python {
 namespace {
 
+// Copies the pixel data into an image frame of the pool.
+std::shared_ptr<ImageFrame> CopyPixelDataToPool(
+    mediapipe::ImageFormat::Format format, const py::array& data,
+    PyImageFramePool* pool) {
+  // The pixel data is wrapped without a copy before it's copied into the pool,
+  // which requires the pixels of each row to be stored contiguously.
+  const py::array packed_data =
+      GetPackedRowWidthStep(format, data) != 0
+          ? data
+          : py::array::ensure(data, py::array::c_style);
+  if (format == mediapipe::ImageFormat::SRGB ||
+      format == mediapipe::ImageFormat::SRGBA ||
+      format == mediapipe::ImageFormat::GRAY8) {
+    return CopyToPooledImageFrame(
+        *CreateImageFrame<uint8>(format, packed_data, /*copy=*/false), pool);
+  } else if (format == mediapipe::ImageFormat::GRAY16 ||
+             format == mediapipe::ImageFormat::SRGB48 ||
+             format == mediapipe::ImageFormat::SRGBA64) {
+    return CopyToPooledImageFrame(
+        *CreateImageFrame<uint16>(format, packed_data, /*copy=*/false), pool);
+  } else if (format == mediapipe::ImageFormat::VEC32F1 ||
+             format == mediapipe::ImageFormat::VEC32F2) {
+    return CopyToPooledImageFrame(
+        *CreateImageFrame<float>(format, packed_data, /*copy=*/false), pool);
+  }
+  throw RaisePyError(PyExc_RuntimeError,
+                     absl::StrCat("Unsupported ImageFormat: ", format).c_str());
+  return nullptr;
+}
+
+// Creates an ImageFrame packet that shares the pixel data of a pooled image
+// frame, which returns to its pool when the packet is released.
+Packet AdoptPooledImageFrame(std::shared_ptr<ImageFrame> pooled_image_frame) {
+  ImageFrame* image_frame = pooled_image_frame.get();
+  return Adopt(new ImageFrame(
+      image_frame->Format(), image_frame->Width(), image_frame->Height(),
+      image_frame->WidthStep(), image_frame->MutablePixelData(),
+      /*deleter=*/[pooled_image_frame](uint8*) {}));
+}
+
+// Wraps the pixel data in an image frame without a copy, marking the array
+// read-only until the image frame is released.
+std::unique_ptr<ImageFrame> BorrowPixelData(
+    mediapipe::ImageFormat::Format format, const py::array& data) {
+  if (format == mediapipe::ImageFormat::SRGB ||
+      format == mediapipe::ImageFormat::SRGBA ||
+      format == mediapipe::ImageFormat::GRAY8) {
+    return BorrowImageFrame<uint8>(format, data);
+  } else if (format == mediapipe::ImageFormat::GRAY16 ||
+             format == mediapipe::ImageFormat::SRGB48 ||
+             format == mediapipe::ImageFormat::SRGBA64) {
+    return BorrowImageFrame<uint16>(format, data);
+  } else if (format == mediapipe::ImageFormat::VEC32F1 ||
+             format == mediapipe::ImageFormat::VEC32F2) {
+    return BorrowImageFrame<float>(format, data);
+  }
+  throw RaisePyError(PyExc_RuntimeError,
+                     absl::StrCat("Unsupported ImageFormat: ", format).c_str());
+  return nullptr;
+}
+
 Packet CreateImageFramePacket(mediapipe::ImageFormat::Format format,
-                              const py::array& data, bool copy) {
+                              const py::array& data, bool copy,
+                              PyImageFramePool* pool) {
+  if (copy && pool != nullptr) {
+    return AdoptPooledImageFrame(CopyPixelDataToPool(format, data, pool));
+  }
   if (format == mediapipe::ImageFormat::SRGB ||
       format == mediapipe::ImageFormat::SRGBA ||
       format == mediapipe::ImageFormat::GRAY8) {
@@ -51,7 +117,11 @@ Packet CreateImageFramePacket(mediapipe::ImageFormat::Format format,
 }
 
 Packet CreateImagePacket(mediapipe::ImageFormat::Format format,
-                         const py::array& data, bool copy) {
+                         const py::array& data, bool copy,
+                         PyImageFramePool* pool) {
+  if (copy && pool != nullptr) {
+    return MakePacket<Image>(CopyPixelDataToPool(format, data, pool));
+  }
   if (format == mediapipe::ImageFormat::SRGB ||
       format == mediapipe::ImageFormat::SRGBA ||
       format == mediapipe::ImageFormat::GRAY8) {
@@ -632,15 +702,36 @@ void PublicPacketCreators(pybind11::module* m) {
 void InternalPacketCreators(pybind11::module* m) {
   m->def("_create_image_frame_from_pixel_data", &CreateImageFramePacket,
          py::arg("format"), py::arg("data").noconvert(), py::arg("copy"),
-         py::return_value_policy::move);
+         py::arg("pool") = py::none(), py::return_value_policy::move);
 
   m->def("_create_image_from_pixel_data", &CreateImagePacket, py::arg("format"),
          py::arg("data").noconvert(), py::arg("copy"),
-         py::return_value_policy::move);
+         py::arg("pool") = py::none(), py::return_value_policy::move);
+
+  m->def(
+      "_create_image_frame_from_borrowed_pixel_data",
+      [](mediapipe::ImageFormat::Format format, const py::array& data) {
+        return Adopt(BorrowPixelData(format, data).release());
+      },
+      py::arg("format"), py::arg("data").noconvert(),
+      py::return_value_policy::move);
+
+  m->def(
+      "_create_image_from_borrowed_pixel_data",
+      [](mediapipe::ImageFormat::Format format, const py::array& data) {
+        return MakePacket<Image>(
+            std::shared_ptr<ImageFrame>(BorrowPixelData(format, data)));
+      },
+      py::arg("format"), py::arg("data").noconvert(),
+      py::return_value_policy::move);
 
   m->def(
       "_create_image_frame_from_image_frame",
-      [](ImageFrame& image_frame) {
+      [](ImageFrame& image_frame, PyImageFramePool* pool) {
+        if (pool != nullptr) {
+          return AdoptPooledImageFrame(
+              CopyToPooledImageFrame(image_frame, pool));
+        }
         auto image_frame_copy = absl::make_unique<ImageFrame>();
         // Set alignment_boundary to kGlDefaultAlignmentBoundary so that
         // both GPU and CPU can process it.
@@ -648,11 +739,16 @@ void InternalPacketCreators(pybind11::module* m) {
                                    ImageFrame::kGlDefaultAlignmentBoundary);
         return Adopt(image_frame_copy.release());
       },
-      py::arg("image_frame").noconvert(), py::return_value_policy::move);
+      py::arg("image_frame").noconvert(), py::arg("pool") = py::none(),
+      py::return_value_policy::move);
 
   m->def(
       "_create_image_from_image",
-      [](Image& image) {
+      [](Image& image, PyImageFramePool* pool) {
+        if (pool != nullptr) {
+          return MakePacket<Image>(
+              CopyToPooledImageFrame(*image.GetImageFrameSharedPtr(), pool));
+        }
         auto image_frame_copy = absl::make_unique<ImageFrame>();
         // Set alignment_boundary to kGlDefaultAlignmentBoundary so that
         // both GPU and CPU can process it.
@@ -662,7 +758,24 @@ void InternalPacketCreators(pybind11::module* m) {
             std::move(image_frame_copy);
         return MakePacket<Image>(shared_image_frame);
       },
-      py::arg("image").noconvert(), py::return_value_policy::move);
+      py::arg("image").noconvert(), py::arg("pool") = py::none(),
+      py::return_value_policy::move);
+
+  m->def(
+      "_create_image_frame_from_pooled_image_frame",
+      [](PooledImageFrame& pooled_image_frame) {
+        return AdoptPooledImageFrame(pooled_image_frame.Submit());
+      },
+      py::arg("pooled_image_frame").noconvert(),
+      py::return_value_policy::move);
+
+  m->def(
+      "_create_image_from_pooled_image_frame",
+      [](PooledImageFrame& pooled_image_frame) {
+        return MakePacket<Image>(pooled_image_frame.Submit());
+      },
+      py::arg("pooled_image_frame").noconvert(),
+      py::return_value_policy::move);
 
   m->def(
       "_create_proto",
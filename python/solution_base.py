@@ -24,7 +24,7 @@ class.
 import collections
 import enum
 import os
-from typing import Any, Iterable, List, Mapping, NamedTuple, Optional, Union
+from typing import Any, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Tuple, Union
 
 import numpy as np
 
@@ -35,6 +35,7 @@ from google.protobuf import message
 # pylint: disable=unused-import
 from mediapipe.calculators.core import constant_side_packet_calculator_pb2
 from mediapipe.calculators.image import image_transformation_calculator_pb2
+from mediapipe.calculators.image import opencv_encoded_image_to_image_frame_calculator_pb2
 from mediapipe.calculators.tensor import tensors_to_detections_calculator_pb2
 from mediapipe.calculators.util import landmarks_smoothing_calculator_pb2
 from mediapipe.calculators.util import logic_calculator_pb2
@@ -50,8 +51,10 @@ from mediapipe.modules.objectron.calculators import lift_2d_frame_annotation_to_
 # pylint: enable=unused-import
 from mediapipe.python import packet_creator
 from mediapipe.python import packet_getter
+from mediapipe.python import video_frame_reader
 from mediapipe.python._framework_bindings import calculator_graph
 from mediapipe.python._framework_bindings import image_frame
+from mediapipe.python._framework_bindings import image_frame_pool
 from mediapipe.python._framework_bindings import packet
 from mediapipe.python._framework_bindings import resource_util
 from mediapipe.python._framework_bindings import validated_graph_config
@@ -64,6 +67,9 @@ CALCULATOR_TO_OPTIONS = {
     'ImageTransformationCalculator':
         image_transformation_calculator_pb2
         .ImageTransformationCalculatorOptions,
+    'OpenCvEncodedImageToImageFrameCalculator':
+        opencv_encoded_image_to_image_frame_calculator_pb2
+        .OpenCvEncodedImageToImageFrameCalculatorOptions,
     'LandmarksSmoothingCalculator':
         landmarks_smoothing_calculator_pb2.LandmarksSmoothingCalculatorOptions,
     'LogicCalculator':
@@ -196,6 +202,15 @@ NAME_TO_TYPE: Mapping[str, 'PacketDataType'] = {
 }
 
 
+@enum.unique
+class ColorOrder(enum.Enum):
+  """The channel order of the three channel input images of a SolutionBase."""
+  RGB = 'rgb'
+  # The input images are converted to RGB by the first calculator of the graph,
+  # e.g. OpenCV frames can be processed without a NumPy copy.
+  BGR = 'bgr'
+
+
 class SolutionBase:
   """The common base class for the high-level MediaPipe Solution APIs.
 
@@ -222,7 +237,9 @@ class SolutionBase:
       graph_options: Optional[message.Message] = None,
       side_inputs: Optional[Mapping[str, Any]] = None,
       outputs: Optional[List[str]] = None,
-      stream_type_hints: Optional[Mapping[str, PacketDataType]] = None):
+      stream_type_hints: Optional[Mapping[str, PacketDataType]] = None,
+      input_color_order: ColorOrder = ColorOrder.RGB,
+      encoded_image_input: bool = False):
     """Initializes the SolutionBase object.
 
     Args:
@@ -237,6 +254,12 @@ class SolutionBase:
         is empty, all the output streams listed in the graph config will be
         automatically observed by default.
       stream_type_hints: A mapping from the stream name to its packet type hint.
+      input_color_order: The channel order of the input images. BGR images are
+        converted to RGB by a ColorConvertCalculator prepended to the graph.
+      encoded_image_input: Whether the image input streams also accept encoded
+        images, e.g. JPEG or PNG bytes, which are decoded by the graph. The
+        decoder of an input stream is named '{stream_name}_decoder', whose
+        reduced_resolution_factor can be set in calculator_params.
 
     Raises:
       FileNotFoundError: If the binary graph file can't be found.
@@ -253,6 +276,8 @@ class SolutionBase:
         e) If the calculator options field is a repeated field but the field
         value to be set is not iterable.
         f) If not all calculator params are valid.
+        g) If 'input_color_order' is BGR and an input image stream of the graph
+        is not an ImageFrame stream.
     """
     if bool(binary_graph_path) == bool(graph_config):
       raise ValueError(
@@ -267,15 +292,30 @@ class SolutionBase:
     else:
       validated_graph.initialize(graph_config=graph_config)
 
+    # Mappings from the input stream names to the graph input streams that
+    # their packets and their encoded images are added to, if they differ.
+    self._graph_input_stream_names = {}
+    self._encoded_input_stream_names = {}
+    # A mapping from the BGR input stream names to the graph input streams
+    # that take RGB images past the color conversion, e.g. decoded video frames.
+    self._rgb_input_stream_names = {}
     canonical_graph_config_proto = self._initialize_graph_interface(
         validated_graph, side_inputs, outputs, stream_type_hints)
+    if encoded_image_input:
+      self._add_encoded_image_inputs(canonical_graph_config_proto)
     if calculator_params:
       self._modify_calculator_options(canonical_graph_config_proto,
                                       calculator_params)
     if graph_options:
       self._set_extension(canonical_graph_config_proto.graph_options,
                           graph_options)
+    if input_color_order == ColorOrder.BGR:
+      self._prepend_bgr_to_rgb_conversion(canonical_graph_config_proto)
+    self._input_color_order = input_color_order
 
+    # The input image frames of the graph are drawn from a pool, so that they
+    # are reused once the graph releases them.
+    self._image_frame_pool = image_frame_pool.ImageFramePool()
     self._graph = calculator_graph.CalculatorGraph(
         graph_config=canonical_graph_config_proto)
     self._simulated_timestamp = 0
@@ -297,21 +337,27 @@ class SolutionBase:
   # types from "_input_stream_type_info" and then auto generate the process
   # method signature by "inspect.Signature" in __init__.
   def process(
-      self, input_data: Union[np.ndarray, Mapping[str, Union[np.ndarray,
-                                                             message.Message]]]
+      self,
+      input_data: Union[np.ndarray, bytes,
+                        Mapping[str, Union[np.ndarray, bytes, message.Message]]]
   ) -> NamedTuple:
     """Processes a set of RGB image data and output SolutionOutputs.
 
     Args:
       input_data: Either a single numpy ndarray object representing the solo
         image input of a graph or a mapping from the stream name to the image or
-        proto data that represents every input streams of a graph.
+        proto data that represents every input streams of a graph. If the
+        solution is created with `encoded_image_input=True`, the images can
+        also be encoded images, e.g. JPEG bytes, which are decoded by the graph.
+        An encoded image that can't be decoded is skipped without failing the
+        graph, like an input without any results.
 
     Raises:
       NotImplementedError: If input_data contains audio data or a list of proto
         objects.
       RuntimeError: If the underlying graph occurs any error.
-      ValueError: If the input image data is not three channel RGB.
+      ValueError: If the input image data is not three channel RGB, or it's
+        encoded but the solution doesn't accept encoded images.
 
     Returns:
       A NamedTuple object that contains the output data of a graph run.
@@ -325,10 +371,17 @@ class SolutionBase:
       results = solution.process(
           {'video_in' : cv2.imread('/tmp/hand1.png')[:, :, ::-1]})
       print(results.hand_landmarks)
+      # A solution created with input_color_order=ColorOrder.BGR takes the
+      # OpenCV frames without a NumPy copy.
+      results = bgr_solution.process(cv2.imread('/tmp/hand0.png'))
+      # A solution created with encoded_image_input=True decodes the images
+      # on the graph threads.
+      with open('/tmp/hand0.jpg', 'rb') as f:
+        results = encoded_solution.process(f.read())
     """
     self._graph_outputs.clear()
 
-    if isinstance(input_data, np.ndarray):
+    if isinstance(input_data, (np.ndarray, bytes)):
       if len(self._input_stream_type_info.keys()) != 1:
         raise ValueError(
             "Can't process single image input since the graph has more than one input streams."
@@ -349,12 +402,24 @@ class SolutionBase:
             f'SolutionBase can only process non-audio and non-proto-list data. '
             f'{self._input_stream_type_info[stream_name].name} '
             f'type is not supported yet.')
+      elif isinstance(data, bytes) and (
+          input_stream_type == PacketDataType.IMAGE_FRAME or
+          input_stream_type == PacketDataType.IMAGE):
+        if stream_name not in self._encoded_input_stream_names:
+          raise ValueError(
+              f'{stream_name} doesn\'t accept encoded images. Please create '
+              f'the solution with encoded_image_input=True.')
+        self._graph.add_packet_to_input_stream(
+            stream=self._encoded_input_stream_names[stream_name],
+            packet=packet_creator.create_string(data).at(
+                self._simulated_timestamp))
       elif (input_stream_type == PacketDataType.IMAGE_FRAME or
             input_stream_type == PacketDataType.IMAGE):
         if data.shape[2] != RGB_CHANNELS:
           raise ValueError('Input image must contain three channel rgb data.')
         self._graph.add_packet_to_input_stream(
-            stream=stream_name,
+            stream=self._graph_input_stream_names.get(stream_name,
+                                                      stream_name),
             packet=self._make_packet(input_stream_type,
                                      data).at(self._simulated_timestamp))
       else:
@@ -364,6 +429,106 @@ class SolutionBase:
                                      data).at(self._simulated_timestamp))
 
     self._graph.wait_until_idle()
+    return self._get_solution_outputs()
+
+  def process_video(
+      self,
+      video_path: str,
+      start_time_ms: int = 0,
+      end_time_ms: Optional[int] = None,
+      frame_stride: int = 1,
+      output_frames: bool = False
+  ) -> Iterator[video_frame_reader.VideoFrameResult]:
+    """Processes the frames of a video file and yields a result per frame.
+
+    The video is decoded by another graph on its own threads, ahead of the
+    processing of the frames, and the decoded frames are fed into the solution
+    graph without being converted to NumPy arrays. The frames are processed
+    after the previous inputs of the solution, at timestamps that keep their
+    intervals in the video.
+
+    Args:
+      video_path: The path to the video file.
+      start_time_ms: The position of the video in milliseconds to start
+        processing from.
+      end_time_ms: The position of the video in milliseconds after which the
+        processing stops. The video is processed to the end if it's None.
+      frame_stride: Only every frame_stride-th frame is processed. The other
+        frames are skipped by the decoder.
+      output_frames: Whether to return the processed frames as NumPy arrays,
+        in the input color order of the solution.
+
+    Returns:
+      An iterator of a VideoFrameResult per processed frame, which contains the
+      timestamp of the frame in the video in milliseconds and the
+      SolutionOutputs of the frame. The video is decoded while the results are
+      iterated.
+
+    Raises:
+      RuntimeError: If the video can't be decoded or the underlying graph
+        occurs any error.
+      ValueError: If the graph doesn't have a single image input stream, or any
+        of the arguments is invalid.
+
+    Examples:
+      solution = solution_base.SolutionBase(graph_config=hand_landmark_graph)
+      for frame_result in solution.process_video(
+          '/tmp/hands.mp4', start_time_ms=2000, frame_stride=2):
+        print(frame_result.timestamp_ms, frame_result.result.hand_landmarks)
+    """
+    if len(self._input_stream_type_info.keys()) != 1:
+      raise ValueError(
+          "Can't process video input since the graph has more than one input "
+          'streams.')
+    stream_name, input_stream_type = next(
+        iter(self._input_stream_type_info.items()))
+    if (input_stream_type != PacketDataType.IMAGE_FRAME and
+        input_stream_type != PacketDataType.IMAGE):
+      raise ValueError(
+          f"Can't process video input since {stream_name} is not an image "
+          'stream.')
+    return self._process_video_frames(stream_name, input_stream_type,
+                                      video_path, start_time_ms, end_time_ms,
+                                      frame_stride, output_frames)
+
+  def _process_video_frames(
+      self, stream_name: str, input_stream_type: PacketDataType,
+      video_path: str, start_time_ms: int, end_time_ms: Optional[int],
+      frame_stride: int,
+      output_frames: bool) -> Iterator[video_frame_reader.VideoFrameResult]:
+    """Yields the outputs of the video frames once they are iterated."""
+    # The decoded frames are RGB, so they skip the BGR to RGB conversion.
+    graph_stream_name = self._rgb_input_stream_names.get(
+        stream_name,
+        self._graph_input_stream_names.get(stream_name, stream_name))
+    # The first frame is processed 33333 us after the previous input.
+    timestamp_offset = self._simulated_timestamp + 33333 - start_time_ms * 1000
+    with video_frame_reader.VideoFrameReader(
+        video_path,
+        start_time_ms=start_time_ms,
+        end_time_ms=end_time_ms,
+        frame_stride=frame_stride,
+        output_image=input_stream_type == PacketDataType.IMAGE) as reader:
+      for frame_packet in reader:
+        self._graph_outputs.clear()
+        frame_timestamp = frame_packet.timestamp.value
+        self._simulated_timestamp = timestamp_offset + frame_timestamp
+        self._graph.add_packet_to_input_stream(
+            stream=graph_stream_name,
+            packet=frame_packet.at(self._simulated_timestamp))
+        self._graph.wait_until_idle()
+        frame = None
+        if output_frames:
+          frame = self._get_packet_content(input_stream_type, frame_packet)
+          if self._input_color_order == ColorOrder.BGR:
+            frame = np.ascontiguousarray(frame[..., ::-1])
+        yield video_frame_reader.VideoFrameResult(
+            timestamp_ms=frame_timestamp // 1000,
+            result=self._get_solution_outputs(),
+            frame=frame)
+
+  def _get_solution_outputs(self) -> NamedTuple:
+    """Gets the SolutionOutputs of the latest graph run."""
     # Create a NamedTuple object where the field names are mapping to the graph
     # output stream names.
     solution_outputs = collections.namedtuple(
@@ -448,6 +613,118 @@ class SolutionBase:
     }
     return canonical_graph_config_proto
 
+  def _redirect_graph_input_stream(
+      self, calculator_graph_config: calculator_pb2.CalculatorGraphConfig,
+      stream_name: str, suffix: str) -> Tuple[str, str]:
+    """Renames the graph input stream that an input stream is fed into.
+
+    Args:
+      calculator_graph_config: The graph config to modify.
+      stream_name: The name of the input stream of the solution.
+      suffix: The suffix of the new graph input stream name.
+
+    Returns:
+      The former and the new graph input stream names. The caller must produce
+      the former stream from the new one in the graph.
+    """
+    graph_stream_name = self._graph_input_stream_names.get(
+        stream_name, stream_name)
+    new_graph_stream_name = stream_name + suffix
+    for index, tag_index_name in enumerate(
+        calculator_graph_config.input_stream):
+      if tag_index_name.split(':')[-1] == graph_stream_name:
+        calculator_graph_config.input_stream[index] = (
+            tag_index_name[:-len(graph_stream_name)] + new_graph_stream_name)
+    self._graph_input_stream_names[stream_name] = new_graph_stream_name
+    return graph_stream_name, new_graph_stream_name
+
+  def _prepend_nodes(
+      self, calculator_graph_config: calculator_pb2.CalculatorGraphConfig,
+      new_nodes: List[calculator_pb2.CalculatorGraphConfig.Node]) -> None:
+    nodes = new_nodes + list(calculator_graph_config.node)
+    del calculator_graph_config.node[:]
+    calculator_graph_config.node.extend(nodes)
+
+  def _add_encoded_image_inputs(
+      self,
+      calculator_graph_config: calculator_pb2.CalculatorGraphConfig) -> None:
+    """Decodes the encoded input images in the first graph calculators."""
+    decoder_nodes = []
+    for stream_name, input_stream_type in self._input_stream_type_info.items():
+      if (input_stream_type != PacketDataType.IMAGE_FRAME and
+          input_stream_type != PacketDataType.IMAGE):
+        continue
+      # The encoded images are fed into a new graph input stream. Once they
+      # are decoded, they are multiplexed with the raw pixel data into the
+      # original input stream.
+      image_stream_name, pixel_stream_name = self._redirect_graph_input_stream(
+          calculator_graph_config, stream_name, '__pixels')
+      encoded_stream_name = stream_name + '__encoded'
+      decoded_stream_name = stream_name + '__decoded'
+      calculator_graph_config.input_stream.append(encoded_stream_name)
+      self._encoded_input_stream_names[stream_name] = encoded_stream_name
+      decoder_nodes.append(
+          calculator_pb2.CalculatorGraphConfig.Node(
+              name=stream_name + '_decoder',
+              calculator='OpenCvEncodedImageToImageFrameCalculator',
+              input_stream=[encoded_stream_name],
+              output_stream=[decoded_stream_name]))
+      if input_stream_type == PacketDataType.IMAGE:
+        decoder_nodes.append(
+            calculator_pb2.CalculatorGraphConfig.Node(
+                calculator='ToImageCalculator',
+                input_stream=['IMAGE_CPU:' + decoded_stream_name],
+                output_stream=['IMAGE:' + decoded_stream_name + '_image']))
+        decoded_stream_name += '_image'
+      mux_node = calculator_pb2.CalculatorGraphConfig.Node(
+          calculator='ImmediateMuxCalculator',
+          input_stream=[pixel_stream_name, decoded_stream_name],
+          output_stream=[image_stream_name])
+      # Only one of the streams has a packet at each timestamp, so the mux
+      # must not wait for the other one to settle.
+      mux_node.input_stream_handler.input_stream_handler = (
+          'ImmediateInputStreamHandler')
+      decoder_nodes.append(mux_node)
+    self._prepend_nodes(calculator_graph_config, decoder_nodes)
+
+  def _prepend_bgr_to_rgb_conversion(
+      self,
+      calculator_graph_config: calculator_pb2.CalculatorGraphConfig) -> None:
+    """Converts the BGR input images to RGB in the first graph calculator."""
+    color_convert_nodes = []
+    for stream_name, input_stream_type in self._input_stream_type_info.items():
+      if input_stream_type == PacketDataType.IMAGE:
+        raise ValueError(
+            f'BGR input is only supported by ImageFrame input streams, but '
+            f'{stream_name} is an Image stream.')
+      if input_stream_type != PacketDataType.IMAGE_FRAME:
+        continue
+      # The BGR images are fed into a new graph input stream and converted by
+      # the first calculator. They are multiplexed into the former input stream
+      # with the RGB images of another new graph input stream, which skip the
+      # conversion.
+      image_stream_name, bgr_stream_name = self._redirect_graph_input_stream(
+          calculator_graph_config, stream_name, '__bgr')
+      converted_stream_name = stream_name + '__converted'
+      rgb_stream_name = stream_name + '__rgb'
+      calculator_graph_config.input_stream.append(rgb_stream_name)
+      self._rgb_input_stream_names[stream_name] = rgb_stream_name
+      color_convert_nodes.append(
+          calculator_pb2.CalculatorGraphConfig.Node(
+              calculator='ColorConvertCalculator',
+              input_stream=['BGR_IN:' + bgr_stream_name],
+              output_stream=['RGB_OUT:' + converted_stream_name]))
+      mux_node = calculator_pb2.CalculatorGraphConfig.Node(
+          calculator='ImmediateMuxCalculator',
+          input_stream=[converted_stream_name, rgb_stream_name],
+          output_stream=[image_stream_name])
+      # Only one of the streams has a packet at each timestamp, so the mux
+      # must not wait for the other one to settle.
+      mux_node.input_stream_handler.input_stream_handler = (
+          'ImmediateInputStreamHandler')
+      color_convert_nodes.append(mux_node)
+    self._prepend_nodes(calculator_graph_config, color_convert_nodes)
+
   def _modify_calculator_options(
       self, calculator_graph_config: calculator_pb2.CalculatorGraphConfig,
       calculator_params: Mapping[str, Any]) -> None:
@@ -588,7 +865,9 @@ class SolutionBase:
     if (packet_data_type == PacketDataType.IMAGE_FRAME or
         packet_data_type == PacketDataType.IMAGE):
       return getattr(packet_creator, 'create_' + packet_data_type.value)(
-          data, image_format=image_frame.ImageFormat.SRGB)
+          data,
+          image_format=image_frame.ImageFormat.SRGB,
+          pool=self._image_frame_pool)
     else:
       return getattr(packet_creator, 'create_' + packet_data_type.value)(data)
 
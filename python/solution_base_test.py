@@ -14,8 +14,11 @@
 
 """Tests for mediapipe.python.solution_base."""
 
+import os
+
 from absl.testing import absltest
 from absl.testing import parameterized
+import cv2
 import numpy as np
 
 from google.protobuf import text_format
@@ -377,6 +380,122 @@ class SolutionBaseTest(parameterized.TestCase):
         outputs = solution2.process(input_image)
         self.assertTrue(np.array_equal(input_image, outputs.image_type_out))
 
+  def test_solution_bgr_input_color_order(self):
+    text_config = """
+      input_stream: 'image_in'
+      output_stream: 'image_out'
+      node {
+        calculator: 'ImageTransformationCalculator'
+        input_stream: 'IMAGE:image_in'
+        output_stream: 'IMAGE:image_out'
+      }
+    """
+    config_proto = text_format.Parse(text_config,
+                                     calculator_pb2.CalculatorGraphConfig())
+    input_image = np.arange(48, dtype=np.uint8).reshape(4, 4, 3)
+    with solution_base.SolutionBase(
+        graph_config=config_proto,
+        input_color_order=solution_base.ColorOrder.BGR) as solution:
+      outputs = solution.process(input_image)
+      outputs2 = solution.process({'image_in': input_image[1:, 1:]})
+    self.assertTrue(np.array_equal(input_image[:, :, ::-1], outputs.image_out))
+    self.assertTrue(
+        np.array_equal(input_image[1:, 1:, ::-1], outputs2.image_out))
+
+  def test_solution_bgr_input_color_order_with_image_stream(self):
+    text_config = """
+      input_stream: 'union_type_image_in'
+      output_stream: 'image_type_out'
+      node {
+        calculator: 'ToImageCalculator'
+        input_stream: 'IMAGE:union_type_image_in'
+        output_stream: 'IMAGE:image_type_out'
+      }
+    """
+    config_proto = text_format.Parse(text_config,
+                                     calculator_pb2.CalculatorGraphConfig())
+    with self.assertRaisesRegex(ValueError, 'BGR input'):
+      solution_base.SolutionBase(
+          graph_config=config_proto,
+          stream_type_hints={'union_type_image_in': PacketDataType.IMAGE},
+          input_color_order=solution_base.ColorOrder.BGR)
+
+  def test_solution_encoded_image_input(self):
+    text_config = """
+      input_stream: 'image_in'
+      output_stream: 'image_out'
+      node {
+        calculator: 'ImageTransformationCalculator'
+        input_stream: 'IMAGE:image_in'
+        output_stream: 'IMAGE:image_out'
+      }
+    """
+    config_proto = text_format.Parse(text_config,
+                                     calculator_pb2.CalculatorGraphConfig())
+    input_image = np.arange(48, dtype=np.uint8).reshape(4, 4, 3)
+    # PNG is lossless, and cv2 encodes BGR images.
+    _, encoded_image = cv2.imencode('.png', input_image[:, :, ::-1])
+    with solution_base.SolutionBase(
+        graph_config=config_proto, encoded_image_input=True) as solution:
+      outputs = solution.process(encoded_image.tobytes())
+      self.assertTrue(np.array_equal(input_image, outputs.image_out))
+      outputs = solution.process(input_image)
+      self.assertTrue(np.array_equal(input_image, outputs.image_out))
+      outputs = solution.process({'image_in': encoded_image.tobytes()})
+      self.assertTrue(np.array_equal(input_image, outputs.image_out))
+    with solution_base.SolutionBase(graph_config=config_proto) as solution:
+      with self.assertRaisesRegex(ValueError, 'encoded images'):
+        solution.process(encoded_image.tobytes())
+
+  def test_solution_process_video(self):
+    text_config = """
+      input_stream: 'image_in'
+      output_stream: 'image_out'
+      node {
+        calculator: 'ImageTransformationCalculator'
+        input_stream: 'IMAGE:image_in'
+        output_stream: 'IMAGE:image_out'
+      }
+    """
+    config_proto = text_format.Parse(text_config,
+                                     calculator_pb2.CalculatorGraphConfig())
+    video_path = os.path.join(self.create_tempdir().full_path, 'test.avi')
+    # A 10 fps video of 30 frames.
+    writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*'MJPG'), 10,
+                             (8, 6))
+    for i in range(30):
+      writer.write(np.full((6, 8, 3), (i, 2 * i, 3 * i), dtype=np.uint8))
+    writer.release()
+    with solution_base.SolutionBase(graph_config=config_proto) as solution:
+      solution.process(np.zeros((6, 8, 3), dtype=np.uint8))
+      frame_results = list(
+          solution.process_video(
+              video_path, start_time_ms=1000, frame_stride=5,
+              output_frames=True))
+      self.assertBetween(len(frame_results), 3, 4)
+      for frame_result in frame_results:
+        self.assertGreaterEqual(frame_result.timestamp_ms, 1000)
+        self.assertTrue(
+            np.array_equal(frame_result.frame, frame_result.result.image_out))
+      # The solution keeps processing the images after the video.
+      outputs = solution.process(np.ones((6, 8, 3), dtype=np.uint8))
+      self.assertTrue(np.array_equal(np.ones((6, 8, 3)), outputs.image_out))
+    with solution_base.SolutionBase(
+        graph_config=config_proto,
+        input_color_order=solution_base.ColorOrder.BGR) as solution:
+      for frame_result in solution.process_video(
+          video_path, end_time_ms=500, output_frames=True):
+        self.assertLessEqual(frame_result.timestamp_ms, 500)
+        # The frames are returned in BGR, and the graph outputs RGB images.
+        self.assertTrue(
+            np.array_equal(frame_result.frame[:, :, ::-1],
+                           frame_result.result.image_out))
+      # The decoded RGB frames skip the color conversion, which still applies
+      # to the BGR images processed after the video.
+      bgr_image = np.full((6, 8, 3), (1, 2, 3), dtype=np.uint8)
+      outputs = solution.process(bgr_image)
+      self.assertTrue(np.array_equal(bgr_image[:, :, ::-1], outputs.image_out))
+
   def _process_and_verify(self,
                           config_proto,
                           side_inputs=None,
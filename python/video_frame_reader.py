@@ -0,0 +1,228 @@
+# Copyright 2022 The MediaPipe Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""MediaPipe VideoFrameReader module.
+
+The VideoFrameReader decodes a video file in a MediaPipe graph and yields the
+packets of the decoded frames, which can be fed into another graph as they are.
+The frames are decoded on the graph threads ahead of the consumer and are never
+converted to NumPy arrays.
+"""
+
+import queue
+import threading
+from typing import Any, NamedTuple, Optional
+
+from mediapipe.calculators.video import opencv_video_decoder_calculator_pb2
+from mediapipe.framework import calculator_pb2
+from mediapipe.python import packet_creator
+from mediapipe.python._framework_bindings import calculator_graph
+from mediapipe.python._framework_bindings import packet
+
+_DecoderOptions = opencv_video_decoder_calculator_pb2.OpenCvVideoDecoderCalculatorOptions
+
+_INPUT_FILE_PATH_SIDE_PACKET_NAME = 'input_file_path'
+_VIDEO_STREAM_NAME = 'video'
+_MICRO_SECONDS_PER_MILLISECOND = 1000
+# Marks the end of the decoded frames in the frame queue.
+_END_OF_VIDEO = object()
+
+
+class VideoFrameResult(NamedTuple):
+  """The result of processing a decoded video frame.
+
+  Attributes:
+    timestamp_ms: The timestamp of the frame in the video in milliseconds.
+    result: The result of processing the frame.
+    frame: The decoded frame, which is only set if it's requested.
+  """
+  timestamp_ms: int
+  result: Any
+  frame: Optional[Any] = None
+
+
+class VideoFrameReader:
+  """Reads the frames of a video file decoded by a MediaPipe graph.
+
+  The frames are decoded by an OpenCvVideoDecoderCalculator on the graph
+  threads, up to `max_queued_frames` frames ahead of the consumer. The decoder
+  seeks to the start of the time range, and the frames skipped by the frame
+  stride are not converted. The output packets are ImageFrame packets, or Image
+  packets if `output_image` is set, that keep their timestamps in the video.
+
+  Example usage:
+    with video_frame_reader.VideoFrameReader(
+        '/tmp/video.mp4', start_time_ms=1000, frame_stride=2) as reader:
+      for frame_packet in reader:
+        print(frame_packet.timestamp)
+  """
+
+  def __init__(self,
+               video_path: str,
+               start_time_ms: int = 0,
+               end_time_ms: Optional[int] = None,
+               frame_stride: int = 1,
+               output_image: bool = False,
+               output_bgr: bool = False,
+               max_queued_frames: int = 4):
+    """Starts decoding the video file.
+
+    Args:
+      video_path: The path to the video file.
+      start_time_ms: The position of the video in milliseconds to start
+        decoding from.
+      end_time_ms: The position of the video in milliseconds after which the
+        decoding stops. The video is decoded to the end if it's None.
+      frame_stride: Only every frame_stride-th frame is output.
+      output_image: Whether to output Image packets instead of ImageFrame
+        packets.
+      output_bgr: Whether to output BGR frames instead of RGB frames.
+      max_queued_frames: The maximum number of decoded frames that wait for the
+        consumer. The decoder is paused while the queue is full.
+
+    Raises:
+      ValueError: If any of the arguments is invalid.
+      RuntimeError: If the decoding graph can't be started.
+    """
+    if frame_stride < 1:
+      raise ValueError('The frame stride must be positive.')
+    if start_time_ms < 0 or (end_time_ms is not None and
+                             end_time_ms < start_time_ms):
+      raise ValueError(
+          f'Invalid time range [{start_time_ms}, {end_time_ms}] of the video.')
+    if max_queued_frames < 1:
+      raise ValueError('The maximum number of queued frames must be positive.')
+    self._graph = calculator_graph.CalculatorGraph(
+        graph_config=self._create_graph_config(start_time_ms, end_time_ms,
+                                               frame_stride, output_image,
+                                               output_bgr))
+    self._frames = queue.Queue(maxsize=max_queued_frames)
+    self._stopped = threading.Event()
+    self._error = None
+    self._done = False
+
+    def callback(stream_name: str, frame_packet: packet.Packet) -> None:
+      del stream_name
+      # Blocks the graph thread until the consumer catches up, unless the
+      # reader is being closed.
+      if not self._stopped.is_set():
+        self._frames.put(frame_packet)
+
+    self._graph.observe_output_stream(_VIDEO_STREAM_NAME, callback)
+    self._graph.start_run({
+        _INPUT_FILE_PATH_SIDE_PACKET_NAME:
+            packet_creator.create_string(video_path)
+    })
+    self._run_thread = threading.Thread(target=self._wait_until_done)
+    self._run_thread.daemon = True
+    self._run_thread.start()
+
+  def _create_graph_config(
+      self, start_time_ms: int, end_time_ms: Optional[int], frame_stride: int,
+      output_image: bool,
+      output_bgr: bool) -> calculator_pb2.CalculatorGraphConfig:
+    """Creates the config of the graph that decodes the video file."""
+    frame_stream_name = 'decoded_frames'
+    decoder_node = calculator_pb2.CalculatorGraphConfig.Node(
+        calculator='OpenCvVideoDecoderCalculator',
+        input_side_packet=[
+            'INPUT_FILE_PATH:' + _INPUT_FILE_PATH_SIDE_PACKET_NAME
+        ],
+        output_stream=['VIDEO:' + frame_stream_name])
+    decoder_node.options.Extensions[_DecoderOptions.ext].CopyFrom(
+        _DecoderOptions(
+            start_time_us=start_time_ms * _MICRO_SECONDS_PER_MILLISECOND,
+            end_time_us=(-1 if end_time_ms is None else end_time_ms *
+                         _MICRO_SECONDS_PER_MILLISECOND),
+            frame_stride=frame_stride))
+    nodes = [decoder_node]
+    if output_bgr:
+      # Converting BGR to RGB swaps the red and blue channels, which converts
+      # the RGB frames to BGR as well.
+      nodes.append(
+          calculator_pb2.CalculatorGraphConfig.Node(
+              calculator='ColorConvertCalculator',
+              input_stream=['BGR_IN:' + frame_stream_name],
+              output_stream=['RGB_OUT:' + frame_stream_name + '_bgr']))
+      frame_stream_name += '_bgr'
+    if output_image:
+      nodes.append(
+          calculator_pb2.CalculatorGraphConfig.Node(
+              calculator='ToImageCalculator',
+              input_stream=['IMAGE_CPU:' + frame_stream_name],
+              output_stream=['IMAGE:' + frame_stream_name + '_image']))
+      frame_stream_name += '_image'
+    nodes.append(
+        calculator_pb2.CalculatorGraphConfig.Node(
+            calculator='PassThroughCalculator',
+            input_stream=[frame_stream_name],
+            output_stream=[_VIDEO_STREAM_NAME]))
+    return calculator_pb2.CalculatorGraphConfig(
+        output_stream=[_VIDEO_STREAM_NAME], node=nodes)
+
+  def _wait_until_done(self) -> None:
+    """Waits for the decoder to reach the end of the video on a thread."""
+    try:
+      self._graph.wait_until_done()
+    except RuntimeError as e:
+      self._error = e
+    # All the frames have been delivered to the callback at this point.
+    if not self._stopped.is_set():
+      self._frames.put(_END_OF_VIDEO)
+
+  def __iter__(self):
+    return self
+
+  def __next__(self) -> packet.Packet:
+    """Returns the packet of the next decoded frame.
+
+    Raises:
+      StopIteration: If all the frames have been read.
+      RuntimeError: If the video can't be decoded.
+    """
+    if self._done:
+      raise StopIteration
+    frame_packet = self._frames.get()
+    if frame_packet is _END_OF_VIDEO:
+      self._done = True
+      self._run_thread.join()
+      if self._error is not None:
+        raise self._error
+      raise StopIteration
+    return frame_packet
+
+  def close(self) -> None:
+    """Stops decoding the video and shuts down the decoding graph."""
+    if self._graph is None:
+      return
+    self._stopped.set()
+    # Unblocks the graph thread if it's waiting for a free slot in the queue.
+    while not self._frames.empty():
+      self._frames.get_nowait()
+    if self._run_thread.is_alive():
+      try:
+        self._graph.close_all_packet_sources()
+      except RuntimeError:
+        # The graph has already failed, which is reported by the iterator.
+        pass
+    self._run_thread.join()
+    self._done = True
+    self._graph = None
+
+  def __enter__(self):
+    """A "with" statement support."""
+    return self
+
+  def __exit__(self, exc_type, exc_val, exc_tb):
+    """Stops decoding the video and shuts down the decoding graph."""
+    self.close()
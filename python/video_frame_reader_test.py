@@ -0,0 +1,96 @@
+# Copyright 2022 The MediaPipe Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for mediapipe.python.video_frame_reader."""
+
+import os
+
+from absl.testing import absltest
+import cv2
+import numpy as np
+
+from mediapipe.python import packet_getter
+from mediapipe.python import video_frame_reader
+
+_NUM_FRAMES = 30
+_FPS = 10
+_WIDTH = 64
+_HEIGHT = 48
+
+
+class VideoFrameReaderTest(absltest.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.video_path = os.path.join(self.create_tempdir().full_path, 'test.avi')
+    writer = cv2.VideoWriter(self.video_path,
+                             cv2.VideoWriter_fourcc(*'MJPG'), _FPS,
+                             (_WIDTH, _HEIGHT))
+    for i in range(_NUM_FRAMES):
+      writer.write(np.full((_HEIGHT, _WIDTH, 3), i * 8, dtype=np.uint8))
+    writer.release()
+
+  def test_read_all_frames(self):
+    with video_frame_reader.VideoFrameReader(self.video_path) as reader:
+      frame_packets = list(reader)
+    # Some OpenCV versions return the first two frames with the same timestamp,
+    # and the second one is dropped.
+    self.assertBetween(len(frame_packets), _NUM_FRAMES - 1, _NUM_FRAMES)
+    for i, frame_packet in enumerate(frame_packets):
+      if i > 0:
+        self.assertGreater(frame_packet.timestamp,
+                           frame_packets[i - 1].timestamp)
+      output_frame = packet_getter.get_image_frame(frame_packet)
+      self.assertEqual(output_frame.width, _WIDTH)
+      self.assertEqual(output_frame.height, _HEIGHT)
+
+  def test_read_frames_in_time_range_with_frame_stride(self):
+    with video_frame_reader.VideoFrameReader(
+        self.video_path,
+        start_time_ms=1000,
+        end_time_ms=2000,
+        frame_stride=3,
+        output_image=True) as reader:
+      timestamps_ms = [
+          frame_packet.timestamp.value // 1000 for frame_packet in reader
+      ]
+    # Every third frame of the 10 fps video in [1000, 2000] ms.
+    self.assertBetween(len(timestamps_ms), 3, 4)
+    for i, timestamp_ms in enumerate(timestamps_ms):
+      self.assertBetween(timestamp_ms, 1000, 2000)
+      if i > 0:
+        self.assertGreaterEqual(timestamp_ms - timestamps_ms[i - 1], 200)
+
+  def test_close_before_the_end_of_video(self):
+    reader = video_frame_reader.VideoFrameReader(
+        self.video_path, max_queued_frames=1)
+    next(reader)
+    reader.close()
+    with self.assertRaises(StopIteration):
+      next(reader)
+
+  def test_invalid_frame_stride(self):
+    with self.assertRaisesRegex(ValueError, 'frame stride'):
+      video_frame_reader.VideoFrameReader(self.video_path, frame_stride=0)
+
+  def test_missing_video_file(self):
+    with self.assertRaises(RuntimeError):
+      with video_frame_reader.VideoFrameReader(
+          os.path.join(self.create_tempdir().full_path,
+                       'missing.avi')) as reader:
+        list(reader)
+
+
+if __name__ == '__main__':
+  absltest.main()
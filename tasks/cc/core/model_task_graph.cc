@@ -24,6 +24,7 @@ limitations under the License.
 #include "absl/status/status.h"
 #include "absl/status/statusor.h"
 #include "absl/strings/ascii.h"
+#include "absl/strings/match.h"
 #include "absl/strings/str_format.h"
 #include "absl/strings/str_split.h"
 #include "mediapipe/calculators/tensor/inference_calculator.pb.h"
@@ -31,6 +32,7 @@ limitations under the License.
 #include "mediapipe/framework/api2/port.h"
 #include "mediapipe/framework/calculator.pb.h"
 #include "mediapipe/framework/port/logging.h"
+#include "mediapipe/framework/tool/subgraph_expansion.h"
 #include "mediapipe/tasks/cc/common.h"
 #include "mediapipe/tasks/cc/core/model_asset_bundle_resources.h"
 #include "mediapipe/tasks/cc/core/model_resources.h"
@@ -108,16 +110,34 @@ class InferenceSubgraph : public Subgraph {
     model_resources_node.SideOut(kMetadataExtractorTag) >>
         graph.SideOut(kMetadataExtractorTag);
 
+    const Acceleration& acceleration =
+        subgraph_options->base_options().acceleration();
     auto& inference_node = graph.AddNode("InferenceCalculator");
-    inference_node.GetOptions<mediapipe::InferenceCalculatorOptions>()
-        .mutable_delegate()
-        ->CopyFrom(inference_delegate);
+    auto& inference_opts =
+        inference_node.GetOptions<mediapipe::InferenceCalculatorOptions>();
+    inference_opts.mutable_delegate()->CopyFrom(inference_delegate);
+    if (acceleration.has_cpu_num_threads()) {
+      inference_opts.set_cpu_num_thread(acceleration.cpu_num_threads());
+    }
     model_resources_node.SideOut(kModelTag) >> inference_node.SideIn(kModelTag);
     model_resources_node.SideOut(kOpResolverTag) >>
         inference_node.SideIn(kOpResolverTag);
     graph.In(kTensorsTag) >> inference_node.In(kTensorsTag);
     inference_node.Out(kTensorsTag) >> graph.Out(kTensorsTag);
-    return graph.GetConfig();
+    CalculatorGraphConfig config = graph.GetConfig();
+    // "InferenceCalculator" is a subgraph that selects the inference
+    // calculator implementation, and subgraph nodes can't be assigned to
+    // executors. So the subgraph is expanded here, and the selected
+    // implementation node is assigned to the executor.
+    if (!acceleration.executor().empty()) {
+      MP_RETURN_IF_ERROR(tool::ExpandSubgraphs(&config));
+      for (auto& node : *config.mutable_node()) {
+        if (absl::StartsWith(node.calculator(), "InferenceCalculator")) {
+          node.set_executor(acceleration.executor());
+        }
+      }
+    }
+    return config;
   }
 
  private:
@@ -31,6 +31,7 @@ limitations under the License.
 #include "absl/status/statusor.h"
 #include "absl/strings/substitute.h"
 #include "absl/synchronization/mutex.h"
+#include "absl/time/time.h"
 #include "mediapipe/framework/calculator.pb.h"
 #include "mediapipe/framework/calculator_framework.h"
 #include "mediapipe/framework/tool/name_util.h"
@@ -42,6 +43,10 @@ namespace tasks {
 namespace core {
 namespace {
 
+// The interval at which a blocked Process() invocation checks whether the graph
+// has failed. The output callback is never invoked after a graph error.
+constexpr absl::Duration kGraphErrorPollInterval = absl::Milliseconds(10);
+
 absl::StatusOr<Timestamp> ValidateAndGetPacketTimestamp(
     const PacketMap& packet_map) {
   if (packet_map.empty()) {
@@ -138,8 +143,7 @@ absl::Status TaskRunner::Initialize(
     mediapipe::tool::AddMultiStreamCallback(
         output_stream_names_,
         [this](const std::vector<Packet>& packets) {
-          status_or_output_packets_ =
-              GenerateOutputPacketMap(packets, output_stream_names_);
+          RouteOutputPackets(packets);
           return;
         },
         &config, &input_side_packets, /*observe_timestamp_bounds=*/true);
@@ -173,6 +177,16 @@ absl::Status TaskRunner::Start() {
   {
     absl::MutexLock lock(&mutex_);
     last_seen_ = Timestamp::Unset();
+    absl::MutexLock results_lock(&results_mutex_);
+    // The Process() invocations of the previous run, which have all been
+    // completed by Close(), may still be waiting on their pending results. The
+    // results are reset after they have been collected.
+    results_mutex_.Await(absl::Condition(
+        +[](std::map<Timestamp, PendingResult>* pending_results) {
+          return pending_results->empty();
+        },
+        &pending_results_));
+    last_output_timestamp_ = Timestamp::Unset();
   }
   MP_RETURN_IF_ERROR(
       AddPayload(graph_.StartRun({}),
@@ -203,51 +217,128 @@ absl::StatusOr<PacketMap> TaskRunner::Process(PacketMap inputs) {
         MediaPipeTasksStatus::kRunnerApiCalledInWrongModeError);
   }
   ASSIGN_OR_RETURN(auto input_timestamp, ValidateAndGetPacketTimestamp(inputs));
-  // MediaPipe reports runtime errors through CalculatorGraph::WaitUntilIdle or
-  // WaitUntilDone without indicating the exact packet timestamp.
-  // To ensure that the TaskRunner::Process reports errors per invocation,
-  // the rest of the method is guarded by a lock, which guarantees that only one
-  // invocation can be processed in the graph concurrently.
-  // TODO: Switches back to the original high performance implementation
-  // when the MediaPipe CalculatorGraph can report errors in output streams.
-  absl::MutexLock lock(&mutex_);
-  // Assigns an internal synthetic timestamp when the input packets has no
-  // assigned timestamp (packets are with the default Timestamp::Unset()).
-  // Using Timestamp increment one second is to avoid interfering with the other
-  // synthetic timestamps, such as those defined by BeginLoopCalculator.
-  bool use_synthetic_timestamp = input_timestamp == Timestamp::Unset();
-  if (use_synthetic_timestamp) {
-    input_timestamp = last_seen_ == Timestamp::Unset()
-                          ? Timestamp(0)
-                          : last_seen_ + Timestamp::kTimestampUnitsPerSecond;
-  } else if (input_timestamp <= last_seen_) {
-    return CreateStatusWithPayload(
-        absl::StatusCode::kInvalidArgument,
-        "Input timestamp must be monotonically increasing.",
-        MediaPipeTasksStatus::kRunnerInvalidTimestampError);
+  {
+    // Only the timestamp assignment and the input packets are serialized, so
+    // the invocations from multiple threads run in the graph concurrently.
+    // Their results and errors are routed back per input timestamp.
+    absl::MutexLock lock(&mutex_);
+    // Assigns an internal synthetic timestamp when the input packets has no
+    // assigned timestamp (packets are with the default Timestamp::Unset()).
+    // Using Timestamp increment one second is to avoid interfering with the
+    // other synthetic timestamps, such as those defined by BeginLoopCalculator.
+    bool use_synthetic_timestamp = input_timestamp == Timestamp::Unset();
+    if (use_synthetic_timestamp) {
+      Timestamp last_timestamp = last_seen_;
+      {
+        // Uses the latest output packet timestamp if it is larger than the
+        // last seen input timestamp.
+        absl::MutexLock results_lock(&results_mutex_);
+        last_timestamp = std::max(last_timestamp, last_output_timestamp_);
+      }
+      input_timestamp =
+          last_timestamp == Timestamp::Unset()
+              ? Timestamp(0)
+              : last_timestamp + Timestamp::kTimestampUnitsPerSecond;
+    } else if (input_timestamp <= last_seen_) {
+      return CreateStatusWithPayload(
+          absl::StatusCode::kInvalidArgument,
+          "Input timestamp must be monotonically increasing.",
+          MediaPipeTasksStatus::kRunnerInvalidTimestampError);
+    }
+    {
+      // Registers the invocation before any output can be produced for it.
+      absl::MutexLock results_lock(&results_mutex_);
+      pending_results_[input_timestamp];
+    }
+    for (auto& [stream_name, packet] : inputs) {
+      absl::Status status = graph_.AddPacketToInputStream(
+          stream_name, std::move(packet).At(input_timestamp));
+      if (!status.ok()) {
+        absl::MutexLock results_lock(&results_mutex_);
+        pending_results_.erase(input_timestamp);
+        return AddPayload(
+            status,
+            absl::StrCat("Failed to add packet to the graph input stream: ",
+                         stream_name),
+            MediaPipeTasksStatus::kRunnerUnexpectedInputError);
+      }
+    }
+    last_seen_ = input_timestamp;
   }
-  for (auto& [stream_name, packet] : inputs) {
-    MP_RETURN_IF_ERROR(AddPayload(
-        graph_.AddPacketToInputStream(stream_name,
-                                      std::move(packet).At(input_timestamp)),
-        absl::StrCat("Failed to add packet to the graph input stream: ",
-                     stream_name),
-        MediaPipeTasksStatus::kRunnerUnexpectedInputError));
+  return AwaitResult(input_timestamp);
+}
+
+void TaskRunner::RouteOutputPackets(const std::vector<Packet>& packets) {
+  // Empty packets observed from timestamp bounds also carry a timestamp, up to
+  // which their stream has settled.
+  Timestamp output_timestamp = Timestamp::Unset();
+  Timestamp settled_timestamp = Timestamp::Max();
+  bool has_output = false;
+  for (const auto& packet : packets) {
+    output_timestamp = std::max(output_timestamp, packet.Timestamp());
+    settled_timestamp = std::min(settled_timestamp, packet.Timestamp());
+    has_output |= !packet.IsEmpty();
   }
-  last_seen_ = input_timestamp;
-  if (!graph_.WaitUntilIdle().ok()) {
-    absl::Status graph_status;
-    graph_.GetCombinedErrors(&graph_status);
-    return graph_status;
+  absl::MutexLock lock(&results_mutex_);
+  last_output_timestamp_ = std::max(last_output_timestamp_, output_timestamp);
+  // A timestamp bound alone isn't the result of any invocation, and only tells
+  // how far all the output streams have settled.
+  auto settled_end = pending_results_.upper_bound(
+      has_output ? output_timestamp : settled_timestamp);
+  if (has_output && settled_end != pending_results_.begin()) {
+    auto it = std::prev(settled_end);
+    // An invocation keeps the first result routed to it.
+    if (!it->second.done) {
+      it->second.status_or_packets =
+          GenerateOutputPacketMap(packets, output_stream_names_);
+      it->second.done = true;
+    }
   }
-  // When a synthetic timestamp is used, uses the timestamp of the first
-  // output packet as the last seen timestamp if there is any output packet.
-  if (use_synthetic_timestamp && status_or_output_packets_.ok()) {
-    for (auto& kv : status_or_output_packets_.value()) {
-      last_seen_ = std::max(kv.second.Timestamp(), last_seen_);
+  // The output streams have settled past the invocations that have not
+  // received any output, so they complete with empty packets.
+  for (auto it = pending_results_.begin(); it != settled_end; ++it) {
+    if (!it->second.done) {
+      it->second.status_or_packets = GenerateOutputPacketMap(
+          std::vector<Packet>(output_stream_names_.size()),
+          output_stream_names_);
+      it->second.done = true;
     }
   }
-  return status_or_output_packets_;
+}
+
+absl::StatusOr<PacketMap> TaskRunner::AwaitResult(Timestamp input_timestamp) {
+  bool graph_failed = false;
+  {
+    absl::MutexLock lock(&results_mutex_);
+    const bool* done = &pending_results_[input_timestamp].done;
+    while (!results_mutex_.AwaitWithTimeout(absl::Condition(done),
+                                            kGraphErrorPollInterval)) {
+      if (graph_.HasError()) {
+        graph_failed = true;
+        break;
+      }
+    }
+  }
+  // MediaPipe reports runtime errors through CalculatorGraph::WaitUntilIdle
+  // without indicating the exact packet timestamp. The invocations that have
+  // received their outputs before the failure still return them, and the
+  // others return the graph error.
+  absl::Status graph_status;
+  if (graph_failed) {
+    // Waits for the failing graph to settle so that all errors are collected.
+    graph_.WaitUntilIdle().IgnoreError();
+    graph_.GetCombinedErrors(&graph_status);
+  }
+  absl::MutexLock lock(&results_mutex_);
+  auto it = pending_results_.find(input_timestamp);
+  if (!it->second.done) {
+    pending_results_.erase(it);
+    return graph_status;
+  }
+  absl::StatusOr<PacketMap> status_or_packets =
+      std::move(it->second.status_or_packets);
+  pending_results_.erase(it);
+  return status_or_packets;
 }
 
 absl::Status TaskRunner::Send(PacketMap inputs) {
@@ -300,13 +391,32 @@ absl::Status TaskRunner::Close() {
         MediaPipeTasksStatus::kRunnerFailsToCloseError);
   }
   is_running_ = false;
-  MP_RETURN_IF_ERROR(
+  absl::Status status =
       AddPayload(graph_.CloseAllInputStreams(), "Fail to close intput streams",
-                 MediaPipeTasksStatus::kRunnerFailsToCloseError));
-  MP_RETURN_IF_ERROR(AddPayload(
-      graph_.WaitUntilDone(), "Fail to shutdown the MediaPipe graph.",
-      MediaPipeTasksStatus::kRunnerFailsToCloseError));
-  return absl::OkStatus();
+                 MediaPipeTasksStatus::kRunnerFailsToCloseError);
+  if (status.ok()) {
+    status = AddPayload(graph_.WaitUntilDone(),
+                        "Fail to shutdown the MediaPipe graph.",
+                        MediaPipeTasksStatus::kRunnerFailsToCloseError);
+  }
+  FailPendingResults(status.ok()
+                         ? CreateStatusWithPayload(
+                               absl::StatusCode::kCancelled,
+                               "Task runner is closed before the result is "
+                               "available.",
+                               MediaPipeTasksStatus::kRunnerFailsToCloseError)
+                         : status);
+  return status;
+}
+
+void TaskRunner::FailPendingResults(const absl::Status& status) {
+  absl::MutexLock lock(&results_mutex_);
+  for (auto& [timestamp, pending_result] : pending_results_) {
+    if (!pending_result.done) {
+      pending_result.status_or_packets = status;
+      pending_result.done = true;
+    }
+  }
 }
 
 absl::Status TaskRunner::Restart() {
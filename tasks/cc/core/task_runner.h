@@ -87,9 +87,11 @@ class TaskRunner {
   // assigend per invocation. Otherwise, when the timestamp is set in the
   // input packets, the caller must ensure that the input packet timestamps are
   // greater than the timestamps of the previous invocation. This method is
-  // thread-unsafe and it is the caller's responsibility to synchronize access
-  // to this method across multiple threads and to ensure that the input packet
-  // timestamps are in order.
+  // thread-safe: invocations from multiple threads are processed in the graph
+  // concurrently, and each invocation receives the output packets or the
+  // error of its own input timestamp. When the timestamps are set by the
+  // caller, it is the caller's responsibility to ensure that the input packet
+  // timestamps are in order across threads.
   absl::StatusOr<PacketMap> Process(PacketMap inputs);
 
   // An asynchronous method that is designed for handling live streaming data
@@ -107,7 +109,9 @@ class TaskRunner {
   absl::Status Close();
 
   // Resets and restarts the task runner. This can be useful for resetting
-  // a stateful task graph to process new data.
+  // a stateful task graph to process new data. The Process() invocations that
+  // are still in flight receive their outputs, or an error if the graph stops
+  // before producing them.
   absl::Status Restart();
 
   // Returns the canonicalized CalculatorGraphConfig of the underlying graph.
@@ -132,15 +136,46 @@ class TaskRunner {
   // indicate that the runner isn't started successfully.
   absl::Status Start();
 
+  // The result of a Process() invocation, which is filled in by the graph
+  // output callback.
+  struct PendingResult {
+    bool done = false;
+    absl::StatusOr<PacketMap> status_or_packets;
+  };
+
+  // Routes the output packets of the graph to the pending Process()
+  // invocation whose input timestamp is the latest one at or before the
+  // output timestamp, unless it already has a result. The invocations that the
+  // output streams have settled past without any output receive empty packets.
+  void RouteOutputPackets(const std::vector<Packet>& packets);
+
+  // Blocks until the result of the Process() invocation at the input
+  // timestamp is available or the graph fails, and removes it from the
+  // pending results.
+  absl::StatusOr<PacketMap> AwaitResult(Timestamp input_timestamp);
+
+  // Completes the pending Process() invocations that haven't received their
+  // outputs with the status, so that none of them is left waiting when the
+  // graph has stopped.
+  void FailPendingResults(const absl::Status& status);
+
   PacketsCallback packets_callback_;
   std::vector<std::string> output_stream_names_;
   CalculatorGraph graph_;
   bool initialized_ = false;
   std::atomic_bool is_running_ = false;
 
-  absl::StatusOr<PacketMap> status_or_output_packets_;
+  // Serializes sending the input packets to the graph in timestamp order.
+  // When both mutexes are held, mutex_ is acquired before results_mutex_.
   Timestamp last_seen_ ABSL_GUARDED_BY(mutex_);
   absl::Mutex mutex_;
+
+  // The results of the Process() invocations in the graph, keyed by their
+  // input timestamp.
+  std::map<Timestamp, PendingResult> pending_results_
+      ABSL_GUARDED_BY(results_mutex_);
+  Timestamp last_output_timestamp_ ABSL_GUARDED_BY(results_mutex_);
+  absl::Mutex results_mutex_;
 };
 
 }  // namespace core
@@ -22,6 +22,7 @@ limitations under the License.
 #include <string>
 #include <thread>
 #include <utility>
+#include <vector>
 
 #include "absl/status/status.h"
 #include "absl/status/statusor.h"
@@ -66,6 +67,40 @@ class ErrorCalculator : public CalculatorBase {
 };
 REGISTER_CALCULATOR(ErrorCalculator);
 
+// A calculator that passes through the even numbers, and only advances the
+// timestamp bound of its output for the odd numbers.
+class EvenNumberPassThroughCalculator : public CalculatorBase {
+ public:
+  static absl::Status GetContract(CalculatorContract* cc) {
+    cc->Inputs().Index(0).Set<int>();
+    cc->Outputs().Index(0).Set<int>();
+    return absl::OkStatus();
+  }
+
+  absl::Status Process(CalculatorContext* cc) final {
+    if (cc->Inputs().Index(0).Get<int>() % 2 == 0) {
+      cc->Outputs().Index(0).AddPacket(cc->Inputs().Index(0).Value());
+    } else {
+      cc->Outputs().Index(0).SetNextTimestampBound(
+          cc->InputTimestamp().NextAllowedInStream());
+    }
+    return absl::OkStatus();
+  }
+};
+REGISTER_CALCULATOR(EvenNumberPassThroughCalculator);
+
+CalculatorGraphConfig GetEvenNumberPassThroughGraphConfig() {
+  return ParseTextProtoOrDie<CalculatorGraphConfig>(
+      R"pb(
+        input_stream: "in"
+        output_stream: "out"
+        node {
+          calculator: "EvenNumberPassThroughCalculator"
+          input_stream: "in"
+          output_stream: "out"
+        })pb");
+}
+
 CalculatorGraphConfig GetErrorCalculatorGraphConfig() {
   return ParseTextProtoOrDie<CalculatorGraphConfig>(
       R"pb(
@@ -254,6 +289,109 @@ TEST_F(TaskRunnerTest, MultiThreadSyncAPICallsWithoutTimestamp) {
   MP_ASSERT_OK(runner->Close());
 }
 
+TEST_F(TaskRunnerTest, MultiThreadSyncAPICallsReceiveTheirOwnResults) {
+  MP_ASSERT_OK_AND_ASSIGN(auto runner,
+                          TaskRunner::Create(GetPassThroughGraphConfig()));
+
+  constexpr int kNumThreads = 8;
+  constexpr int kNumCallsPerThread = 50;
+  std::vector<std::thread> threads;
+  // Every input is unique, so each invocation must get back its own input
+  // while the other threads' invocations are in the graph concurrently.
+  for (int i = 0; i < kNumThreads; ++i) {
+    threads.emplace_back([i, &runner]() {
+      for (int j = 0; j < kNumCallsPerThread; ++j) {
+        const int input = i * kNumCallsPerThread + j;
+        auto status_or_result =
+            runner->Process({{"in", MakePacket<int>(input)}});
+        ASSERT_TRUE(status_or_result.ok());
+        EXPECT_EQ(input, status_or_result.value()["out"].Get<int>());
+      }
+    });
+  }
+  for (auto& thread : threads) {
+    thread.join();
+  }
+  MP_ASSERT_OK(runner->Close());
+}
+
+TEST_F(TaskRunnerTest, SyncAPICallsWithTimestampBoundOnlyOutputs) {
+  MP_ASSERT_OK_AND_ASSIGN(
+      auto runner, TaskRunner::Create(GetEvenNumberPassThroughGraphConfig()));
+  // The odd inputs only produce a timestamp bound, which must neither replace
+  // the output of the previous invocation nor be returned as an output.
+  for (int i = 0; i < 10; ++i) {
+    auto status_or_result = runner->Process({{"in", MakePacket<int>(i)}});
+    ASSERT_TRUE(status_or_result.ok());
+    if (i % 2 == 0) {
+      EXPECT_EQ(i, status_or_result.value()["out"].Get<int>());
+    } else {
+      EXPECT_TRUE(status_or_result.value()["out"].IsEmpty());
+    }
+  }
+  MP_ASSERT_OK(runner->Close());
+}
+
+TEST_F(TaskRunnerTest, MultiThreadSyncAPICallsWithTimestampBoundOnlyOutputs) {
+  MP_ASSERT_OK_AND_ASSIGN(
+      auto runner, TaskRunner::Create(GetEvenNumberPassThroughGraphConfig()));
+
+  constexpr int kNumThreads = 8;
+  constexpr int kNumCallsPerThread = 50;
+  std::vector<std::thread> threads;
+  for (int i = 0; i < kNumThreads; ++i) {
+    threads.emplace_back([i, &runner]() {
+      for (int j = 0; j < kNumCallsPerThread; ++j) {
+        const int input = i * kNumCallsPerThread + j;
+        auto status_or_result =
+            runner->Process({{"in", MakePacket<int>(input)}});
+        ASSERT_TRUE(status_or_result.ok());
+        if (input % 2 == 0) {
+          EXPECT_EQ(input, status_or_result.value()["out"].Get<int>());
+        } else {
+          EXPECT_TRUE(status_or_result.value()["out"].IsEmpty());
+        }
+      }
+    });
+  }
+  for (auto& thread : threads) {
+    thread.join();
+  }
+  MP_ASSERT_OK(runner->Close());
+}
+
+TEST_F(TaskRunnerTest, RestartWhileSyncAPICallsAreInFlight) {
+  MP_ASSERT_OK_AND_ASSIGN(auto runner,
+                          TaskRunner::Create(GetPassThroughGraphConfig()));
+
+  constexpr int kNumThreads = 4;
+  std::atomic<bool> stop = false;
+  std::vector<std::thread> threads;
+  // The invocations running across the restarts either get back their own
+  // input or fail, and none of them is left blocked.
+  for (int i = 0; i < kNumThreads; ++i) {
+    threads.emplace_back([i, &runner, &stop]() {
+      for (int j = 0; !stop; ++j) {
+        const int input = i * 100000 + j;
+        auto status_or_result =
+            runner->Process({{"in", MakePacket<int>(input)}});
+        if (status_or_result.ok()) {
+          EXPECT_EQ(input, status_or_result.value()["out"].Get<int>());
+        }
+      }
+    });
+  }
+  for (int i = 0; i < 20; ++i) {
+    std::this_thread::sleep_for(std::chrono::milliseconds(2));
+    MP_EXPECT_OK(runner->Restart());
+  }
+  stop = true;
+  for (auto& thread : threads) {
+    thread.join();
+  }
+  MP_ASSERT_OK(runner->Close());
+}
+
 TEST_F(TaskRunnerTest, AsyncAPICalls) {
   std::function<void(absl::StatusOr<PacketMap>)> callback(
       [](absl::StatusOr<PacketMap> status_or_packets) {
@@ -284,6 +422,23 @@ TEST_F(TaskRunnerTest, ReportErrorInSyncAPICall) {
               testing::HasSubstr("An intended error for testing"));
 }
 
+TEST_F(TaskRunnerTest, ReportErrorInMultiThreadSyncAPICalls) {
+  MP_ASSERT_OK_AND_ASSIGN(auto runner,
+                          TaskRunner::Create(GetErrorCalculatorGraphConfig()));
+  constexpr int kNumThreads = 4;
+  std::vector<std::thread> threads;
+  // Every concurrent invocation receives the graph error instead of blocking.
+  for (int i = 0; i < kNumThreads; ++i) {
+    threads.emplace_back([i, &runner]() {
+      auto status_or_result = runner->Process({{"in", MakePacket<int>(i)}});
+      ASSERT_FALSE(status_or_result.ok());
+    });
+  }
+  for (auto& thread : threads) {
+    thread.join();
+  }
+}
+
 TEST_F(TaskRunnerTest, ReportErrorInAsyncAPICall) {
   std::function<void(absl::StatusOr<PacketMap>)> callback(
       [](absl::StatusOr<PacketMap> status_or_packets) {
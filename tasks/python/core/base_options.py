@@ -13,15 +13,99 @@
 # limitations under the License.
 """Base options for MediaPipe Task APIs."""
 
+import contextlib
 import dataclasses
-from typing import Any, Optional
-
+import enum
+import os
+from typing import Any, Iterator, List, Optional, Sequence
+
+from mediapipe.calculators.tensor import inference_calculator_pb2
+from mediapipe.framework import calculator_pb2
+from mediapipe.framework import thread_pool_executor_pb2
+from mediapipe.tasks.cc.core.proto import acceleration_pb2
 from mediapipe.tasks.cc.core.proto import base_options_pb2
 from mediapipe.tasks.cc.core.proto import external_file_pb2
 from mediapipe.tasks.python.core.optional_dependencies import doc_controls
 
+_AccelerationProto = acceleration_pb2.Acceleration
 _BaseOptionsProto = base_options_pb2.BaseOptions
+_DelegateProto = inference_calculator_pb2.InferenceCalculatorOptions.Delegate
+_ExecutorConfigProto = calculator_pb2.ExecutorConfig
 _ExternalFileProto = external_file_pb2.ExternalFile
+_ThreadPoolOptionsProto = thread_pool_executor_pb2.ThreadPoolExecutorOptions
+
+_INFERENCE_EXECUTOR_NAME = 'inference'
+
+
+@dataclasses.dataclass
+class ExecutionOptions:
+  """Options for the threads that run a MediaPipe task.
+
+  Attributes:
+    num_threads: The number of threads of the default executor, which runs the
+      calculators that are not assigned to another executor, such as the pre-
+      and post-processing calculators. If not set, the number of threads is
+      chosen based on the number of processors.
+    inference_num_threads: If set, the inference calculators run on a dedicated
+      thread pool executor with this many threads instead of the default
+      executor.
+    interpreter_num_threads: The number of threads available to the TFLite
+      interpreter of each inference calculator on CPU.
+    cpu_affinity: The CPUs to pin the threads that are created with the task to.
+      Only supported on Linux.
+  """
+
+  num_threads: Optional[int] = None
+  inference_num_threads: Optional[int] = None
+  interpreter_num_threads: Optional[int] = None
+  cpu_affinity: Optional[List[int]] = None
+
+  @doc_controls.do_not_generate_docs
+  def to_executor_configs(self) -> List[_ExecutorConfigProto]:
+    """Generates the ExecutorConfig protobuf objects of the task graph."""
+    executors = []
+    if self.num_threads is not None:
+      executor = _ExecutorConfigProto()
+      executor.options.Extensions[_ThreadPoolOptionsProto.ext].CopyFrom(
+          _ThreadPoolOptionsProto(num_threads=self.num_threads))
+      executors.append(executor)
+    if self.inference_num_threads is not None:
+      executor = _ExecutorConfigProto(
+          name=_INFERENCE_EXECUTOR_NAME, type='ThreadPoolExecutor')
+      executor.options.Extensions[_ThreadPoolOptionsProto.ext].CopyFrom(
+          _ThreadPoolOptionsProto(
+              num_threads=self.inference_num_threads,
+              thread_name_prefix=_INFERENCE_EXECUTOR_NAME))
+      executors.append(executor)
+    return executors
+
+  @doc_controls.do_not_generate_docs
+  @contextlib.contextmanager
+  def pin_threads(self) -> Iterator[None]:
+    """Pins the threads created within the context to `cpu_affinity`.
+
+    New threads inherit the CPU affinity of the thread that creates them, so
+    the graph threads started within the context stay on `cpu_affinity`, while
+    the affinity of the calling thread is restored on exit.
+
+    Yields:
+      None.
+
+    Raises:
+      ValueError: If `cpu_affinity` is set on a platform that doesn't support
+        it.
+    """
+    if not self.cpu_affinity:
+      yield
+      return
+    if not hasattr(os, 'sched_setaffinity'):
+      raise ValueError('CPU affinity is only supported on Linux.')
+    previous_affinity = os.sched_getaffinity(0)
+    os.sched_setaffinity(0, self.cpu_affinity)
+    try:
+      yield
+    finally:
+      os.sched_setaffinity(0, previous_affinity)
 
 
 @dataclasses.dataclass
@@ -37,30 +121,112 @@ class BaseOptions:
   If more than one field of these fields is provided, they are used in this
   precedence order.
 
+  The model inference runs on CPU, either with the default TFLite kernels or
+  with the XNNPACK delegate as chosen by `delegate`. The number of threads of
+  the TFLite interpreter is set by `execution_options.interpreter_num_threads`.
+
   Attributes:
     model_asset_path: Path to the model asset file.
     model_asset_buffer: The model asset file contents as bytes.
+    execution_options: The threading options of the task.
+    delegate: The delegate to run the model inference with. If not set, the
+      task chooses the delegate.
+    xnnpack_num_threads: The number of threads of the XNNPACK delegate. If not
+      set, the number of threads is chosen based on the device. Only used with
+      the XNNPACK delegate.
   """
 
+  class Delegate(enum.Enum):
+    """The delegates to run the model inference with.
+
+    Attributes:
+      CPU: The default TFLite kernels on CPU.
+      XNNPACK: The XNNPACK delegate on CPU.
+    """
+    CPU = 0
+    XNNPACK = 1
+
   model_asset_path: Optional[str] = None
   model_asset_buffer: Optional[bytes] = None
-  # TODO: Allow Python API to specify acceleration settings.
+  execution_options: Optional[ExecutionOptions] = None
+  delegate: Optional[Delegate] = None
+  xnnpack_num_threads: Optional[int] = None
 
   @doc_controls.do_not_generate_docs
   def to_pb2(self) -> _BaseOptionsProto:
     """Generates a BaseOptions protobuf object."""
+    if self.xnnpack_num_threads is not None and (
+        self.delegate != BaseOptions.Delegate.XNNPACK):
+      raise ValueError(
+          'xnnpack_num_threads can only be set with the XNNPACK delegate.')
+    acceleration = None
+    if self.delegate == BaseOptions.Delegate.XNNPACK:
+      acceleration = _AccelerationProto(
+          xnnpack=_DelegateProto.Xnnpack(num_threads=self.xnnpack_num_threads))
+    elif self.delegate == BaseOptions.Delegate.CPU:
+      acceleration = _AccelerationProto(tflite=_DelegateProto.TfLite())
+    if self.execution_options is not None:
+      acceleration = acceleration or _AccelerationProto()
+      if self.execution_options.interpreter_num_threads is not None:
+        acceleration.cpu_num_threads = (
+            self.execution_options.interpreter_num_threads)
+      if self.execution_options.inference_num_threads is not None:
+        acceleration.executor = _INFERENCE_EXECUTOR_NAME
     return _BaseOptionsProto(
         model_asset=_ExternalFileProto(
             file_name=self.model_asset_path,
-            file_content=self.model_asset_buffer))
+            file_content=self.model_asset_buffer),
+        acceleration=acceleration)
 
   @classmethod
   @doc_controls.do_not_generate_docs
-  def create_from_pb2(cls, pb2_obj: _BaseOptionsProto) -> 'BaseOptions':
-    """Creates a `BaseOptions` object from the given protobuf object."""
+  def create_from_pb2(
+      cls,
+      pb2_obj: _BaseOptionsProto,
+      executor_configs: Sequence[_ExecutorConfigProto] = ()
+  ) -> 'BaseOptions':
+    """Creates a `BaseOptions` object from the given protobuf object.
+
+    The executors are configured in the task graph rather than in the
+    protobuf object, so the thread counts of `execution_options` other than
+    `interpreter_num_threads` are read from `executor_configs`, and
+    `cpu_affinity` isn't restored.
+
+    Args:
+      pb2_obj: The BaseOptions protobuf object.
+      executor_configs: The ExecutorConfig protobuf objects of the task graph,
+        as generated by `ExecutionOptions.to_executor_configs`.
+
+    Returns:
+      The `BaseOptions` object.
+    """
+    acceleration = pb2_obj.acceleration
+    delegate = None
+    xnnpack_num_threads = None
+    if acceleration.HasField('xnnpack'):
+      delegate = BaseOptions.Delegate.XNNPACK
+      if acceleration.xnnpack.HasField('num_threads'):
+        xnnpack_num_threads = acceleration.xnnpack.num_threads
+    elif acceleration.HasField('tflite'):
+      delegate = BaseOptions.Delegate.CPU
+    execution_options = None
+    if acceleration.HasField('cpu_num_threads') or executor_configs:
+      execution_options = ExecutionOptions()
+      if acceleration.HasField('cpu_num_threads'):
+        execution_options.interpreter_num_threads = acceleration.cpu_num_threads
+      for executor in executor_configs:
+        num_threads = executor.options.Extensions[
+            _ThreadPoolOptionsProto.ext].num_threads
+        if not executor.name:
+          execution_options.num_threads = num_threads
+        elif executor.name == _INFERENCE_EXECUTOR_NAME:
+          execution_options.inference_num_threads = num_threads
     return BaseOptions(
         model_asset_path=pb2_obj.model_asset.file_name,
-        model_asset_buffer=pb2_obj.model_asset.file_content)
+        model_asset_buffer=pb2_obj.model_asset.file_content,
+        execution_options=execution_options,
+        delegate=delegate,
+        xnnpack_num_threads=xnnpack_num_threads)
 
   def __eq__(self, other: Any) -> bool:
     """Checks if this object is equal to the given object.
@@ -74,4 +240,5 @@ class BaseOptions:
     if not isinstance(other, BaseOptions):
       return False
 
-    return self.to_pb2().__eq__(other.to_pb2())
+    return (self.to_pb2().__eq__(other.to_pb2()) and
+            self.execution_options == other.execution_options)
@@ -0,0 +1,161 @@
+# Copyright 2022 The MediaPipe Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Consumers of the output packets queue of MediaPipe Tasks' task runner."""
+
+import asyncio
+import threading
+from typing import AsyncIterator, Callable, Iterator, List, Mapping
+
+from mediapipe.python._framework_bindings import packet as packet_module
+from mediapipe.python._framework_bindings import task_runner as task_runner_module
+
+_OutputPacketsQueue = task_runner_module.OutputPacketsQueue
+_Packet = packet_module.Packet
+_OutputPackets = Mapping[str, _Packet]
+
+
+def iter_output_packets(
+    queue: _OutputPacketsQueue,
+    max_batch_size: int = 0) -> Iterator[List[_OutputPackets]]:
+  """Yields batches of output packets until the queue is closed and drained.
+
+  Args:
+    queue: The output packets queue of a task runner.
+    max_batch_size: The maximum number of output packet dicts per batch. All
+      the queued output packets are yielded at once if it's not positive.
+
+  Yields:
+    Lists of dicts of (output stream name, data packet) pairs.
+
+  Raises:
+    RuntimeError: The underlying mediapipe graph failed to produce the next
+      output packets.
+  """
+  while True:
+    batch = queue.get(max_batch_size)
+    if not batch:
+      return
+    yield batch
+
+
+async def aiter_output_packets(
+    queue: _OutputPacketsQueue,
+    max_batch_size: int = 0) -> AsyncIterator[List[_OutputPackets]]:
+  """Asynchronously yields batches of output packets.
+
+  The blocking queue reads run in the default executor of the running event
+  loop, so the event loop is never blocked on the task runner.
+
+  Args:
+    queue: The output packets queue of a task runner.
+    max_batch_size: The maximum number of output packet dicts per batch. All
+      the queued output packets are yielded at once if it's not positive.
+
+  Yields:
+    Lists of dicts of (output stream name, data packet) pairs.
+
+  Raises:
+    RuntimeError: The underlying mediapipe graph failed to produce the next
+      output packets.
+  """
+  loop = asyncio.get_running_loop()
+  while True:
+    batch = await loop.run_in_executor(None, queue.get, max_batch_size)
+    if not batch:
+      return
+    yield batch
+
+
+def _consume_output_packets(
+    queue: _OutputPacketsQueue,
+    packets_callback: Callable[[_OutputPackets], None], max_batch_size: int,
+    errors: List[Exception]) -> None:
+  """Invokes the packets callback until the queue is closed and drained.
+
+  The consumer thread runs this function instead of a method of the consumer,
+  so that the thread doesn't keep the consumer alive.
+
+  Args:
+    queue: The output packets queue of a task runner.
+    packets_callback: The callback to invoke on every output packets dict.
+    max_batch_size: The maximum number of output packet dicts per batch.
+    errors: The list that the first error raised by the task runner or the
+      packets callback is appended to.
+  """
+  while True:
+    try:
+      for batch in iter_output_packets(queue, max_batch_size):
+        for output_packets in batch:
+          packets_callback(output_packets)
+      return
+    except Exception as e:  # pylint: disable=broad-except
+      # Keeps draining the queue and reports the first error on close.
+      if not errors:
+        errors.append(e)
+
+
+class OutputPacketsConsumer(object):
+  """Delivers the output packets of a task runner on a background thread.
+
+  The task runner pushes its output packets into `queue` without acquiring the
+  GIL. The consumer thread pops them in batches of up to `max_batch_size` and
+  invokes the packets callback on each output packets dict, so the result
+  conversion in the callback never stalls the graph threads. The consumer
+  thread is stopped by `close()`, or once the consumer is garbage collected.
+  """
+
+  def __init__(self,
+               packets_callback: Callable[[_OutputPackets], None],
+               max_batch_size: int = 0,
+               max_queue_size: int = 16,
+               drop_oldest: bool = False) -> None:
+    """Initializes the consumer and starts its thread.
+
+    Args:
+      packets_callback: The callback to invoke on every output packets dict.
+      max_batch_size: The maximum number of output packet dicts to pop per GIL
+        acquisition. All the queued output packets are popped at once if it's
+        not positive.
+      max_queue_size: The maximum number of output packet dicts waiting for the
+        consumer thread, or 0 for no limit.
+      drop_oldest: Whether the oldest output packets are dropped when the queue
+        is full. Otherwise, the graph threads wait for the consumer thread, so
+        the flow limiter of a live stream graph drops the new inputs instead.
+    """
+    self.queue = _OutputPacketsQueue(max_queue_size, drop_oldest)
+    self._errors: List[Exception] = []
+    self._thread = threading.Thread(
+        target=_consume_output_packets,
+        args=(self.queue, packets_callback, max_batch_size, self._errors),
+        daemon=True)
+    self._thread.start()
+
+  def close(self) -> None:
+    """Delivers the remaining output packets and stops the consumer thread.
+
+    Must be called after the task runner is closed.
+
+    Raises:
+      Exception: The first error raised by the task runner or the packets
+        callback.
+    """
+    self.queue.close()
+    self._thread.join()
+    if self._errors:
+      raise self._errors.pop()
+
+  def __del__(self):
+    # Lets the consumer thread exit once it has drained the queue if close() is
+    # never called.
+    self.queue.close()
@@ -14,6 +14,17 @@
 
 #include "mediapipe/tasks/python/core/pybind/task_runner.h"
 
+#include <deque>
+#include <iterator>
+#include <memory>
+#include <optional>
+#include <utility>
+#include <vector>
+
+#include "absl/base/thread_annotations.h"
+#include "absl/status/statusor.h"
+#include "absl/synchronization/mutex.h"
+#include "absl/time/time.h"
 #include "mediapipe/framework/calculator.pb.h"
 #include "mediapipe/python/pybind/util.h"
 #include "mediapipe/tasks/cc/core/mediapipe_builtin_op_resolver.h"
@@ -39,6 +50,92 @@ using ::mediapipe::tasks::core::TaskRunner;
 // run at once.
 absl::Mutex callback_mutex;
 
+// A queue of the output packets of a TaskRunner in the asynchronous mode. The
+// graph threads push the output packets without acquiring the GIL, and a python
+// consumer pops them in batches.
+class OutputPacketsQueue {
+ public:
+  // Creates a queue of up to capacity output packet maps, or an unbounded
+  // queue if capacity is not positive. When the queue is full, Push() drops
+  // the oldest output packet map if drop_oldest is set, or blocks the graph
+  // thread until there is space otherwise, which lets the graph's flow
+  // limiter drop the inputs instead.
+  OutputPacketsQueue(int capacity, bool drop_oldest)
+      : capacity_(capacity), drop_oldest_(drop_oldest) {}
+
+  void Push(absl::StatusOr<PacketMap> output_packets) {
+    absl::MutexLock lock(&mutex_);
+    if (capacity_ > 0) {
+      if (drop_oldest_) {
+        // The errors are never dropped, so that the consumer reports them.
+        for (auto it = queue_.begin();
+             it != queue_.end() &&
+             static_cast<int>(queue_.size()) >= capacity_;) {
+          it = it->ok() ? queue_.erase(it) : std::next(it);
+        }
+      } else {
+        // A closed queue isn't consumed anymore once it's drained, so the
+        // graph threads don't wait for it.
+        mutex_.Await(absl::Condition(this, &OutputPacketsQueue::HasSpace));
+      }
+    }
+    queue_.push_back(std::move(output_packets));
+  }
+
+  // Pops up to max_batch_size output packet maps, or all of them if
+  // max_batch_size is not positive, after waiting up to timeout for the first
+  // one. A batch ends before an error status unless the error is the first
+  // element. Returns an empty batch on timeout or if the queue is closed and
+  // drained.
+  std::vector<absl::StatusOr<PacketMap>> Pop(int max_batch_size,
+                                             absl::Duration timeout) {
+    absl::MutexLock lock(&mutex_);
+    mutex_.AwaitWithTimeout(absl::Condition(this, &OutputPacketsQueue::IsReady),
+                            timeout);
+    std::vector<absl::StatusOr<PacketMap>> batch;
+    while (!queue_.empty() &&
+           (max_batch_size <= 0 ||
+            static_cast<int>(batch.size()) < max_batch_size)) {
+      if (!queue_.front().ok() && !batch.empty()) {
+        break;
+      }
+      batch.push_back(std::move(queue_.front()));
+      queue_.pop_front();
+      if (!batch.back().ok()) {
+        break;
+      }
+    }
+    return batch;
+  }
+
+  // Wakes up the consumers. Once the queued output packets are popped, Pop()
+  // returns empty batches without waiting.
+  void Close() {
+    absl::MutexLock lock(&mutex_);
+    closed_ = true;
+  }
+
+  int Size() {
+    absl::MutexLock lock(&mutex_);
+    return queue_.size();
+  }
+
+ private:
+  bool IsReady() ABSL_EXCLUSIVE_LOCKS_REQUIRED(mutex_) {
+    return !queue_.empty() || closed_;
+  }
+
+  bool HasSpace() ABSL_EXCLUSIVE_LOCKS_REQUIRED(mutex_) {
+    return static_cast<int>(queue_.size()) < capacity_ || closed_;
+  }
+
+  const int capacity_;
+  const bool drop_oldest_;
+  absl::Mutex mutex_;
+  std::deque<absl::StatusOr<PacketMap>> queue_ ABSL_GUARDED_BY(mutex_);
+  bool closed_ ABSL_GUARDED_BY(mutex_) = false;
+};
+
 void TaskRunnerSubmodule(py::module* module) {
   pybind11_protobuf::ImportNativeProtoCasters();
   py::module m = module->def_submodule("task_runner",
@@ -58,11 +155,87 @@ instance can operate in only one processing mode, which is defined at
 construction time based on whether a packets callback is provided (asynchronous
 mode) or not (synchronous mode).)doc");
 
+  py::class_<OutputPacketsQueue, std::shared_ptr<OutputPacketsQueue>>
+      output_packets_queue(m, "OutputPacketsQueue",
+                           R"doc(A queue of the output packets of a TaskRunner.
+
+When a TaskRunner in the asynchronous mode is created with an output packets
+queue instead of a packets callback, the graph threads push the output packets
+into the queue without acquiring the GIL. A python consumer pops them in
+batches and converts them off the graph threads.)doc");
+
+  output_packets_queue.def(py::init<int, bool>(),
+                           R"doc(Creates an OutputPacketsQueue.
+
+Args:
+  capacity: The maximum number of queued output packet dicts, or 0 for an
+    unbounded queue.
+  drop_oldest: Whether to drop the oldest output packets when the queue is full.
+    Otherwise, the graph threads wait until there is space in the queue, so the
+    flow limiter of a live stream graph drops the new inputs instead.
+)doc",
+                           py::arg("capacity") = 16,
+                           py::arg("drop_oldest") = false);
+
+  output_packets_queue.def(
+      "get",
+      [](OutputPacketsQueue* self, int max_batch_size,
+         std::optional<double> timeout) {
+        std::vector<absl::StatusOr<PacketMap>> batch;
+        {
+          py::gil_scoped_release gil_release;
+          batch = self->Pop(max_batch_size,
+                            timeout.has_value() ? absl::Seconds(*timeout)
+                                                : absl::InfiniteDuration());
+        }
+        std::vector<PacketMap> output_packets;
+        output_packets.reserve(batch.size());
+        for (auto& packet_map : batch) {
+          RaisePyErrorIfNotOk(packet_map.status());
+          output_packets.push_back(std::move(*packet_map));
+        }
+        return output_packets;
+      },
+      R"doc(Pops a batch of output packets.
+
+Blocks until output packets are available, the timeout expires or the queue is
+closed.
+
+Args:
+  max_batch_size: The maximum number of output packet dicts to return. All the
+    queued output packets are returned if it's not positive.
+  timeout: The maximum number of seconds to wait, or None to wait until output
+    packets are available or the queue is closed.
+
+Returns:
+  A list of dicts of (output stream name, data packet) pairs. The list is empty
+  on timeout or if the queue is closed and drained.
+
+Raises:
+  RuntimeError: The underlying mediapipe graph failed to produce the next
+    output packets.
+)doc",
+      py::arg("max_batch_size") = 0, py::arg("timeout") = py::none());
+
+  output_packets_queue.def(
+      "close", [](OutputPacketsQueue* self) { self->Close(); },
+      R"doc(Closes the queue so that get() returns once it is drained.)doc");
+
+  output_packets_queue.def(
+      "__len__", [](OutputPacketsQueue* self) { return self->Size(); });
+
   task_runner.def_static(
       "create",
       [](CalculatorGraphConfig graph_config,
-         std::optional<py::function> packets_callback) {
+         std::optional<py::function> packets_callback,
+         std::optional<std::shared_ptr<OutputPacketsQueue>>
+             output_packets_queue) {
         PacketsCallback callback = nullptr;
+        if (packets_callback.has_value() && output_packets_queue.has_value()) {
+          throw RaisePyError(PyExc_ValueError,
+                             "Only one of packets_callback and "
+                             "output_packets_queue can be provided.");
+        }
         if (packets_callback.has_value()) {
           callback =
               [packets_callback](absl::StatusOr<PacketMap> output_packets) {
@@ -73,6 +246,12 @@ mode) or not (synchronous mode).)doc");
                 packets_callback.value()(output_packets.value());
                 return absl::OkStatus();
               };
+        } else if (output_packets_queue.has_value()) {
+          // The graph threads never acquire the GIL in this mode.
+          callback = [queue = *output_packets_queue](
+                         absl::StatusOr<PacketMap> output_packets) {
+            queue->Push(std::move(output_packets));
+          };
         }
         auto task_runner = TaskRunner::Create(
             std::move(graph_config),
@@ -83,22 +262,26 @@ mode) or not (synchronous mode).)doc");
       },
       R"doc(Creates a TaskRunner instance from a CalculatorGraphConfig proto and an optional user-defined packets callback.
 
-When a user-defined packets callback is provided, callers must use the
-asynchronous method, send(), to provide the input packets. If the packets
-callback is absent, clients must use the synchronous method, process(), to
+When a user-defined packets callback or an output packets queue is provided,
+callers must use the asynchronous method, send(), to provide the input packets.
+If both are absent, clients must use the synchronous method, process(), to
 provide the input packets and receive the output packets.
 
 Args:
   graph_config: A MediaPipe task graph config protobuf object.
   packets_callback: A user-defined packets callback function that takes a list
      of output packets as the input argument.
+  output_packets_queue: An OutputPacketsQueue to push the output packets into
+     instead of calling a packets callback.
 
 Raises:
   RuntimeError: Any of the following:
     a) The graph config proto is invalid.
     b) The underlying medipaipe graph fails to initilize and start.
+  ValueError: Both packets_callback and output_packets_queue are provided.
 )doc",
-      py::arg("graph_config"), py::arg("packets_callback") = py::none());
+      py::arg("graph_config"), py::arg("packets_callback") = py::none(),
+      py::arg("output_packets_queue") = py::none());
 
   task_runner.def(
       "process",
@@ -123,9 +306,11 @@ status or a successful result is returned.
 If the input packets have no timestamp, an internal timestamp will be assigend
 per invocation. Otherwise, when the timestamp is set in the input packets, the
 caller must ensure that the input packet timestamps are greater than the
-timestamps of the previous invocation. This method is thread-unsafe and it is
-the caller's responsibility to synchronize access to this method across multiple
-threads and to ensure that the input packet timestamps are in order.
+timestamps of the previous invocation. This method is thread-safe: invocations
+from multiple threads are processed in the graph concurrently, and each
+invocation receives its own output packets or error. When the timestamps are
+set in the input packets, it is the caller's responsibility to ensure that they
+are in order across threads.
 
 Args:
   input_packets: A dict contains (input stream name, data packet) pairs.
@@ -147,7 +332,11 @@ Raises:
                              name_to_packet.first.cast<std::string>(),
                              name_to_packet.second.cast<Packet>());
         }
-        RaisePyErrorIfNotOk(self->Send(input_packet_map));
+        // The graph threads may wait for the output packets consumer, which
+        // needs the GIL.
+        py::gil_scoped_release gil_release;
+        RaisePyErrorIfNotOk(self->Send(input_packet_map),
+                            /**acquire_gil=*/true);
       },
       R"doc(An asynchronous method for handling live streaming data.
 
@@ -82,6 +82,11 @@ class TaskInfo:
     task_options_proto = self.task_options.to_pb2()
     task_subgraph_options.Extensions[task_options_proto.ext].CopyFrom(
         task_options_proto)
+    # The executors requested by the execution options of the task, if any.
+    base_options = getattr(self.task_options, 'base_options', None)
+    execution_options = getattr(base_options, 'execution_options', None)
+    executors = (
+        execution_options.to_executor_configs() if execution_options else [])
     if not enable_flow_limiting:
       return calculator_pb2.CalculatorGraphConfig(
           node=[
@@ -92,7 +97,8 @@ class TaskInfo:
                   options=task_subgraph_options)
           ],
           input_stream=self.input_streams,
-          output_stream=self.output_streams)
+          output_stream=self.output_streams,
+          executor=executors)
     # When a FlowLimiterCalculator is inserted to lower the overall graph
     # latency, the task doesn't guarantee that each input must have the
     # corresponding output.
@@ -126,5 +132,6 @@ class TaskInfo:
                 options=task_subgraph_options), flow_limiter
         ],
         input_stream=self.input_streams,
-        output_stream=self.output_streams)
+        output_stream=self.output_streams,
+        executor=executors)
     return config
@@ -0,0 +1,107 @@
+# Copyright 2022 The MediaPipe Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests for base options."""
+
+import os
+import threading
+
+from absl.testing import absltest
+
+from mediapipe.framework import thread_pool_executor_pb2
+from mediapipe.tasks.python.core import base_options as base_options_module
+
+_BaseOptions = base_options_module.BaseOptions
+_ExecutionOptions = base_options_module.ExecutionOptions
+_ThreadPoolOptionsProto = thread_pool_executor_pb2.ThreadPoolExecutorOptions
+
+
+class ExecutionOptionsTest(absltest.TestCase):
+
+  def test_to_executor_configs_without_options(self):
+    self.assertEmpty(_ExecutionOptions().to_executor_configs())
+
+  def test_to_executor_configs(self):
+    executors = _ExecutionOptions(
+        num_threads=4, inference_num_threads=2).to_executor_configs()
+    self.assertLen(executors, 2)
+    # The default executor has no name.
+    self.assertEqual(executors[0].name, '')
+    self.assertEqual(
+        executors[0].options.Extensions[_ThreadPoolOptionsProto.ext]
+        .num_threads, 4)
+    self.assertEqual(executors[1].name, 'inference')
+    self.assertEqual(executors[1].type, 'ThreadPoolExecutor')
+    self.assertEqual(
+        executors[1].options.Extensions[_ThreadPoolOptionsProto.ext]
+        .num_threads, 2)
+
+  def test_to_pb2_sets_inference_executor_and_interpreter_threads(self):
+    options_proto = _BaseOptions(
+        model_asset_path='model.tflite',
+        execution_options=_ExecutionOptions(
+            inference_num_threads=2, interpreter_num_threads=3)).to_pb2()
+    self.assertEqual(options_proto.acceleration.executor, 'inference')
+    self.assertEqual(options_proto.acceleration.cpu_num_threads, 3)
+
+  def test_to_pb2_without_inference_executor(self):
+    options_proto = _BaseOptions(
+        model_asset_path='model.tflite',
+        execution_options=_ExecutionOptions(num_threads=2)).to_pb2()
+    self.assertEqual(options_proto.acceleration.executor, '')
+    self.assertFalse(options_proto.acceleration.HasField('cpu_num_threads'))
+
+  def test_create_from_pb2_round_trip(self):
+    options = _BaseOptions(
+        model_asset_path='model.tflite',
+        execution_options=_ExecutionOptions(
+            num_threads=4, inference_num_threads=2, interpreter_num_threads=3))
+    self.assertEqual(
+        _BaseOptions.create_from_pb2(
+            options.to_pb2(),
+            options.execution_options.to_executor_configs()), options)
+
+  def test_create_from_pb2_reads_interpreter_threads(self):
+    options = _BaseOptions(
+        model_asset_path='model.tflite',
+        execution_options=_ExecutionOptions(interpreter_num_threads=3))
+    self.assertEqual(_BaseOptions.create_from_pb2(options.to_pb2()), options)
+
+  @absltest.skipIf(not hasattr(os, 'sched_setaffinity'),
+                   'CPU affinity is only supported on Linux.')
+  def test_pin_threads(self):
+    previous_affinity = os.sched_getaffinity(0)
+    cpu = min(previous_affinity)
+    thread_affinity = []
+    thread = threading.Thread(
+        target=lambda: thread_affinity.append(os.sched_getaffinity(0)))
+    with _ExecutionOptions(cpu_affinity=[cpu]).pin_threads():
+      self.assertEqual(os.sched_getaffinity(0), {cpu})
+      thread.start()
+    thread.join()
+    # The threads started within the context inherit the CPU affinity, while
+    # the affinity of the calling thread is restored.
+    self.assertEqual(thread_affinity, [{cpu}])
+    self.assertEqual(os.sched_getaffinity(0), previous_affinity)
+
+  def test_pin_threads_without_cpu_affinity(self):
+    previous_affinity = (
+        os.sched_getaffinity(0) if hasattr(os, 'sched_getaffinity') else None)
+    with _ExecutionOptions().pin_threads():
+      pass
+    if previous_affinity is not None:
+      self.assertEqual(os.sched_getaffinity(0), previous_affinity)
+
+
+if __name__ == '__main__':
+  absltest.main()
@@ -19,7 +19,7 @@ from unittest import mock
 
 from absl.testing import absltest
 from absl.testing import parameterized
-
+import cv2
 import numpy as np
 
 from mediapipe.python._framework_bindings import image
@@ -219,6 +219,64 @@ class ImageClassifierTest(parameterized.TestCase):
       test_utils.assert_proto_equals(self, image_result.to_pb2(),
                                      expected_classification_result.to_pb2())
 
+  def test_classify_with_execution_options(self):
+    execution_options = base_options_module.ExecutionOptions(
+        num_threads=2, inference_num_threads=1, interpreter_num_threads=2)
+    options = _ImageClassifierOptions(
+        base_options=_BaseOptions(
+            model_asset_path=self.model_path,
+            execution_options=execution_options),
+        classifier_options=_ClassifierOptions(max_results=1))
+    # The inference calculator runs on the dedicated inference executor.
+    with _ImageClassifier.create_from_options(options) as classifier:
+      classification_result = classifier.classify(self.test_image)
+      self.assertEqual(
+          classification_result.classifications[0].entries[0].categories[0]
+          .category_name, 'cheeseburger')
+
+  def test_classify_encoded_image(self):
+    with open(
+        test_utils.get_test_data_path(
+            os.path.join(_TEST_DATA_DIR, _IMAGE_FILE)), 'rb') as f:
+      encoded_image = f.read()
+    custom_classifier_options = _ClassifierOptions(max_results=1)
+    options = _ImageClassifierOptions(
+        base_options=_BaseOptions(model_asset_path=self.model_path),
+        running_mode=_RUNNING_MODE.VIDEO,
+        classifier_options=custom_classifier_options,
+        encoded_image_input=True)
+    with _ImageClassifier.create_from_options(options) as classifier:
+      for timestamp in range(0, 120, 30):
+        classification_result = classifier.classify_for_video(
+            encoded_image, timestamp)
+        self.assertEqual(
+            classification_result.classifications[0].entries[0].categories[0]
+            .category_name, 'cheeseburger')
+      # An undecodable image fails only its own call.
+      with self.assertRaisesRegex(ValueError, 'decoded'):
+        classifier.classify_for_video(b'not an image', 120)
+      classification_result = classifier.classify_for_video(encoded_image, 150)
+      self.assertEqual(
+          classification_result.classifications[0].entries[0].categories[0]
+          .category_name, 'cheeseburger')
+      with self.assertRaisesRegex(ValueError, 'only takes encoded images'):
+        classifier.classify_for_video(self.test_image, 180)
+
+  def test_classify_fails_with_encoded_image_by_default(self):
+    options = _ImageClassifierOptions(
+        base_options=_BaseOptions(model_asset_path=self.model_path))
+    with _ImageClassifier.create_from_options(options) as classifier:
+      with self.assertRaisesRegex(ValueError, 'encoded_image_input'):
+        classifier.classify(b'not an image')
+
+  def test_create_from_options_fails_with_invalid_reduced_resolution_factor(
+      self):
+    options = _ImageClassifierOptions(
+        base_options=_BaseOptions(model_asset_path=self.model_path),
+        encoded_image_reduced_resolution_factor=3)
+    with self.assertRaisesRegex(ValueError, 'reduced resolution factor'):
+      _ImageClassifier.create_from_options(options)
+
   def test_classify_succeeds_with_region_of_interest(self):
     base_options = _BaseOptions(model_asset_path=self.model_path)
     custom_classifier_options = _ClassifierOptions(max_results=1)
@@ -357,6 +415,15 @@ class ImageClassifierTest(parameterized.TestCase):
                                   r'not initialized with the video mode'):
         classifier.classify_for_video(self.test_image, 0)
 
+  def test_calling_process_video_in_image_mode(self):
+    options = _ImageClassifierOptions(
+        base_options=_BaseOptions(model_asset_path=self.model_path),
+        running_mode=_RUNNING_MODE.IMAGE)
+    with _ImageClassifier.create_from_options(options) as classifier:
+      with self.assertRaisesRegex(ValueError,
+                                  r'not initialized with the video mode'):
+        classifier.process_video('/tmp/video.mp4')
+
   def test_calling_classify_async_in_image_mode(self):
     options = _ImageClassifierOptions(
         base_options=_BaseOptions(model_asset_path=self.model_path),
@@ -429,6 +496,47 @@ class ImageClassifierTest(parameterized.TestCase):
             self, classification_result.to_pb2(),
             _generate_soccer_ball_results(timestamp).to_pb2())
 
+  def test_process_video(self):
+    video_path = os.path.join(self.create_tempdir().full_path, 'burger.avi')
+    burger = cv2.cvtColor(self.test_image.numpy_view(), cv2.COLOR_RGB2BGR)
+    # A 10 fps video of 30 frames.
+    writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*'MJPG'), 10,
+                             (burger.shape[1], burger.shape[0]))
+    for _ in range(30):
+      writer.write(burger)
+    writer.release()
+
+    options = _ImageClassifierOptions(
+        base_options=_BaseOptions(model_asset_path=self.model_path),
+        running_mode=_RUNNING_MODE.VIDEO,
+        classifier_options=_ClassifierOptions(max_results=4))
+    with _ImageClassifier.create_from_options(
+        options) as classifier, _ImageClassifier.create_from_options(
+            options) as reference_classifier:
+      frame_results = list(
+          classifier.process_video(
+              video_path,
+              start_time_ms=1000,
+              end_time_ms=2000,
+              frame_stride=3,
+              output_frames=True))
+      # Every third frame in [1000, 2000] ms.
+      self.assertBetween(len(frame_results), 3, 4)
+      for i, frame_result in enumerate(frame_results):
+        self.assertBetween(frame_result.timestamp_ms, 1000, 2000)
+        if i > 0:
+          self.assertGreaterEqual(
+              frame_result.timestamp_ms - frame_results[i - 1].timestamp_ms,
+              200)
+        # The results match those of classify_for_video on the same frames.
+        expected_result = reference_classifier.classify_for_video(
+            frame_result.frame, frame_result.timestamp_ms)
+        test_utils.assert_proto_equals(self, frame_result.result.to_pb2(),
+                                       expected_result.to_pb2())
+        self.assertEqual(
+            frame_result.result.classifications[0].entries[0].categories[0]
+            .category_name, 'cheeseburger')
+
   def test_calling_classify_in_live_stream_mode(self):
     options = _ImageClassifierOptions(
         base_options=_BaseOptions(model_asset_path=self.model_path),
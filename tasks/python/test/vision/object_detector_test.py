@@ -15,6 +15,7 @@
 
 import enum
 import os
+import time
 from unittest import mock
 
 from absl.testing import absltest
@@ -187,6 +188,31 @@ class ObjectDetectorTest(parameterized.TestCase):
       # Comparing results.
       self.assertEqual(detection_result, expected_detection_result)
 
+  @parameterized.parameters(
+      (_BaseOptions.Delegate.CPU, None),
+      (_BaseOptions.Delegate.XNNPACK, None),
+      (_BaseOptions.Delegate.XNNPACK, 2))
+  def test_detect_with_cpu_delegate(self, delegate, xnnpack_num_threads):
+    base_options = _BaseOptions(
+        model_asset_path=self.model_path,
+        delegate=delegate,
+        xnnpack_num_threads=xnnpack_num_threads)
+    options = _ObjectDetectorOptions(base_options=base_options, max_results=4)
+    with _ObjectDetector.create_from_options(options) as detector:
+      # Performs object detection on the input.
+      detection_result = detector.detect(self.test_image)
+      # Comparing results.
+      self.assertEqual(detection_result, _EXPECTED_DETECTION_RESULT)
+
+  def test_xnnpack_num_threads_without_xnnpack_delegate(self):
+    with self.assertRaisesRegex(
+        ValueError,
+        r'xnnpack_num_threads can only be set with the XNNPACK delegate.'):
+      base_options = _BaseOptions(
+          model_asset_path=self.model_path, xnnpack_num_threads=2)
+      options = _ObjectDetectorOptions(base_options=base_options)
+      _ObjectDetector.create_from_options(options)
+
   def test_score_threshold_option(self):
     options = _ObjectDetectorOptions(
         base_options=_BaseOptions(model_asset_path=self.model_path),
@@ -399,6 +425,63 @@ class ObjectDetectorTest(parameterized.TestCase):
       detector.detect_async(self.test_image, timestamp)
     detector.close()
 
+  def test_detect_async_calls_with_result_batch_size(self):
+    observed_timestamps_ms = []
+
+    def check_result(result: _DetectionResult, unused_output_image: _Image,
+                     timestamp_ms: int):
+      self.assertEqual(result, _EXPECTED_DETECTION_RESULT)
+      observed_timestamps_ms.append(timestamp_ms)
+
+    options = _ObjectDetectorOptions(
+        base_options=_BaseOptions(model_asset_path=self.model_path),
+        running_mode=_RUNNING_MODE.LIVE_STREAM,
+        max_results=4,
+        result_callback=check_result,
+        result_batch_size=4)
+    detector = _ObjectDetector.create_from_options(options)
+    for timestamp in range(0, 300, 30):
+      detector.detect_async(self.test_image, timestamp)
+    # Assertion errors raised by the callback on the consumer thread are
+    # re-raised by close(), which delivers all the queued results.
+    detector.close()
+    self.assertNotEmpty(observed_timestamps_ms)
+    self.assertEqual(sorted(observed_timestamps_ms), observed_timestamps_ms)
+
+  @parameterized.parameters((False,), (True,))
+  def test_detect_async_calls_with_full_result_queue(self, drop_oldest_results):
+    observed_timestamps_ms = []
+
+    def check_result(result: _DetectionResult, unused_output_image: _Image,
+                     timestamp_ms: int):
+      self.assertEqual(result, _EXPECTED_DETECTION_RESULT)
+      observed_timestamps_ms.append(timestamp_ms)
+      # Keeps the result queue full.
+      time.sleep(0.05)
+
+    options = _ObjectDetectorOptions(
+        base_options=_BaseOptions(model_asset_path=self.model_path),
+        running_mode=_RUNNING_MODE.LIVE_STREAM,
+        max_results=4,
+        result_callback=check_result,
+        result_batch_size=1,
+        result_queue_size=1,
+        drop_oldest_results=drop_oldest_results)
+    detector = _ObjectDetector.create_from_options(options)
+    for timestamp in range(0, 300, 30):
+      detector.detect_async(self.test_image, timestamp)
+    detector.close()
+    self.assertNotEmpty(observed_timestamps_ms)
+    self.assertEqual(sorted(observed_timestamps_ms), observed_timestamps_ms)
+
+  def test_result_batch_size_in_image_mode(self):
+    options = _ObjectDetectorOptions(
+        base_options=_BaseOptions(model_asset_path=self.model_path),
+        running_mode=_RUNNING_MODE.IMAGE,
+        result_batch_size=4)
+    with self.assertRaisesRegex(ValueError, r'live stream mode'):
+      _ObjectDetector.create_from_options(options)
+
 
 if __name__ == '__main__':
   absltest.main()
@@ -14,21 +14,36 @@
 """MediaPipe vision task base api."""
 
 import math
-from typing import Callable, Mapping, Optional
+from typing import Any, Callable, Iterator, Mapping, Optional, Union
 
+from mediapipe.calculators.image import opencv_encoded_image_to_image_frame_calculator_pb2
 from mediapipe.framework import calculator_pb2
+from mediapipe.python import packet_creator
+from mediapipe.python import packet_getter
+from mediapipe.python import video_frame_reader
+from mediapipe.python._framework_bindings import image as image_module
+from mediapipe.python._framework_bindings import image_frame_pool
 from mediapipe.python._framework_bindings import packet as packet_module
 from mediapipe.python._framework_bindings import task_runner as task_runner_module
 from mediapipe.tasks.python.components.containers import rect as rect_module
+from mediapipe.tasks.python.core import base_options as base_options_module
+from mediapipe.tasks.python.core import output_packets_consumer
 from mediapipe.tasks.python.core.optional_dependencies import doc_controls
 from mediapipe.tasks.python.vision.core import image_processing_options as image_processing_options_module
 from mediapipe.tasks.python.vision.core import vision_task_running_mode as running_mode_module
 
 _TaskRunner = task_runner_module.TaskRunner
+_Image = image_module.Image
+_ImageFramePool = image_frame_pool.ImageFramePool
+_ExecutionOptions = base_options_module.ExecutionOptions
 _Packet = packet_module.Packet
 _NormalizedRect = rect_module.NormalizedRect
 _RunningMode = running_mode_module.VisionTaskRunningMode
 _ImageProcessingOptions = image_processing_options_module.ImageProcessingOptions
+_DecoderOptions = opencv_encoded_image_to_image_frame_calculator_pb2.OpenCvEncodedImageToImageFrameCalculatorOptions
+
+_IMAGE_TAG = 'IMAGE'
+_MICRO_SECONDS_PER_MILLISECOND = 1000
 
 
 class BaseVisionTaskApi(object):
@@ -39,7 +54,13 @@ class BaseVisionTaskApi(object):
       graph_config: calculator_pb2.CalculatorGraphConfig,
       running_mode: _RunningMode,
       packet_callback: Optional[Callable[[Mapping[str, packet_module.Packet]],
-                                         None]] = None
+                                         None]] = None,
+      result_batch_size: Optional[int] = None,
+      execution_options: Optional[_ExecutionOptions] = None,
+      encoded_image_input: bool = False,
+      encoded_image_reduced_resolution_factor: int = 1,
+      result_queue_size: int = 16,
+      drop_oldest_results: bool = False
   ) -> None:
     """Initializes the `BaseVisionTaskApi` object.
 
@@ -48,10 +69,26 @@ class BaseVisionTaskApi(object):
       running_mode: The running mode of the mediapipe vision task.
       packet_callback: The optional packet callback for getting results
       asynchronously in the live stream mode.
+      result_batch_size: If set in the live stream mode, the output packets are
+      queued by the graph threads and the packet callback is invoked on a
+      background thread, on up to this many results per GIL acquisition (all
+      the queued results if it's not positive).
+      execution_options: The optional execution options of the task, whose CPU
+      affinity is applied to the graph threads.
+      encoded_image_input: Whether the image inputs are encoded images, e.g.
+      JPEG bytes, which are decoded by the graph.
+      encoded_image_reduced_resolution_factor: The factor, one of 1, 2, 4 and
+      8, that the encoded input images are downscaled by while they are
+      decoded.
+      result_queue_size: The maximum number of output packets queued for the
+      background thread when `result_batch_size` is set, or 0 for no limit.
+      drop_oldest_results: Whether the oldest queued output packets are dropped
+      when the queue is full, instead of blocking the graph threads.
 
     Raises:
-      ValueError: The packet callback is not properly set based on the task's
-      running mode.
+      ValueError: The packet callback or the result batch size is not properly
+      set based on the task's running mode, or the reduced resolution factor is
+      not supported.
     """
     if running_mode == _RunningMode.LIVE_STREAM:
       if packet_callback is None:
@@ -62,8 +99,130 @@ class BaseVisionTaskApi(object):
       raise ValueError(
           'The vision task is in image or video mode, a user-defined result '
           'callback should not be provided.')
-    self._runner = _TaskRunner.create(graph_config, packet_callback)
+    if result_batch_size is not None and (running_mode !=
+                                          _RunningMode.LIVE_STREAM):
+      raise ValueError(
+          'The result batch size can only be set in the live stream mode.')
+    if encoded_image_reduced_resolution_factor not in (1, 2, 4, 8):
+      raise ValueError(
+          'The encoded image reduced resolution factor must be one of 1, 2, 4 '
+          'and 8.')
+    # A mapping from the image input stream names to the graph input streams
+    # that their encoded images are added to, if the graph decodes them.
+    self._encoded_stream_names = {}
+    if encoded_image_input:
+      self._add_encoded_image_inputs(graph_config,
+                                     encoded_image_reduced_resolution_factor)
+    execution_options = execution_options or _ExecutionOptions()
+    self._output_consumer = None
+    # The graph threads are started when the task runner is created.
+    with execution_options.pin_threads():
+      if result_batch_size is not None:
+        self._output_consumer = output_packets_consumer.OutputPacketsConsumer(
+            packet_callback, result_batch_size, result_queue_size,
+            drop_oldest_results)
+        self._runner = _TaskRunner.create(
+            graph_config, output_packets_queue=self._output_consumer.queue)
+      else:
+        self._runner = _TaskRunner.create(graph_config, packet_callback)
     self._running_mode = running_mode
+    # The input images are copied into image frames drawn from a pool, so that
+    # they are reused once the graph releases them.
+    self._image_frame_pool = _ImageFramePool()
+
+  def _add_encoded_image_inputs(
+      self, graph_config: calculator_pb2.CalculatorGraphConfig,
+      reduced_resolution_factor: int) -> None:
+    """Replaces each image input stream of the graph with an encoded one.
+
+    The encoded images are decoded into the original image input stream by the
+    first calculators of the graph on the graph threads.
+
+    Args:
+      graph_config: The graph config to modify.
+      reduced_resolution_factor: The factor that the encoded images are
+        downscaled by while they are decoded.
+    """
+    decoder_nodes = []
+    for index, tag_index_name in enumerate(graph_config.input_stream):
+      if tag_index_name.split(':')[0] != _IMAGE_TAG:
+        continue
+      stream_name = tag_index_name.split(':')[-1]
+      encoded_stream_name = stream_name + '__encoded'
+      decoded_stream_name = stream_name + '__decoded'
+      graph_config.input_stream[index] = encoded_stream_name
+      self._encoded_stream_names[stream_name] = encoded_stream_name
+      decoder_node = calculator_pb2.CalculatorGraphConfig.Node(
+          calculator='OpenCvEncodedImageToImageFrameCalculator',
+          input_stream=[encoded_stream_name],
+          output_stream=[decoded_stream_name])
+      decoder_node.options.Extensions[_DecoderOptions.ext].CopyFrom(
+          _DecoderOptions(reduced_resolution_factor=reduced_resolution_factor))
+      decoder_nodes.extend([
+          decoder_node,
+          calculator_pb2.CalculatorGraphConfig.Node(
+              calculator='ToImageCalculator',
+              input_stream=['IMAGE_CPU:' + decoded_stream_name],
+              output_stream=['IMAGE:' + stream_name]),
+      ])
+    nodes = decoder_nodes + list(graph_config.node)
+    del graph_config.node[:]
+    graph_config.node.extend(nodes)
+
+  def _image_stream_name(self, stream_name: str,
+                         image: Union[_Image, bytes]) -> str:
+    """Returns the graph input stream that an input image is added to.
+
+    Args:
+      stream_name: The name of the image input stream of the task graph.
+      image: The input image, or an encoded image.
+
+    Returns:
+      The name of the graph input stream for the image.
+
+    Raises:
+      ValueError: If the image is encoded but the task doesn't decode images, or
+        the other way around.
+    """
+    if not self._encoded_stream_names:
+      if isinstance(image, bytes):
+        raise ValueError(
+            'The task doesn\'t take encoded images. Please create the task with '
+            '`encoded_image_input=True`.')
+      return stream_name
+    if not isinstance(image, bytes):
+      raise ValueError(
+          'The task is created with `encoded_image_input=True` and only takes '
+          'encoded images.')
+    return self._encoded_stream_names[stream_name]
+
+  def _check_decoded(self, output_packets: Mapping[str, _Packet]) -> None:
+    """Raises a ValueError if the encoded input image couldn't be decoded.
+
+    The decoder skips an undecodable image without failing the graph, in which
+    case none of the outputs of the graph are produced.
+
+    Args:
+      output_packets: The output packets of the graph for the input image.
+    """
+    if self._encoded_stream_names and all(
+        output_packet.is_empty() for output_packet in output_packets.values()):
+      raise ValueError('The encoded image can\'t be decoded.')
+
+  def _create_image_packet(self, image: Union[_Image, bytes]) -> _Packet:
+    """Creates the packet of an input image from the image frame pool.
+
+    Args:
+      image: The input image, or an encoded image, e.g. JPEG bytes, which is
+        decoded by the graph.
+
+    Returns:
+      An Image packet holding a copy of the input image, or a string packet
+      holding the encoded image.
+    """
+    if isinstance(image, bytes):
+      return packet_creator.create_string(image)
+    return packet_creator.create_image(image, pool=self._image_frame_pool)
 
   def _process_image_data(
       self, inputs: Mapping[str, _Packet]) -> Mapping[str, _Packet]:
@@ -79,13 +238,16 @@ class BaseVisionTaskApi(object):
       A dict contains (output stream name, data packet) pairs.
 
     Raises:
-      ValueError: If the task's running mode is not set to image mode.
+      ValueError: If the task's running mode is not set to image mode, or the
+        encoded input image can't be decoded.
     """
     if self._running_mode != _RunningMode.IMAGE:
       raise ValueError(
           'Task is not initialized with the image mode. Current running mode:' +
           self._running_mode.name)
-    return self._runner.process(inputs)
+    output_packets = self._runner.process(inputs)
+    self._check_decoded(output_packets)
+    return output_packets
 
   def _process_video_data(
       self, inputs: Mapping[str, _Packet]) -> Mapping[str, _Packet]:
@@ -101,13 +263,102 @@ class BaseVisionTaskApi(object):
       A dict contains (output stream name, data packet) pairs.
 
     Raises:
-      ValueError: If the task's running mode is not set to the video mode.
+      ValueError: If the task's running mode is not set to the video mode, or
+        the encoded input image can't be decoded.
     """
     if self._running_mode != _RunningMode.VIDEO:
       raise ValueError(
           'Task is not initialized with the video mode. Current running mode:' +
           self._running_mode.name)
-    return self._runner.process(inputs)
+    output_packets = self._runner.process(inputs)
+    self._check_decoded(output_packets)
+    return output_packets
+
+  def process_video(
+      self,
+      video_path: str,
+      start_time_ms: int = 0,
+      end_time_ms: Optional[int] = None,
+      frame_stride: int = 1,
+      output_frames: bool = False,
+      **kwargs) -> Iterator[video_frame_reader.VideoFrameResult]:
+    """Processes the frames of a video file and yields a result per frame.
+
+    Only use this method when the task is created with the video running mode.
+    The video is decoded by another graph on its own threads, ahead of the
+    processing of the frames, and the decoded frames are never converted to
+    NumPy arrays. The frames are processed at their timestamps in the video, so
+    they must be later than the frames that the task has already processed.
+
+    Args:
+      video_path: The path to the video file.
+      start_time_ms: The position of the video in milliseconds to start
+        processing from.
+      end_time_ms: The position of the video in milliseconds after which the
+        processing stops. The video is processed to the end if it's None.
+      frame_stride: Only every frame_stride-th frame is processed. The other
+        frames are skipped by the decoder.
+      output_frames: Whether to return the processed frames as MediaPipe
+        Images.
+      **kwargs: The other arguments of the video processing method of the task,
+        e.g. `image_processing_options`.
+
+    Returns:
+      An iterator of a VideoFrameResult per processed frame, which contains the
+      timestamp of the frame in the video in milliseconds and the result of the
+      task, e.g. the result of `classify_for_video`. The video is decoded while
+      the results are iterated.
+
+    Raises:
+      ValueError: If the task's running mode is not set to the video mode, the
+        task takes encoded images, or any of the arguments is invalid.
+      RuntimeError: If the video can't be decoded or the task failed to run.
+    """
+    if self._running_mode != _RunningMode.VIDEO:
+      raise ValueError(
+          'Task is not initialized with the video mode. Current running mode:' +
+          self._running_mode.name)
+    if self._encoded_stream_names:
+      raise ValueError(
+          'Video files can\'t be processed by a task created with '
+          '`encoded_image_input=True`.')
+    return self._process_video_frames(video_path, start_time_ms, end_time_ms,
+                                      frame_stride, output_frames, kwargs)
+
+  def _process_video_frames(
+      self, video_path: str, start_time_ms: int, end_time_ms: Optional[int],
+      frame_stride: int, output_frames: bool, kwargs: Mapping[str, Any]
+  ) -> Iterator[video_frame_reader.VideoFrameResult]:
+    """Yields the results of the video frames once they are iterated."""
+    with video_frame_reader.VideoFrameReader(
+        video_path,
+        start_time_ms=start_time_ms,
+        end_time_ms=end_time_ms,
+        frame_stride=frame_stride,
+        output_image=True) as reader:
+      for frame_packet in reader:
+        image = packet_getter.get_image(frame_packet)
+        timestamp_ms = (
+            frame_packet.timestamp.value // _MICRO_SECONDS_PER_MILLISECOND)
+        yield video_frame_reader.VideoFrameResult(
+            timestamp_ms=timestamp_ms,
+            result=self._process_video_frame(image, timestamp_ms, **kwargs),
+            frame=image if output_frames else None)
+
+  def _process_video_frame(self, image: _Image, timestamp_ms: int,
+                           **kwargs) -> Any:
+    """Processes a decoded video frame by the video method of the task.
+
+    Args:
+      image: The decoded video frame.
+      timestamp_ms: The timestamp of the frame in the video in milliseconds.
+      **kwargs: The other arguments of the video processing method.
+
+    Returns:
+      The result of the task.
+    """
+    raise NotImplementedError(
+        f'{type(self).__name__} doesn\'t support processing video files.')
 
   def _send_live_stream_data(self, inputs: Mapping[str, _Packet]) -> None:
     """An asynchronous method to send live stream data to the runner.
@@ -176,7 +427,12 @@ class BaseVisionTaskApi(object):
     Raises:
       RuntimeError: If the mediapipe vision task failed to close.
     """
-    self._runner.close()
+    try:
+      self._runner.close()
+    finally:
+      # Delivers the results queued before the runner was closed.
+      if self._output_consumer is not None:
+        self._output_consumer.close()
 
   @doc_controls.do_not_generate_docs
   def __enter__(self):
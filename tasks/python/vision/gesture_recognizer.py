@@ -14,7 +14,7 @@
 """MediaPipe gesture recognizer task."""
 
 import dataclasses
-from typing import Callable, Mapping, Optional, List
+from typing import Callable, List, Mapping, Optional, Union
 
 from mediapipe.framework.formats import classification_pb2
 from mediapipe.framework.formats import landmark_pb2
@@ -171,6 +171,22 @@ class GestureRecognizerOptions:
     result_callback: The user-defined result callback for processing live stream
       data. The result callback should only be specified when the running mode
       is set to the live stream mode.
+    result_batch_size: If set in the live stream mode, results are queued by the
+      graph and the result callback is invoked on a background thread, on up to
+      this many results per GIL acquisition (all the queued results if it's not
+      positive).
+    result_queue_size: The maximum number of results queued for the result
+      callback when `result_batch_size` is set, or 0 for no limit.
+    drop_oldest_results: Whether the oldest queued results are dropped when the
+      result queue is full. Otherwise, the graph waits for the result callback,
+      and the newest input images are dropped while it waits.
+    encoded_image_input: Whether the task takes encoded images, e.g. JPEG bytes,
+      instead of MediaPipe Images. The images are decoded by the graph, which
+      is only extended with a decoder when this is set.
+    encoded_image_reduced_resolution_factor: The factor, one of 1, 2, 4 and 8,
+      that the encoded input images are downscaled by while they are decoded.
+      JPEG images are scaled while they are decoded, which is much faster than
+      decoding them at full resolution when the model input is much smaller.
   """
   base_options: _BaseOptions
   running_mode: _RunningMode = _RunningMode.IMAGE
@@ -184,6 +200,11 @@ class GestureRecognizerOptions:
       _ClassifierOptions] = _ClassifierOptions()
   result_callback: Optional[Callable[
       [GestureRecognitionResult, image_module.Image, int], None]] = None
+  result_batch_size: Optional[int] = None
+  result_queue_size: int = 16
+  drop_oldest_results: bool = False
+  encoded_image_input: bool = False
+  encoded_image_reduced_resolution_factor: int = 1
 
   @doc_controls.do_not_generate_docs
   def to_pb2(self) -> _GestureRecognizerGraphOptionsProto:
@@ -293,11 +314,15 @@ class GestureRecognizer(base_vision_task_api.BaseVisionTaskApi):
         task_info.generate_graph_config(
             enable_flow_limiting=options.running_mode ==
             _RunningMode.LIVE_STREAM), options.running_mode,
-        packets_callback if options.result_callback else None)
+        packets_callback if options.result_callback else None,
+        options.result_batch_size, options.base_options.execution_options,
+        options.encoded_image_input,
+        options.encoded_image_reduced_resolution_factor,
+        options.result_queue_size, options.drop_oldest_results)
 
   def recognize(
       self,
-      image: image_module.Image,
+      image: Union[image_module.Image, bytes],
       image_processing_options: Optional[_ImageProcessingOptions] = None
   ) -> GestureRecognitionResult:
     """Performs hand gesture recognition on the given image.
@@ -310,7 +335,8 @@ class GestureRecognizer(base_vision_task_api.BaseVisionTaskApi):
     support is implemented.
 
     Args:
-      image: MediaPipe Image.
+      image: MediaPipe Image, or an encoded image, e.g. JPEG bytes, if the
+        task is created with `encoded_image_input`.
       image_processing_options: Options for image processing.
 
     Returns:
@@ -323,8 +349,8 @@ class GestureRecognizer(base_vision_task_api.BaseVisionTaskApi):
     normalized_rect = self.convert_to_normalized_rect(
         image_processing_options, roi_allowed=False)
     output_packets = self._process_image_data({
-        _IMAGE_IN_STREAM_NAME:
-            packet_creator.create_image(image),
+        self._image_stream_name(_IMAGE_IN_STREAM_NAME, image):
+            self._create_image_packet(image),
         _NORM_RECT_STREAM_NAME:
             packet_creator.create_proto(normalized_rect.to_pb2())
     })
@@ -336,7 +362,7 @@ class GestureRecognizer(base_vision_task_api.BaseVisionTaskApi):
 
   def recognize_for_video(
       self,
-      image: image_module.Image,
+      image: Union[image_module.Image, bytes],
       timestamp_ms: int,
       image_processing_options: Optional[_ImageProcessingOptions] = None
   ) -> GestureRecognitionResult:
@@ -351,7 +377,8 @@ class GestureRecognizer(base_vision_task_api.BaseVisionTaskApi):
     monotonically increasing for adjacent calls of this method.
 
     Args:
-      image: MediaPipe Image.
+      image: MediaPipe Image, or an encoded image, e.g. JPEG bytes, if the
+        task is created with `encoded_image_input`.
       timestamp_ms: The timestamp of the input video frame in milliseconds.
       image_processing_options: Options for image processing.
 
@@ -365,8 +392,8 @@ class GestureRecognizer(base_vision_task_api.BaseVisionTaskApi):
     normalized_rect = self.convert_to_normalized_rect(
         image_processing_options, roi_allowed=False)
     output_packets = self._process_video_data({
-        _IMAGE_IN_STREAM_NAME:
-            packet_creator.create_image(image).at(
+        self._image_stream_name(_IMAGE_IN_STREAM_NAME, image):
+            self._create_image_packet(image).at(
                 timestamp_ms * _MICRO_SECONDS_PER_MILLISECOND),
         _NORM_RECT_STREAM_NAME:
             packet_creator.create_proto(normalized_rect.to_pb2()).at(
@@ -378,9 +405,13 @@ class GestureRecognizer(base_vision_task_api.BaseVisionTaskApi):
 
     return _build_recognition_result(output_packets)
 
+  def _process_video_frame(self, image: image_module.Image, timestamp_ms: int,
+                           **kwargs) -> GestureRecognitionResult:
+    return self.recognize_for_video(image, timestamp_ms, **kwargs)
+
   def recognize_async(
       self,
-      image: image_module.Image,
+      image: Union[image_module.Image, bytes],
       timestamp_ms: int,
       image_processing_options: Optional[_ImageProcessingOptions] = None
   ) -> None:
@@ -406,7 +437,8 @@ class GestureRecognizer(base_vision_task_api.BaseVisionTaskApi):
       - The input timestamp in milliseconds.
 
     Args:
-      image: MediaPipe Image.
+      image: MediaPipe Image, or an encoded image, e.g. JPEG bytes, if the
+        task is created with `encoded_image_input`.
       timestamp_ms: The timestamp of the input image in milliseconds.
       image_processing_options: Options for image processing.
 
@@ -417,8 +449,8 @@ class GestureRecognizer(base_vision_task_api.BaseVisionTaskApi):
     normalized_rect = self.convert_to_normalized_rect(
         image_processing_options, roi_allowed=False)
     self._send_live_stream_data({
-        _IMAGE_IN_STREAM_NAME:
-            packet_creator.create_image(image).at(
+        self._image_stream_name(_IMAGE_IN_STREAM_NAME, image):
+            self._create_image_packet(image).at(
                 timestamp_ms * _MICRO_SECONDS_PER_MILLISECOND),
         _NORM_RECT_STREAM_NAME:
             packet_creator.create_proto(normalized_rect.to_pb2()).at(
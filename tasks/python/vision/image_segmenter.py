@@ -15,9 +15,8 @@
 
 import dataclasses
 import enum
-from typing import Callable, List, Mapping, Optional
+from typing import Callable, List, Mapping, Optional, Union
 
-from mediapipe.python import packet_creator
 from mediapipe.python import packet_getter
 from mediapipe.python._framework_bindings import image as image_module
 from mediapipe.python._framework_bindings import packet
@@ -73,6 +72,22 @@ class ImageSegmenterOptions:
     result_callback: The user-defined result callback for processing live stream
       data. The result callback should only be specified when the running mode
       is set to the live stream mode.
+    result_batch_size: If set in the live stream mode, results are queued by the
+      graph and the result callback is invoked on a background thread, on up to
+      this many results per GIL acquisition (all the queued results if it's not
+      positive).
+    result_queue_size: The maximum number of results queued for the result
+      callback when `result_batch_size` is set, or 0 for no limit.
+    drop_oldest_results: Whether the oldest queued results are dropped when the
+      result queue is full. Otherwise, the graph waits for the result callback,
+      and the newest input images are dropped while it waits.
+    encoded_image_input: Whether the task takes encoded images, e.g. JPEG bytes,
+      instead of MediaPipe Images. The images are decoded by the graph, which
+      is only extended with a decoder when this is set.
+    encoded_image_reduced_resolution_factor: The factor, one of 1, 2, 4 and 8,
+      that the encoded input images are downscaled by while they are decoded.
+      JPEG images are scaled while they are decoded, which is much faster than
+      decoding them at full resolution when the model input is much smaller.
   """
   base_options: _BaseOptions
   running_mode: _RunningMode = _RunningMode.IMAGE
@@ -80,6 +95,11 @@ class ImageSegmenterOptions:
   activation: Optional[Activation] = Activation.NONE
   result_callback: Optional[Callable[
       [List[image_module.Image], image_module.Image, int], None]] = None
+  result_batch_size: Optional[int] = None
+  result_queue_size: int = 16
+  drop_oldest_results: bool = False
+  encoded_image_input: bool = False
+  encoded_image_reduced_resolution_factor: int = 1
 
   @doc_controls.do_not_generate_docs
   def to_pb2(self) -> _ImageSegmenterOptionsProto:
@@ -159,13 +179,20 @@ class ImageSegmenter(base_vision_task_api.BaseVisionTaskApi):
         task_info.generate_graph_config(
             enable_flow_limiting=options.running_mode ==
             _RunningMode.LIVE_STREAM), options.running_mode,
-        packets_callback if options.result_callback else None)
-
-  def segment(self, image: image_module.Image) -> List[image_module.Image]:
+        packets_callback if options.result_callback else None,
+        options.result_batch_size, options.base_options.execution_options,
+        options.encoded_image_input,
+        options.encoded_image_reduced_resolution_factor,
+        options.result_queue_size, options.drop_oldest_results)
+
+  def segment(
+      self,
+      image: Union[image_module.Image, bytes]) -> List[image_module.Image]:
     """Performs the actual segmentation task on the provided MediaPipe Image.
 
     Args:
-      image: MediaPipe Image.
+      image: MediaPipe Image, or an encoded image, e.g. JPEG bytes, if the
+        task is created with `encoded_image_input`.
 
     Returns:
       If the output_type is CATEGORY_MASK, the returned vector of images is
@@ -178,13 +205,15 @@ class ImageSegmenter(base_vision_task_api.BaseVisionTaskApi):
       ValueError: If any of the input arguments is invalid.
       RuntimeError: If image segmentation failed to run.
     """
-    output_packets = self._process_image_data(
-        {_IMAGE_IN_STREAM_NAME: packet_creator.create_image(image)})
+    output_packets = self._process_image_data({
+        self._image_stream_name(_IMAGE_IN_STREAM_NAME, image):
+            self._create_image_packet(image)
+    })
     segmentation_result = packet_getter.get_image_list(
         output_packets[_SEGMENTATION_OUT_STREAM_NAME])
     return segmentation_result
 
-  def segment_for_video(self, image: image_module.Image,
+  def segment_for_video(self, image: Union[image_module.Image, bytes],
                         timestamp_ms: int) -> List[image_module.Image]:
     """Performs segmentation on the provided video frames.
 
@@ -194,7 +223,8 @@ class ImageSegmenter(base_vision_task_api.BaseVisionTaskApi):
     monotonically increasing for adjacent calls of this method.
 
     Args:
-      image: MediaPipe Image.
+      image: MediaPipe Image, or an encoded image, e.g. JPEG bytes, if the
+        task is created with `encoded_image_input`.
       timestamp_ms: The timestamp of the input video frame in milliseconds.
 
     Returns:
@@ -209,15 +239,20 @@ class ImageSegmenter(base_vision_task_api.BaseVisionTaskApi):
       RuntimeError: If image segmentation failed to run.
     """
     output_packets = self._process_video_data({
-        _IMAGE_IN_STREAM_NAME:
-            packet_creator.create_image(image).at(
+        self._image_stream_name(_IMAGE_IN_STREAM_NAME, image):
+            self._create_image_packet(image).at(
                 timestamp_ms * _MICRO_SECONDS_PER_MILLISECOND)
     })
     segmentation_result = packet_getter.get_image_list(
         output_packets[_SEGMENTATION_OUT_STREAM_NAME])
     return segmentation_result
 
-  def segment_async(self, image: image_module.Image, timestamp_ms: int) -> None:
+  def _process_video_frame(self, image: image_module.Image, timestamp_ms: int,
+                           **kwargs) -> List[image_module.Image]:
+    return self.segment_for_video(image, timestamp_ms, **kwargs)
+
+  def segment_async(self, image: Union[image_module.Image, bytes],
+                    timestamp_ms: int) -> None:
     """Sends live image data (an Image with a unique timestamp) to perform image segmentation.
 
     Only use this method when the ImageSegmenter is created with the live stream
@@ -237,7 +272,8 @@ class ImageSegmenter(base_vision_task_api.BaseVisionTaskApi):
       - The input timestamp in milliseconds.
 
     Args:
-      image: MediaPipe Image.
+      image: MediaPipe Image, or an encoded image, e.g. JPEG bytes, if the
+        task is created with `encoded_image_input`.
       timestamp_ms: The timestamp of the input image in milliseconds.
 
     Raises:
@@ -245,7 +281,7 @@ class ImageSegmenter(base_vision_task_api.BaseVisionTaskApi):
         segmenter has already processed.
     """
     self._send_live_stream_data({
-        _IMAGE_IN_STREAM_NAME:
-            packet_creator.create_image(image).at(
+        self._image_stream_name(_IMAGE_IN_STREAM_NAME, image):
+            self._create_image_packet(image).at(
                 timestamp_ms * _MICRO_SECONDS_PER_MILLISECOND)
     })
@@ -14,9 +14,8 @@
 """MediaPipe object detector task."""
 
 import dataclasses
-from typing import Callable, List, Mapping, Optional
+from typing import Callable, List, Mapping, Optional, Union
 
-from mediapipe.python import packet_creator
 from mediapipe.python import packet_getter
 from mediapipe.python._framework_bindings import image as image_module
 from mediapipe.python._framework_bindings import packet as packet_module
@@ -70,6 +69,22 @@ class ObjectDetectorOptions:
     result_callback: The user-defined result callback for processing live stream
       data. The result callback should only be specified when the running mode
       is set to the live stream mode.
+    result_batch_size: If set in the live stream mode, results are queued by the
+      graph and the result callback is invoked on a background thread, on up to
+      this many results per GIL acquisition (all the queued results if it's not
+      positive).
+    result_queue_size: The maximum number of results queued for the result
+      callback when `result_batch_size` is set, or 0 for no limit.
+    drop_oldest_results: Whether the oldest queued results are dropped when the
+      result queue is full. Otherwise, the graph waits for the result callback,
+      and the newest input images are dropped while it waits.
+    encoded_image_input: Whether the task takes encoded images, e.g. JPEG bytes,
+      instead of MediaPipe Images. The images are decoded by the graph, which
+      is only extended with a decoder when this is set.
+    encoded_image_reduced_resolution_factor: The factor, one of 1, 2, 4 and 8,
+      that the encoded input images are downscaled by while they are decoded.
+      JPEG images are scaled while they are decoded, which is much faster than
+      decoding them at full resolution when the model input is much smaller.
   """
   base_options: _BaseOptions
   running_mode: _RunningMode = _RunningMode.IMAGE
@@ -81,6 +96,11 @@ class ObjectDetectorOptions:
   result_callback: Optional[
       Callable[[detections_module.DetectionResult, image_module.Image, int],
                None]] = None
+  result_batch_size: Optional[int] = None
+  result_queue_size: int = 16
+  drop_oldest_results: bool = False
+  encoded_image_input: bool = False
+  encoded_image_reduced_resolution_factor: int = 1
 
   @doc_controls.do_not_generate_docs
   def to_pb2(self) -> _ObjectDetectorOptionsProto:
@@ -166,18 +186,24 @@ class ObjectDetector(base_vision_task_api.BaseVisionTaskApi):
         task_info.generate_graph_config(
             enable_flow_limiting=options.running_mode ==
             _RunningMode.LIVE_STREAM), options.running_mode,
-        packets_callback if options.result_callback else None)
+        packets_callback if options.result_callback else None,
+        options.result_batch_size, options.base_options.execution_options,
+        options.encoded_image_input,
+        options.encoded_image_reduced_resolution_factor,
+        options.result_queue_size, options.drop_oldest_results)
 
   # TODO: Create an Image class for MediaPipe Tasks.
-  def detect(self,
-             image: image_module.Image) -> detections_module.DetectionResult:
+  def detect(
+      self, image: Union[image_module.Image,
+                         bytes]) -> detections_module.DetectionResult:
     """Performs object detection on the provided MediaPipe Image.
 
     Only use this method when the ObjectDetector is created with the image
     running mode.
 
     Args:
-      image: MediaPipe Image.
+      image: MediaPipe Image, or an encoded image, e.g. JPEG bytes, if the
+        task is created with `encoded_image_input`.
 
     Returns:
       A detection result object that contains a list of detections, each
@@ -189,8 +215,10 @@ class ObjectDetector(base_vision_task_api.BaseVisionTaskApi):
       ValueError: If any of the input arguments is invalid.
       RuntimeError: If object detection failed to run.
     """
-    output_packets = self._process_image_data(
-        {_IMAGE_IN_STREAM_NAME: packet_creator.create_image(image)})
+    output_packets = self._process_image_data({
+        self._image_stream_name(_IMAGE_IN_STREAM_NAME, image):
+            self._create_image_packet(image)
+    })
     detection_proto_list = packet_getter.get_proto_list(
         output_packets[_DETECTIONS_OUT_STREAM_NAME])
     return detections_module.DetectionResult([
@@ -198,7 +226,7 @@ class ObjectDetector(base_vision_task_api.BaseVisionTaskApi):
         for result in detection_proto_list
     ])
 
-  def detect_for_video(self, image: image_module.Image,
+  def detect_for_video(self, image: Union[image_module.Image, bytes],
                        timestamp_ms: int) -> detections_module.DetectionResult:
     """Performs object detection on the provided video frames.
 
@@ -208,7 +236,8 @@ class ObjectDetector(base_vision_task_api.BaseVisionTaskApi):
     monotonically increasing for adjacent calls of this method.
 
     Args:
-      image: MediaPipe Image.
+      image: MediaPipe Image, or an encoded image, e.g. JPEG bytes, if the
+        task is created with `encoded_image_input`.
       timestamp_ms: The timestamp of the input video frame in milliseconds.
 
     Returns:
@@ -222,8 +251,8 @@ class ObjectDetector(base_vision_task_api.BaseVisionTaskApi):
       RuntimeError: If object detection failed to run.
     """
     output_packets = self._process_video_data({
-        _IMAGE_IN_STREAM_NAME:
-            packet_creator.create_image(image).at(timestamp_ms)
+        self._image_stream_name(_IMAGE_IN_STREAM_NAME, image):
+            self._create_image_packet(image).at(timestamp_ms)
     })
     detection_proto_list = packet_getter.get_proto_list(
         output_packets[_DETECTIONS_OUT_STREAM_NAME])
@@ -232,7 +261,12 @@ class ObjectDetector(base_vision_task_api.BaseVisionTaskApi):
         for result in detection_proto_list
     ])
 
-  def detect_async(self, image: image_module.Image, timestamp_ms: int) -> None:
+  def _process_video_frame(self, image: image_module.Image, timestamp_ms: int,
+                           **kwargs) -> detections_module.DetectionResult:
+    return self.detect_for_video(image, timestamp_ms, **kwargs)
+
+  def detect_async(self, image: Union[image_module.Image, bytes],
+                   timestamp_ms: int) -> None:
     """Sends live image data (an Image with a unique timestamp) to perform object detection.
 
     Only use this method when the ObjectDetector is created with the live stream
@@ -254,7 +288,8 @@ class ObjectDetector(base_vision_task_api.BaseVisionTaskApi):
       - The input timestamp in milliseconds.
 
     Args:
-      image: MediaPipe Image.
+      image: MediaPipe Image, or an encoded image, e.g. JPEG bytes, if the
+        task is created with `encoded_image_input`.
       timestamp_ms: The timestamp of the input image in milliseconds.
 
     Raises:
@@ -262,6 +297,6 @@ class ObjectDetector(base_vision_task_api.BaseVisionTaskApi):
         detector has already processed.
     """
     self._send_live_stream_data({
-        _IMAGE_IN_STREAM_NAME:
-            packet_creator.create_image(image).at(timestamp_ms)
+        self._image_stream_name(_IMAGE_IN_STREAM_NAME, image):
+            self._create_image_packet(image).at(timestamp_ms)
     })
@@ -142,6 +142,14 @@ Add${NAME}.
       labels = get_bbox_label_string_at(example, i)
     clear_bbox_label_string(example)
 
+Float and int64 feature lists also provide get_${NAME}_array and
+set_${NAME}_array, which read or write every timestep at once with NumPy arrays
+instead of one proto access per timestep. For feature lists of lists, the
+getter returns the values padded to the longest list along with the list
+lengths, and the setter accepts the same (array, lengths) tuple.
+  boxes, num_boxes = get_bbox_array(example)  # Shape (T, N, 4) and (T,).
+  set_predicted_bbox_array((boxes, num_boxes), example)
+
 As described in media_sequence_util.h, each of these functions can take an
 additional string prefix argument as their first argument. The prefix can
 be fixed with a new NAME by using functools.partial. Prefixes are used to
@@ -434,6 +442,23 @@ def _create_region_with_prefix(name, prefix):
       add_bbox_xmin(values[:, 1], sequence_example, prefix=prefix)
       add_bbox_ymax(values[:, 2], sequence_example, prefix=prefix)
       add_bbox_xmax(values[:, 3], sequence_example, prefix=prefix)
+  def get_prefixed_bbox_array(sequence_example, prefix):
+    ymin, num_boxes = get_bbox_ymin_array(sequence_example, prefix=prefix)
+    xmin, _ = get_bbox_xmin_array(sequence_example, prefix=prefix)
+    ymax, _ = get_bbox_ymax_array(sequence_example, prefix=prefix)
+    xmax, _ = get_bbox_xmax_array(sequence_example, prefix=prefix)
+    return np.stack((ymin, xmin, ymax, xmax), -1), num_boxes
+  def set_prefixed_bbox_array(values, sequence_example, prefix):
+    num_boxes = None
+    if isinstance(values, tuple):
+      values, num_boxes = values
+    values = np.asarray(values, dtype=np.float32)
+    if values.size == 0:
+      values = np.zeros((len(values), 0, 4), dtype=np.float32)
+    for i, set_array in enumerate((set_bbox_ymin_array, set_bbox_xmin_array,
+                                   set_bbox_ymax_array, set_bbox_xmax_array)):
+      set_array((values[:, :, i], num_boxes) if num_boxes is not None else
+                values[:, :, i], sequence_example, prefix=prefix)
   def get_prefixed_bbox_size(sequence_example, prefix):
     return get_bbox_ymin_size(sequence_example, prefix=prefix)
   def has_prefixed_bbox(sequence_example, prefix):
@@ -488,6 +513,10 @@ def _create_region_with_prefix(name, prefix):
           msu.function_with_default(has_prefixed_bbox, prefix),
       "clear_" + name:
           msu.function_with_default(clear_prefixed_bbox, prefix),
+      "get_" + name + "_array":
+          msu.function_with_default(get_prefixed_bbox_array, prefix),
+      "set_" + name + "_array":
+          msu.function_with_default(set_prefixed_bbox_array, prefix),
   }, module_dict=globals())
   msu.add_functions_to_module({
       "get_" + name + "_point_at":
@@ -0,0 +1,210 @@
+"""Copyright 2023 The MediaPipe Authors.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Streaming construction of fixed-duration clip SequenceExamples.
+
+Building one SequenceExample for a long video holds every frame and feature in
+memory until it is serialized. ClipWriter instead splits the media into clips
+of a fixed duration and writes each clip to TFRecord shards as soon as data for
+a later clip arrives, so only one clip is held in memory at a time.
+
+Every clip gets the context of a template SequenceExample, with:
+  clip/start/timestamp and clip/end/timestamp set to the clip window.
+  example/id suffixed with the clip number, if present.
+  segment/* labels restricted and clamped to the segments overlapping the
+    window. segment/start/index and segment/end/index are removed since they
+    index the frames of the whole media.
+  clip/label/* labels restricted and clamped the same way if they have
+    clip/label/start/timestamp and clip/label/end/timestamp.
+
+Data is added with the media_sequence functions to the example returned by
+example_at() for its timestamp. Timestamps stay relative to the media:
+
+   with ClipWriter(shard_paths, 10 * 1000000, template) as writer:
+     for timestamp, encoded in frames:
+       example = writer.example_at(timestamp)
+       ms.add_image_timestamp(timestamp, example)
+       ms.add_image_encoded(encoded, example)
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import tensorflow.compat.v1 as tf
+
+from mediapipe.util.sequence import media_sequence as ms
+from mediapipe.util.sequence import media_sequence_index
+
+# (start key, end key, keys of values parallel to the timestamps) of the
+# labels that are sliced to each clip.
+_TIMED_LABEL_KEYS = (
+    (ms.SEGMENT_START_TIMESTAMP_KEY, ms.SEGMENT_END_TIMESTAMP_KEY,
+     (ms.SEGMENT_LABEL_INDEX_KEY, ms.SEGMENT_LABEL_STRING_KEY,
+      ms.SEGMENT_LABEL_CONFIDENCE_KEY)),
+    (ms.CLIP_LABEL_START_TIMESTAMP_KEY, ms.CLIP_LABEL_END_TIMESTAMP_KEY,
+     (ms.CLIP_LABEL_INDEX_KEY, ms.CLIP_LABEL_STRING_KEY,
+      ms.CLIP_LABEL_CONFIDENCE_KEY)),
+)
+# Context keys that only apply to the whole media.
+_DROPPED_KEYS = (ms.SEGMENT_START_INDEX_KEY, ms.SEGMENT_END_INDEX_KEY)
+
+
+def _get_values(feature):
+  return getattr(feature, feature.WhichOneof("kind")).value
+
+
+def _slice_timed_labels(context, start, end):
+  """Keeps the timed labels of context overlapping [start, end), in place."""
+  for start_key, end_key, value_keys in _TIMED_LABEL_KEYS:
+    if start_key not in context.feature or end_key not in context.feature:
+      continue
+    starts = list(context.feature[start_key].int64_list.value)
+    ends = list(context.feature[end_key].int64_list.value)
+    kept = [
+        i for i, (label_start, label_end) in enumerate(zip(starts, ends))
+        if label_start < end and label_end >= start
+    ]
+    context.feature[start_key].int64_list.value[:] = [
+        max(starts[i], start) for i in kept
+    ]
+    context.feature[end_key].int64_list.value[:] = [
+        min(ends[i], end) for i in kept
+    ]
+    for key in value_keys:
+      if key in context.feature:
+        values = _get_values(context.feature[key])
+        values[:] = [values[i] for i in kept]
+
+
+class ClipWriter(object):
+  """Writes fixed-duration clips of a media as SequenceExamples.
+
+  Clip k covers [start + k * clip_duration, start + (k + 1) * clip_duration),
+  where start is the clip/start/timestamp of the template or 0. Clips without
+  data are skipped. Clips are written round robin to the shards when data for
+  a later clip is added or the writer is closed, so data must be added in
+  timestamp order across clip boundaries.
+  """
+
+  def __init__(self, shard_paths, clip_duration, template=None,
+               write_index=True):
+    """Opens the shards.
+
+    Args:
+      shard_paths: the paths of the TFRecord shards to write.
+      clip_duration: the duration of each clip in microseconds.
+      template: a SequenceExample with the context to give every clip. Its
+        clip/start/timestamp and clip/end/timestamp, if present, bound the
+        clips.
+      write_index: whether to write a media_sequence_index file per shard.
+    Raises:
+      ValueError: if clip_duration is not positive.
+    """
+    if clip_duration <= 0:
+      raise ValueError("clip_duration must be positive.")
+    self._shard_paths = list(shard_paths)
+    self._clip_duration = clip_duration
+    self._template = template or tf.train.SequenceExample()
+    self._start = (
+        ms.get_clip_start_timestamp(self._template)
+        if ms.has_clip_start_timestamp(self._template) else 0)
+    self._end = (
+        ms.get_clip_end_timestamp(self._template)
+        if ms.has_clip_end_timestamp(self._template) else None)
+    self._write_index = write_index
+    self._writers = [tf.io.TFRecordWriter(path) for path in self._shard_paths]
+    self._offsets = [0] * len(self._shard_paths)
+    if write_index:
+      for path in self._shard_paths:
+        with open(media_sequence_index.get_index_path(path), "w"):
+          pass
+    self._example = None
+    self._clip_index = None
+    self.num_written = 0
+
+  def _new_example(self, clip_index):
+    """Returns an example with the template context for a clip."""
+    start = self._start + clip_index * self._clip_duration
+    end = start + self._clip_duration
+    if self._end is not None:
+      end = min(end, self._end)
+    example = tf.train.SequenceExample()
+    example.context.CopyFrom(self._template.context)
+    for key in _DROPPED_KEYS:
+      if key in example.context.feature:
+        del example.context.feature[key]
+    _slice_timed_labels(example.context, start, end)
+    ms.set_clip_start_timestamp(start, example)
+    ms.set_clip_end_timestamp(end, example)
+    if ms.has_example_id(example):
+      ms.set_example_id(
+          b"%s_%d" % (ms.get_example_id(example), clip_index), example)
+    return example
+
+  def example_at(self, timestamp):
+    """Returns the example of the clip holding timestamp.
+
+    The previous clip is written if timestamp is in a later clip.
+
+    Args:
+      timestamp: a timestamp in microseconds in the media.
+
+    Returns:
+      The tf.train.SequenceExample to add the data at timestamp to.
+    Raises:
+      ValueError: if timestamp is outside the template clip or in a clip that
+        was already written.
+    """
+    if timestamp < self._start or (self._end is not None and
+                                   timestamp >= self._end):
+      raise ValueError("Timestamp %d is outside of the media." % timestamp)
+    clip_index = (timestamp - self._start) // self._clip_duration
+    if clip_index != self._clip_index:
+      if self._clip_index is not None and clip_index < self._clip_index:
+        raise ValueError("Timestamp %d is in a clip that was already written."
+                         % timestamp)
+      self._flush()
+      self._example = self._new_example(clip_index)
+      self._clip_index = clip_index
+    return self._example
+
+  def _flush(self):
+    """Writes the current clip, if any."""
+    if self._example is None:
+      return
+    record = self._example.SerializeToString()
+    shard_index = self.num_written % len(self._shard_paths)
+    self._writers[shard_index].write(record)
+    if self._write_index:
+      media_sequence_index.append_index_entries(
+          media_sequence_index.get_index_path(self._shard_paths[shard_index]),
+          [media_sequence_index.make_index_entry(record,
+                                                 self._offsets[shard_index])])
+      self._offsets[shard_index] += media_sequence_index.get_record_size(
+          record)
+    self._example = None
+    self.num_written += 1
+
+  def close(self):
+    """Writes the last clip and closes the shards."""
+    self._flush()
+    for writer in self._writers:
+      writer.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *args):
+    self.close()
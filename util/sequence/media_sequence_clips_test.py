@@ -0,0 +1,140 @@
+"""Copyright 2023 The MediaPipe Authors.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Tests for media_sequence_clips.py.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+
+import tensorflow.compat.v1 as tf
+
+from mediapipe.util.sequence import media_sequence as ms
+from mediapipe.util.sequence import media_sequence_clips
+from mediapipe.util.sequence import media_sequence_index
+
+
+class MediaSequenceClipsTest(tf.test.TestCase):
+
+  def _create_template(self):
+    template = tf.train.SequenceExample()
+    ms.set_example_id(b"video", template)
+    ms.set_clip_media_id(b"media", template)
+    ms.set_clip_start_timestamp(1000, template)
+    ms.set_clip_end_timestamp(3500, template)
+    ms.set_segment_start_timestamp((1000, 1500, 2900), template)
+    ms.set_segment_end_timestamp((1200, 2500, 3400), template)
+    ms.set_segment_start_index((0, 5, 19), template)
+    ms.set_segment_end_index((2, 15, 24), template)
+    ms.set_segment_label_index((1, 2, 3), template)
+    ms.set_segment_label_string((b"a", b"b", b"c"), template)
+    ms.set_clip_label_index((7,), template)
+    return template
+
+  def _read(self, shard_paths):
+    return [
+        tf.train.SequenceExample.FromString(record)
+        for path in shard_paths
+        for record in tf.io.tf_record_iterator(path)
+    ]
+
+  def test_write_clips(self):
+    shard_paths = [os.path.join(self.get_temp_dir(), "clips")]
+    with media_sequence_clips.ClipWriter(
+        shard_paths, 1000, self._create_template()) as writer:
+      for timestamp in range(1000, 3500, 100):
+        example = writer.example_at(timestamp)
+        ms.add_image_timestamp(timestamp, example)
+        ms.add_image_encoded(b"frame", example)
+    self.assertEqual(3, writer.num_written)
+    clips = self._read(shard_paths)
+    self.assertEqual([b"video_0", b"video_1", b"video_2"],
+                     [ms.get_example_id(clip) for clip in clips])
+    self.assertEqual([b"media"] * 3,
+                     [ms.get_clip_media_id(clip) for clip in clips])
+    self.assertEqual([(1000, 2000), (2000, 3000), (3000, 3500)],
+                     [(ms.get_clip_start_timestamp(clip),
+                       ms.get_clip_end_timestamp(clip)) for clip in clips])
+    self.assertEqual([10, 10, 5],
+                     [ms.get_image_timestamp_size(clip) for clip in clips])
+    self.assertEqual(2000, ms.get_image_timestamp_at(0, clips[1]))
+    # Segments are restricted and clamped to each clip.
+    self.assertEqual([1000, 1500],
+                     list(ms.get_segment_start_timestamp(clips[0])))
+    self.assertEqual([1200, 2000],
+                     list(ms.get_segment_end_timestamp(clips[0])))
+    self.assertEqual([b"a", b"b"], ms.get_segment_label_string(clips[0]))
+    self.assertEqual([2, 3], list(ms.get_segment_label_index(clips[1])))
+    self.assertEqual([2000, 2900],
+                     list(ms.get_segment_start_timestamp(clips[1])))
+    self.assertEqual([3], list(ms.get_segment_label_index(clips[2])))
+    self.assertFalse(ms.has_segment_start_index(clips[0]))
+    self.assertEqual([7], list(ms.get_clip_label_index(clips[2])))
+
+  def test_timed_clip_labels_are_sliced(self):
+    template = tf.train.SequenceExample()
+    ms.set_clip_label_index((1, 2), template)
+    ms.set_clip_label_confidence((0.5, 1.0), template)
+    ms.set_clip_label_start_timestamp((0, 1500), template)
+    ms.set_clip_label_end_timestamp((500, 1800), template)
+    shard_paths = [os.path.join(self.get_temp_dir(), "clips")]
+    with media_sequence_clips.ClipWriter(shard_paths, 1000,
+                                         template) as writer:
+      writer.example_at(0)
+      writer.example_at(1999)
+    clips = self._read(shard_paths)
+    self.assertEqual([1], list(ms.get_clip_label_index(clips[0])))
+    self.assertEqual([2], list(ms.get_clip_label_index(clips[1])))
+    self.assertAllClose([1.0], ms.get_clip_label_confidence(clips[1]))
+    self.assertEqual([1500], list(ms.get_clip_label_start_timestamp(clips[1])))
+
+  def test_empty_clips_are_skipped_and_shards_indexed(self):
+    shard_paths = [
+        os.path.join(self.get_temp_dir(), "clips-%d" % i) for i in range(2)
+    ]
+    with media_sequence_clips.ClipWriter(
+        shard_paths, 1000, self._create_template()) as writer:
+      ms.add_image_encoded(b"0", writer.example_at(1000))
+      ms.add_image_encoded(b"2", writer.example_at(3000))
+    clips = self._read(shard_paths)
+    self.assertEqual([b"video_0", b"video_2"],
+                     [ms.get_example_id(clip) for clip in clips])
+    with media_sequence_index.IndexedRecordReader(shard_paths) as reader:
+      self.assertEqual(
+          3000,
+          ms.get_clip_start_timestamp(
+              tf.train.SequenceExample.FromString(reader.lookup("video_2"))))
+
+  def test_out_of_order_timestamps_raise(self):
+    shard_paths = [os.path.join(self.get_temp_dir(), "clips")]
+    with media_sequence_clips.ClipWriter(
+        shard_paths, 1000, self._create_template()) as writer:
+      writer.example_at(2500)
+      # Earlier data in the current clip is accepted.
+      writer.example_at(2000)
+      with self.assertRaisesRegex(ValueError, "already written"):
+        writer.example_at(1999)
+      with self.assertRaisesRegex(ValueError, "outside"):
+        writer.example_at(3500)
+
+  def test_invalid_duration_raises(self):
+    with self.assertRaises(ValueError):
+      media_sequence_clips.ClipWriter(["unused"], 0)
+
+
+if __name__ == "__main__":
+  tf.test.main()
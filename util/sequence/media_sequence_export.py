@@ -0,0 +1,426 @@
+"""Copyright 2023 The MediaPipe Authors.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Columnar export of MediaSequence annotations.
+
+Queries over the annotations of many SequenceExamples otherwise parse every
+example with the media_sequence getters. export_annotations() decodes the
+annotation keys of MediaSequence TFRecord shards in parallel, with
+media_sequence_lite, and writes them as tables with one column per key:
+
+  clips: one row per example with its example, clip and clip label keys and
+    its image timestamps.
+  segments: one row per segment with the segment keys.
+  regions: one row per region in each frame with the region keys, for each
+    region prefix.
+  features: one row per timestep with feature/timestamp and feature/floats,
+    for each feature prefix.
+
+Columns are named after the media_sequence keys, with the prefix in a separate
+"prefix" column. Keys missing from an example are null. List values such as
+clip labels are stored as contiguous values and offsets. Each shard is written
+as a part of every table:
+
+  output_dir/clips/part-00000.parquet
+  output_dir/segments/part-00000.parquet
+  ...
+
+Parquet files are written with pyarrow. If pyarrow is not installed, each part
+is saved with NumPy as a .npz file holding "<column>.values", "<column>.valid"
+and, for list columns, "<column>.offsets" arrays in the same layout.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+from concurrent import futures
+import os
+
+import numpy as np
+
+from mediapipe.util.sequence import media_sequence as ms
+from mediapipe.util.sequence import media_sequence_lite as msl
+from mediapipe.util.sequence import media_sequence_util as msu
+
+try:
+  # pyarrow is optional and only used to write Parquet files.
+  import pyarrow as pa
+  import pyarrow.parquet as pq
+except ImportError:
+  pa = None
+  pq = None
+
+CLIPS = "clips"
+SEGMENTS = "segments"
+REGIONS = "regions"
+FEATURES = "features"
+PREFIX_COLUMN = "prefix"
+FRAME_INDEX_COLUMN = "frame_index"
+
+_INT64 = "int64"
+_FLOAT = "float32"
+_STRING = "string"
+_DTYPES = {_INT64: np.int64, _FLOAT: np.float32, _STRING: object}
+
+# (key, type, whether each row holds a list) of the columns of each table.
+_CLIP_COLUMNS = (
+    (ms.EXAMPLE_ID_KEY, _STRING, False),
+    (ms.EXAMPLE_DATASET_NAME_KEY, _STRING, False),
+    (ms.CLIP_MEDIA_ID_KEY, _STRING, False),
+    (ms.CLIP_DATA_PATH_KEY, _STRING, False),
+    (ms.CLIP_START_TIMESTAMP_KEY, _INT64, False),
+    (ms.CLIP_END_TIMESTAMP_KEY, _INT64, False),
+    (ms.CLIP_LABEL_INDEX_KEY, _INT64, True),
+    (ms.CLIP_LABEL_STRING_KEY, _STRING, True),
+    (ms.CLIP_LABEL_CONFIDENCE_KEY, _FLOAT, True),
+    (ms.IMAGE_FRAME_RATE_KEY, _FLOAT, False),
+)
+_CLIP_FEATURE_LIST_COLUMNS = ((ms.IMAGE_TIMESTAMP_KEY, _INT64, True),)
+_SEGMENT_COLUMNS = (
+    (ms.SEGMENT_START_TIMESTAMP_KEY, _INT64, False),
+    (ms.SEGMENT_END_TIMESTAMP_KEY, _INT64, False),
+    (ms.SEGMENT_START_INDEX_KEY, _INT64, False),
+    (ms.SEGMENT_END_INDEX_KEY, _INT64, False),
+    (ms.SEGMENT_LABEL_INDEX_KEY, _INT64, False),
+    (ms.SEGMENT_LABEL_STRING_KEY, _STRING, False),
+    (ms.SEGMENT_LABEL_CONFIDENCE_KEY, _FLOAT, False),
+)
+_REGION_COLUMNS = (
+    (ms.REGION_BBOX_YMIN_KEY, _FLOAT, False),
+    (ms.REGION_BBOX_XMIN_KEY, _FLOAT, False),
+    (ms.REGION_BBOX_YMAX_KEY, _FLOAT, False),
+    (ms.REGION_BBOX_XMAX_KEY, _FLOAT, False),
+    (ms.REGION_LABEL_INDEX_KEY, _INT64, False),
+    (ms.REGION_LABEL_STRING_KEY, _STRING, False),
+    (ms.REGION_LABEL_CONFIDENCE_KEY, _FLOAT, False),
+    (ms.REGION_CLASS_INDEX_KEY, _INT64, False),
+    (ms.REGION_CLASS_STRING_KEY, _STRING, False),
+    (ms.REGION_CLASS_CONFIDENCE_KEY, _FLOAT, False),
+    (ms.REGION_TRACK_INDEX_KEY, _INT64, False),
+    (ms.REGION_TRACK_STRING_KEY, _STRING, False),
+    (ms.REGION_TRACK_CONFIDENCE_KEY, _FLOAT, False),
+    (ms.REGION_IS_OCCLUDED_KEY, _INT64, False),
+)
+_FEATURE_COLUMNS = (
+    (ms.FEATURE_TIMESTAMP_KEY, _INT64, False),
+    (ms.FEATURE_FLOATS_KEY, _FLOAT, True),
+)
+
+
+def _to_array(values, kind):
+  """Converts decoded values to an array of the column type."""
+  if kind == _STRING:
+    array = np.empty(len(values), dtype=object)
+    array[:] = [value.decode("utf-8", "replace") for value in values]
+    return array
+  return np.asarray(values, dtype=_DTYPES[kind])
+
+
+class _Column(object):
+  """Accumulates the values of a column, in chunks of rows."""
+
+  def __init__(self, kind, is_list):
+    self.kind = kind
+    self.is_list = is_list
+    self._values = []
+    self._lengths = []
+    self._valid = []
+
+  def append(self, values, num_rows, lengths=None):
+    """Appends num_rows rows.
+
+    Args:
+      values: an array with one value per row, or the concatenated values of
+        all rows for a list column. None appends null rows.
+      num_rows: the number of rows.
+      lengths: for a list column, the number of values in each row.
+    """
+    if values is None:
+      if self.is_list:
+        self._values.append(_to_array([], self.kind))
+      elif self.kind == _STRING:
+        self._values.append(np.full(num_rows, "", dtype=object))
+      else:
+        self._values.append(np.zeros(num_rows, dtype=_DTYPES[self.kind]))
+      self._lengths.append(np.zeros(num_rows, dtype=np.int64))
+      self._valid.append(np.zeros(num_rows, dtype=bool))
+      return
+    self._values.append(values)
+    self._lengths.append(
+        np.asarray(lengths, dtype=np.int64) if self.is_list else
+        np.ones(num_rows, dtype=np.int64))
+    self._valid.append(np.ones(num_rows, dtype=bool))
+
+  def finish(self):
+    """Returns the (values, offsets or None, valid) arrays of the column."""
+    values = (np.concatenate(self._values) if self._values else
+              _to_array([], self.kind))
+    valid = (np.concatenate(self._valid) if self._valid else
+             np.zeros(0, dtype=bool))
+    if not self.is_list:
+      return values, None, valid
+    offsets = np.zeros(len(valid) + 1, dtype=np.int64)
+    if self._lengths:
+      np.cumsum(np.concatenate(self._lengths), out=offsets[1:])
+    return values, offsets, valid
+
+
+class _Table(object):
+  """Accumulates the rows of a table."""
+
+  def __init__(self, columns):
+    self.num_rows = 0
+    self.columns = {}
+    for key, kind, is_list in columns:
+      self.columns[key] = _Column(kind, is_list)
+
+  def append(self, num_rows, values):
+    """Appends rows from a dict of column values; other columns are null."""
+    for key, column in self.columns.items():
+      if key in values:
+        column.append(*values[key])
+      else:
+        column.append(None, num_rows)
+    self.num_rows += num_rows
+
+
+def _scalar(values, kind):
+  """Returns the first of the decoded values of a context key, or None."""
+  if values is None or not len(values):
+    return None
+  return (_to_array(values[:1], kind), 1)
+
+
+def _add_clip(context, feature_lists, clips):
+  values = {}
+  for key, kind, is_list in _CLIP_COLUMNS:
+    if key not in context:
+      continue
+    if is_list:
+      values[key] = (_to_array(context[key], kind), 1, [len(context[key])])
+    elif len(context[key]):
+      values[key] = _scalar(context[key], kind)
+  for key, kind, _ in _CLIP_FEATURE_LIST_COLUMNS:
+    if key in feature_lists:
+      flat = _concatenate(feature_lists[key], kind)
+      values[key] = (flat, 1, [len(flat)])
+  clips.append(1, values)
+
+
+def _concatenate(values_per_row, kind):
+  if kind == _STRING:
+    return _to_array([value for row in values_per_row for value in row], kind)
+  if not values_per_row:
+    return np.zeros(0, dtype=_DTYPES[kind])
+  return np.concatenate(values_per_row).astype(_DTYPES[kind], copy=False)
+
+
+def _add_segments(example_id, context, segments):
+  num_segments = max(
+      [len(context[key]) for key, _, _ in _SEGMENT_COLUMNS if key in context] +
+      [0])
+  if not num_segments:
+    return
+  values = {}
+  for key, kind, _ in _SEGMENT_COLUMNS:
+    if key in context and len(context[key]) == num_segments:
+      values[key] = (_to_array(context[key], kind), num_segments)
+  if example_id is not None:
+    values[ms.EXAMPLE_ID_KEY] = (np.repeat(example_id[0], num_segments),
+                                 num_segments)
+  segments.append(num_segments, values)
+
+
+def _add_regions(example_id, prefix, feature_lists, regions):
+  """Appends one row per region of each frame of a region prefix."""
+  keys = {
+      key: msu.merge_prefix(prefix, key)
+      for key, _, _ in _REGION_COLUMNS + ((ms.REGION_TIMESTAMP_KEY, None,
+                                           None),)
+  }
+  counts = None
+  for key, _, _ in _REGION_COLUMNS:
+    if keys[key] in feature_lists:
+      counts = np.array([len(row) for row in feature_lists[keys[key]]],
+                        dtype=np.int64)
+      break
+  if counts is None or not counts.sum():
+    return
+  num_rows = int(counts.sum())
+  values = {
+      PREFIX_COLUMN: (_to_array([prefix.encode()] * num_rows, _STRING),
+                      num_rows),
+      FRAME_INDEX_COLUMN: (np.repeat(np.arange(len(counts)), counts),
+                           num_rows),
+  }
+  if example_id is not None:
+    values[ms.EXAMPLE_ID_KEY] = (np.repeat(example_id[0], num_rows), num_rows)
+  timestamps = feature_lists.get(keys[ms.REGION_TIMESTAMP_KEY])
+  if timestamps is not None and len(timestamps) == len(counts):
+    values[ms.REGION_TIMESTAMP_KEY] = (
+        np.repeat(_concatenate(timestamps, _INT64), counts), num_rows)
+  for key, kind, _ in _REGION_COLUMNS:
+    rows = feature_lists.get(keys[key])
+    if rows is not None and [len(row) for row in rows] == list(counts):
+      values[key] = (_concatenate(rows, kind), num_rows)
+  regions.append(num_rows, values)
+
+
+def _add_features(example_id, prefix, feature_lists, features):
+  """Appends one row per timestep of the features of a prefix."""
+  floats = feature_lists.get(msu.merge_prefix(prefix, ms.FEATURE_FLOATS_KEY))
+  timestamps = feature_lists.get(
+      msu.merge_prefix(prefix, ms.FEATURE_TIMESTAMP_KEY))
+  num_rows = len(floats if floats is not None else timestamps or ())
+  if not num_rows:
+    return
+  values = {
+      PREFIX_COLUMN: (_to_array([prefix.encode()] * num_rows, _STRING),
+                      num_rows),
+      FRAME_INDEX_COLUMN: (np.arange(num_rows), num_rows),
+  }
+  if example_id is not None:
+    values[ms.EXAMPLE_ID_KEY] = (np.repeat(example_id[0], num_rows), num_rows)
+  if timestamps is not None and len(timestamps) == num_rows:
+    values[ms.FEATURE_TIMESTAMP_KEY] = (_concatenate(timestamps, _INT64),
+                                        num_rows)
+  if floats is not None:
+    values[ms.FEATURE_FLOATS_KEY] = (_concatenate(floats, _FLOAT), num_rows,
+                                     [len(row) for row in floats])
+  features.append(num_rows, values)
+
+
+def _create_tables():
+  row_columns = ((ms.EXAMPLE_ID_KEY, _STRING, False),)
+  frame_columns = row_columns + ((PREFIX_COLUMN, _STRING, False),
+                                 (FRAME_INDEX_COLUMN, _INT64, False))
+  return {
+      CLIPS: _Table(_CLIP_COLUMNS + _CLIP_FEATURE_LIST_COLUMNS),
+      SEGMENTS: _Table(row_columns + _SEGMENT_COLUMNS),
+      REGIONS: _Table(frame_columns +
+                      ((ms.REGION_TIMESTAMP_KEY, _INT64, False),) +
+                      _REGION_COLUMNS),
+      FEATURES: _Table(frame_columns + _FEATURE_COLUMNS),
+  }
+
+
+def _write_table(table, path):
+  """Writes a table to path with a .parquet or .npz extension."""
+  if pa is not None:
+    arrays = []
+    for column in table.columns.values():
+      values, offsets, valid = column.finish()
+      value_type = pa.string() if column.kind == _STRING else None
+      if column.is_list:
+        arrays.append(
+            pa.ListArray.from_arrays(
+                pa.array(offsets, type=pa.int32()),
+                pa.array(values, type=value_type),
+                mask=pa.array(~valid)))
+      else:
+        arrays.append(pa.array(values, type=value_type, mask=~valid))
+    pq.write_table(
+        pa.Table.from_arrays(arrays, names=list(table.columns)),
+        path + ".parquet")
+    return path + ".parquet"
+  arrays = {}
+  for key, column in table.columns.items():
+    values, offsets, valid = column.finish()
+    arrays[key + ".values"] = values
+    arrays[key + ".valid"] = valid
+    if offsets is not None:
+      arrays[key + ".offsets"] = offsets
+  np.savez(path + ".npz", **arrays)
+  return path + ".npz"
+
+
+def export_shard(shard_path, output_dir, part_index=0, region_prefixes=("",),
+                 feature_prefixes=()):
+  """Exports the annotations of one TFRecord shard as a part of each table.
+
+  Args:
+    shard_path: the path of the uncompressed TFRecord shard.
+    output_dir: the directory with one subdirectory per table.
+    part_index: the number of the parts written for this shard.
+    region_prefixes: the prefixes of the regions to export.
+    feature_prefixes: the prefixes of the feature/floats to export.
+
+  Returns:
+    A dict with the number of rows written to each table.
+  """
+  context_keys = [key for key, _, _ in _CLIP_COLUMNS + _SEGMENT_COLUMNS]
+  feature_list_keys = [key for key, _, _ in _CLIP_FEATURE_LIST_COLUMNS]
+  for prefix in region_prefixes:
+    feature_list_keys.extend(
+        msu.merge_prefix(prefix, key)
+        for key, _, _ in _REGION_COLUMNS + ((ms.REGION_TIMESTAMP_KEY, None,
+                                             None),))
+  for prefix in feature_prefixes:
+    feature_list_keys.extend(
+        msu.merge_prefix(prefix, key) for key, _, _ in _FEATURE_COLUMNS)
+  tables = _create_tables()
+  for serialized in msl.tf_record_iterator(shard_path):
+    context, feature_lists = msl.parse_sequence_example(
+        serialized, context_keys=context_keys,
+        feature_list_keys=feature_list_keys)
+    example_id = _scalar(context.get(ms.EXAMPLE_ID_KEY), _STRING)
+    example_id = example_id[0] if example_id else None
+    _add_clip(context, feature_lists, tables[CLIPS])
+    _add_segments(example_id, context, tables[SEGMENTS])
+    for prefix in region_prefixes:
+      _add_regions(example_id, prefix, feature_lists, tables[REGIONS])
+    for prefix in feature_prefixes:
+      _add_features(example_id, prefix, feature_lists, tables[FEATURES])
+  num_rows = {}
+  for name, table in tables.items():
+    os.makedirs(os.path.join(output_dir, name), exist_ok=True)
+    _write_table(table,
+                 os.path.join(output_dir, name, "part-%05d" % part_index))
+    num_rows[name] = table.num_rows
+  return num_rows
+
+
+def export_annotations(shard_paths, output_dir, region_prefixes=("",),
+                       feature_prefixes=(), num_workers=None):
+  """Exports the annotations of TFRecord shards to columnar tables.
+
+  Shards are exported concurrently by worker processes, and shard i is
+  written as part i of every table.
+
+  Args:
+    shard_paths: the paths of the uncompressed MediaSequence TFRecord shards.
+    output_dir: the directory to write the tables to.
+    region_prefixes: the prefixes of the regions to export.
+    feature_prefixes: the prefixes of the feature/floats to export.
+    num_workers: the number of shards exported concurrently. Defaults to the
+      number of CPUs.
+
+  Returns:
+    A dict with the total number of rows written to each table.
+  """
+  shard_paths = list(shard_paths)
+  args = [(path, output_dir, i, tuple(region_prefixes),
+           tuple(feature_prefixes)) for i, path in enumerate(shard_paths)]
+  num_workers = num_workers or os.cpu_count() or 1
+  if num_workers == 1:
+    results = [export_shard(*shard_args) for shard_args in args]
+  else:
+    with futures.ProcessPoolExecutor(num_workers) as executor:
+      results = list(executor.map(export_shard, *zip(*args)))
+  totals = {}
+  for result in results:
+    for name, num_rows in result.items():
+      totals[name] = totals.get(name, 0) + num_rows
+  return totals
@@ -0,0 +1,132 @@
+"""Copyright 2023 The MediaPipe Authors.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Tests for media_sequence_export.py.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+from unittest import mock
+
+import numpy as np
+import tensorflow.compat.v1 as tf
+
+from mediapipe.util.sequence import media_sequence as ms
+from mediapipe.util.sequence import media_sequence_export as mse
+
+
+class MediaSequenceExportTest(tf.test.TestCase):
+
+  def _create_example(self):
+    example = tf.train.SequenceExample()
+    ms.set_example_id(b"video", example)
+    ms.set_clip_media_id(b"media", example)
+    ms.set_clip_start_timestamp(0, example)
+    ms.set_clip_label_index((3, 4), example)
+    ms.set_clip_label_string((b"run", b"jump"), example)
+    ms.set_segment_start_timestamp((0, 100), example)
+    ms.set_segment_end_timestamp((50, 200), example)
+    ms.set_segment_label_string((b"a", b"b"), example)
+    ms.add_image_timestamp(0, example)
+    ms.add_image_timestamp(100, example)
+    ms.add_bbox(np.array([[0.1, 0.2, 0.3, 0.4], [0.5, 0.6, 0.7, 0.8]]),
+                example)
+    ms.add_bbox_label_string((b"cat", b"dog"), example)
+    ms.add_bbox_timestamp(0, example)
+    ms.add_bbox(np.zeros((0, 4)), example)
+    ms.add_bbox_label_string((), example)
+    ms.add_bbox_timestamp(100, example)
+    ms.add_bbox(np.array([[0.0, 0.0, 1.0, 1.0]]), example,
+                prefix="PREDICTED")
+    ms.add_feature_floats((1.0, 2.0, 3.0), example, prefix="AUDIO")
+    ms.add_feature_timestamp(0, example, prefix="AUDIO")
+    ms.add_feature_floats((4.0, 5.0, 6.0), example, prefix="AUDIO")
+    ms.add_feature_timestamp(100, example, prefix="AUDIO")
+    return example
+
+  def _write_shards(self):
+    shard_paths = [
+        os.path.join(self.get_temp_dir(), "shard-%d" % i) for i in range(2)
+    ]
+    with tf.io.TFRecordWriter(shard_paths[0]) as writer:
+      writer.write(self._create_example().SerializeToString())
+    # An example without ids or annotations.
+    example = tf.train.SequenceExample()
+    ms.add_image_timestamp(5, example)
+    with tf.io.TFRecordWriter(shard_paths[1]) as writer:
+      writer.write(example.SerializeToString())
+    return shard_paths
+
+  def test_export_parquet(self):
+    if mse.pa is None:
+      self.skipTest("pyarrow is not installed.")
+    output_dir = os.path.join(self.get_temp_dir(), "output")
+    num_rows = mse.export_annotations(
+        self._write_shards(), output_dir,
+        region_prefixes=("", "PREDICTED"), feature_prefixes=("AUDIO",),
+        num_workers=2)
+    self.assertEqual({mse.CLIPS: 2, mse.SEGMENTS: 2, mse.REGIONS: 3,
+                      mse.FEATURES: 2}, num_rows)
+
+    def read(table):
+      return mse.pq.read_table(os.path.join(output_dir, table)).to_pydict()
+
+    clips = read(mse.CLIPS)
+    self.assertEqual(["video", None], clips[ms.EXAMPLE_ID_KEY])
+    self.assertEqual([[3, 4], None], clips[ms.CLIP_LABEL_INDEX_KEY])
+    self.assertEqual([["run", "jump"], None],
+                     clips[ms.CLIP_LABEL_STRING_KEY])
+    self.assertEqual([0, None], clips[ms.CLIP_START_TIMESTAMP_KEY])
+    self.assertEqual([[0, 100], [5]], clips[ms.IMAGE_TIMESTAMP_KEY])
+    segments = read(mse.SEGMENTS)
+    self.assertEqual(["video", "video"], segments[ms.EXAMPLE_ID_KEY])
+    self.assertEqual([50, 200], segments[ms.SEGMENT_END_TIMESTAMP_KEY])
+    self.assertEqual(["a", "b"], segments[ms.SEGMENT_LABEL_STRING_KEY])
+    self.assertEqual([None, None], segments[ms.SEGMENT_LABEL_INDEX_KEY])
+    regions = read(mse.REGIONS)
+    self.assertEqual(["", "", "PREDICTED"], regions[mse.PREFIX_COLUMN])
+    self.assertEqual([0, 0, 0], regions[mse.FRAME_INDEX_COLUMN])
+    self.assertEqual([0, 0, None], regions[ms.REGION_TIMESTAMP_KEY])
+    self.assertAllClose([0.3, 0.7, 1.0], regions[ms.REGION_BBOX_YMAX_KEY])
+    self.assertEqual(["cat", "dog", None],
+                     regions[ms.REGION_LABEL_STRING_KEY])
+    features = read(mse.FEATURES)
+    self.assertEqual([0, 100], features[ms.FEATURE_TIMESTAMP_KEY])
+    self.assertEqual([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]],
+                     features[ms.FEATURE_FLOATS_KEY])
+
+  def test_export_npz_without_pyarrow(self):
+    output_dir = os.path.join(self.get_temp_dir(), "output")
+    with mock.patch.object(mse, "pa", None):
+      mse.export_annotations(self._write_shards(), output_dir, num_workers=1)
+    clips = np.load(os.path.join(output_dir, mse.CLIPS, "part-00000.npz"),
+                    allow_pickle=True)
+    self.assertEqual(["video"], list(clips[ms.EXAMPLE_ID_KEY + ".values"]))
+    self.assertAllEqual([3, 4], clips[ms.CLIP_LABEL_INDEX_KEY + ".values"])
+    self.assertAllEqual([0, 2], clips[ms.CLIP_LABEL_INDEX_KEY + ".offsets"])
+    empty = np.load(os.path.join(output_dir, mse.CLIPS, "part-00001.npz"),
+                    allow_pickle=True)
+    self.assertAllEqual([False], empty[ms.EXAMPLE_ID_KEY + ".valid"])
+    regions = np.load(
+        os.path.join(output_dir, mse.REGIONS, "part-00000.npz"),
+        allow_pickle=True)
+    self.assertAllClose([0.1, 0.5], regions[ms.REGION_BBOX_YMIN_KEY +
+                                            ".values"])
+
+
+if __name__ == "__main__":
+  tf.test.main()
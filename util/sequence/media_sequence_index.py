@@ -0,0 +1,268 @@
+"""Copyright 2023 The MediaPipe Authors.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Random access to MediaSequence TFRecord shards through sidecar indices.
+
+A TFRecord file can only be read sequentially, so fetching record i means
+scanning every record before it. Each shard can instead have an index file
+next to it, at the shard path with an ".index" suffix, that holds one JSON line
+per record with its byte offset and length and its example/id and
+clip/media_id when present. IndexedRecordReader loads the indices of a set of
+shards and reads any record with a single positioned read, by its position or
+by either key.
+
+   reader = IndexedRecordReader(shard_paths)
+   serialized = reader[1234]
+   serialized = reader.lookup(b"video_id")
+
+Indices are written by the media_sequence data set generators. write_index()
+creates the index of an existing shard. Only uncompressed TFRecord files are
+supported, and record checksums are not verified.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import bisect
+import json
+import os
+import struct
+import threading
+
+from mediapipe.util.sequence import media_sequence as ms
+from mediapipe.util.sequence import media_sequence_lite as msl
+
+INDEX_SUFFIX = ".index"
+INDEXED_KEYS = (ms.EXAMPLE_ID_KEY, ms.CLIP_MEDIA_ID_KEY)
+# A TFRecord is framed by an 8 byte length, a 4 byte length checksum, and a 4
+# byte data checksum.
+_RECORD_HEADER_SIZE = 12
+_RECORD_OVERHEAD = 16
+
+
+def get_index_path(shard_path):
+  return shard_path + INDEX_SUFFIX
+
+
+def _to_key(value):
+  return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+def make_index_entry(serialized, offset):
+  """Returns the index entry of a record.
+
+  Args:
+    serialized: the serialized SequenceExample stored in the record.
+    offset: the byte offset of the record in its shard.
+
+  Returns:
+    A dict with the offset and length of the record and the values of the
+    INDEXED_KEYS that are present.
+  """
+  context, _ = msl.parse_sequence_example(
+      serialized, context_keys=INDEXED_KEYS, feature_list_keys=())
+  entry = {"offset": offset, "length": len(serialized)}
+  for key in INDEXED_KEYS:
+    if len(context.get(key, ())):
+      entry[key] = _to_key(context[key][0])
+  return entry
+
+
+def get_record_size(serialized):
+  """Returns the number of bytes a record takes in a TFRecord file."""
+  return len(serialized) + _RECORD_OVERHEAD
+
+
+def append_index_entries(index_path, entries):
+  """Appends index entries, one JSON line each, to an index file."""
+  with open(index_path, "a") as f:
+    for entry in entries:
+      f.write(json.dumps(entry, sort_keys=True) + "\n")
+
+
+def read_index(index_path):
+  """Returns the list of entries in an index file."""
+  with open(index_path, "r") as f:
+    return [json.loads(line) for line in f if line.strip()]
+
+
+def write_index(shard_path):
+  """Scans a TFRecord shard and writes its index.
+
+  Args:
+    shard_path: the path of the TFRecord shard.
+
+  Returns:
+    The path of the index file.
+  """
+  index_path = get_index_path(shard_path)
+  temp_path = index_path + ".tmp"
+  offset = 0
+  with open(temp_path, "w") as f:
+    for serialized in msl.tf_record_iterator(shard_path):
+      f.write(json.dumps(make_index_entry(serialized, offset),
+                         sort_keys=True) + "\n")
+      offset += get_record_size(serialized)
+  os.replace(temp_path, index_path)
+  return index_path
+
+
+def truncate_index(shard_path, num_records):
+  """Keeps the first num_records entries of the index of a shard.
+
+  The index is rebuilt from the shard if it has fewer entries.
+
+  Args:
+    shard_path: the path of the TFRecord shard.
+    num_records: the number of records in the shard.
+  """
+  index_path = get_index_path(shard_path)
+  entries = read_index(index_path) if os.path.exists(index_path) else []
+  if len(entries) < num_records:
+    write_index(shard_path)
+    return
+  temp_path = index_path + ".tmp"
+  if os.path.exists(temp_path):
+    os.remove(temp_path)
+  append_index_entries(temp_path, entries[:num_records])
+  os.replace(temp_path, index_path)
+
+
+class IndexedRecordReader(object):
+  """Reads records of indexed TFRecord shards by position or by key.
+
+  Records are numbered shard by shard in the order of shard_paths. The reader
+  is safe to use from several threads.
+  """
+
+  def __init__(self, shard_paths, build_missing=False):
+    """Loads the indices of the shards.
+
+    Args:
+      shard_paths: the paths of the TFRecord shards.
+      build_missing: if true, shards without an index are scanned and indexed.
+        Otherwise, a missing index raises an IOError.
+    Raises:
+      IOError: if an index is missing and build_missing is false.
+    """
+    self._shard_paths = list(shard_paths)
+    self._entries = []
+    self._starts = []
+    self._keys = {key: {} for key in INDEXED_KEYS}
+    self._num_records = 0
+    for shard_index, shard_path in enumerate(self._shard_paths):
+      index_path = get_index_path(shard_path)
+      if not os.path.exists(index_path):
+        if not build_missing:
+          raise IOError("%s has no index at %s." % (shard_path, index_path))
+        write_index(shard_path)
+      entries = read_index(index_path)
+      self._starts.append(self._num_records)
+      self._num_records += len(entries)
+      for record_index, entry in enumerate(entries):
+        for key in INDEXED_KEYS:
+          if key in entry:
+            self._keys[key].setdefault(entry[key], (shard_index, record_index))
+      self._entries.append(entries)
+    self._files = [None] * len(self._shard_paths)
+    self._lock = threading.Lock()
+
+  def __len__(self):
+    return self._num_records
+
+  def __getitem__(self, index):
+    """Returns the serialized record at a position across all shards."""
+    if index < 0:
+      index += self._num_records
+    if not 0 <= index < self._num_records:
+      raise IndexError("Record %d is out of range." % index)
+    # Empty shards share their start with the next shard, so the last shard
+    # starting at or before index holds it.
+    shard_index = bisect.bisect_right(self._starts, index) - 1
+    return self.read(shard_index, index - self._starts[shard_index])
+
+  def _get_file(self, shard_index):
+    with self._lock:
+      if self._files[shard_index] is None:
+        self._files[shard_index] = open(self._shard_paths[shard_index], "rb")
+      return self._files[shard_index]
+
+  def read(self, shard, record_index):
+    """Returns the serialized record at an index within one shard.
+
+    Args:
+      shard: the position of the shard in shard_paths, or its path.
+      record_index: the index of the record in the shard.
+
+    Returns:
+      The bytes of the record.
+    Raises:
+      IOError: if the shard does not match its index.
+    """
+    shard_index = (
+        self._shard_paths.index(shard) if isinstance(shard, str) else shard)
+    entry = self._entries[shard_index][record_index]
+    f = self._get_file(shard_index)
+    data = os.pread(f.fileno(), _RECORD_HEADER_SIZE + entry["length"],
+                    entry["offset"])
+    if (len(data) != _RECORD_HEADER_SIZE + entry["length"] or
+        struct.unpack("<Q", data[:8])[0] != entry["length"]):
+      raise IOError("The index of %s does not match the shard." %
+                    self._shard_paths[shard_index])
+    return data[_RECORD_HEADER_SIZE:]
+
+  def find(self, key_value, key=None):
+    """Returns the (shard index, record index) of a key, or None.
+
+    Args:
+      key_value: the example/id or clip/media_id to look up, as str or bytes.
+      key: one of INDEXED_KEYS to look up. Defaults to trying each in order.
+    """
+    key_value = _to_key(key_value)
+    for indexed_key in (key,) if key else INDEXED_KEYS:
+      position = self._keys[indexed_key].get(key_value)
+      if position is not None:
+        return position
+    return None
+
+  def lookup(self, key_value, key=None):
+    """Returns the serialized record with an example/id or clip/media_id.
+
+    If several records share a key, the first is returned.
+
+    Args:
+      key_value: the value to look up, as str or bytes.
+      key: one of INDEXED_KEYS to look up. Defaults to trying each in order.
+
+    Raises:
+      KeyError: if no record has the key.
+    """
+    position = self.find(key_value, key)
+    if position is None:
+      raise KeyError(key_value)
+    return self.read(*position)
+
+  def close(self):
+    with self._lock:
+      for f in self._files:
+        if f is not None:
+          f.close()
+      self._files = [None] * len(self._shard_paths)
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *args):
+    self.close()
@@ -0,0 +1,132 @@
+"""Copyright 2023 The MediaPipe Authors.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Tests for media_sequence_index.py.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+
+import tensorflow.compat.v1 as tf
+
+from mediapipe.util.sequence import media_sequence as ms
+from mediapipe.util.sequence import media_sequence_index as msi
+
+
+class MediaSequenceIndexTest(tf.test.TestCase):
+
+  def _create_example(self, i):
+    example = tf.train.SequenceExample()
+    ms.set_example_id(b"example_%d" % i, example)
+    if i % 2 == 0:
+      ms.set_clip_media_id(b"media_%d" % i, example)
+    for _ in range(i):
+      ms.add_image_encoded(b"image" * i, example)
+    return example.SerializeToString()
+
+  def _write_shards(self, num_shards, num_examples):
+    shard_paths = [
+        os.path.join(self.get_temp_dir(), "shard-%d-of-%d" % (i, num_shards))
+        for i in range(num_shards)
+    ]
+    writers = [tf.io.TFRecordWriter(path) for path in shard_paths]
+    records = [self._create_example(i) for i in range(num_examples)]
+    for i, record in enumerate(records):
+      writers[i % num_shards].write(record)
+    for writer in writers:
+      writer.close()
+    return shard_paths, records
+
+  def test_write_index(self):
+    shard_paths, records = self._write_shards(1, 3)
+    index_path = msi.write_index(shard_paths[0])
+    self.assertEqual(shard_paths[0] + msi.INDEX_SUFFIX, index_path)
+    entries = msi.read_index(index_path)
+    self.assertEqual([0, msi.get_record_size(records[0]),
+                      msi.get_record_size(records[0]) +
+                      msi.get_record_size(records[1])],
+                     [entry["offset"] for entry in entries])
+    self.assertEqual({
+        "offset": 0,
+        "length": len(records[0]),
+        ms.EXAMPLE_ID_KEY: "example_0",
+        ms.CLIP_MEDIA_ID_KEY: "media_0",
+    }, entries[0])
+    self.assertNotIn(ms.CLIP_MEDIA_ID_KEY, entries[1])
+
+  def test_random_access(self):
+    shard_paths, records = self._write_shards(3, 7)
+    for path in shard_paths:
+      msi.write_index(path)
+    with msi.IndexedRecordReader(shard_paths) as reader:
+      self.assertLen(reader, 7)
+      # Records are numbered shard by shard.
+      self.assertEqual(records[0], reader[0])
+      self.assertEqual(records[3], reader[1])
+      self.assertEqual(records[1], reader[3])
+      self.assertEqual(records[5], reader[-1])
+      self.assertEqual(records[4], reader.read(1, 1))
+      self.assertEqual(records[4], reader.read(shard_paths[1], 1))
+      with self.assertRaises(IndexError):
+        reader[7]  # pylint: disable=pointless-statement
+
+  def test_lookup_by_key(self):
+    shard_paths, records = self._write_shards(2, 5)
+    with msi.IndexedRecordReader(shard_paths, build_missing=True) as reader:
+      self.assertEqual(records[3], reader.lookup(b"example_3"))
+      self.assertEqual(records[4], reader.lookup("media_4"))
+      self.assertEqual((0, 2),
+                       reader.find("media_4", key=ms.CLIP_MEDIA_ID_KEY))
+      self.assertIsNone(reader.find("media_4", key=ms.EXAMPLE_ID_KEY))
+      with self.assertRaises(KeyError):
+        reader.lookup("missing")
+
+  def test_empty_shards(self):
+    shard_paths, records = self._write_shards(4, 2)
+    with msi.IndexedRecordReader(shard_paths, build_missing=True) as reader:
+      self.assertLen(reader, 2)
+      self.assertEqual(records, [reader[0], reader[1]])
+    with msi.IndexedRecordReader(shard_paths[1:3]) as reader:
+      self.assertEqual([records[1]], [reader[0]])
+
+  def test_missing_index_raises(self):
+    shard_paths, _ = self._write_shards(1, 1)
+    with self.assertRaisesRegex(IOError, "no index"):
+      msi.IndexedRecordReader(shard_paths)
+
+  def test_stale_index_raises(self):
+    shard_paths, _ = self._write_shards(1, 2)
+    msi.write_index(shard_paths[0])
+    with tf.io.TFRecordWriter(shard_paths[0]) as writer:
+      writer.write(b"other")
+    with msi.IndexedRecordReader(shard_paths) as reader:
+      with self.assertRaisesRegex(IOError, "does not match"):
+        reader[1]  # pylint: disable=pointless-statement
+
+  def test_truncate_index(self):
+    shard_paths, records = self._write_shards(1, 3)
+    msi.write_index(shard_paths[0])
+    msi.truncate_index(shard_paths[0], 2)
+    self.assertLen(msi.read_index(shard_paths[0] + msi.INDEX_SUFFIX), 2)
+    os.remove(shard_paths[0] + msi.INDEX_SUFFIX)
+    msi.truncate_index(shard_paths[0], 3)
+    with msi.IndexedRecordReader(shard_paths) as reader:
+      self.assertEqual(records[2], reader[2])
+
+
+if __name__ == "__main__":
+  tf.test.main()
@@ -0,0 +1,539 @@
+"""Copyright 2023 The MediaPipe Authors.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Reading and writing MediaSequence data without TensorFlow.
+
+media_sequence.py operates on tf.train.SequenceExample protos and
+tf.io.parse_single_sequence_example, which requires importing TensorFlow. The
+functions in this file work directly on the serialized SequenceExample
+protobuf wire format and only depend on NumPy, so serving-side code can read
+the keys it needs without paying for a TensorFlow import.
+
+Values are decoded as follows:
+  float_list -> 1D np.float32 array.
+  int64_list -> 1D np.int64 array.
+  bytes_list -> list of bytes.
+A feature list is decoded to a list with one such value per timestep.
+
+The keys are the same strings used by media_sequence.py, which can be imported
+without TensorFlow to look them up. Example:
+  from mediapipe.util.sequence import media_sequence as ms
+  from mediapipe.util.sequence import media_sequence_lite as msl
+
+  for serialized in msl.tf_record_iterator("/path/to/shard.tfrecord"):
+    context, feature_lists = msl.parse_sequence_example(
+        serialized,
+        context_keys=(ms.CLIP_LABEL_INDEX_KEY,),
+        feature_list_keys=(ms.IMAGE_TIMESTAMP_KEY,))
+    labels = context[ms.CLIP_LABEL_INDEX_KEY]
+    timestamps = np.concatenate(feature_lists[ms.IMAGE_TIMESTAMP_KEY])
+
+  serialized = msl.serialize_sequence_example(
+      context={ms.CLIP_LABEL_INDEX_KEY: np.array([35, 47])},
+      feature_lists={ms.IMAGE_TIMESTAMP_KEY: [[0], [100000], [200000]]})
+
+For large examples, LazySequenceExample records where each key is stored and
+decodes only the keys that are read, through the media_sequence.py getters:
+  example = msl.LazySequenceExample(serialized)
+  labels = ms.get_clip_label_index(example)
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import collections
+import collections.abc
+import struct
+
+import numpy as np
+
+# Field numbers from tensorflow/core/example/{example,feature}.proto.
+_SEQUENCE_EXAMPLE_CONTEXT_FIELD = 1
+_SEQUENCE_EXAMPLE_FEATURE_LISTS_FIELD = 2
+_MAP_FIELD = 1
+_MAP_KEY_FIELD = 1
+_MAP_VALUE_FIELD = 2
+_FEATURE_LIST_FEATURE_FIELD = 1
+_FEATURE_BYTES_LIST_FIELD = 1
+_FEATURE_FLOAT_LIST_FIELD = 2
+_FEATURE_INT64_LIST_FIELD = 3
+_LIST_VALUE_FIELD = 1
+_LIST_FIELD_NAMES = {
+    _FEATURE_BYTES_LIST_FIELD: "bytes_list",
+    _FEATURE_FLOAT_LIST_FIELD: "float_list",
+    _FEATURE_INT64_LIST_FIELD: "int64_list",
+}
+
+_WIRE_TYPE_VARINT = 0
+_WIRE_TYPE_FIXED64 = 1
+_WIRE_TYPE_LENGTH_DELIMITED = 2
+_WIRE_TYPE_FIXED32 = 5
+
+_UINT64_MASK = (1 << 64) - 1
+
+
+def _read_varint(buffer, pos):
+  """Reads a varint starting at pos and returns it with the next position."""
+  result = 0
+  shift = 0
+  while True:
+    byte = buffer[pos]
+    pos += 1
+    result |= (byte & 0x7f) << shift
+    if not byte & 0x80:
+      return result, pos
+    shift += 7
+
+
+def _iter_fields(buffer, start, end):
+  """Yields (field number, wire type, value start, value end) in a message."""
+  pos = start
+  while pos < end:
+    tag, pos = _read_varint(buffer, pos)
+    wire_type = tag & 0x7
+    if wire_type == _WIRE_TYPE_LENGTH_DELIMITED:
+      length, pos = _read_varint(buffer, pos)
+      value_start = pos
+      pos += length
+    elif wire_type == _WIRE_TYPE_VARINT:
+      value_start = pos
+      _, pos = _read_varint(buffer, pos)
+    elif wire_type == _WIRE_TYPE_FIXED64:
+      value_start = pos
+      pos += 8
+    elif wire_type == _WIRE_TYPE_FIXED32:
+      value_start = pos
+      pos += 4
+    else:
+      raise ValueError("Unsupported wire type %d in SequenceExample." %
+                       wire_type)
+    if pos > end:
+      raise ValueError("Truncated SequenceExample.")
+    yield tag >> 3, wire_type, value_start, pos
+
+
+def _decode_varints(buffer, start, end):
+  """Decodes a run of packed varints into an int64 array."""
+  data = np.frombuffer(buffer, dtype=np.uint8, count=end - start, offset=start)
+  if not data.size:
+    return np.zeros(0, dtype=np.int64)
+  ends = np.flatnonzero(data < 0x80)
+  if not ends.size or ends[-1] != data.size - 1:
+    raise ValueError("Truncated varint in SequenceExample.")
+  starts = np.concatenate(([0], ends[:-1] + 1))
+  groups = np.repeat(np.arange(ends.size), ends - starts + 1)
+  shifts = ((np.arange(data.size) - starts[groups]) * 7).astype(np.uint64)
+  values = (data & 0x7f).astype(np.uint64) << shifts
+  return np.add.reduceat(values, starts).view(np.int64)
+
+
+def _decode_floats(buffer, start, end):
+  return np.frombuffer(
+      buffer, dtype="<f4", count=(end - start) // 4, offset=start).astype(
+          np.float32)
+
+
+def _decode_list(buffer, start, end, kind):
+  """Decodes a BytesList, FloatList or Int64List message."""
+  if kind == _FEATURE_BYTES_LIST_FIELD:
+    return [
+        bytes(buffer[value_start:value_end])
+        for field, _, value_start, value_end in _iter_fields(buffer, start, end)
+        if field == _LIST_VALUE_FIELD
+    ]
+  parts = []
+  for field, wire_type, value_start, value_end in _iter_fields(
+      buffer, start, end):
+    if field != _LIST_VALUE_FIELD:
+      continue
+    if kind == _FEATURE_FLOAT_LIST_FIELD:
+      parts.append(_decode_floats(buffer, value_start, value_end))
+    elif wire_type == _WIRE_TYPE_LENGTH_DELIMITED:
+      parts.append(_decode_varints(buffer, value_start, value_end))
+    else:
+      value, _ = _read_varint(buffer, value_start)
+      parts.append(np.array([value], dtype=np.uint64).view(np.int64))
+  if not parts:
+    dtype = np.float32 if kind == _FEATURE_FLOAT_LIST_FIELD else np.int64
+    return np.zeros(0, dtype=dtype)
+  return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+
+def _decode_feature_and_kind(buffer, start, end):
+  """Returns the set Feature field, or None, and its decoded value."""
+  kind = None
+  value = []
+  for field, _, value_start, value_end in _iter_fields(buffer, start, end):
+    if field in _LIST_FIELD_NAMES:
+      kind = field
+      value = _decode_list(buffer, value_start, value_end, field)
+  return kind, value
+
+
+def _decode_feature(buffer, start, end):
+  """Decodes a Feature message into a NumPy array or a list of bytes."""
+  return _decode_feature_and_kind(buffer, start, end)[1]
+
+
+def _decode_feature_list(buffer, start, end):
+  """Decodes a FeatureList message into a list of per-timestep values."""
+  return [
+      _decode_feature(buffer, value_start, value_end)
+      for field, _, value_start, value_end in _iter_fields(buffer, start, end)
+      if field == _FEATURE_LIST_FEATURE_FIELD
+  ]
+
+
+def _index_map(buffer, start, end, spans):
+  """Records the value span of every entry in a Features/FeatureLists map."""
+  for field, wire_type, entry_start, entry_end in _iter_fields(
+      buffer, start, end):
+    if field != _MAP_FIELD or wire_type != _WIRE_TYPE_LENGTH_DELIMITED:
+      continue
+    key = ""
+    value_span = (entry_end, entry_end)
+    for entry_field, _, value_start, value_end in _iter_fields(
+        buffer, entry_start, entry_end):
+      if entry_field == _MAP_KEY_FIELD:
+        key = bytes(buffer[value_start:value_end]).decode("utf-8")
+      elif entry_field == _MAP_VALUE_FIELD:
+        value_span = (value_start, value_end)
+    spans[key] = value_span
+
+
+def _index_sequence_example(buffer):
+  """Returns the byte spans of every context and feature list value.
+
+  Args:
+    buffer: a serialized SequenceExample.
+
+  Returns:
+    A (context spans, feature list spans) tuple of dicts mapping each key to
+    the (start, end) offsets of its Feature or FeatureList in buffer.
+  """
+  context_spans = {}
+  feature_list_spans = {}
+  for field, wire_type, start, end in _iter_fields(buffer, 0, len(buffer)):
+    if wire_type != _WIRE_TYPE_LENGTH_DELIMITED:
+      continue
+    if field == _SEQUENCE_EXAMPLE_CONTEXT_FIELD:
+      _index_map(buffer, start, end, context_spans)
+    elif field == _SEQUENCE_EXAMPLE_FEATURE_LISTS_FIELD:
+      _index_map(buffer, start, end, feature_list_spans)
+  return context_spans, feature_list_spans
+
+
+def parse_sequence_example(serialized, context_keys=None,
+                           feature_list_keys=None):
+  """Parses the requested keys from a serialized SequenceExample.
+
+  Values of keys that are not requested are skipped over without being
+  decoded.
+
+  Args:
+    serialized: the serialized SequenceExample as bytes.
+    context_keys: the context keys to decode. If None, all context keys are
+      decoded. Requested keys that are missing are left out of the result.
+    feature_list_keys: the feature list keys to decode. If None, all feature
+      lists are decoded. Requested keys that are missing are left out of the
+      result.
+
+  Returns:
+    A (context, feature_lists) tuple of dicts mapping keys to decoded values.
+  """
+  buffer = memoryview(serialized)
+  context_spans, feature_list_spans = _index_sequence_example(buffer)
+  if context_keys is None:
+    context_keys = context_spans
+  if feature_list_keys is None:
+    feature_list_keys = feature_list_spans
+  context = {
+      key: _decode_feature(buffer, *context_spans[key])
+      for key in context_keys
+      if key in context_spans
+  }
+  feature_lists = {
+      key: _decode_feature_list(buffer, *feature_list_spans[key])
+      for key in feature_list_keys
+      if key in feature_list_spans
+  }
+  return context, feature_lists
+
+
+_ValueList = collections.namedtuple("_ValueList", ["value"])
+_Features = collections.namedtuple("_Features", ["feature"])
+_FeatureLists = collections.namedtuple("_FeatureLists", ["feature_list"])
+
+
+class _LazyFeature(object):
+  """A read-only Feature that is decoded on first access to its values."""
+
+  __slots__ = ("_buffer", "_start", "_end", "_kind", "_value")
+
+  def __init__(self, buffer, start, end):
+    self._buffer = buffer
+    self._start = start
+    self._end = end
+    self._kind = None
+    self._value = None
+
+  @property
+  def is_decoded(self):
+    return self._value is not None
+
+  def _decode(self):
+    if self._value is None:
+      self._kind, self._value = _decode_feature_and_kind(
+          self._buffer, self._start, self._end)
+    return self._kind, self._value
+
+  def _get_list(self, kind):
+    decoded_kind, value = self._decode()
+    if decoded_kind == kind:
+      return _ValueList(value)
+    if kind == _FEATURE_BYTES_LIST_FIELD:
+      return _ValueList([])
+    dtype = np.float32 if kind == _FEATURE_FLOAT_LIST_FIELD else np.int64
+    return _ValueList(np.zeros(0, dtype=dtype))
+
+  @property
+  def bytes_list(self):
+    return self._get_list(_FEATURE_BYTES_LIST_FIELD)
+
+  @property
+  def float_list(self):
+    return self._get_list(_FEATURE_FLOAT_LIST_FIELD)
+
+  @property
+  def int64_list(self):
+    return self._get_list(_FEATURE_INT64_LIST_FIELD)
+
+  def WhichOneof(self, oneof_group):  # pylint: disable=invalid-name
+    del oneof_group  # Feature only has the "kind" oneof.
+    return _LIST_FIELD_NAMES.get(self._decode()[0])
+
+  def HasField(self, field_name):  # pylint: disable=invalid-name
+    return self.WhichOneof("kind") == field_name
+
+
+class _LazyFeatureList(object):
+  """A read-only FeatureList whose features are located on first access."""
+
+  def __init__(self, buffer, start, end):
+    self._buffer = buffer
+    self._start = start
+    self._end = end
+    self._feature = None
+
+  @property
+  def feature(self):
+    if self._feature is None:
+      self._feature = [
+          _LazyFeature(self._buffer, value_start, value_end)
+          for field, _, value_start, value_end in _iter_fields(
+              self._buffer, self._start, self._end)
+          if field == _FEATURE_LIST_FEATURE_FIELD
+      ]
+    return self._feature
+
+
+class _LazyMap(collections.abc.Mapping):
+  """A read-only map creating its values from recorded byte spans."""
+
+  def __init__(self, buffer, spans, value_type):
+    self._buffer = buffer
+    self._spans = spans
+    self._value_type = value_type
+    self._values = {}
+
+  def __getitem__(self, key):
+    value = self._values.get(key)
+    if value is None:
+      start, end = self._spans[key]
+      value = self._value_type(self._buffer, start, end)
+      self._values[key] = value
+    return value
+
+  def __contains__(self, key):
+    return key in self._spans
+
+  def __iter__(self):
+    return iter(self._spans)
+
+  def __len__(self):
+    return len(self._spans)
+
+
+class LazySequenceExample(object):
+  """A read-only SequenceExample view that decodes keys as they are accessed.
+
+  The serialized bytes are scanned once on construction to record where each
+  context feature and feature list is stored. Values are only decoded when
+  they are read and are cached afterwards, so reading the clip labels of an
+  example does not decode its encoded images.
+
+  The view mirrors the context.feature and feature_lists.feature_list fields
+  of tf.train.SequenceExample, so the media_sequence.py getters work on it
+  without TensorFlow. Example:
+    example = LazySequenceExample(serialized)
+    labels = ms.get_clip_label_index(example)
+    timestamps = ms.get_image_timestamp_array(example)
+
+  Numeric values are returned as NumPy arrays instead of repeated fields.
+  Setters are not supported.
+  """
+
+  def __init__(self, serialized):
+    """Indexes a serialized SequenceExample.
+
+    Args:
+      serialized: the serialized SequenceExample. Any object supporting the
+        buffer protocol, e.g. bytes or a memory-mapped file, can be used and
+        must be kept unmodified while the view is used.
+    """
+    buffer = memoryview(serialized)
+    context_spans, feature_list_spans = _index_sequence_example(buffer)
+    self.context = _Features(_LazyMap(buffer, context_spans, _LazyFeature))
+    self.feature_lists = _FeatureLists(
+        _LazyMap(buffer, feature_list_spans, _LazyFeatureList))
+
+
+def _encode_varint(value):
+  value &= _UINT64_MASK
+  encoded = bytearray()
+  while value > 0x7f:
+    encoded.append((value & 0x7f) | 0x80)
+    value >>= 7
+  encoded.append(value)
+  return bytes(encoded)
+
+
+def _encode_length_delimited(field, payload):
+  return b"".join((_encode_varint(field << 3 | _WIRE_TYPE_LENGTH_DELIMITED),
+                   _encode_varint(len(payload)), payload))
+
+
+def _get_kind(value):
+  """Returns the Feature field used to store value."""
+  if isinstance(value, np.ndarray):
+    if value.dtype.kind == "f":
+      return _FEATURE_FLOAT_LIST_FIELD
+    if value.dtype.kind in "iub":
+      return _FEATURE_INT64_LIST_FIELD
+    if value.dtype.kind in "SUO":
+      return _FEATURE_BYTES_LIST_FIELD
+    raise TypeError("Unsupported dtype %s." % value.dtype)
+  if not value:
+    raise ValueError("Cannot infer the type of an empty value; pass a typed "
+                     "NumPy array instead.")
+  first = value[0]
+  if isinstance(first, (bytes, str)):
+    return _FEATURE_BYTES_LIST_FIELD
+  if isinstance(first, (float, np.floating)):
+    return _FEATURE_FLOAT_LIST_FIELD
+  if isinstance(first, (int, np.integer)):
+    return _FEATURE_INT64_LIST_FIELD
+  raise TypeError("Unsupported value type %s." % type(first))
+
+
+def _encode_feature(value):
+  """Encodes a sequence of floats, ints or bytes as a Feature message."""
+  kind = _get_kind(value)
+  if kind == _FEATURE_BYTES_LIST_FIELD:
+    payload = b"".join(
+        _encode_length_delimited(
+            _LIST_VALUE_FIELD,
+            entry.encode("utf-8") if isinstance(entry, str) else bytes(entry))
+        for entry in value)
+  else:
+    if kind == _FEATURE_FLOAT_LIST_FIELD:
+      packed = np.asarray(value, dtype="<f4").tobytes()
+    else:
+      packed = b"".join(
+          _encode_varint(entry)
+          for entry in np.asarray(value, dtype=np.int64).tolist())
+    payload = _encode_length_delimited(_LIST_VALUE_FIELD,
+                                       packed) if packed else b""
+  return _encode_length_delimited(kind, payload)
+
+
+def _encode_map_entry(key, value):
+  return _encode_length_delimited(
+      _MAP_FIELD,
+      _encode_length_delimited(_MAP_KEY_FIELD, key.encode("utf-8")) +
+      _encode_length_delimited(_MAP_VALUE_FIELD, value))
+
+
+def serialize_sequence_example(context=None, feature_lists=None):
+  """Serializes context and feature list values as a SequenceExample.
+
+  Value types are inferred from NumPy dtypes or the type of the first element:
+  floating point values are stored in float_list, integers and booleans in
+  int64_list, and bytes or strings in bytes_list.
+
+  Args:
+    context: a dict mapping context keys to a sequence of values.
+    feature_lists: a dict mapping feature list keys to a sequence with one
+      sequence of values per timestep.
+
+  Returns:
+    The serialized SequenceExample as bytes, readable by
+    tf.train.SequenceExample.FromString and parse_sequence_example.
+  """
+  parts = []
+  if context:
+    parts.append(
+        _encode_length_delimited(
+            _SEQUENCE_EXAMPLE_CONTEXT_FIELD,
+            b"".join(
+                _encode_map_entry(key, _encode_feature(value))
+                for key, value in context.items())))
+  if feature_lists:
+    parts.append(
+        _encode_length_delimited(
+            _SEQUENCE_EXAMPLE_FEATURE_LISTS_FIELD,
+            b"".join(
+                _encode_map_entry(
+                    key, b"".join(
+                        _encode_length_delimited(_FEATURE_LIST_FEATURE_FIELD,
+                                                 _encode_feature(value))
+                        for value in values))
+                for key, values in feature_lists.items())))
+  return b"".join(parts)
+
+
+def tf_record_iterator(path):
+  """Yields the serialized records stored in an uncompressed TFRecord file.
+
+  The record checksums are not verified.
+
+  Args:
+    path: the path to the TFRecord file.
+
+  Yields:
+    The bytes of each record.
+  """
+  with open(path, "rb") as f:
+    while True:
+      header = f.read(12)
+      if not header:
+        return
+      if len(header) != 12:
+        raise ValueError("Truncated record header in %s." % path)
+      length, = struct.unpack("<Q", header[:8])
+      record = f.read(length)
+      if len(record) != length or len(f.read(4)) != 4:
+        raise ValueError("Truncated record in %s." % path)
+      yield record
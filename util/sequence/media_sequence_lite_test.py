@@ -0,0 +1,156 @@
+"""Copyright 2023 The MediaPipe Authors.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Tests for media_sequence_lite.py.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+
+import numpy as np
+import tensorflow.compat.v1 as tf
+
+from mediapipe.util.sequence import media_sequence as ms
+from mediapipe.util.sequence import media_sequence_lite as msl
+
+
+class MediaSequenceLiteTest(tf.test.TestCase):
+
+  def _create_example(self):
+    example = tf.train.SequenceExample()
+    ms.set_example_id(b"example", example)
+    ms.set_clip_label_index((35, -47), example)
+    ms.set_clip_label_confidence((0.5, 0.25), example)
+    ms.set_clip_label_string((b"run", b"jump"), example)
+    ms.add_image_timestamp(0, example)
+    ms.add_image_timestamp(2**40, example)
+    ms.add_image_encoded(b"jpeg0", example)
+    ms.add_image_encoded(b"jpeg1", example)
+    ms.add_feature_floats((1.0, 2.0, 3.0), example)
+    ms.add_feature_floats((4.0,), example)
+    return example
+
+  def test_parse_all_keys(self):
+    example = self._create_example()
+    context, feature_lists = msl.parse_sequence_example(
+        example.SerializeToString())
+    self.assertEqual([b"example"], context[ms.EXAMPLE_ID_KEY])
+    self.assertAllEqual([35, -47], context[ms.CLIP_LABEL_INDEX_KEY])
+    self.assertEqual(np.int64, context[ms.CLIP_LABEL_INDEX_KEY].dtype)
+    self.assertAllClose([0.5, 0.25], context[ms.CLIP_LABEL_CONFIDENCE_KEY])
+    self.assertEqual(np.float32, context[ms.CLIP_LABEL_CONFIDENCE_KEY].dtype)
+    self.assertEqual([b"run", b"jump"], context[ms.CLIP_LABEL_STRING_KEY])
+    self.assertAllEqual([[0], [2**40]],
+                        feature_lists[ms.IMAGE_TIMESTAMP_KEY])
+    self.assertEqual([[b"jpeg0"], [b"jpeg1"]],
+                     feature_lists[ms.IMAGE_ENCODED_KEY])
+    floats = feature_lists[ms.get_feature_floats_key()]
+    self.assertAllClose([1.0, 2.0, 3.0], floats[0])
+    self.assertAllClose([4.0], floats[1])
+
+  def test_parse_selected_keys(self):
+    example = self._create_example()
+    context, feature_lists = msl.parse_sequence_example(
+        example.SerializeToString(),
+        context_keys=(ms.CLIP_LABEL_INDEX_KEY, "missing"),
+        feature_list_keys=(ms.IMAGE_TIMESTAMP_KEY,))
+    self.assertEqual([ms.CLIP_LABEL_INDEX_KEY], list(context))
+    self.assertEqual([ms.IMAGE_TIMESTAMP_KEY], list(feature_lists))
+
+  def test_parse_unpacked_values(self):
+    # A Feature with an unpacked int64_list holding 3 and 4.
+    feature = b"\x1a\x04\x08\x03\x08\x04"
+    serialized = msl._encode_length_delimited(
+        1, msl._encode_map_entry("a", feature))
+    context, _ = msl.parse_sequence_example(serialized)
+    self.assertAllEqual([3, 4], context["a"])
+
+  def test_serialize_round_trip(self):
+    context = {
+        ms.CLIP_LABEL_INDEX_KEY: np.array([35, -47]),
+        ms.CLIP_LABEL_STRING_KEY: ["run", b"jump"],
+        ms.CLIP_LABEL_CONFIDENCE_KEY: [0.5, 0.25],
+        "empty": np.array([], dtype=np.float32),
+    }
+    feature_lists = {
+        ms.IMAGE_TIMESTAMP_KEY: [[0], [100000]],
+        ms.get_feature_floats_key(): [np.ones(3), np.zeros(2)],
+    }
+    serialized = msl.serialize_sequence_example(context, feature_lists)
+    example = tf.train.SequenceExample.FromString(serialized)
+    self.assertAllEqual([35, -47], ms.get_clip_label_index(example))
+    self.assertAllEqual([b"run", b"jump"], ms.get_clip_label_string(example))
+    self.assertAllClose([0.5, 0.25], ms.get_clip_label_confidence(example))
+    self.assertTrue(example.context.feature["empty"].HasField("float_list"))
+    self.assertAllEqual([0, 100000], ms.get_image_timestamp_array(example))
+    self.assertAllClose([1.0, 1.0, 1.0], ms.get_feature_floats_at(0, example))
+    parsed_context, parsed_feature_lists = msl.parse_sequence_example(
+        serialized)
+    self.assertAllEqual([35, -47], parsed_context[ms.CLIP_LABEL_INDEX_KEY])
+    self.assertEqual(0, parsed_context["empty"].size)
+    self.assertAllEqual([[0], [100000]],
+                        parsed_feature_lists[ms.IMAGE_TIMESTAMP_KEY])
+
+  def test_serialize_empty_list_raises(self):
+    with self.assertRaisesRegex(ValueError, "empty"):
+      msl.serialize_sequence_example(context={"empty": []})
+
+  def test_lazy_sequence_example_getters(self):
+    example = self._create_example()
+    ms.add_bbox(np.array([[0.1, 0.2, 0.3, 0.4]]), example)
+    lazy = msl.LazySequenceExample(example.SerializeToString())
+    self.assertEqual(b"example", ms.get_example_id(lazy))
+    self.assertAllEqual([35, -47], ms.get_clip_label_index(lazy))
+    self.assertEqual([b"run", b"jump"], ms.get_clip_label_string(lazy))
+    self.assertTrue(ms.has_clip_label_index(lazy))
+    self.assertFalse(ms.has_clip_media_id(lazy))
+    self.assertEqual(2, ms.get_image_timestamp_size(lazy))
+    self.assertEqual(2**40, ms.get_image_timestamp_at(1, lazy))
+    self.assertAllEqual([0, 2**40], ms.get_image_timestamp_array(lazy))
+    self.assertAllClose([4.0], ms.get_feature_floats_at(1, lazy))
+    self.assertAllClose([[[0.1, 0.2, 0.3, 0.4]]], ms.get_bbox_array(lazy)[0])
+    self.assertEqual("int64_list", lazy.context.feature[
+        ms.CLIP_LABEL_INDEX_KEY].WhichOneof("kind"))
+    self.assertEqual(0, len(lazy.context.feature[
+        ms.CLIP_LABEL_INDEX_KEY].bytes_list.value))
+
+  def test_lazy_sequence_example_decodes_accessed_keys_only(self):
+    lazy = msl.LazySequenceExample(
+        self._create_example().SerializeToString())
+    ms.get_clip_label_index(lazy)
+    ms.get_image_timestamp_at(0, lazy)
+    self.assertTrue(
+        lazy.context.feature[ms.CLIP_LABEL_INDEX_KEY].is_decoded)
+    self.assertFalse(
+        lazy.context.feature[ms.CLIP_LABEL_STRING_KEY].is_decoded)
+    timestamps = lazy.feature_lists.feature_list[ms.IMAGE_TIMESTAMP_KEY]
+    self.assertTrue(timestamps.feature[0].is_decoded)
+    self.assertFalse(timestamps.feature[1].is_decoded)
+    images = lazy.feature_lists.feature_list[ms.IMAGE_ENCODED_KEY]
+    self.assertFalse(any(feature.is_decoded for feature in images.feature))
+
+  def test_tf_record_iterator(self):
+    path = os.path.join(self.get_temp_dir(), "examples.tfrecord")
+    records = [self._create_example().SerializeToString(), b""]
+    with tf.io.TFRecordWriter(path) as writer:
+      for record in records:
+        writer.write(record)
+    self.assertEqual(records, list(msl.tf_record_iterator(path)))
+
+
+if __name__ == "__main__":
+  tf.test.main()
@@ -149,6 +149,26 @@ class MediaSequenceTest(tf.test.TestCase):
     ms.clear_bbox(example)
     self.assertEqual(0, ms.get_bbox_size(example))
 
+  def test_bbox_array_round_trip(self):
+    example = tf.train.SequenceExample()
+    boxes = np.array([[0.1, 0.2, 0.3, 0.4],
+                      [0.5, 0.6, 0.7, 0.8]])
+    ms.add_bbox(boxes, example)
+    ms.add_bbox(np.array([]), example)
+    ms.add_bbox(boxes[:1], example)
+    box_array, num_boxes = ms.get_bbox_array(example)
+    self.assertEqual((3, 2, 4), box_array.shape)
+    self.assertAllEqual([2, 0, 1], num_boxes)
+    self.assertAllClose(boxes, box_array[0])
+    self.assertAllClose(boxes[:1], box_array[2, :1])
+
+    other_example = tf.train.SequenceExample()
+    ms.set_predicted_bbox_array((box_array, num_boxes), other_example)
+    self.assertEqual(3, ms.get_predicted_bbox_size(other_example))
+    self.assertAllClose(boxes, ms.get_predicted_bbox_at(0, other_example))
+    self.assertEqual(3, ms.get_predicted_bbox_ymin_size(other_example))
+    self.assertEmpty(ms.get_predicted_bbox_ymin_at(1, other_example))
+
   def test_point_round_trip(self):
     example = tf.train.SequenceExample()
     points = np.array([[0.1, 0.2],
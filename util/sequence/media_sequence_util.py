@@ -22,8 +22,22 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import itertools
 import types
-import tensorflow.compat.v1 as tf
+import numpy as np
+
+
+def _import_tensorflow():
+  """Imports TensorFlow only when a default parser is requested.
+
+  Keeping the import out of module load time lets the keys and accessors be
+  used, e.g. with media_sequence_lite.py, in processes without TensorFlow.
+
+  Returns:
+    The tensorflow.compat.v1 module.
+  """
+  import tensorflow.compat.v1 as tf  # pylint: disable=g-import-not-at-top
+  return tf
 
 
 def function_with_default(f, default):
@@ -194,6 +208,99 @@ def add_int(key, value, sequence, prefix=""):
   ).int64_list.value[:] = (value,)
 
 
+def _get_feature_list_values(key, sequence, prefix, list_field):
+  """Returns the value containers of every feature in a feature list."""
+  key = merge_prefix(prefix, key)
+  if key not in sequence.feature_lists.feature_list:
+    return []
+  return [getattr(feature, list_field).value
+          for feature in sequence.feature_lists.feature_list[key].feature]
+
+
+def _get_list_array(key, sequence, prefix, list_field, dtype):
+  """Returns a feature list of lists as a padded array and the list lengths."""
+  values = _get_feature_list_values(key, sequence, prefix, list_field)
+  lengths = np.fromiter((len(value) for value in values), dtype=np.int64,
+                        count=len(values))
+  max_length = int(lengths.max()) if values else 0
+  flat_values = np.fromiter(itertools.chain.from_iterable(values), dtype=dtype,
+                            count=int(lengths.sum()))
+  array = np.zeros((len(values), max_length), dtype=dtype)
+  array[np.arange(max_length) < lengths[:, np.newaxis]] = flat_values
+  return array, lengths
+
+
+def _get_array(key, sequence, prefix, list_field, dtype):
+  """Returns a feature list of single values as an array."""
+  values = _get_feature_list_values(key, sequence, prefix, list_field)
+  return np.fromiter((value[0] for value in values), dtype=dtype,
+                     count=len(values))
+
+
+def _set_list_array(key, value, sequence, prefix, list_field):
+  """Replaces a feature list of lists by the rows of an array.
+
+  Args:
+    key: the key for the feature list in the SequenceExample.
+    value: a 2D array, a sequence of lists, or an (array, lengths) tuple as
+      returned by _get_list_array in which case row i is truncated to
+      lengths[i] values.
+    sequence: the SequenceExample to modify.
+    prefix: a prefix to append to the key in the SequenceExample.
+    list_field: the name of the list field in each feature.
+  """
+  lengths = None
+  if isinstance(value, tuple):
+    value, lengths = value
+  rows = value.tolist() if isinstance(value, np.ndarray) else value
+  feature_list = sequence.feature_lists.feature_list[merge_prefix(prefix, key)]
+  del feature_list.feature[:]
+  for i, row in enumerate(rows):
+    if lengths is not None:
+      row = row[:lengths[i]]
+    getattr(feature_list.feature.add(), list_field).value[:] = row
+
+
+def _set_array(key, value, sequence, prefix, list_field):
+  """Replaces a feature list of single values by the entries of an array."""
+  feature_list = sequence.feature_lists.feature_list[merge_prefix(prefix, key)]
+  del feature_list.feature[:]
+  for entry in np.asarray(value).tolist():
+    getattr(feature_list.feature.add(), list_field).value.append(entry)
+
+
+def get_float_list_array(key, sequence, prefix=""):
+  return _get_list_array(key, sequence, prefix, "float_list", np.float32)
+
+
+def get_int_list_array(key, sequence, prefix=""):
+  return _get_list_array(key, sequence, prefix, "int64_list", np.int64)
+
+
+def get_float_array(key, sequence, prefix=""):
+  return _get_array(key, sequence, prefix, "float_list", np.float32)
+
+
+def get_int_array(key, sequence, prefix=""):
+  return _get_array(key, sequence, prefix, "int64_list", np.int64)
+
+
+def set_float_list_array(key, value, sequence, prefix=""):
+  _set_list_array(key, value, sequence, prefix, "float_list")
+
+
+def set_int_list_array(key, value, sequence, prefix=""):
+  _set_list_array(key, value, sequence, prefix, "int64_list")
+
+
+def set_float_array(key, value, sequence, prefix=""):
+  _set_array(key, value, sequence, prefix, "float_list")
+
+
+def set_int_array(key, value, sequence, prefix=""):
+  _set_array(key, value, sequence, prefix, "int64_list")
+
+
 def create_bytes_list_context_feature(name, key, prefix="", module_dict=None):
   """Creates accessor functions for list of bytes features.
 
@@ -229,6 +336,7 @@ def create_bytes_list_context_feature(name, key, prefix="", module_dict=None):
     return merge_prefix(prefix, key)
 
   def _get_default_parser():
+    tf = _import_tensorflow()
     return tf.io.VarLenFeature(tf.string)
 
   function_dict = {
@@ -277,6 +385,7 @@ def create_float_list_context_feature(name, key, prefix="", module_dict=None):
     return merge_prefix(prefix, key)
 
   def _get_default_parser():
+    tf = _import_tensorflow()
     return tf.io.VarLenFeature(tf.float32)
 
   function_dict = {
@@ -325,6 +434,7 @@ def create_int_list_context_feature(name, key, prefix="", module_dict=None):
     return merge_prefix(prefix, key)
 
   def _get_default_parser():
+    tf = _import_tensorflow()
     return tf.io.VarLenFeature(tf.int64)
 
   function_dict = {
@@ -373,6 +483,7 @@ def create_bytes_context_feature(name, key, prefix="", module_dict=None):
     return merge_prefix(prefix, key)
 
   def _get_default_parser():
+    tf = _import_tensorflow()
     return tf.io.FixedLenFeature((), tf.string)
 
   function_dict = {
@@ -421,6 +532,7 @@ def create_float_context_feature(name, key, prefix="", module_dict=None):
     return merge_prefix(prefix, key)
 
   def _get_default_parser():
+    tf = _import_tensorflow()
     return tf.io.FixedLenFeature((), tf.float32)
 
   function_dict = {
@@ -469,6 +581,7 @@ def create_int_context_feature(name, key, prefix="", module_dict=None):
     return merge_prefix(prefix, key)
 
   def _get_default_parser():
+    tf = _import_tensorflow()
     return tf.io.FixedLenFeature((), tf.int64)
 
   function_dict = {
@@ -521,6 +634,7 @@ def create_bytes_feature_list(name, key, prefix="", module_dict=None):
     return merge_prefix(prefix, key)
 
   def _get_default_parser():
+    tf = _import_tensorflow()
     return tf.io.FixedLenSequenceFeature((), tf.string)
 
   function_dict = {
@@ -539,7 +653,7 @@ def create_float_feature_list(name, key, prefix="", module_dict=None):
   """Creates accessor functions for float feature lists.
 
   The provided functions are has_${NAME}, get_${NAME}_size, get_${NAME}_at,
-  clear_${NAME}, and add_${NAME}.
+  clear_${NAME}, add_${NAME}, get_${NAME}_array and set_${NAME}_array.
 
   example = tensorflow.train.SequenceExample()
   add_confidence(0.47, example)
@@ -570,10 +684,17 @@ def create_float_feature_list(name, key, prefix="", module_dict=None):
   def _add(value, sequence_example, prefix=prefix):
     add_float(key, value, sequence_example, prefix=prefix)
 
+  def _get_array(sequence_example, prefix=prefix):
+    return get_float_array(key, sequence_example, prefix=prefix)
+
+  def _set_array(value, sequence_example, prefix=prefix):
+    set_float_array(key, value, sequence_example, prefix=prefix)
+
   def _get_key(prefix=prefix):
     return merge_prefix(prefix, key)
 
   def _get_default_parser():
+    tf = _import_tensorflow()
     return tf.io.FixedLenSequenceFeature((), tf.float32)
 
   function_dict = {
@@ -582,6 +703,8 @@ def create_float_feature_list(name, key, prefix="", module_dict=None):
       "get_" + name + "_at": _get_at,
       "clear_" + name: _clear,
       "add_" + name: _add,
+      "get_" + name + "_array": _get_array,
+      "set_" + name + "_array": _set_array,
       "get_" + name + "_key": _get_key,
       "get_" + name + "_default_parser": _get_default_parser,
   }
@@ -592,7 +715,7 @@ def create_int_feature_list(name, key, prefix="", module_dict=None):
   """Creates accessor functions for bytes feature lists.
 
   The provided functions are has_${NAME}, get_${NAME}_size, get_${NAME}_at,
-  clear_${NAME}, and add_${NAME}.
+  clear_${NAME}, add_${NAME}, get_${NAME}_array and set_${NAME}_array.
 
   example = tensorflow.train.SequenceExample()
   add_image_timestamp(1000000, example)
@@ -600,6 +723,8 @@ def create_int_feature_list(name, key, prefix="", module_dict=None):
   if has_image_timestamp:
     for i in range(get_image_timestamp_size(example):
       timestamp = get_image_timestamp_at(i, example)
+    # Or all at once.
+    timestamps = get_image_timestamp_array(example)
     clear_image_timestamp(example)
 
   Args:
@@ -623,10 +748,17 @@ def create_int_feature_list(name, key, prefix="", module_dict=None):
   def _add(value, sequence_example, prefix=prefix):
     add_int(key, value, sequence_example, prefix=prefix)
 
+  def _get_array(sequence_example, prefix=prefix):
+    return get_int_array(key, sequence_example, prefix=prefix)
+
+  def _set_array(value, sequence_example, prefix=prefix):
+    set_int_array(key, value, sequence_example, prefix=prefix)
+
   def _get_key(prefix=prefix):
     return merge_prefix(prefix, key)
 
   def _get_default_parser():
+    tf = _import_tensorflow()
     return tf.io.FixedLenSequenceFeature((), tf.int64)
 
   function_dict = {
@@ -635,6 +767,8 @@ def create_int_feature_list(name, key, prefix="", module_dict=None):
       "get_" + name + "_at": _get_at,
       "clear_" + name: _clear,
       "add_" + name: _add,
+      "get_" + name + "_array": _get_array,
+      "set_" + name + "_array": _set_array,
       "get_" + name + "_key": _get_key,
       "get_" + name + "_default_parser": _get_default_parser,
   }
@@ -680,6 +814,7 @@ def create_bytes_list_feature_list(name, key, prefix="", module_dict=None):
     return merge_prefix(prefix, key)
 
   def _get_default_parser():
+    tf = _import_tensorflow()
     return tf.io.VarLenFeature(tf.string)
 
   function_dict = {
@@ -698,7 +833,7 @@ def create_float_list_feature_list(name, key, prefix="", module_dict=None):
   """Creates accessor functions for list of float feature lists.
 
   The provided functions are has_${NAME}, get_${NAME}_size, get_${NAME}_at,
-  clear_${NAME}, and add_${NAME}.
+  clear_${NAME}, add_${NAME}, get_${NAME}_array and set_${NAME}_array.
 
   example = tensorflow.train.SequenceExample()
   add_bbox_ymin([0.47, 0.49], example)
@@ -706,6 +841,8 @@ def create_float_list_feature_list(name, key, prefix="", module_dict=None):
   if has_bbox_ymin:
     for i in range(get_bbox_ymin_size(example):
       bbox_ymin = get_bbox_ymin_at(i, example)
+    # Or all at once, padded to the longest list.
+    bbox_ymin, num_boxes = get_bbox_ymin_array(example)
     clear_bbox_ymin(example)
 
   Args:
@@ -729,10 +866,17 @@ def create_float_list_feature_list(name, key, prefix="", module_dict=None):
   def _add(value, sequence_example, prefix=prefix):
     add_float_list(key, value, sequence_example, prefix=prefix)
 
+  def _get_array(sequence_example, prefix=prefix):
+    return get_float_list_array(key, sequence_example, prefix=prefix)
+
+  def _set_array(value, sequence_example, prefix=prefix):
+    set_float_list_array(key, value, sequence_example, prefix=prefix)
+
   def _get_key(prefix=prefix):
     return merge_prefix(prefix, key)
 
   def _get_default_parser():
+    tf = _import_tensorflow()
     return tf.io.VarLenFeature(tf.float32)
 
   function_dict = {
@@ -741,6 +885,8 @@ def create_float_list_feature_list(name, key, prefix="", module_dict=None):
       "get_" + name + "_at": _get_at,
       "clear_" + name: _clear,
       "add_" + name: _add,
+      "get_" + name + "_array": _get_array,
+      "set_" + name + "_array": _set_array,
       "get_" + name + "_key": _get_key,
       "get_" + name + "_default_parser": _get_default_parser,
   }
@@ -751,7 +897,7 @@ def create_int_list_feature_list(name, key, prefix="", module_dict=None):
   """Creates accessor functions for list of int64 feature lists.
 
   The provided functions are has_${NAME}, get_${NAME}_size, get_${NAME}_at,
-  clear_${NAME}, and add_${NAME}.
+  clear_${NAME}, add_${NAME}, get_${NAME}_array and set_${NAME}_array.
 
   example = tensorflow.train.SequenceExample()
   add_bbox_label_index([47, 49], example)
@@ -782,10 +928,17 @@ def create_int_list_feature_list(name, key, prefix="", module_dict=None):
   def _add(value, sequence_example, prefix=prefix):
     add_int_list(key, value, sequence_example, prefix=prefix)
 
+  def _get_array(sequence_example, prefix=prefix):
+    return get_int_list_array(key, sequence_example, prefix=prefix)
+
+  def _set_array(value, sequence_example, prefix=prefix):
+    set_int_list_array(key, value, sequence_example, prefix=prefix)
+
   def _get_key(prefix=prefix):
     return merge_prefix(prefix, key)
 
   def _get_default_parser():
+    tf = _import_tensorflow()
     return tf.io.VarLenFeature(tf.int64)
 
   function_dict = {
@@ -794,6 +947,8 @@ def create_int_list_feature_list(name, key, prefix="", module_dict=None):
       "get_" + name + "_at": _get_at,
       "clear_" + name: _clear,
       "add_" + name: _add,
+      "get_" + name + "_array": _get_array,
+      "set_" + name + "_array": _set_array,
       "get_" + name + "_key": _get_key,
       "get_" + name + "_default_parser": _get_default_parser,
   }
@@ -292,6 +292,44 @@ class MediaSequenceTest(tf.test.TestCase):
     self.assertEqual("int64_list_feature_list",
                      msu.get_int64_list_feature_list_key())
 
+  def test_round_trip_float_list_feature_list_array(self):
+    example = tf.train.SequenceExample()
+    msu.add_float_list_feature_list([0.47, 0.49], example)
+    msu.add_float_list_feature_list([], example)
+    msu.add_float_list_feature_list([0.5], example)
+    values, lengths = msu.get_float_list_feature_list_array(example)
+    self.assertAllClose([[0.47, 0.49], [0.0, 0.0], [0.5, 0.0]], values)
+    self.assertAllEqual([2, 0, 1], lengths)
+
+    other_example = tf.train.SequenceExample()
+    msu.set_float_list_feature_list_array((values, lengths), other_example)
+    self.assertEqual(example, other_example)
+    msu.set_float_list_feature_list_array([[1.0], [2.0]], other_example)
+    self.assertEqual(2, msu.get_float_list_feature_list_size(other_example))
+    self.assertSequenceAlmostEqual(
+        [2.0], msu.get_float_list_feature_list_at(1, other_example))
+
+  def test_round_trip_int_list_feature_list_array(self):
+    example = tf.train.SequenceExample()
+    values, lengths = msu.get_int64_list_feature_list_array(example)
+    self.assertEqual((0, 0), values.shape)
+    self.assertEqual((0,), lengths.shape)
+    self.assertFalse(msu.has_int64_list_feature_list(example))
+    msu.set_int64_list_feature_list_array([[47, 49], [50]], example)
+    values, lengths = msu.get_int64_list_feature_list_array(example)
+    self.assertAllEqual([[47, 49], [50, 0]], values)
+    self.assertAllEqual([2, 1], lengths)
+
+  def test_round_trip_feature_list_array(self):
+    example = tf.train.SequenceExample()
+    msu.set_int64_feature_list_array([47, 49], example)
+    msu.set_float_feature_list_array([0.47, 0.49], example)
+    self.assertEqual(2, msu.get_int64_feature_list_size(example))
+    self.assertEqual(49, msu.get_int64_feature_list_at(1, example))
+    self.assertAllEqual([47, 49], msu.get_int64_feature_list_array(example))
+    self.assertAllClose([0.47, 0.49],
+                        msu.get_float_feature_list_array(example))
+
   def test_prefix_int64_context(self):
     example = tf.train.SequenceExample()
     msu.set_int64_context(47, example, prefix="magic")